@@ -1,7 +1,8 @@
 import json
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from utils import call_gemini, safe_json_loads
+from token_budget import fit_extra_text
+from utils import call_gemini, call_gemini_async, safe_json_loads
 
 # =========================================================================
 # 1. [Pydantic 스키마 정의] - FINANCIAL_SCHEMA 문자열을 객체지향적으로 완벽 대체
@@ -52,11 +53,10 @@ class FinancialResponseSchema(BaseModel):
 # =========================================================================
 # 2. [분석 엔진(Agent) 실행부]
 # =========================================================================
-def analyze(pdf_path: str, extra_text: str = "") -> dict:
-    print(f"   [Financial Agent] 재무 데이터 및 헤더 정보 분석 중...")
-    
+def _build_prompt(extra_text: str = "") -> str:
+    extra_text = fit_extra_text(extra_text, "financial")
     # 🚨 기존 프롬프트의 지시사항은 그대로 유지하되, 스키마 설명은 Pydantic이 대체하므로 제거
-    prompt = f"""
+    return f"""
     당신은 기업 재무 분석 전문가(CFA)이자 벤처캐피탈(VC)의 시니어 심사역입니다.
     제공된 메인 IR 자료(PDF)와 **[보충 문서 데이터]**(엑셀 재무제표, Markdown 등)를 종합하여 정밀하게 추출하십시오.
     엑셀(표 형태) 또는 Markdown으로 제공된 재무 데이터가 있다면 이를 최우선으로 신뢰하십시오.
@@ -78,13 +78,30 @@ def analyze(pdf_path: str, extra_text: str = "") -> dict:
     7. 표 데이터 전사: 찾은 데이터가 있을 경우에만 Income_Statement 필드의 Columns(연도 헤더)와 Rows(매출액/영업수익, 영업이익, 당기순이익 등 핵심 계정) 배열에 2차원 표 형태로 정확하게 전사하십시오. 과거 재무 데이터 역시 존재할 경우에만 Balance_Sheet 배열에 작성하고, 없다면 빈 배열([])로 두십시오.
     8. 투자 일자(Date)가 문서에 명확히 기재되어 있지 않다면, 절대로 '2000.00', '0000', 'N/A' 등의 임의의 숫자나 문자를 지어내서 채우지 마십시오. 반드시 값을 빈 문자열("") 또는 null로 비워두어야 합니다.
     """
-    
-    # 🚨 call_gemini 함수에 Pydantic 스키마(response_schema)를 전달합니다.
-    # (utils.py의 call_gemini 함수가 response_schema kwargs를 지원해야 완벽하게 작동합니다)
-    res = call_gemini(prompt, pdf_path=pdf_path, response_schema=FinancialResponseSchema)
-    
+
+def _parse_result(res: dict) -> dict:
     if res.get("ok"):
         return safe_json_loads(res["text"])
     else:
         print(f"   [Financial Agent] Error: {res.get('error')}")
-        return {}
\ No newline at end of file
+        return {}
+
+def _header_stream_kwargs(on_header) -> dict:
+    # on_header가 있으면 스트리밍으로 받아 Report_Header가 완성되는 즉시 전달 (Phase 2 조기 시작용)
+    if not on_header: return {}
+    return {"watch_fields": [("Report_Header",)], "on_field": lambda path, value: on_header(value)}
+
+def analyze(pdf_path: str, extra_text: str = "", on_header=None) -> dict:
+    print(f"   [Financial Agent] 재무 데이터 및 헤더 정보 분석 중...")
+    
+    # 🚨 call_gemini 함수에 Pydantic 스키마(response_schema)를 전달합니다.
+    # (utils.py의 call_gemini 함수가 response_schema kwargs를 지원해야 완벽하게 작동합니다)
+    res = call_gemini(_build_prompt(extra_text), pdf_path=pdf_path, response_schema=FinancialResponseSchema,
+                      **_header_stream_kwargs(on_header))
+    return _parse_result(res)
+
+async def analyze_async(pdf_path: str, extra_text: str = "", on_header=None) -> dict:
+    print(f"   [Financial Agent] 재무 데이터 및 헤더 정보 분석 중...")
+    res = await call_gemini_async(_build_prompt(extra_text), pdf_path=pdf_path, response_schema=FinancialResponseSchema,
+                                  **_header_stream_kwargs(on_header))
+    return _parse_result(res)
@@ -1,7 +1,8 @@
 import json
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from utils import call_gemini, safe_json_loads
+from token_budget import fit_extra_text
+from utils import call_gemini, call_gemini_async, safe_json_loads
 
 # =========================================================================
 # 1. [Pydantic 스키마 정의] - 기존 MARKET_SCHEMA 문자열을 완벽하게 대체
@@ -50,21 +51,21 @@ class MarketResponseSchema(BaseModel):
 # =========================================================================
 # 2. [분석 엔진(Agent) 실행부]
 # =========================================================================
-def analyze(pdf_path: str, company_name: str, industry_sector: str, extra_text: str = "") -> dict:
-    print(f"   [Market Agent] 시장 동향 및 경쟁사 검색 중...")
-
+def _rag_prompt(company_name: str, industry_sector: str) -> str:
     # 1. RAG: 최신 시장 동향 및 경쟁사 정밀 검색 (검색어 개편)
     search_query = f"""
     1. {company_name} 주요 경쟁사 현황 및 제품 비교
     2. {industry_sector} 시장 규모(TAM, SAM, SOM) 및 전망
     3. {industry_sector} 최신 트렌드 및 규제 이슈
     """
-    rag_res = call_gemini(f"'{company_name}'이 속한 {industry_sector} 시장의 최신 동향과 경쟁사 정보를 검색하십시오.\n{search_query}", tools=[{"google_search": {}}])
-    rag_context = rag_res.get("text", "") if rag_res.get("ok") else ""
+    return f"'{company_name}'이 속한 {industry_sector} 시장의 최신 동향과 경쟁사 정보를 검색하십시오.\n{search_query}"
 
+def _build_prompt(extra_text: str, rag_context: str, peer_instruction: str = "") -> str:
+    # Peer Group 지시문은 예산 축약 대상이 아니므로 보충 텍스트를 줄인 뒤에 붙입니다.
+    extra_text = fit_extra_text(extra_text, "market") + peer_instruction
     # 2. Analysis
     # 🚨 프롬프트 지시사항은 완벽히 유지하되, 하드코딩된 Output Schema 문자열만 제거
-    prompt = f"""
+    return f"""
     당신은 벤처캐피탈(VC)의 시니어 산업 분석 애널리스트입니다.
     메인 IR 자료(PDF), 검색된 시장 데이터(RAG Context), 그리고 **[보충 문서 데이터]**를 모두 결합하여 시장성을 심층 분석하십시오.
 
@@ -88,12 +89,29 @@ def analyze(pdf_path: str, company_name: str, industry_sector: str, extra_text:
     5. **[성장 지표 추출]**: 문서 내에 연도별 수출 실적, 계약 건수, 매출 규모 추이 데이터가 표나 그래프로 존재한다면 `Export_and_Contract_Stats`에 연도와 수치 쌍(예: ["2024", "150"])으로 전사하십시오. 없으면 빈 배열 `[]`을 반환하십시오.
     6. **[엑시트 전략 분리 작성 엄수]**: 'Expected_LO_Scenarios' 작성 시 M&A와 IPO는 엑시트의 성격이 완전히 다르므로 반드시 2개의 독립된 시나리오로 분리하여 각 상황에 맞게 날카롭게 작성하십시오.
     """
-    
-    # 🚨 [핵심 변경] utils.py의 call_gemini에 response_schema 파라미터를 넘겨 JSON 출력을 완벽히 통제합니다.
-    res = call_gemini(prompt, pdf_path=pdf_path, response_schema=MarketResponseSchema)
-    
+
+def _parse_result(res: dict) -> dict:
     if res.get("ok"):
         return safe_json_loads(res["text"])
     else:
         print(f"   [Market Agent] Error: {res.get('error')}")
-        return {}
\ No newline at end of file
+        return {}
+
+def analyze(pdf_path: str, company_name: str, industry_sector: str, extra_text: str = "", peer_instruction: str = "") -> dict:
+    print(f"   [Market Agent] 시장 동향 및 경쟁사 검색 중...")
+
+    rag_res = call_gemini(_rag_prompt(company_name, industry_sector), tools=[{"google_search": {}}])
+    rag_context = rag_res.get("text", "") if rag_res.get("ok") else ""
+
+    # 🚨 [핵심 변경] utils.py의 call_gemini에 response_schema 파라미터를 넘겨 JSON 출력을 완벽히 통제합니다.
+    res = call_gemini(_build_prompt(extra_text, rag_context, peer_instruction), pdf_path=pdf_path, response_schema=MarketResponseSchema)
+    return _parse_result(res)
+
+async def analyze_async(pdf_path: str, company_name: str, industry_sector: str, extra_text: str = "", peer_instruction: str = "") -> dict:
+    print(f"   [Market Agent] 시장 동향 및 경쟁사 검색 중...")
+
+    rag_res = await call_gemini_async(_rag_prompt(company_name, industry_sector), tools=[{"google_search": {}}])
+    rag_context = rag_res.get("text", "") if rag_res.get("ok") else ""
+
+    res = await call_gemini_async(_build_prompt(extra_text, rag_context, peer_instruction), pdf_path=pdf_path, response_schema=MarketResponseSchema)
+    return _parse_result(res)
@@ -2,7 +2,8 @@ import json
 import re
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from utils import call_gemini, safe_json_loads
+from token_budget import fit_extra_text
+from utils import call_gemini, call_gemini_async, safe_json_loads
 
 # =========================================================================
 # 1. [Pydantic 스키마 정의] - 기존 문자열 스키마 3종을 완벽하게 대체
@@ -72,16 +73,17 @@ def _norm(s: str) -> str:
     x = re.sub(r"[^0-9a-z가-힣\.\-:/]", "", x)
     return x
 
-def _extract_company_signature(pdf_path: str, extra_text: str = "") -> dict:
-    prompt = f"""
+def _signature_prompt(extra_text: str) -> str:
+    extra_text = fit_extra_text(extra_text, "personnel_signature")
+    return f"""
 너는 IR 문서에서 회사의 '식별자'만 추출하는 도구다. 추측 금지.
 문서에 명시된 값만 추출하여라. 없으면 빈 문자열로 둔다.
 
 [보충 문서 데이터]
 {extra_text}
 """
-    # 🚨 [최적화] response_schema 주입
-    res = call_gemini(prompt, pdf_path=pdf_path, response_schema=CompanySignatureSchema)
+
+def _parse_signature(res: dict) -> dict:
     if not res.get("ok"):
         return safe_json_loads('{"company_name_kr":"","company_name_en":"","company_domain":"","company_address":"","biz_reg_no":"","ticker_or_market":""}')
     sig = safe_json_loads(res.get("text", "")) or {}
@@ -89,6 +91,15 @@ def _extract_company_signature(pdf_path: str, extra_text: str = "") -> dict:
         sig[k] = (sig.get(k) or "").strip()
     return sig
 
+def _extract_company_signature(pdf_path: str, extra_text: str = "") -> dict:
+    # 🚨 [최적화] response_schema 주입
+    res = call_gemini(_signature_prompt(extra_text), pdf_path=pdf_path, response_schema=CompanySignatureSchema)
+    return _parse_signature(res)
+
+async def _extract_company_signature_async(pdf_path: str, extra_text: str = "") -> dict:
+    res = await call_gemini_async(_signature_prompt(extra_text), pdf_path=pdf_path, response_schema=CompanySignatureSchema)
+    return _parse_signature(res)
+
 def _build_queries(ceo_name: str, sig: dict) -> list[str]:
     ceo_name = (ceo_name or "").strip()
     name_kr = (sig.get("company_name_kr") or "").strip()
@@ -103,17 +114,15 @@ def _build_queries(ceo_name: str, sig: dict) -> list[str]:
         queries += [f"site:{domain} {ceo_name} 대표이사"]
     return queries
 
-def _extract_ceo_evidence(ceo_name: str, sig: dict) -> dict:
+def _ceo_rag_prompt(ceo_name: str, sig: dict) -> str:
     queries = _build_queries(ceo_name, sig)
-    rag_prompt = (
+    return (
         "아래 각 질의를 검색하여, '대표이사/CEO임을 확인할 수 있는 문장'과 함께 출처를 남기십시오.\n"
         + "\n".join([f"- {q}" for q in queries])
     )
-    # RAG 검색 (자유 텍스트 반환이므로 스키마 적용 안함)
-    rag_res = call_gemini(rag_prompt, tools=[{"google_search": {}}])
-    rag_text = rag_res.get("text", "") if rag_res.get("ok") else ""
 
-    struct_prompt = f"""
+def _ceo_struct_prompt(sig: dict, rag_text: str) -> str:
+    return f"""
 너는 VC의 인사 검증 리서처다.
 아래 RAG 텍스트에서 '대표이사/CEO' 주장만 추출하여 근거(evidence)로 묶어라.
 
@@ -123,13 +132,29 @@ def _extract_ceo_evidence(ceo_name: str, sig: dict) -> dict:
 [RAG TEXT]
 {rag_text}
 """
-    # 🚨 [최적화] 추출된 텍스트를 구조화할 때 response_schema 주입
-    sres = call_gemini(struct_prompt, response_schema=CeoEvidenceSchema)
+
+def _parse_ceo_evidence(sres: dict, sig: dict) -> dict:
     if not sres.get("ok"): return {"company_signature": sig, "ceo_claims": []}
     out = safe_json_loads(sres.get("text", "")) or {"company_signature": sig, "ceo_claims": []}
     if "company_signature" not in out: out["company_signature"] = sig
     return out
 
+def _extract_ceo_evidence(ceo_name: str, sig: dict) -> dict:
+    # RAG 검색 (자유 텍스트 반환이므로 스키마 적용 안함)
+    rag_res = call_gemini(_ceo_rag_prompt(ceo_name, sig), tools=[{"google_search": {}}])
+    rag_text = rag_res.get("text", "") if rag_res.get("ok") else ""
+
+    # 🚨 [최적화] 추출된 텍스트를 구조화할 때 response_schema 주입
+    sres = call_gemini(_ceo_struct_prompt(sig, rag_text), response_schema=CeoEvidenceSchema)
+    return _parse_ceo_evidence(sres, sig)
+
+async def _extract_ceo_evidence_async(ceo_name: str, sig: dict) -> dict:
+    rag_res = await call_gemini_async(_ceo_rag_prompt(ceo_name, sig), tools=[{"google_search": {}}])
+    rag_text = rag_res.get("text", "") if rag_res.get("ok") else ""
+
+    sres = await call_gemini_async(_ceo_struct_prompt(sig, rag_text), response_schema=CeoEvidenceSchema)
+    return _parse_ceo_evidence(sres, sig)
+
 def _company_match_score(sig: dict, evidence_item: dict) -> int:
     blob = " ".join([str(evidence_item.get("snippet","")), str(evidence_item.get("source_name","")), str(evidence_item.get("url",""))])
     b = _norm(blob)
@@ -176,24 +201,20 @@ def _validate_ceo_evidence(evd: dict, ceo_name: str, sig: dict) -> tuple[bool, s
 # =========================================================================
 # 3. [분석 엔진(Agent) 메인 실행부]
 # =========================================================================
-def analyze(pdf_path: str, ceo_name: str, extra_text: str = "") -> dict:
-    print(f"   [Personnel Agent] 경영진 및 조직 역량 분석 중...")
-
-    sig = _extract_company_signature(pdf_path, extra_text)
-
+def _verified_ceo_context(ceo_name: str, sig: dict, evd: dict = None) -> str:
     if ceo_name:
         # 사실 확인을 위해 RAG 및 자체 검증 수행
-        evd = _extract_ceo_evidence(ceo_name, sig)
         ok, warn, cleaned = _validate_ceo_evidence(evd, ceo_name, sig)
-        verified_ceo_context = json.dumps(cleaned, ensure_ascii=False, indent=2)
-    else:
-        verified_ceo_context = json.dumps(
-            {"company_signature": sig, "ceo_claims": [], "validation_failed": True, "reason": "ceo_name 미제공"},
-            ensure_ascii=False, indent=2
-        )
+        return json.dumps(cleaned, ensure_ascii=False, indent=2)
+    return json.dumps(
+        {"company_signature": sig, "ceo_claims": [], "validation_failed": True, "reason": "ceo_name 미제공"},
+        ensure_ascii=False, indent=2
+    )
 
+def _build_prompt(extra_text: str, verified_ceo_context: str) -> str:
+    extra_text = fit_extra_text(extra_text, "personnel")
     # 🚨 [최적화] 프롬프트 내 하드코딩된 JSON 양식 제거 및 톤앤매너 지시사항 강조
-    prompt = f"""
+    return f"""
 당신은 벤처캐피탈(VC)의 인사 검증 담당자이자 전문 심사역(Analyst)입니다.
 메인 자료(PDF), [보충 문서 데이터], 그리고 '검증된 CEO 근거'를 사용하여 경영진과 조직 역량을 평가하십시오.
 
@@ -219,10 +240,31 @@ Verified CEO Evidence가 'validation_failed' 상태이거나 제공된 자료 
 - (잘못된 예) "공식/준공식 근거 부재로 검증 실패"
 - (올바른 예) "제공된 IR 자료 내에서 대표이사의 핵심 역량 및 과거 레퍼런스를 교차 검증할 수 있는 구체적인 정보가 확인되지 않아, 현 시점에서의 경영 능력 세부 평가는 제한적입니다. 향후 추가적인 인터뷰나 보완 자료를 통한 확인이 필요합니다."
 """
-    # [최적화] 최종 PersonnelResponseSchema 주입
-    res = call_gemini(prompt, pdf_path=pdf_path, response_schema=PersonnelResponseSchema)
+
+def _parse_result(res: dict) -> dict:
     if res.get("ok"):
         return safe_json_loads(res["text"])
     else:
         print(f"   [Personnel Agent] Error: {res.get('error')}")
-        return {}
\ No newline at end of file
+        return {}
+
+def analyze(pdf_path: str, ceo_name: str, extra_text: str = "") -> dict:
+    print(f"   [Personnel Agent] 경영진 및 조직 역량 분석 중...")
+
+    sig = _extract_company_signature(pdf_path, extra_text)
+    evd = _extract_ceo_evidence(ceo_name, sig) if ceo_name else None
+    verified_ceo_context = _verified_ceo_context(ceo_name, sig, evd)
+
+    # [최적화] 최종 PersonnelResponseSchema 주입
+    res = call_gemini(_build_prompt(extra_text, verified_ceo_context), pdf_path=pdf_path, response_schema=PersonnelResponseSchema)
+    return _parse_result(res)
+
+async def analyze_async(pdf_path: str, ceo_name: str, extra_text: str = "") -> dict:
+    print(f"   [Personnel Agent] 경영진 및 조직 역량 분석 중...")
+
+    sig = await _extract_company_signature_async(pdf_path, extra_text)
+    evd = await _extract_ceo_evidence_async(ceo_name, sig) if ceo_name else None
+    verified_ceo_context = _verified_ceo_context(ceo_name, sig, evd)
+
+    res = await call_gemini_async(_build_prompt(extra_text, verified_ceo_context), pdf_path=pdf_path, response_schema=PersonnelResponseSchema)
+    return _parse_result(res)
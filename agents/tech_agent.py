@@ -1,7 +1,8 @@
 import json
 from pydantic import BaseModel, Field
 from typing import List, Optional
-from utils import call_gemini, safe_json_loads
+from token_budget import fit_extra_text
+from utils import call_gemini, call_gemini_async, safe_json_loads
 
 # =========================================================================
 # 1. [Pydantic 스키마 정의] - 기존 TECH_SCHEMA 문자열을 완벽하게 대체
@@ -26,11 +27,10 @@ class TechResponseSchema(BaseModel):
 # =========================================================================
 # 2. [분석 엔진(Agent) 메인 실행부]
 # =========================================================================
-def analyze(pdf_path: str, extra_text: str = "") -> dict:
-    print(f"   [Tech Agent] 기술 경쟁력 및 파이프라인 분석 중...")
-    
+def _build_prompt(extra_text: str = "") -> str:
+    extra_text = fit_extra_text(extra_text, "tech")
     # 🚨 프롬프트 지시사항은 그대로 유지하고 하드코딩된 Output Schema만 제거
-    prompt = f"""
+    return f"""
     당신은 기술 특례 상장 심사역(CTO)입니다.
     제공된 메인 자료(PDF)와 **[보충 문서 데이터]**를 바탕으로 회사의 기술력과 파이프라인을 심층 분석하십시오.
 
@@ -42,12 +42,22 @@ def analyze(pdf_path: str, extra_text: str = "") -> dict:
     2. **Core Tech**: 기술의 작동 원리를 비전문가도 이해할 수 있되, 전문 용어를 사용하여 구체적으로 설명하십시오.
     3. **Pipeline**: 각 파이프라인의 개발 단계(TRL, 임상 단계 등)를 명확히 구분하여 적으십시오.
     """
-    
-    # 🚨 [핵심 변경] response_schema 파라미터를 넘겨 JSON 출력을 100% 통제합니다.
-    res = call_gemini(prompt, pdf_path=pdf_path, response_schema=TechResponseSchema)
-    
+
+def _parse_result(res: dict) -> dict:
     if res.get("ok"):
         return safe_json_loads(res["text"])
     else:
         print(f"   [Tech Agent] Error: {res.get('error')}")
-        return {}
\ No newline at end of file
+        return {}
+
+def analyze(pdf_path: str, extra_text: str = "") -> dict:
+    print(f"   [Tech Agent] 기술 경쟁력 및 파이프라인 분석 중...")
+    
+    # 🚨 [핵심 변경] response_schema 파라미터를 넘겨 JSON 출력을 100% 통제합니다.
+    res = call_gemini(_build_prompt(extra_text), pdf_path=pdf_path, response_schema=TechResponseSchema)
+    return _parse_result(res)
+
+async def analyze_async(pdf_path: str, extra_text: str = "") -> dict:
+    print(f"   [Tech Agent] 기술 경쟁력 및 파이프라인 분석 중...")
+    res = await call_gemini_async(_build_prompt(extra_text), pdf_path=pdf_path, response_schema=TechResponseSchema)
+    return _parse_result(res)
@@ -3,10 +3,12 @@ import json
 import math
 import datetime
 import re
+import asyncio
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
-from utils import call_gemini, safe_json_loads, load_industry_codes, get_companies_by_code
-from utils_extended import full_peer_filtering_pipeline
+from token_budget import fit_extra_text
+from utils import call_gemini, call_gemini_async, safe_json_loads, load_industry_codes, get_companies_by_code
+from utils_extended import full_peer_filtering_pipeline, full_peer_filtering_pipeline_async
 
 # =========================================================================
 # 1. [Pydantic 스키마 정의] - 각 LLM 호출 단계별로 완벽한 타입 강제
@@ -61,25 +63,17 @@ class ValuationResponseSchema(BaseModel):
 # =========================================================================
 # 2. [분석 엔진(Agent) 메인 실행부]
 # =========================================================================
-def analyze(pdf_path: str, company_name: str, ceo_name: str, industry_sector: str, extra_text: str = "") -> dict:
-    print(f"   [Valuation Agent] '{company_name}' 정밀 타겟팅 (Full 4-Stage Pipeline) 시작...")
-
+def _data_paths() -> tuple:
     industry_def_path = r"C:\Users\Researcher\Desktop\Project V\OCR Sample\data\metadata\preprocess_corp_code_list(prototype).csv"
     base_dir = os.path.dirname(industry_def_path)
     company_list_path = os.path.join(base_dir, "company_cord_prototype.csv")
     if not os.path.exists(company_list_path): 
         company_list_path = "company_cord_prototype.csv"
+    return industry_def_path, company_list_path
 
-    # [Step 1] 산업분류코드 추출
-    industry_map = load_industry_codes(industry_def_path)
-    target_codes = []
-    selected_industries = []
-    
-    if industry_map:
-        industry_names = list(industry_map.keys())
-        context_str = "\n".join(industry_names[:1500]) 
-
-        prompt_step1 = f"""
+def _industry_prompt(company_name: str, extra_text: str, context_str: str) -> str:
+    extra_text = fit_extra_text(extra_text, "valuation_industry")
+    return f"""
 당신은 산업분류 전문가입니다.
 IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업내용 목록] 중 대상 기업 '{company_name}'의 사업과 가장 연관성이 높은 '산업내용' 3가지를 선택하십시오.
 
@@ -89,38 +83,10 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
 [산업내용 목록 (일부)]
 {context_str}
 """
-        # 🚨 [최적화 1] 산업 선택 Pydantic 주입
-        res = call_gemini(prompt_step1, pdf_path=pdf_path, response_schema=IndustrySelection)
-        selection = safe_json_loads(res.get("text", ""))
-        selected_industries = selection.get("Selected_Industries", [])
-        print(f"   👉 [Step 1] AI 선정 산업: {selected_industries}")
-        
-        for ind in selected_industries:
-            search_keyword = ind.strip()
-            for k, v_list in industry_map.items():
-                if search_keyword in k:
-                    target_codes.extend(v_list)
-        
-        target_codes = list(set(target_codes))
 
-    # [Step 2] 기업 리스트 추출
-    raw_peers = []
-    if target_codes:
-        for code in target_codes:
-            peers = get_companies_by_code(code, company_list_path)
-            if not peers and len(code) > 3:
-                peers = get_companies_by_code(code[:-1], company_list_path)
-            raw_peers.extend(peers)
-    
-    raw_peers = list(set(raw_peers))
-    
-    # =========================================================
-    # 동적 확장 로직 (Dynamic Expansion) - 최소 5개 ~ 최대 7개
-    # =========================================================
-    if len(raw_peers) <= 10:
-        print(f"   ⚠️ [Fallback] 1차 매칭 기업이 {len(raw_peers)}개로 부족합니다. 밸류체 전반으로 산업분류를 최소 5개 이상 확장 탐색합니다.")
-        
-        prompt_step1_expand = f"""
+def _industry_expand_prompt(company_name: str, extra_text: str, context_str: str) -> str:
+    extra_text = fit_extra_text(extra_text, "valuation_industry")
+    return f"""
 당신은 산업분류 전문가입니다.
 앞서 선택한 3개의 산업만으로는 비교할 상장사 그룹이 턱없이 부족합니다.
 대상 기업 '{company_name}'의 밸류체인(원재료, 후방 제조 공정, 전방 적용 시장 등)을 모두 포괄하여, 
@@ -131,58 +97,29 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
 [산업내용 목록 (일부)]
 {context_str}
 """
-        # 🚨 [최적화 2] 산업 확장 선택 Pydantic 주입
-        res_expand = call_gemini(prompt_step1_expand, pdf_path=pdf_path, response_schema=IndustrySelection)
-        selection_expand = safe_json_loads(res_expand.get("text", ""))
-        expanded_industries = selection_expand.get("Selected_Industries", [])
-        
-        print(f"   👉 [Step 1-확장] AI 추가 선정 산업: {expanded_industries}")
-        
-        expanded_codes = []
-        for ind in expanded_industries:
-            search_keyword = ind.strip()
-            for k, v_list in industry_map.items():
-                if search_keyword in k:
-                    expanded_codes.extend(v_list)
-                    
-        expanded_codes = list(set(expanded_codes))
-        for code in expanded_codes:
-            peers = get_companies_by_code(code, company_list_path)
-            if not peers and len(code) > 3:
-                peers = get_companies_by_code(code[:-1], company_list_path)
-            raw_peers.extend(peers)
-            
-        raw_peers = list(set(raw_peers))
-        print(f"   ✅ [Step 1-확장 완료] 최종 확보된 1차 모집단: {len(raw_peers)}개 사")
 
-    # [Step 3~6] Full 4-Stage Filtering Pipeline
-    pipeline_result = full_peer_filtering_pipeline(
-        target_pdf_path=pdf_path,
-        company_name=company_name,
-        raw_peer_names=raw_peers,
-        company_csv_path=company_list_path,
-        similarity_threshold=0.3
-    )
-    
-    stage2_dec = pipeline_result.get("stage2_dec_passed", [])
-    stage2_profit = pipeline_result.get("stage2_profit_passed", [])
-    stage3_business = pipeline_result.get("stage3_business_passed", [])
-    stage4_final = pipeline_result.get("stage4_final_peers", [])
-    
-    final_peers = stage4_final[:10]
-    peers_str = ", ".join(final_peers)
+def _codes_for_industries(industries: list, industry_map: dict) -> list:
+    codes = []
+    for ind in industries:
+        search_keyword = ind.strip()
+        for k, v_list in industry_map.items():
+            if search_keyword in k:
+                codes.extend(v_list)
+    return list(set(codes))
 
-    # [Step 7] RAG 검색 (자유 텍스트 기반)
-    if final_peers:
-        search_prompt = f"Target Peers: {peers_str}\n각 기업의 시가총액, PER, 2024년 당기순이익, Target 기업 '{company_name}'의 발행주식수를 검색하십시오."
-        rag_res = call_gemini(search_prompt, tools=[{"google_search": {}}])
-        rag_context = rag_res.get('text', '') if rag_res.get('ok') else ''
-    else:
-        rag_context = "Peer 데이터 부족"
+def _peers_for_codes(codes: list, company_list_path: str) -> list:
+    raw_peers = []
+    for code in codes:
+        peers = get_companies_by_code(code, company_list_path)
+        if not peers and len(code) > 3:
+            peers = get_companies_by_code(code[:-1], company_list_path)
+        raw_peers.extend(peers)
+    return raw_peers
 
-    # [Step 8] 파이썬 기반 Valuation 연산 엔진 (환각 0%)
-    target_year = datetime.datetime.now().year + 1
-    
+def _peer_search_prompt(peers_str: str, company_name: str) -> str:
+    return f"Target Peers: {peers_str}\n각 기업의 시가총액, PER, 2024년 당기순이익, Target 기업 '{company_name}'의 발행주식수를 검색하십시오."
+
+def _peer_avg_per(pipeline_result: dict, final_peers: list) -> float:
     valid_pers = []
     scraped_per_info = []
     if "details" in pipeline_result and "stage4_requirements" in pipeline_result["details"]:
@@ -193,9 +130,11 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
                 if passed and isinstance(per_val, (int, float)):
                     valid_pers.append(per_val)
                     
-    peer_avg_per = sum(valid_pers) / len(valid_pers) if valid_pers else 0.0
+    return sum(valid_pers) / len(valid_pers) if valid_pers else 0.0
 
-    extract_prompt = f"""
+def _extract_prompt(company_name: str, target_year: int, extra_text: str) -> str:
+    extra_text = fit_extra_text(extra_text, "valuation_extract")
+    return f"""
 당신은 집요하고 정확한 재무 데이터 추출 전문가입니다.
 대상 기업 '{company_name}'의 문서에서 아래 3가지 정보만 찾아내십시오. 계산 과정은 출력하지 말고 오직 최종 결과만 추출하십시오.
 
@@ -213,26 +152,15 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
 [보충 문서 데이터]
 {extra_text}
 """
-    # 🚨 [최적화 3] 데이터 핀셋 추출 Pydantic 주입
-    res_extract = call_gemini(extract_prompt, pdf_path=pdf_path, response_schema=ExtractionData)
-    extracted_data = safe_json_loads(res_extract.get("text", ""))
-    t_net_income = extracted_data.get("target_net_income")
-    t_shares = extracted_data.get("total_shares")
-    t_round = extracted_data.get("target_round")
 
-    fallback_msg = "" 
+def _clean_company_name(company_name: str) -> str:
+    return re.sub(r'\(.*?\)', '', company_name).replace('주식회사', '').replace('(주)', '').strip()
 
-    if not t_shares:
-        print(f"   🔍 [Smart Fallback] 문서 내 주식수 부재 감지. 구글 검색(RAG)을 통해 집중 탐색을 시작합니다...")
-        try:
-            clean_name = re.sub(r'\(.*?\)', '', company_name).replace('주식회사', '').replace('(주)', '').strip()
-            
-            rag_fallback_prompt = f"한국 비상장 기업 '{clean_name}'의 '자본금' 또는 '발행주식총수'를 검색해서 정확한 수치를 알려주세요. 잡코리아, 사람인, 혁신의숲 등 구인구직 사이트나 기사 데이터를 적극 참고하세요."
-            rag_res = call_gemini(rag_fallback_prompt, tools=[{"google_search": {}}])
-            fallback_context = rag_res.get('text', '') if rag_res.get('ok') else ''
-            
-            if fallback_context:
-                conv_prompt = f"""
+def _capital_rag_prompt(clean_name: str) -> str:
+    return f"한국 비상장 기업 '{clean_name}'의 '자본금' 또는 '발행주식총수'를 검색해서 정확한 수치를 알려주세요. 잡코리아, 사람인, 혁신의숲 등 구인구직 사이트나 기사 데이터를 적극 참고하세요."
+
+def _capital_conv_prompt(clean_name: str, fallback_context: str) -> str:
+    return f"""
                 당신은 재무 데이터 추출 전문가입니다.
                 다음 검색 결과를 바탕으로 '{clean_name}'의 '자본금'을 찾아내십시오.
                 그리고 찾은 자본금을 오직 '원(₩) 단위의 정수(Integer)'로만 변환하여 반환하십시오.
@@ -244,26 +172,22 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
                 [검색 결과 Context]
                 {fallback_context}
                 """
-                # 🚨 [최적화 4] 자본금 정수 변환 Pydantic 주입
-                res_conv = call_gemini(conv_prompt, response_schema=CapitalConversion)
-                conv_data = safe_json_loads(res_conv.get("text", ""))
-                
-                capital_int = conv_data.get("capital_amount_int")
-                capital_str = conv_data.get("capital_amount_str", "미상")
-                source_name = conv_data.get("source", "웹 검색")
-                
-                if capital_int and isinstance(capital_int, (int, float)) and capital_int > 0:
-                    t_shares = int(capital_int / 500)
-                    fallback_msg = f" (출처: {source_name}, 적용 자본금: {capital_str})"
-                    print(f"      ✅ 파이썬 엔진 기반 주식수 역산 완료: {t_shares:,}주{fallback_msg}")
-                else:
-                    print("      ⚠️ RAG 웹 검색으로 자본금 정보를 도출하지 못했습니다.")
-            else:
-                print("      ⚠️ RAG 검색 결과가 반환되지 않았습니다.")
-                
-        except Exception as e:
-            print(f"      ⚠️ RAG 조건부 탐색 중 오류 발생: {e}")
-            
+
+def _shares_from_capital(conv_data: dict) -> tuple:
+    """자본금 변환 결과로 주식수를 역산합니다. Returns: (t_shares 또는 None, fallback_msg)"""
+    capital_int = conv_data.get("capital_amount_int")
+    capital_str = conv_data.get("capital_amount_str", "미상")
+    source_name = conv_data.get("source", "웹 검색")
+    
+    if capital_int and isinstance(capital_int, (int, float)) and capital_int > 0:
+        t_shares = int(capital_int / 500)
+        fallback_msg = f" (출처: {source_name}, 적용 자본금: {capital_str})"
+        print(f"      ✅ 파이썬 엔진 기반 주식수 역산 완료: {t_shares:,}주{fallback_msg}")
+        return t_shares, fallback_msg
+    print("      ⚠️ RAG 웹 검색으로 자본금 정보를 도출하지 못했습니다.")
+    return None, ""
+
+def _discount_rate_for_round(t_round) -> float:
     # 투자 라운드 기반 동적 할인율 매핑 로직
     d_rate_pv = 0.50  # 기본 할인율
     
@@ -286,13 +210,25 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
     # 후기 라운드
     elif "ipo" in round_str or "상장" in round_str: 
         d_rate_pv = 0.20
-
+    return d_rate_pv
+
+def _get_approx_korean(val):
+    if val >= 1000000000000: 
+        jo = int(val // 1000000000000)
+        eok = int((val % 1000000000000) // 100000000)
+        return f"(약 {jo}조 {eok:,}억)" if eok > 0 else f"(약 {jo}조)"
+    elif val >= 100000000: return f"(약 {int(val // 100000000):,}억)"
+    else: return f"(약 {int(val // 10000):,}만)"
+
+def _compute_valuation(peer_avg_per: float, t_net_income, t_shares, t_round, d_rate_pv: float,
+                       fallback_msg: str, target_year: int) -> dict:
+    """[Step 8] 파이썬 3-Scenario 사칙연산 및 텍스트 조립"""
     display_round = t_round if t_round else "미상 (기본값 적용)"
 
-    # 3. 파이썬 3-Scenario 사칙연산 및 텍스트 조립
     calc_rationale = ""
     target_est_price = "-"
     scenario_data = [] 
+    d_rate_ipo = None
     
     if peer_avg_per > 0 and t_net_income:
         d_rate_ipo = 0.40 # 공모 할인율 고정
@@ -308,14 +244,6 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
             calc_rationale += f"  * 참고: 자본금 및 발행주식수 정보 부재로 주당 단가 산출 생략"
 
         scenarios = [("낙관적", 1.0), ("중립적", 0.70), ("보수적", 0.50)]
-        
-        def get_approx_korean(val):
-            if val >= 1000000000000: 
-                jo = int(val // 1000000000000)
-                eok = int((val % 1000000000000) // 100000000)
-                return f"(약 {jo}조 {eok:,}억)" if eok > 0 else f"(약 {jo}조)"
-            elif val >= 100000000: return f"(약 {int(val // 100000000):,}억)"
-            else: return f"(약 {int(val // 10000):,}만)"
 
         for scen_name, ratio in scenarios:
             adj_income = t_net_income * ratio
@@ -323,8 +251,8 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
             pv_trunc = math.floor(pv / 1000000) * 1000000
             ev = pv_trunc * peer_avg_per
             
-            pv_approx = get_approx_korean(pv_trunc)
-            ev_approx = get_approx_korean(ev)
+            pv_approx = _get_approx_korean(pv_trunc)
+            ev_approx = _get_approx_korean(ev)
             
             if t_shares:
                 # [기초] 보통주 평가가액
@@ -357,8 +285,16 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
         if peer_avg_per <= 0: calc_rationale += "- 유효한 Peer PER 데이터 부재\n"
         if not t_net_income: calc_rationale += f"- {target_year}년 추정 당기순이익 정보 부재\n"
 
-    # [Step 9] 정성적 평가 (LLM은 평가에만 집중)
-    main_prompt = f"""
+    return {
+        "calc_rationale": calc_rationale,
+        "target_est_price": target_est_price,
+        "scenario_data": scenario_data,
+        "d_rate_ipo": d_rate_ipo,
+    }
+
+def _main_prompt(company_name: str, peers_str: str, rag_context: str, extra_text: str) -> str:
+    extra_text = fit_extra_text(extra_text, "valuation_main")
+    return f"""
 당신은 기업가치 평가 전문가입니다.
 가치 평가(Valuation) 산출 및 계산은 파이썬 시스템이 이미 완벽하게 수행했습니다. 
 당신은 아래 정보를 바탕으로 **정성적 분석 및 투자 판단**에만 집중하십시오.
@@ -376,10 +312,10 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
 - 계산 관련 수식은 시스템이 강제 주입할 것이므로 임의로 생성하지 마십시오.
 - [전문가 문체(Tone & Manner) 엄수]: 'Three_Axis_Assessment'와 'Final_Conclusion'을 포함한 모든 정성적 평가를 작성할 때, "~할 것이다", "~다" 등의 단정적이거나 AI스러운 어미 사용을 절대 금지합니다. 실제 VC 심사역 및 증권사 애널리스트들이 사용하는 전문적인 어미("~로 사료된다", "~할 필요가 있다", "~할 것으로 전망된다", "~로 판단된다" 등)로 문장이 자연스럽게 귀결되도록 엄격히 작성하십시오.
 """
-    # 🚨 [최적화 5] 최종 Valuation 정성평가 Pydantic 주입
-    res = call_gemini(main_prompt, pdf_path=pdf_path, response_schema=ValuationResponseSchema, max_tokens=8192)
-    val_data = safe_json_loads(res.get("text", "") if res.get("ok") else "{}")
-    
+
+def _inject_valuation(val_data: dict, selected_industries: list, raw_peers: list, pipeline_result: dict,
+                      final_peers: list, calc: dict, t_net_income, t_shares, peer_avg_per: float,
+                      d_rate_pv: float) -> dict:
     # [Data Injection] 
     if "Valuation_and_Judgment" not in val_data: val_data["Valuation_and_Judgment"] = {}
     v_judge = val_data["Valuation_and_Judgment"]
@@ -388,21 +324,21 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
     detail = v_judge["Valuation_Logic_Detail"]
     detail["Step1_Industries"] = selected_industries
     detail["Step2_Raw_Pool"] = raw_peers
-    detail["Step3_Dec_Filtered"] = stage2_dec
-    detail["Step3_Profit_Filtered"] = stage2_profit
-    detail["Step4_Business_Filtered"] = stage3_business
+    detail["Step3_Dec_Filtered"] = pipeline_result.get("stage2_dec_passed", [])
+    detail["Step3_Profit_Filtered"] = pipeline_result.get("stage2_profit_passed", [])
+    detail["Step4_Business_Filtered"] = pipeline_result.get("stage3_business_passed", [])
     detail["Step5_Final_Peers"] = final_peers
     
     # 파이썬 연산 결과를 LLM JSON 템플릿에 안전하게 강제 주입
-    detail["Calculation_Rationale"] = calc_rationale
-    detail["Scenario_Valuation"] = scenario_data
-    detail["Estimated_Share_Price"] = target_est_price
+    detail["Calculation_Rationale"] = calc["calc_rationale"]
+    detail["Scenario_Valuation"] = calc["scenario_data"]
+    detail["Estimated_Share_Price"] = calc["target_est_price"]
     detail["Target_Net_Income"] = f"{t_net_income:,}원" if t_net_income else "정보 부재"
     detail["Total_Shares_Outstanding"] = f"{t_shares:,}주" if t_shares else "정보 부재"
     detail["Applied_Multiple"] = f"{peer_avg_per:.2f}배" if peer_avg_per > 0 else "산출 불가"
 
     detail["Discount_Rate_PV"] = f"{int(d_rate_pv*100)}%"
-    detail["Discount_Rate_IPO"] = f"{int(d_rate_ipo*100)}%" if 'd_rate_ipo' in locals() else "40%"
+    detail["Discount_Rate_IPO"] = f"{int(calc['d_rate_ipo']*100)}%" if calc["d_rate_ipo"] is not None else "40%"
     
     if "details" in pipeline_result:
         raw_s3 = pipeline_result["details"].get("stage3_similarity", [])[:5]
@@ -418,10 +354,207 @@ IR 자료(PDF)와 **[보충 문서 데이터]**를 분석하여, 아래 [산업
         ]
     
     if not v_judge.get("Valuation_Table"):
-        v_judge["Valuation_Table"] = [{ "Round": "IPO (예상)", "Pre_Money": "-", "Post_Money": "-", "Comment": f"예상 공모가: {target_est_price}" }]
+        v_judge["Valuation_Table"] = [{ "Round": "IPO (예상)", "Pre_Money": "-", "Post_Money": "-", "Comment": f"예상 공모가: {calc['target_est_price']}" }]
 
     return val_data
 
+def analyze(pdf_path: str, company_name: str, ceo_name: str, industry_sector: str, extra_text: str = "") -> dict:
+    print(f"   [Valuation Agent] '{company_name}' 정밀 타겟팅 (Full 4-Stage Pipeline) 시작...")
+
+    industry_def_path, company_list_path = _data_paths()
+
+    # [Step 1] 산업분류코드 추출
+    industry_map = load_industry_codes(industry_def_path)
+    target_codes = []
+    selected_industries = []
+    context_str = ""
+    
+    if industry_map:
+        industry_names = list(industry_map.keys())
+        context_str = "\n".join(industry_names[:1500]) 
+
+        # 🚨 [최적화 1] 산업 선택 Pydantic 주입
+        res = call_gemini(_industry_prompt(company_name, extra_text, context_str), pdf_path=pdf_path, response_schema=IndustrySelection)
+        selection = safe_json_loads(res.get("text", ""))
+        selected_industries = selection.get("Selected_Industries", [])
+        print(f"   👉 [Step 1] AI 선정 산업: {selected_industries}")
+        target_codes = _codes_for_industries(selected_industries, industry_map)
+
+    # [Step 2] 기업 리스트 추출
+    raw_peers = list(set(_peers_for_codes(target_codes, company_list_path)))
+    
+    # =========================================================
+    # 동적 확장 로직 (Dynamic Expansion) - 최소 5개 ~ 최대 7개
+    # =========================================================
+    if len(raw_peers) <= 10:
+        print(f"   ⚠️ [Fallback] 1차 매칭 기업이 {len(raw_peers)}개로 부족합니다. 밸류체 전반으로 산업분류를 최소 5개 이상 확장 탐색합니다.")
+        
+        # 🚨 [최적화 2] 산업 확장 선택 Pydantic 주입
+        res_expand = call_gemini(_industry_expand_prompt(company_name, extra_text, context_str), pdf_path=pdf_path, response_schema=IndustrySelection)
+        selection_expand = safe_json_loads(res_expand.get("text", ""))
+        expanded_industries = selection_expand.get("Selected_Industries", [])
+        
+        print(f"   👉 [Step 1-확장] AI 추가 선정 산업: {expanded_industries}")
+        
+        expanded_codes = _codes_for_industries(expanded_industries, industry_map)
+        raw_peers = list(set(raw_peers + _peers_for_codes(expanded_codes, company_list_path)))
+        print(f"   ✅ [Step 1-확장 완료] 최종 확보된 1차 모집단: {len(raw_peers)}개 사")
+
+    # [Step 3~6] Full 4-Stage Filtering Pipeline
+    pipeline_result = full_peer_filtering_pipeline(
+        target_pdf_path=pdf_path,
+        company_name=company_name,
+        raw_peer_names=raw_peers,
+        company_csv_path=company_list_path,
+        similarity_threshold=0.3
+    )
+    
+    final_peers = pipeline_result.get("stage4_final_peers", [])[:10]
+    peers_str = ", ".join(final_peers)
+
+    # [Step 7] RAG 검색 (자유 텍스트 기반)
+    if final_peers:
+        rag_res = call_gemini(_peer_search_prompt(peers_str, company_name), tools=[{"google_search": {}}])
+        rag_context = rag_res.get('text', '') if rag_res.get('ok') else ''
+    else:
+        rag_context = "Peer 데이터 부족"
+
+    # [Step 8] 파이썬 기반 Valuation 연산 엔진 (환각 0%)
+    target_year = datetime.datetime.now().year + 1
+    peer_avg_per = _peer_avg_per(pipeline_result, final_peers)
+
+    # 🚨 [최적화 3] 데이터 핀셋 추출 Pydantic 주입
+    res_extract = call_gemini(_extract_prompt(company_name, target_year, extra_text), pdf_path=pdf_path, response_schema=ExtractionData)
+    extracted_data = safe_json_loads(res_extract.get("text", ""))
+    t_net_income = extracted_data.get("target_net_income")
+    t_shares = extracted_data.get("total_shares")
+    t_round = extracted_data.get("target_round")
+
+    fallback_msg = "" 
+
+    if not t_shares:
+        print(f"   🔍 [Smart Fallback] 문서 내 주식수 부재 감지. 구글 검색(RAG)을 통해 집중 탐색을 시작합니다...")
+        try:
+            clean_name = _clean_company_name(company_name)
+            rag_res = call_gemini(_capital_rag_prompt(clean_name), tools=[{"google_search": {}}])
+            fallback_context = rag_res.get('text', '') if rag_res.get('ok') else ''
+            
+            if fallback_context:
+                # 🚨 [최적화 4] 자본금 정수 변환 Pydantic 주입
+                res_conv = call_gemini(_capital_conv_prompt(clean_name, fallback_context), response_schema=CapitalConversion)
+                t_shares, fallback_msg = _shares_from_capital(safe_json_loads(res_conv.get("text", "")))
+            else:
+                print("      ⚠️ RAG 검색 결과가 반환되지 않았습니다.")
+                
+        except Exception as e:
+            print(f"      ⚠️ RAG 조건부 탐색 중 오류 발생: {e}")
+            
+    d_rate_pv = _discount_rate_for_round(t_round)
+    calc = _compute_valuation(peer_avg_per, t_net_income, t_shares, t_round, d_rate_pv, fallback_msg, target_year)
+
+    # [Step 9] 정성적 평가 (LLM은 평가에만 집중)
+    # 🚨 [최적화 5] 최종 Valuation 정성평가 Pydantic 주입
+    res = call_gemini(_main_prompt(company_name, peers_str, rag_context, extra_text), pdf_path=pdf_path, response_schema=ValuationResponseSchema, max_tokens=8192)
+    val_data = safe_json_loads(res.get("text", "") if res.get("ok") else "{}")
+    
+    return _inject_valuation(val_data, selected_industries, raw_peers, pipeline_result, final_peers,
+                             calc, t_net_income, t_shares, peer_avg_per, d_rate_pv)
+
+async def analyze_async(pdf_path: str, company_name: str, ceo_name: str, industry_sector: str, extra_text: str = "") -> dict:
+    """analyze()와 동일한 단계를 비동기로 수행합니다. Peer 필터링(Stage 2~4)의 크롤링/유사도 호출은 동시 실행됩니다."""
+    print(f"   [Valuation Agent] '{company_name}' 정밀 타겟팅 (Full 4-Stage Pipeline) 시작...")
+
+    industry_def_path, company_list_path = _data_paths()
+
+    # [Step 1] 산업분류코드 추출 (CSV 로딩은 블로킹이므로 스레드에서 수행)
+    industry_map = await asyncio.to_thread(load_industry_codes, industry_def_path)
+    target_codes = []
+    selected_industries = []
+    context_str = ""
+    
+    if industry_map:
+        industry_names = list(industry_map.keys())
+        context_str = "\n".join(industry_names[:1500]) 
+
+        res = await call_gemini_async(_industry_prompt(company_name, extra_text, context_str), pdf_path=pdf_path, response_schema=IndustrySelection)
+        selection = safe_json_loads(res.get("text", ""))
+        selected_industries = selection.get("Selected_Industries", [])
+        print(f"   👉 [Step 1] AI 선정 산업: {selected_industries}")
+        target_codes = _codes_for_industries(selected_industries, industry_map)
+
+    # [Step 2] 기업 리스트 추출
+    raw_peers = list(set(await asyncio.to_thread(_peers_for_codes, target_codes, company_list_path)))
+    
+    if len(raw_peers) <= 10:
+        print(f"   ⚠️ [Fallback] 1차 매칭 기업이 {len(raw_peers)}개로 부족합니다. 밸류체 전반으로 산업분류를 최소 5개 이상 확장 탐색합니다.")
+        
+        res_expand = await call_gemini_async(_industry_expand_prompt(company_name, extra_text, context_str), pdf_path=pdf_path, response_schema=IndustrySelection)
+        selection_expand = safe_json_loads(res_expand.get("text", ""))
+        expanded_industries = selection_expand.get("Selected_Industries", [])
+        
+        print(f"   👉 [Step 1-확장] AI 추가 선정 산업: {expanded_industries}")
+        
+        expanded_codes = _codes_for_industries(expanded_industries, industry_map)
+        raw_peers = list(set(raw_peers + await asyncio.to_thread(_peers_for_codes, expanded_codes, company_list_path)))
+        print(f"   ✅ [Step 1-확장 완료] 최종 확보된 1차 모집단: {len(raw_peers)}개 사")
+
+    # [Step 3~6] Full 4-Stage Filtering Pipeline
+    pipeline_result = await full_peer_filtering_pipeline_async(
+        target_pdf_path=pdf_path,
+        company_name=company_name,
+        raw_peer_names=raw_peers,
+        company_csv_path=company_list_path,
+        similarity_threshold=0.3
+    )
+    
+    final_peers = pipeline_result.get("stage4_final_peers", [])[:10]
+    peers_str = ", ".join(final_peers)
+    target_year = datetime.datetime.now().year + 1
+    peer_avg_per = _peer_avg_per(pipeline_result, final_peers)
+
+    # [Step 7] Peer 시장 데이터 검색과 [Step 8] 타겟 데이터 추출은 서로 독립적이므로 동시에 요청
+    async def peer_rag():
+        if not final_peers: return "Peer 데이터 부족"
+        rag_res = await call_gemini_async(_peer_search_prompt(peers_str, company_name), tools=[{"google_search": {}}])
+        return rag_res.get('text', '') if rag_res.get('ok') else ''
+
+    rag_context, res_extract = await asyncio.gather(
+        peer_rag(),
+        call_gemini_async(_extract_prompt(company_name, target_year, extra_text), pdf_path=pdf_path, response_schema=ExtractionData),
+    )
+    extracted_data = safe_json_loads(res_extract.get("text", ""))
+    t_net_income = extracted_data.get("target_net_income")
+    t_shares = extracted_data.get("total_shares")
+    t_round = extracted_data.get("target_round")
+
+    fallback_msg = "" 
+
+    if not t_shares:
+        print(f"   🔍 [Smart Fallback] 문서 내 주식수 부재 감지. 구글 검색(RAG)을 통해 집중 탐색을 시작합니다...")
+        try:
+            clean_name = _clean_company_name(company_name)
+            rag_res = await call_gemini_async(_capital_rag_prompt(clean_name), tools=[{"google_search": {}}])
+            fallback_context = rag_res.get('text', '') if rag_res.get('ok') else ''
+            
+            if fallback_context:
+                res_conv = await call_gemini_async(_capital_conv_prompt(clean_name, fallback_context), response_schema=CapitalConversion)
+                t_shares, fallback_msg = _shares_from_capital(safe_json_loads(res_conv.get("text", "")))
+            else:
+                print("      ⚠️ RAG 검색 결과가 반환되지 않았습니다.")
+                
+        except Exception as e:
+            print(f"      ⚠️ RAG 조건부 탐색 중 오류 발생: {e}")
+            
+    d_rate_pv = _discount_rate_for_round(t_round)
+    calc = _compute_valuation(peer_avg_per, t_net_income, t_shares, t_round, d_rate_pv, fallback_msg, target_year)
+
+    # [Step 9] 정성적 평가
+    res = await call_gemini_async(_main_prompt(company_name, peers_str, rag_context, extra_text), pdf_path=pdf_path, response_schema=ValuationResponseSchema, max_tokens=8192)
+    val_data = safe_json_loads(res.get("text", "") if res.get("ok") else "{}")
+    
+    return _inject_valuation(val_data, selected_industries, raw_peers, pipeline_result, final_peers,
+                             calc, t_net_income, t_shares, peer_avg_per, d_rate_pv)
+
 # import os
 # import json
 # import re
@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import datetime
+import threading
+from contextlib import contextmanager
+import requests
+import gemini_client
+import response_cache
+
+# =========================================================
+# 💡 [설정] 오프라인 배치 잡 모드 (batchGenerateContent)
+# =========================================================
+# 동작 방식 (wave 단위)
+#   1) collect() 안에서 모든 기업의 에이전트 그래프를 실행합니다.
+#      응답 캐시에 없는 호출은 네트워크로 나가지 않고 대기열에 쌓인 뒤 BatchDeferred로 해당 기업 그래프를 멈춥니다.
+#   2) 대기열을 JSONL 잡 파일({"key", "request"} 한 줄씩)로 직렬화해 Files API에 올리고 배치 잡을 생성합니다.
+#   3) 완료될 때까지 폴링한 뒤 결과를 응답 캐시에 적재합니다.
+#   4) 다시 1)로 돌아가면 이미 받은 호출은 캐시 적중으로 통과하고, 그 다음 단계의 호출이 새로 모입니다.
+# 잡 상태는 BATCH_DIR/state.json에 남으므로 프로세스가 중간에 끊겨도 다음 실행에서 이어서 수집합니다.
+BATCH_DIR = os.getenv("GEMINI_BATCH_DIR", os.path.join("output", "batch"))
+POLL_INTERVAL = float(os.getenv("GEMINI_BATCH_POLL_SEC", "30"))
+POLL_TIMEOUT = float(os.getenv("GEMINI_BATCH_TIMEOUT_SEC", str(24 * 3600)))
+MAX_WAVES = int(os.getenv("GEMINI_BATCH_MAX_WAVES", "20"))
+# 같은 요청이 배치에서 이 횟수만큼 실패하면 더 미루지 않고 실패 응답을 돌려줘 에이전트의 기존 오류 처리로 넘깁니다.
+MAX_KEY_FAILURES = int(os.getenv("GEMINI_BATCH_MAX_KEY_FAILURES", "2"))
+# Files API 업로드는 48시간 뒤 삭제되므로 여유를 두고 재업로드합니다.
+FILE_REUSE_SEC = 46 * 3600
+
+SUCCEEDED = "BATCH_STATE_SUCCEEDED"
+TERMINAL_STATES = (SUCCEEDED, "BATCH_STATE_FAILED", "BATCH_STATE_CANCELLED", "BATCH_STATE_EXPIRED")
+
+class BatchDeferred(BaseException):
+    """
+    수집 모드에서 아직 결과가 없는 호출을 만났다는 신호입니다.
+    에이전트 내부의 `except Exception` 폴백에 잡히지 않고 그래프 밖(main.run_batch)까지 올라가도록 BaseException을 상속합니다.
+    """
+
+_lock = threading.Lock()
+_collecting = False
+_pending = {}
+_state = None
+
+# =========================================================
+# 🧺 요청 수집
+# =========================================================
+@contextmanager
+def collect():
+    """with 블록 안의 call_gemini 캐시 미스를 네트워크 대신 배치 대기열로 보냅니다."""
+    global _collecting
+    _collecting = True
+    try:
+        yield
+    finally:
+        _collecting = False
+
+def collecting() -> bool:
+    return _collecting
+
+def defer(key: str, payload: dict, call_type: str, model: str = gemini_client.TARGET_MODEL) -> dict:
+    """
+    요청을 대기열에 넣고 BatchDeferred를 던집니다.
+    이미 MAX_KEY_FAILURES번 실패한 요청이면 던지지 않고 post_generate와 같은 형태의 실패 결과를 반환합니다.
+    """
+    failures = _load_state()["failures"].get(key, 0)
+    if failures >= MAX_KEY_FAILURES:
+        return {"ok": False, "status": 0, "text": f"Batch request failed {failures} times ({key[:12]})"}
+    with _lock:
+        _pending.setdefault(key, {"request": payload, "call_type": call_type, "model": model})
+    raise BatchDeferred(key)
+
+def pending_count() -> int:
+    with _lock:
+        return len(_pending)
+
+# =========================================================
+# 🗂️ 잡 상태 파일 (재시작 시 이어서 수집)
+# =========================================================
+def _state_path() -> str:
+    return os.path.join(BATCH_DIR, "state.json")
+
+def _load_state() -> dict:
+    global _state
+    with _lock:
+        if _state is None:
+            try:
+                with open(_state_path(), "r", encoding="utf-8") as f:
+                    _state = json.load(f)
+            except (OSError, ValueError):
+                _state = {}
+            for k in ("jobs", "files", "failures"):
+                _state.setdefault(k, [] if k == "jobs" else {})
+        return _state
+
+def _save_state():
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    tmp = _state_path() + ".tmp"
+    with _lock:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, _state_path())
+
+def open_jobs() -> list:
+    """제출됐지만 아직 결과를 적재하지 못한 잡 목록"""
+    return [j for j in _load_state()["jobs"] if not j.get("closed")]
+
+# =========================================================
+# 🌐 Files API / Batch REST 호출
+# =========================================================
+def _root_url(prefix: str) -> str:
+    # https://.../v1beta → https://.../upload/v1beta, https://.../download/v1beta
+    base, version = gemini_client.API_BASE.rsplit("/", 1)
+    return f"{base}/{prefix}/{version}"
+
+def upload_file(data: bytes, mime_type: str, display_name: str) -> dict:
+    """Files API resumable 업로드 (start → upload, finalize). Returns: {"name", "uri", ...}"""
+    if not gemini_client.api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    session = gemini_client.get_session()
+    timeout = (gemini_client.CONNECT_TIMEOUT, gemini_client.DEFAULT_READ_TIMEOUT)
+    start = session.post(
+        f"{_root_url('upload')}/files?key={gemini_client.api_key}",
+        headers={
+            "X-Goog-Upload-Protocol": "resumable",
+            "X-Goog-Upload-Command": "start",
+            "X-Goog-Upload-Header-Content-Length": str(len(data)),
+            "X-Goog-Upload-Header-Content-Type": mime_type,
+        },
+        json={"file": {"display_name": display_name}},
+        timeout=timeout,
+    )
+    upload_url = start.headers.get("X-Goog-Upload-URL")
+    if start.status_code != 200 or not upload_url:
+        raise RuntimeError(f"파일 업로드 시작 실패 ({start.status_code}): {start.text[:200]}")
+
+    resp = session.post(
+        upload_url,
+        headers={"Content-Type": mime_type, "X-Goog-Upload-Offset": "0", "X-Goog-Upload-Command": "upload, finalize"},
+        data=data,
+        timeout=timeout,
+    )
+    if resp.status_code != 200:
+        raise RuntimeError(f"파일 업로드 실패 ({resp.status_code}): {resp.text[:200]}")
+    return resp.json()["file"]
+
+def download_file(name: str) -> bytes:
+    url = f"{_root_url('download')}/{name}:download?alt=media&key={gemini_client.api_key}"
+    try:
+        resp = gemini_client.get_session().get(url, timeout=(gemini_client.CONNECT_TIMEOUT, gemini_client.DEFAULT_READ_TIMEOUT))
+    except requests.RequestException as e:
+        raise RuntimeError(f"결과 파일 다운로드 실패 ({name}): {e}")
+    if resp.status_code != 200:
+        raise RuntimeError(f"결과 파일 다운로드 실패 ({resp.status_code}): {resp.text[:200]}")
+    return resp.content
+
+def _batch_state(op: dict) -> str:
+    return (op.get("metadata") or {}).get("state") or op.get("state") or ""
+
+# =========================================================
+# 📤 제출
+# =========================================================
+def _externalize_pdfs(payload: dict, state: dict) -> dict:
+    """
+    inline PDF(base64)를 Files API 참조(file_data)로 바꿉니다.
+    같은 IR 자료를 쓰는 수십 개 요청이 잡 파일 안에 PDF를 반복해서 싣지 않도록 내용 해시당 1회만 업로드합니다.
+    """
+    parts = []
+    for part in payload["contents"][0]["parts"]:
+        inline = part.get("inline_data")
+        if not inline:
+            parts.append(part)
+            continue
+        digest = hashlib.sha256(inline["data"].encode("ascii")).hexdigest()
+        entry = state["files"].get(digest)
+        if not entry or time.time() - entry["uploaded"] > FILE_REUSE_SEC:
+            info = upload_file(base64.b64decode(inline["data"]), inline["mime_type"], f"pdf-{digest[:12]}")
+            entry = {"name": info["name"], "uri": info["uri"], "uploaded": time.time()}
+            state["files"][digest] = entry
+            print(f"      ⬆️ PDF 업로드: {entry['name']} ({len(inline['data']) * 3 // 4 / 1024 / 1024:.1f} MB)")
+        parts.append({"file_data": {"mime_type": inline["mime_type"], "file_uri": entry["uri"]}})
+    return {**payload, "contents": [{**payload["contents"][0], "parts": parts}]}
+
+def submit_pending(wave: int) -> list:
+    """대기열을 모델별 JSONL 잡 파일로 직렬화해 배치 잡을 생성합니다. Returns: 생성된 잡 레코드 목록"""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending: return []
+
+    state = _load_state()
+    by_model = {}
+    for key, item in pending.items():
+        by_model.setdefault(item["model"], {})[key] = item
+
+    jobs = []
+    stamp = f"{datetime.datetime.now():%Y%m%d_%H%M%S}"
+    os.makedirs(BATCH_DIR, exist_ok=True)
+    for model, items in by_model.items():
+        job_file = os.path.join(BATCH_DIR, f"wave{wave:02d}_{stamp}_{model.rsplit('/', 1)[-1]}.jsonl")
+        with open(job_file, "w", encoding="utf-8") as f:
+            for key, item in items.items():
+                request = _externalize_pdfs(item["request"], state)
+                f.write(json.dumps({"key": key, "request": request}, ensure_ascii=False) + "\n")
+
+        with open(job_file, "rb") as f:
+            info = upload_file(f.read(), "application/jsonl", os.path.basename(job_file))
+        res = gemini_client.api_request("POST", f"{model}:batchGenerateContent", {
+            "batch": {
+                "display_name": os.path.splitext(os.path.basename(job_file))[0],
+                "input_config": {"file_name": info["name"]},
+            }
+        })
+        if not res["ok"]:
+            _save_state()
+            raise RuntimeError(f"배치 잡 생성 실패 ({res.get('status')}): {res.get('text', '')[:200]}")
+
+        job = {
+            "name": res["json"]["name"],
+            "model": model,
+            "wave": wave,
+            "job_file": job_file,
+            "requests": len(items),
+            "call_types": {key: item["call_type"] for key, item in items.items()},
+            "submitted": time.time(),
+            "state": _batch_state(res["json"]) or "BATCH_STATE_PENDING",
+        }
+        state["jobs"].append(job)
+        jobs.append(job)
+        print(f"   📤 [Batch] {job['name']} 제출 (wave {wave}, 요청 {len(items)}건 → {job_file})")
+    _save_state()
+    return jobs
+
+# =========================================================
+# ⏳ 폴링 / 결과 적재
+# =========================================================
+def wait(job: dict, interval: float = None, timeout: float = None) -> dict:
+    """잡이 종료 상태가 될 때까지 폴링합니다. 시간 초과 시 None (잡은 상태 파일에 남아 다음 실행에서 이어짐)"""
+    interval = POLL_INTERVAL if interval is None else interval
+    deadline = time.time() + (POLL_TIMEOUT if timeout is None else timeout)
+    last = None
+    while True:
+        res = gemini_client.api_request("GET", job["name"])
+        if res["ok"]:
+            op = res["json"]
+            state = _batch_state(op)
+            if state != last:
+                elapsed = time.time() - job["submitted"]
+                print(f"   ⏳ [Batch] {job['name']}: {state} ({elapsed:.0f}s 경과)")
+                last = state
+            if state in TERMINAL_STATES or op.get("done"):
+                job["state"] = state
+                return op
+        else:
+            print(f"   ⚠️ [Batch] 상태 조회 실패 ({res.get('status')}), 다음 주기에 재시도")
+        if time.time() >= deadline:
+            print(f"   ⚠️ [Batch] {job['name']} 대기 시간 초과 - 다음 실행에서 이어서 수집합니다.")
+            return None
+        time.sleep(interval)
+
+def _result_lines(op: dict) -> list:
+    out = op.get("response") or (op.get("metadata") or {}).get("output") or {}
+    if out.get("responsesFile"):
+        raw = download_file(out["responsesFile"]).decode("utf-8")
+        return [json.loads(line) for line in raw.splitlines() if line.strip()]
+    # 인라인 요청으로 만든 잡은 결과도 인라인으로 돌아옵니다.
+    inlined = (out.get("inlinedResponses") or {}).get("inlinedResponses") or []
+    return [{"key": (r.get("metadata") or {}).get("key"), **r} for r in inlined]
+
+def ingest(job: dict, op: dict) -> dict:
+    """
+    배치 결과를 응답 캐시에 적재합니다. 실패한 요청은 다음 wave에서 다시 모이며, 실패 횟수는 키별로 누적됩니다.
+    Returns: {"ok": n, "failed": n}
+    """
+    state = _load_state()
+    call_types = job.get("call_types", {})
+    ok, failed = 0, 0
+    seen = set()
+
+    if _batch_state(op) == SUCCEEDED:
+        for line in _result_lines(op):
+            key = line.get("key")
+            if key not in call_types: continue
+            seen.add(key)
+            body = line.get("response")
+            if body and body.get("candidates"):
+                response_cache.put(key, body, call_types[key])
+                state["failures"].pop(key, None)
+                ok += 1
+            else:
+                state["failures"][key] = state["failures"].get(key, 0) + 1
+                failed += 1
+
+    # 잡 자체가 실패/만료됐거나 결과 줄이 빠진 요청도 실패로 집계
+    for key in call_types:
+        if key not in seen:
+            state["failures"][key] = state["failures"].get(key, 0) + 1
+            failed += 1
+
+    job["closed"] = True
+    job["ingested"] = {"ok": ok, "failed": failed}
+    _save_state()
+    print(f"   📥 [Batch] {job['name']} 적재 완료: 성공 {ok}건 / 실패 {failed}건 ({_batch_state(op)})")
+    return job["ingested"]
+
+def resume(interval: float = None, timeout: float = None) -> int:
+    """이전 실행에서 제출만 하고 끝난 잡을 마저 기다려 적재합니다. Returns: 적재한 잡 수"""
+    if not open_jobs():
+        # 이어받을 잡이 없으면 새 실행이므로, 지난 실행에서 포기한 요청도 다시 배치에 태웁니다.
+        _load_state()["failures"].clear()
+        return 0
+    done = 0
+    for job in open_jobs():
+        print(f"   🔁 [Batch] 이전 실행의 잡 이어받기: {job['name']} (wave {job['wave']})")
+        op = wait(job, interval, timeout)
+        if op is None: continue
+        ingest(job, op)
+        done += 1
+    return done
+
+def stats() -> dict:
+    state = _load_state()
+    jobs = state["jobs"]
+    return {
+        "jobs": len(jobs),
+        "open": sum(1 for j in jobs if not j.get("closed")),
+        "requests": sum(j["requests"] for j in jobs),
+        "ok": sum((j.get("ingested") or {}).get("ok", 0) for j in jobs),
+        "failed": sum((j.get("ingested") or {}).get("failed", 0) for j in jobs),
+    }
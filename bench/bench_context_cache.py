@@ -0,0 +1,60 @@
+"""
+기업 단위 Context Cache 사용 시 에이전트 호출당 업로드 바이트/시간 비교 (로컬 스텁 서버)
+
+실행: python -m bench.bench_context_cache [--pdf-mb 20] [--extra-kb 500] [--calls 10]
+"""
+import os
+import time
+import argparse
+import tempfile
+
+from bench.stub_server import start_stub_server
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf-mb", type=float, default=20)
+    ap.add_argument("--extra-kb", type=float, default=500)
+    ap.add_argument("--calls", type=int, default=10, help="기업 1곳당 PDF를 참조하는 호출 수")
+    args = ap.parse_args()
+
+    server, base_url = start_stub_server()
+    os.environ["GEMINI_API_BASE"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+
+    import utils
+    import context_cache
+    import rate_limiter
+    # 임의 바이트 PDF는 페이지 수를 셀 수 없어 크기 기준 추정으로 예약되므로, 쿼터 대기가 비교를 왜곡하지 않게 끕니다.
+    rate_limiter.configure(rpm=0, tpm=0)
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(os.urandom(int(args.pdf_mb * 1024 * 1024)))
+        pdf_path = f.name
+    extra_text = "보충 문서 " * int(args.extra_kb * 1024 / 14)
+
+    def run_company():
+        for i in range(args.calls):
+            prompt = f"[Agent {i}] 분석 지시\n\n[보충 문서 데이터]\n{extra_text}\n\n[작성 지침] ..."
+            res = utils.call_gemini(prompt, pdf_path=pdf_path)
+            assert res["ok"], res
+
+    print(f"🏁 PDF {args.pdf_mb}MB + 보충 {args.extra_kb}KB, 호출 {args.calls}회")
+    for label, use_cache in [("inline (기존)", False), ("context cache", True)]:
+        utils.clear_pdf_cache()
+        before = server.state.bytes_in
+        t0 = time.perf_counter()
+        if use_cache:
+            with context_cache.company_context(pdf_path, extra_text):
+                run_company()
+        else:
+            run_company()
+        wall = time.perf_counter() - t0
+        sent = (server.state.bytes_in - before) / 1024 / 1024
+        print(f"   {label:<14} wall {wall:6.2f}s | 업로드 {sent:8.1f} MB | 호출당 {sent / args.calls:6.2f} MB")
+
+    assert not server.state.caches, "캐시 핸들이 삭제되지 않았습니다."
+    os.remove(pdf_path)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
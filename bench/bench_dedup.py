@@ -0,0 +1,96 @@
+"""
+보충 문서 중복 페이지 제거: main.prepare_company의 combined_extra_text 크기 (중복 제거 전 vs 후, 로컬, 네트워크 없음)
+
+임시 기업 폴더에 흔한 구성을 만듭니다.
+  - IR.pdf              : 메인 IR 덱 (--pages 페이지, 페이지마다 다른 내용) → 비교 기준, 에이전트에는 PDF로 전송
+  - IR_전체추출결과.md   : 메인 덱의 Vision 추출본 (Markdown 표/굵게) → 전부 빠져야 함
+  - IR_구버전.pdf        : 예전 버전 덱 (일부 페이지만 새 내용, 일부는 숫자만 조금 다름) → 새 페이지만 남아야 함
+  - 기타_메모.md         : 다른 문서와 겹치지 않는 메모 → 그대로 남아야 함
+표지처럼 짧은 페이지는 비교하지 않고 남기며, 같은 템플릿(제목 형식)을 쓰는 다른 페이지는 남는지도 확인합니다.
+
+실행: python -m bench.bench_dedup [--pages 40] [--new-every 4]
+"""
+import os
+import time
+import shutil
+import random
+import argparse
+import tempfile
+
+import fitz
+
+def _page_lines(n: int, version: int = 0) -> list:
+    rnd = random.Random(n)
+    items = ["매출액", "영업이익", "당기순이익", "EBITDA", "수주잔고", "연구개발비", "고객사 수", "재구매율", "생산능력", "가동률"]
+    rnd.shuffle(items)
+    lines = [f"{item} {2021 + k % 4}년 {rnd.randint(10, 9999):,}억원 (YoY {rnd.randint(-30, 80)}%)" for k, item in enumerate(items * 2)]
+    lines += [f"{rnd.choice(['국내', '북미', '유럽', '동남아'])} 시장 {rnd.choice(['확대', '진입', '점유율 상승'])} 계획 - 파트너 {rnd.randint(2, 40)}곳과 협의" for _ in range(6)]
+    if version: lines[0] = lines[0].replace("억원", "억원 (수정)")  # 숫자 한 줄만 바뀐 예전 버전 페이지
+    return lines
+
+def _make_pdf(path: str, pages: list):
+    doc = fitz.open()
+    for n, lines in pages:
+        page = doc.new_page()
+        page.insert_text((36, 40), f"IR Deck - Section {n}", fontsize=12)
+        page.insert_textbox(fitz.Rect(36, 60, 560, 800), "\n".join(lines), fontsize=8, fontname="korea")
+    doc.save(path)
+    doc.close()
+
+def _vision_md(path: str, pages: list, pdf_name: str):
+    """test_vision_extractor 출력 형식 (Markdown 표 + 굵게)"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {pdf_name} 전체 추출 결과\n\n")
+        for i, (n, lines) in enumerate(pages):
+            f.write(f"## Page {i + 1}\n\n**IR Deck - Section {n}**\n\n| 항목 | 내용 |\n|---|---|\n")
+            f.write("\n".join(f"| {l.split(' ', 1)[0]} | {l.split(' ', 1)[1]} |" for l in lines) + "\n\n---\n\n")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--new-every", type=int, default=4, help="예전 버전 덱에서 N페이지마다 1페이지는 새 내용")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_dedup_")
+    os.environ["PARSE_CACHE_DIR"] = os.path.join(tmp, "parse_cache")
+    import main as pipeline
+    import dedup
+    try:
+        d = os.path.join(tmp, "모의기업")
+        os.makedirs(d)
+        deck = [(n, _page_lines(n)) for n in range(1, args.pages + 1)]
+        old = [(n + 1000, _page_lines(n + 1000)) if n % args.new_every == 0 else (n, _page_lines(n, version=n % 3 == 1))
+               for n in range(1, args.pages + 1)]
+        new_pages = sum(1 for n, _ in old if n > 1000)
+        paths = {name: os.path.join(d, name) for name in ("IR.pdf", "IR_구버전.pdf", "IR_전체추출결과.md", "기타_메모.md")}
+        _make_pdf(paths["IR.pdf"], deck)
+        _make_pdf(paths["IR_구버전.pdf"], old)
+        _vision_md(paths["IR_전체추출결과.md"], deck, "IR.pdf")
+        memo = "# 메모\n\n" + "\n".join(_page_lines(5000 + k)[k] for k in range(20))
+        with open(paths["기타_메모.md"], "w", encoding="utf-8") as f:
+            f.write(memo)
+        files = {"IR": [paths["IR.pdf"], paths["IR_구버전.pdf"]], "기타": [paths["IR_전체추출결과.md"], paths["기타_메모.md"]]}
+        print(f"🏁 보충 문서 중복 제거 | 메인 덱 {args.pages}p + Vision 추출본 + 구버전 덱(새 페이지 {new_pages}) + 메모")
+
+        dedup.DEDUP = False
+        t0 = time.perf_counter()
+        _, before = pipeline.prepare_company(files)
+        t_before = time.perf_counter() - t0
+        dedup.DEDUP = True
+        t0 = time.perf_counter()
+        _, after = pipeline.prepare_company(files)
+        t_after = time.perf_counter() - t0
+
+        s = dedup.stats()
+        assert s["dropped"] == args.pages * 2 - new_pages, s
+        assert f"Section {1000 + args.new_every}" in after and memo in after and "IR_전체추출결과.md" not in after
+        kept_old = after.count("--- [PDF Page ")
+        assert kept_old == new_pages, kept_old
+        print(f"   보충 텍스트 {len(before.encode('utf-8')):,} → {len(after.encode('utf-8')):,} bytes "
+              f"({1 - len(after.encode('utf-8')) / len(before.encode('utf-8')):.0%} 감소) | "
+              f"제거 페이지 {s['dropped']}/{s['units']} | 준비 시간 {t_before:.2f}s → {t_after:.2f}s (메인 PDF 파싱 포함)")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+extract_text_from_excel: 예전 경로(pandas.read_excel + tabulate) vs 고속 경로(read-only 스트리밍 + 직접 작성 Markdown)
+
+- 통합 문서 크기(시트당 행 수)별로 임시 .xlsx를 만들어 변환 시간, 출력 크기, 추정 토큰을 비교합니다.
+- 고속 경로는 시트별 프로세스 풀 변환(--workers 2 이상)도 함께 측정합니다. (첫 호출의 워커 기동 비용은 워밍업으로 제외)
+- 두 경로의 데이터 행 수가 같은지 확인합니다.
+
+실행: python -m bench.bench_excel [--rows 1000,10000,50000] [--sheets 3] [--cols 12] [--workers 4]
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import datetime
+import tempfile
+
+import openpyxl
+
+import parser as doc_parser
+from token_budget import estimate_tokens
+
+def _make_workbook(path: str, rows: int, sheets: int, cols: int, seed: int = 0):
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    base = datetime.datetime(2020, 1, 1)
+    for s in range(sheets):
+        ws = wb.create_sheet(f"시트{s + 1}")
+        ws.append(["일자", "거래처", "품목"] + [f"지표{c}" for c in range(cols - 3)])
+        for r in range(rows):
+            row = [base + datetime.timedelta(days=r % 1500), f"거래처{rng.randint(1, 500)}", rng.choice(["소재", "부품", "장비"])]
+            row += [rng.randint(0, 10 ** 7) if c % 2 else (round(rng.uniform(-100, 100), 3) if rng.random() > 0.1 else None)
+                    for c in range(cols - 3)]
+            ws.append(row)
+    wb.save(path)
+
+def _data_rows(text: str) -> int:
+    # 표 행 수 - 시트마다 헤더 + 구분선 2줄
+    return sum(1 for line in text.split("\n") if line.startswith("|")) - 2 * text.count("--- [Excel Sheet:")
+
+def _timed(fn) -> tuple:
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", default="1000,10000,50000", help="시트당 행 수 (쉼표 구분)")
+    ap.add_argument("--sheets", type=int, default=3)
+    ap.add_argument("--cols", type=int, default=12)
+    ap.add_argument("--workers", type=int, default=doc_parser.PARSER_WORKERS)
+    args = ap.parse_args()
+
+    doc_parser.PARSER_WORKERS = max(2, args.workers)
+    engine = doc_parser._fast_excel_engine("x.xlsx")
+    print(f"🏁 엑셀 {args.sheets}시트 x {args.cols}열 | 고속 엔진 {engine} | workers {doc_parser.PARSER_WORKERS} (CPU {os.cpu_count()})")
+
+    tmp = tempfile.mkdtemp(prefix="bench_excel_")
+    try:
+        for i, rows in enumerate(int(x) for x in args.rows.split(",") if x.strip()):
+            path = os.path.join(tmp, f"wb_{rows}.xlsx")
+            _make_workbook(path, rows, args.sheets, args.cols)
+            if i == 0: doc_parser.extract_text_from_excel(path, parallel=True)  # 워커 기동 워밍업
+
+            t_old, old = _timed(lambda: doc_parser._join(doc_parser._iter_excel_pandas(path)))
+            t_fast, fast = _timed(lambda: doc_parser.extract_text_from_excel(path, parallel=False))
+            t_par, par = _timed(lambda: doc_parser.extract_text_from_excel(path, parallel=True))
+            assert fast == par, "병렬 변환 결과가 단일 프로세스 결과와 다릅니다."
+            assert _data_rows(old) == _data_rows(fast) == rows * args.sheets, (_data_rows(old), _data_rows(fast))
+
+            print(f"   {rows:>7,}행/시트 ({os.path.getsize(path) / 1024 / 1024:5.1f} MB) | "
+                  f"pandas+tabulate {t_old:7.2f}s | fast {t_fast:6.2f}s ({t_old / t_fast:4.1f}x) | "
+                  f"fast+pool {t_par:6.2f}s ({t_old / t_par:4.1f}x) | "
+                  f"토큰 {estimate_tokens(old):,} → {estimate_tokens(fast):,}")
+    finally:
+        doc_parser.shutdown_process_pool()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+공유 keep-alive 세션(gemini_client) vs 호출마다 requests.post 비교 마이크로 벤치마크
+
+실행: python -m bench.bench_http_client [--calls 200] [--workers 5] [--latency 0.0]
+"""
+import os
+import time
+import argparse
+import statistics
+import concurrent.futures
+import requests
+
+from bench.stub_server import start_stub_server
+
+def _run(fn, calls: int, workers: int) -> list:
+    latencies = []
+    def one(_):
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        latencies = list(executor.map(one, range(calls)))
+    return latencies
+
+def _report(label: str, latencies: list, wall: float):
+    lat_ms = sorted(x * 1000 for x in latencies)
+    p95 = lat_ms[int(len(lat_ms) * 0.95) - 1]
+    print(f"   {label:<22} wall {wall:7.3f}s | p50 {statistics.median(lat_ms):7.2f}ms | p95 {p95:7.2f}ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.0, help="스텁 서버 응답 지연(초)")
+    args = ap.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    os.environ["GEMINI_API_BASE"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+
+    import gemini_client
+    import rate_limiter
+    # 연결 재사용만 비교하도록 클라이언트 쪽 쿼터 대기는 끕니다.
+    rate_limiter.configure(rpm=0, tpm=0)
+    gemini_client.API_BASE = base_url
+    gemini_client.api_key = gemini_client.api_key or "bench-key"
+
+    payload = {"contents": [{"parts": [{"text": "ping" * 256}]}]}
+    url = gemini_client.build_url()
+
+    def naive():
+        requests.post(url, headers=gemini_client.HEADERS, json=payload, timeout=30).json()
+
+    def pooled():
+        gemini_client.post_generate(payload, read_timeout=30)
+
+    print(f"🏁 {args.calls} calls x {args.workers} workers (stub latency {args.latency}s)")
+    for label, fn in [("requests.post (no pool)", naive), ("gemini_client (pooled)", pooled)]:
+        t0 = time.perf_counter()
+        lat = _run(fn, args.calls, args.workers)
+        _report(label, lat, time.perf_counter() - t0)
+
+    gemini_client.close_session()
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+main.prepare_company의 보충 문서 파싱 단계: 스레드 풀 vs 프로세스 풀 처리량 비교 (parse_cache 끔)
+
+임시 폴더에 PDF / XLSX / DOCX / PPTX / CSV / MD가 섞인 기업 자료를 만들고
+parse_stage.parse_documents를 executor별로 실행합니다. 두 방식의 결과 텍스트가 같은지도 확인합니다.
+프로세스 풀은 워커 기동(spawn) 비용을 따로 보여 주기 위해 첫 실행(cold)과 두 번째 실행(warm)을 나눠 측정합니다.
+
+실행: python -m bench.bench_parse_stage [--pdf-pages 150] [--xlsx-rows 8000] [--copies 2] [--workers 4] [--timeout 0]
+      --timeout을 주면 해당 초로 파일별 시간 제한을 걸어 시간 초과 처리도 확인합니다.
+      --hang-sec: 멈춘 파일 뒤에 줄 선 파일 확인용 작업 시간 (워커 수만큼 멈추는 작업 + 빠른 작업, 시간 제한 1초)
+                  멈춘 작업이 끝나기를 기다리지 않고 빠른 작업까지 파싱한 뒤 돌아오는지 executor별로 확인합니다.
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import docx
+from pptx import Presentation
+
+import parse_cache
+import parse_stage
+from bench.bench_pdf_extract import _make_pdf
+from bench.bench_excel import _make_workbook
+
+def _make_folder(root: str, pdf_pages: int, xlsx_rows: int, copies: int) -> list:
+    paths = []
+    for i in range(copies):
+        p = os.path.join(root, f"IR_자료_{i}.pdf"); _make_pdf(p, pdf_pages); paths.append(p)
+        p = os.path.join(root, f"재무_{i}.xlsx"); _make_workbook(p, xlsx_rows, 2, 10, seed=i); paths.append(p)
+        d = docx.Document()
+        for n in range(400): d.add_paragraph(f"{n}. 사업 개요 및 연혁 - 주요 고객사 납품 실적 {n * 7}건")
+        t = d.add_table(rows=60, cols=5)
+        for r in range(60):
+            for c in range(5): t.cell(r, c).text = f"R{r}C{c}"
+        p = os.path.join(root, f"기타_{i}.docx"); d.save(p); paths.append(p)
+        prs = Presentation()
+        for n in range(40):
+            s = prs.slides.add_slide(prs.slide_layouts[1])
+            s.shapes.title.text = f"홍보 슬라이드 {n}"
+            s.placeholders[1].text = "제품 라인업\n고객 사례\n" * 5
+        p = os.path.join(root, f"홍보_{i}.pptx"); prs.save(p); paths.append(p)
+        p = os.path.join(root, f"기타_{i}.csv")
+        with open(p, "w", encoding="cp949") as f:
+            f.write("품목,수량,단가\n" + "".join(f"부품{n},{n},{n * 13}\n" for n in range(5000)))
+        paths.append(p)
+        p = os.path.join(root, f"기타_메모_{i}.md")
+        with open(p, "w", encoding="utf-8") as f: f.write("# 메모\n- 핵심 인력 12명\n")
+        paths.append(p)
+    return paths
+
+def _sleep_job(spec: str, starts=None):
+    """확인용 파싱 작업: "이름:초" 만큼 멈춘 뒤 이름을 돌려줍니다. (워커 프로세스에서도 돌도록 최상위 함수)"""
+    starts = starts or parse_stage._start_queue
+    if starts is not None: starts.put((spec, time.time()))
+    name, sec = spec.rsplit(":", 1)
+    time.sleep(float(sec))
+    return name
+
+def _check_hang(hang_sec: float):
+    workers = parse_stage.PARSE_WORKERS
+    specs = [f"hung{i}:{hang_sec}" for i in range(workers)] + [f"fast{i}:0.1" for i in range(workers)]
+    for use_process in (True, False):
+        t0 = time.perf_counter()
+        out = parse_stage._parse_pending(specs, use_process, 1.0, job=_sleep_job)
+        elapsed = time.perf_counter() - t0
+        assert all(out[s] == "" for s in specs[:workers]), out
+        assert all(out[s] == s.split(":")[0] for s in specs[workers:]), out
+        assert elapsed < hang_sec, f"멈춘 작업이 끝날 때까지 기다렸습니다 ({elapsed:.1f}s)"
+        print(f"   {'process' if use_process else 'thread':<7} 멈춘 파일 {workers}개 뒤 빠른 파일 {workers}개: {elapsed:5.2f}s "
+              f"(멈춘 작업 {hang_sec:.0f}s, 시간 제한 1s)")
+
+def _timed(paths: list, executor: str, timeout: float) -> tuple:
+    t0 = time.perf_counter()
+    texts = parse_stage.parse_documents(paths, executor=executor, timeout=timeout)
+    return time.perf_counter() - t0, texts
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf-pages", type=int, default=150)
+    ap.add_argument("--xlsx-rows", type=int, default=8000)
+    ap.add_argument("--copies", type=int, default=2, help="파일 종류별 개수")
+    ap.add_argument("--workers", type=int, default=parse_stage.PARSE_WORKERS)
+    ap.add_argument("--timeout", type=float, default=0, help="파일별 시간 제한(초). 0이면 기본값")
+    ap.add_argument("--hang-sec", type=float, default=8, help="멈춘 파일 확인용 작업 시간(초). 0이면 건너뜀")
+    args = ap.parse_args()
+
+    # spawn 워커는 환경변수로 설정을 다시 읽으므로 부모/워커 모두 캐시를 끕니다.
+    os.environ["PARSE_CACHE"] = "0"
+    parse_cache.ENABLED = False
+    parse_stage.PARSE_WORKERS = max(2, args.workers)
+    parse_stage.PARSE_PROCESS_MIN_BYTES = 0
+    timeout = args.timeout or None
+
+    tmp = tempfile.mkdtemp(prefix="bench_parse_")
+    try:
+        paths = _make_folder(tmp, args.pdf_pages, args.xlsx_rows, args.copies)
+        size = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+        print(f"🏁 보충 문서 {len(paths)}개 ({size:.1f} MB) | workers {parse_stage.PARSE_WORKERS} (CPU {os.cpu_count()})")
+
+        t_thread, by_thread = _timed(paths, "thread", timeout)
+        t_cold, by_process = _timed(paths, "process", timeout)
+        t_warm, _ = _timed(paths, "process", timeout)
+        if not timeout:
+            assert by_thread == by_process, "스레드/프로세스 파싱 결과가 다릅니다."
+        chars = sum(len(t) for t in by_thread)
+        print(f"   thread  {t_thread:6.2f}s | {size / t_thread:5.2f} MB/s ({chars:,}자)")
+        print(f"   process {t_cold:6.2f}s (cold, 워커 기동 포함) | {t_warm:6.2f}s (warm) → {t_thread / t_warm:4.2f}x")
+        if args.hang_sec:
+            _check_hang(args.hang_sec)
+        print(f"   {parse_stage.stats()}")
+    finally:
+        parse_stage.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+parser.extract_text_from_pdf 단일 프로세스 vs 페이지 구간 병렬(프로세스 풀) 비교
+
+- --pdf를 주지 않으면 PyMuPDF로 텍스트가 빽빽한 N페이지 IR 덱을 임시로 만듭니다.
+- main처럼 스레드 풀에서 PDF 여러 개를 동시에 추출하는 경우(--files)도 함께 측정합니다.
+- 병렬 결과가 단일 프로세스 결과와 글자 단위로 같은지 확인합니다.
+- 첫 병렬 호출의 워커 기동(spawn) 비용은 워밍업에서 따로 표시합니다.
+
+실행: python -m bench.bench_pdf_extract [--pages 240] [--files 3] [--workers 4] [--chunk 40] [--pdf path.pdf]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import concurrent.futures
+
+import fitz
+
+import parser as doc_parser
+
+def _make_pdf(path: str, pages: int):
+    doc = fitz.open()
+    body = "\n".join(f"{i:03d}. 매출액 1,234억원 / 영업이익 210억원 / YoY +12.5% Revenue EBITDA margin" for i in range(60))
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((36, 40), f"IR Deck Page {n + 1}", fontsize=14)
+        # 한글 글리프 없이도 텍스트 레이어가 남도록 기본 폰트 + 작은 글자로 채웁니다.
+        page.insert_textbox(fitz.Rect(36, 60, 560, 800), body, fontsize=6)
+    doc.save(path)
+    doc.close()
+
+def _timed(fn, *args) -> tuple:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+def _concurrent(paths: list, parallel: bool) -> list:
+    with concurrent.futures.ThreadPoolExecutor() as ex:
+        return list(ex.map(lambda p: doc_parser.extract_text_from_pdf(p, parallel=parallel), paths))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=240)
+    ap.add_argument("--files", type=int, default=3, help="동시에 추출할 PDF 수 (main의 보충 문서 병렬 파싱 재현)")
+    ap.add_argument("--workers", type=int, default=doc_parser.PARSER_WORKERS)
+    ap.add_argument("--chunk", type=int, default=doc_parser.PDF_CHUNK_PAGES)
+    ap.add_argument("--pdf", default=None, help="실제 PDF로 측정하려면 경로 지정")
+    args = ap.parse_args()
+
+    doc_parser.PARSER_WORKERS = max(2, args.workers)
+    doc_parser.PDF_CHUNK_PAGES = args.chunk
+
+    tmp = tempfile.mkdtemp(prefix="bench_pdf_")
+    try:
+        if args.pdf:
+            paths = [args.pdf] * args.files
+        else:
+            src = os.path.join(tmp, "deck_0.pdf")
+            _make_pdf(src, args.pages)
+            paths = [src] + [shutil.copy(src, os.path.join(tmp, f"deck_{i}.pdf")) for i in range(1, args.files)]
+        with fitz.open(paths[0]) as d: pages = len(d)
+
+        print(f"🏁 PDF {pages}페이지 x {args.files}개 | workers {doc_parser.PARSER_WORKERS} / chunk {args.chunk} "
+              f"(CPU {os.cpu_count()}, 임계값 {doc_parser.PDF_PARALLEL_MIN_PAGES}p)")
+        warm, _ = _timed(doc_parser.extract_text_from_pdf, paths[0], True)
+        print(f"   워밍업(워커 기동 포함) {warm:6.2f}s")
+
+        t_serial, serial = _timed(doc_parser.extract_text_from_pdf, paths[0], False)
+        t_par, par = _timed(doc_parser.extract_text_from_pdf, paths[0], True)
+        assert serial == par, "병렬 추출 결과가 단일 프로세스 결과와 다릅니다."
+        print(f"   PDF 1개   single {t_serial:6.2f}s | process-pool {t_par:6.2f}s → {t_serial / t_par:4.2f}x "
+              f"({len(serial):,}자, 결과 동일)")
+
+        t_serial, _ = _timed(_concurrent, paths, False)
+        t_par, _ = _timed(_concurrent, paths, True)
+        print(f"   PDF {args.files}개 동시(스레드 풀) single {t_serial:6.2f}s | process-pool {t_par:6.2f}s "
+              f"→ {t_serial / t_par:4.2f}x")
+    finally:
+        doc_parser.shutdown_process_pool()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+PDF 본문 + 표 추출: 예전 2회 처리(PyMuPDF 본문 → pdfplumber로 다시 열어 표) vs 1회 처리(parser.extract_pdf_text_and_tables)
+
+- --pdf를 주지 않으면 괘선 표가 몇 페이지마다 들어간 N페이지 IR 덱을 임시로 만듭니다.
+- 1회 처리는 단일 프로세스와 페이지 구간 병렬(프로세스 풀)을 따로 측정합니다. (첫 병렬 호출의 워커 기동 비용은 워밍업으로 제외)
+- 본문 텍스트가 extract_text_from_pdf와 같은지, 표 Markdown이 pdfplumber 결과와 같은지 확인합니다.
+  (실제 IR 자료는 두 라이브러리의 표 탐지 결과가 조금 다를 수 있으므로 표는 개수만 비교해 표시)
+
+실행: python -m bench.bench_pdf_tables [--pages 60] [--table-every 3] [--workers 4] [--pdf a.pdf,b.pdf]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import fitz
+
+import parser as doc_parser
+from table_extractor import TableExtractor
+
+def _make_ir_deck(path: str, pages: int, table_every: int):
+    doc = fitz.open()
+    body = "\n".join(f"{i:02d}. 매출액 1,234억원 / 영업이익 210억원 Revenue EBITDA margin" for i in range(40))
+    for n in range(pages):
+        page = doc.new_page()
+        page.insert_text((36, 40), f"IR Deck Page {n + 1} - Financial Highlights", fontsize=12)
+        if table_every and n % table_every == 0:
+            x0, y0, cw, rh, rows, cols = 50, 70, 110, 20, 8, 4
+            for r in range(rows + 1): page.draw_line((x0, y0 + r * rh), (x0 + cols * cw, y0 + r * rh))
+            for c in range(cols + 1): page.draw_line((x0 + c * cw, y0), (x0 + c * cw, y0 + rows * rh))
+            for r in range(rows):
+                for c in range(cols):
+                    cell = ("Item" if c == 0 else f"FY{2021 + c}") if r == 0 else (f"Line {r}" if c == 0 else f"{r * c * 1234:,}")
+                    page.insert_text((x0 + c * cw + 4, y0 + r * rh + 14), cell, fontsize=8)
+        page.insert_textbox(fitz.Rect(36, 260, 560, 800), body, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+def _two_pass(path: str) -> tuple:
+    return doc_parser.extract_text_from_pdf(path, parallel=False), TableExtractor._pdfplumber_tables_to_md(path)
+
+def _timed(fn, *args) -> tuple:
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=60)
+    ap.add_argument("--table-every", type=int, default=3, help="N페이지마다 표 1개 (0이면 표 없음)")
+    ap.add_argument("--workers", type=int, default=doc_parser.PARSER_WORKERS)
+    ap.add_argument("--pdf", default=None, help="실제 IR 자료로 측정하려면 경로 (쉼표 구분)")
+    args = ap.parse_args()
+
+    doc_parser.PARSER_WORKERS = max(2, args.workers)
+    tmp = tempfile.mkdtemp(prefix="bench_pdf_tables_")
+    try:
+        if args.pdf:
+            paths = [p.strip() for p in args.pdf.split(",") if p.strip()]
+        else:
+            paths = [os.path.join(tmp, "ir_deck.pdf")]
+            _make_ir_deck(paths[0], args.pages, args.table_every)
+        print(f"🏁 PDF 본문+표 추출 | workers {doc_parser.PARSER_WORKERS} (CPU {os.cpu_count()})")
+        warm, _ = _timed(doc_parser.extract_pdf_text_and_tables, paths[0], True)
+        print(f"   워밍업(워커 기동 포함) {warm:6.2f}s")
+
+        for path in paths:
+            with fitz.open(path) as d: pages = len(d)
+            t_two, (text_two, tables_two) = _timed(_two_pass, path)
+            t_one, (text_one, tables_one) = _timed(doc_parser.extract_pdf_text_and_tables, path, False)
+            t_par, (text_par, tables_par) = _timed(doc_parser.extract_pdf_text_and_tables, path, True)
+            assert text_one == text_par == text_two, "본문 텍스트가 extract_text_from_pdf와 다릅니다."
+            assert tables_one == tables_par, "병렬 추출 표가 단일 프로세스 결과와 다릅니다."
+            if not args.pdf:
+                assert tables_one == tables_two, "표 Markdown이 pdfplumber 결과와 다릅니다."
+            count = lambda md: md.count("**[Page ")
+            print(f"   {os.path.basename(path)} ({pages}p) | 2회 처리 {t_two:6.2f}s | 1회 처리 {t_one:6.2f}s ({t_two / t_one:4.1f}x) | "
+                  f"1회+pool {t_par:6.2f}s ({t_two / t_par:4.1f}x) | 표 {count(tables_two)} → {count(tables_one)}개")
+    finally:
+        doc_parser.shutdown_process_pool()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
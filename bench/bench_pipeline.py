@@ -0,0 +1,107 @@
+"""
+main() 전체 파이프라인을 로컬 목 서버(bench.mock_gemini)에 붙여 실행하고 동기/비동기 오케스트레이션을 비교합니다.
+
+- 응답 캐시는 끄고(off) 매번 실제로 목 서버를 호출합니다.
+- 기업 데이터는 --data를 주지 않으면 임시 폴더에 기업 N곳(작은 IR PDF + 보충 Markdown)을 만들어 씁니다.
+- 병렬도 = Σ(LLM 호출 지연) / wall. 1보다 클수록 호출이 겹쳐서 실행된 것입니다.
+
+실행: python -m bench.bench_pipeline [--companies 3] [--latency lognormal:0.5,0.4] [--search-latency uniform:0.5,1.5]
+                                     [--fault-429 0.02] [--fault-5xx 0.01] [--modes sync,async] [--verbose]
+"""
+import os
+import io
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+from bench.mock_gemini import start_mock_server
+
+_MINI_PDF = b"%PDF-1.4\n1 0 obj<</Type/Catalog>>endobj\ntrailer<</Root 1 0 R>>\n%%EOF\n"
+
+def _make_data(root: str, companies: int):
+    for i in range(companies):
+        d = os.path.join(root, "data", f"모의기업{i + 1:02d}")
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f"모의기업{i + 1:02d}_IR.pdf"), "wb") as f:
+            f.write(_MINI_PDF)
+        with open(os.path.join(d, "기타_메모.md"), "w", encoding="utf-8") as f:
+            f.write(f"# 모의기업{i + 1:02d}\n\n- 주력 제품: 산업용 센서\n- 매출: 120억원 (2024)\n")
+
+def _run_mode(mode: str, workdir: str, verbose: bool) -> dict:
+    import main
+    import metrics
+    import rate_limiter
+
+    metrics.reset()
+    rate_limiter.reset_stats()
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    t0 = time.perf_counter()
+    try:
+        with sink:
+            main.main(use_async=(mode == "async"))
+    finally:
+        wall = time.perf_counter() - t0
+        os.chdir(cwd)
+
+    llm = [r for r in metrics.records() if r["kind"] == "llm"]
+    busy = sum(r["latency_ms"] for r in llm) / 1000
+    rl = rate_limiter.stats()
+    return {
+        "mode": mode, "wall": wall, "calls": len(llm), "busy": busy,
+        "parallelism": busy / wall if wall else 0.0,
+        "errors": sum(1 for r in llm if not r["ok"]), "retries": sum(r["retries"] for r in llm),
+        "throttled": rl["throttled"],
+    }
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--companies", type=int, default=3)
+    ap.add_argument("--data", default=None, help="실제 data 폴더를 쓰려면 경로 지정 (기본: 임시 모의 데이터)")
+    ap.add_argument("--fixtures", default=None, help="기록 응답 디렉터리 (기본: 합성 응답만 사용)")
+    ap.add_argument("--latency", default="lognormal:0.5,0.4")
+    ap.add_argument("--search-latency", default="uniform:0.5,1.5")
+    ap.add_argument("--fault-429", type=float, default=0.0)
+    ap.add_argument("--fault-5xx", type=float, default=0.0)
+    ap.add_argument("--modes", default="sync,async")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--verbose", action="store_true", help="main()의 진행 로그를 그대로 출력")
+    args = ap.parse_args()
+
+    server, base_url, responder = start_mock_server(
+        fixtures_dir=args.fixtures, latency=args.latency, search_latency=args.search_latency,
+        fault_429=args.fault_429, fault_5xx=args.fault_5xx, seed=args.seed,
+    )
+    # gemini_client 등은 import 시점에 환경변수를 읽으므로 main을 import하기 전에 설정합니다.
+    os.environ.update(GEMINI_API_BASE=base_url, GEMINI_API_KEY="mock", GEMINI_RESPONSE_CACHE_MODE="off")
+    sys.path.insert(0, os.getcwd())
+
+    print(f"🏁 main() x {args.modes} | latency {args.latency} (search +{args.search_latency}) | "
+          f"429 {args.fault_429:.0%} / 5xx {args.fault_5xx:.0%}")
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        workdir = tempfile.mkdtemp(prefix=f"bench_pipeline_{mode}_")
+        try:
+            if args.data: shutil.copytree(args.data, os.path.join(workdir, "data"))
+            else: _make_data(workdir, args.companies)
+            res = _run_mode(mode, workdir, args.verbose)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        results.append(res)
+        print(f"   {mode:<6} wall {res['wall']:7.2f}s | LLM {res['calls']:3d}건 Σ{res['busy']:7.2f}s | "
+              f"병렬도 {res['parallelism']:4.1f}x | 실패 {res['errors']} / 재시도 {res['retries']} / 429 {res['throttled']}")
+
+    if len(results) > 1:
+        base = results[0]["wall"]
+        for r in results[1:]:
+            print(f"   → {r['mode']} vs {results[0]['mode']}: {base / r['wall']:.2f}x")
+    print(f"   mock: 요청 {server.state.requests}건 | 오류 주입 {server.state.faults}"
+          + (f" | fixture {responder.fixtures.stats}" if responder.fixtures else ""))
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
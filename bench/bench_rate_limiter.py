@@ -0,0 +1,51 @@
+"""
+프로세스 공용 RPM 리미터 on/off 비교 (로컬 스텁 서버가 RPM 쿼터를 흉내 냄)
+
+실행: python -m bench.bench_rate_limiter [--rpm 30] [--calls 45] [--workers 10]
+
+스텁 쿼터는 60초 슬라이딩 창이므로, 리미터는 쿼터의 90% 속도 + 짧은 버스트로 설정해야 429 없이 흘러갑니다.
+"""
+import os
+import time
+import argparse
+import concurrent.futures
+
+from bench.stub_server import start_stub_server
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rpm", type=int, default=30, help="스텁 서버 쿼터(분당 요청 수)")
+    ap.add_argument("--calls", type=int, default=45)
+    ap.add_argument("--workers", type=int, default=10)
+    ap.add_argument("--headroom", type=float, default=0.9, help="리미터 속도 = 쿼터 x headroom")
+    ap.add_argument("--burst-sec", type=float, default=5)
+    args = ap.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    print(f"🏁 쿼터 {args.rpm} RPM, 호출 {args.calls}회, 동시 {args.workers}")
+
+    for label, limiter_rpm in [("limiter off", 0), ("limiter on", args.rpm * args.headroom)]:
+        # 서버마다 쿼터 창이 새로 시작되도록 매 라운드 새 스텁을 띄웁니다.
+        server, base_url = start_stub_server(rpm_limit=args.rpm)
+        import gemini_client, rate_limiter
+        gemini_client.API_BASE = base_url
+        gemini_client.close_session()
+        rate_limiter.configure(rpm=limiter_rpm, tpm=0, burst_sec=args.burst_sec)
+        rate_limiter.reset_stats()
+
+        payload = {"contents": [{"parts": [{"text": "ping"}]}]}
+        def one(_):
+            # 운영과 같은 재시도 정책(3회, base_wait 5s)
+            return gemini_client.post_generate(payload)["ok"]
+
+        t0 = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.workers) as ex:
+            ok = sum(ex.map(one, range(args.calls)))
+        wall = time.perf_counter() - t0
+        st = rate_limiter.stats()
+        print(f"   {label:<12} wall {wall:6.1f}s | 성공 {ok}/{args.calls} | 429 {server.state.throttled:3d}회 "
+              f"| 대기 {st['wait_sec']:6.1f}s (max {st['max_wait_sec']:.1f}s) | 실행 {st['exec_sec']:5.2f}s")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
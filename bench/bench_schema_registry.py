@@ -0,0 +1,81 @@
+"""
+호출마다 스키마 변환(model_json_schema → convert → json.dumps) vs schema_registry 사전 변환 비교
+
+payload 1건 빌드 = generationConfig 생성 + 응답 캐시 키 + 요청 본문 직렬화 (PDF 제외)
+실행: python -m bench.bench_schema_registry [--calls 2000] [--workers 8] [--prompt-kb 8]
+"""
+import time
+import json
+import hashlib
+import argparse
+import concurrent.futures
+
+from agents.financial_agent import FinancialResponseSchema
+from agents.market_agent import MarketResponseSchema
+from agents.tech_agent import TechResponseSchema
+from agents.personnel_agent import PersonnelResponseSchema, CompanySignatureSchema, CeoEvidenceSchema
+from agents.valuation_agent import ValuationResponseSchema, IndustrySelection, ExtractionData, CapitalConversion
+import utils
+import gemini_client
+import response_cache
+import schema_registry
+
+MODELS = [
+    FinancialResponseSchema, MarketResponseSchema, TechResponseSchema,
+    PersonnelResponseSchema, CompanySignatureSchema, CeoEvidenceSchema,
+    ValuationResponseSchema, IndustrySelection, ExtractionData, CapitalConversion,
+]
+
+def _legacy_build(prompt: str, model) -> bytes:
+    """예전 경로: 호출마다 변환하고, 캐시 키와 요청 본문에서 스키마를 각각 다시 직렬화"""
+    config = {"temperature": 0.1, "maxOutputTokens": 8192, "responseMimeType": "application/json",
+              "responseSchema": schema_registry.convert_to_gemini_schema(model.model_json_schema())}
+    blob = json.dumps({"model": gemini_client.TARGET_MODEL, "prompt": prompt, "pdf": None,
+                       "schema": config["responseSchema"], "tools": None, "config": config},
+                      ensure_ascii=False, sort_keys=True)
+    hashlib.sha256(blob.encode("utf-8")).hexdigest()
+    # requests의 json= 기본 직렬화 (ensure_ascii=True)
+    return json.dumps({"contents": [{"parts": [{"text": prompt}]}], "generationConfig": config}).encode("utf-8")
+
+def _registry_build(prompt: str, model) -> bytes:
+    config = utils._build_generation_config(model)
+    response_cache.make_key(gemini_client.TARGET_MODEL, prompt, None, config["responseSchema"], None, config)
+    return gemini_client.encode_payload({"contents": [{"parts": [{"text": prompt}]}], "generationConfig": config})
+
+def _run(fn, prompt: str, calls: int, workers: int) -> tuple:
+    jobs = [MODELS[i % len(MODELS)] for i in range(calls)]
+    t0 = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        sizes = list(executor.map(lambda m: len(fn(prompt, m)), jobs))
+    return time.perf_counter() - t0, sum(sizes) / len(sizes)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--prompt-kb", type=float, default=8, help="프롬프트 크기(한글, KB)")
+    args = ap.parse_args()
+
+    prompt = "재무제표와 IR 자료를 바탕으로 분석하십시오. " * int(args.prompt_kb * 1024 / 60)
+    schema_registry.clear()
+
+    # 결과 동일성 확인 (캐시 키가 바뀌면 기존 응답 캐시가 전부 무효화되므로)
+    for m in MODELS:
+        old_cfg = {"temperature": 0.1, "maxOutputTokens": 8192, "responseMimeType": "application/json",
+                   "responseSchema": schema_registry.convert_to_gemini_schema(m.model_json_schema())}
+        new_cfg = utils._build_generation_config(m)
+        assert json.loads(json.dumps(old_cfg)) == json.loads(schema_registry.dumps(new_cfg)), m.__name__
+        old_key = hashlib.sha256(json.dumps({"model": gemini_client.TARGET_MODEL, "prompt": prompt, "pdf": None,
+                                             "schema": old_cfg["responseSchema"], "tools": None, "config": old_cfg},
+                                            ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+        assert old_key == response_cache.make_key(gemini_client.TARGET_MODEL, prompt, None,
+                                                  new_cfg["responseSchema"], None, new_cfg), m.__name__
+
+    print(f"🏁 {len(MODELS)}개 응답 모델, payload {args.calls}건 x {args.workers} workers (프롬프트 {len(prompt):,}자)")
+    for label, fn in [("per-call convert", _legacy_build), ("schema_registry", _registry_build)]:
+        wall, size = _run(fn, prompt, args.calls, args.workers)
+        print(f"   {label:<18} wall {wall:7.3f}s | {wall / args.calls * 1e6:8.1f} µs/payload | body {size / 1024:6.1f} KB")
+    print(f"   registry: {schema_registry.stats()}")
+
+if __name__ == "__main__":
+    main()
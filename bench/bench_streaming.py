@@ -0,0 +1,70 @@
+"""
+Financial 응답 스트리밍 시 Phase 2 시작 시점 비교 (로컬 스텁 서버)
+
+Report_Header가 맨 앞에 오는 재무 응답을 조각 단위로 흘려보내고,
+  - 비스트리밍: 전체 응답 수신 후 헤더 확보
+  - 스트리밍  : Report_Header가 닫히는 즉시 콜백
+까지 걸린 시간을 비교합니다.
+
+실행: python -m bench.bench_streaming [--chunks 40] [--chunk-delay 0.05] [--rows 60]
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+
+from bench.stub_server import start_stub_server
+
+def _financial_response(rows: int) -> str:
+    body = {
+        "Report_Header": {"Company_Name": "벤치주식회사", "CEO_Name": "홍길동", "Industry_Sector": "2차전지 소재",
+                          "Industry_Classification": "제조", "Investment_Rating": "관심"},
+        "Financial_Status": {
+            "Balance_Sheet": {"Unit": "백만원", "Columns": ["구분", "2022", "2023", "2024"],
+                              "Rows": [[f"계정{i}", "1,040", "1,200", "1,530"] for i in range(rows)]},
+            "Income_Statement": {"Unit": "백만원", "Columns": [], "Rows": []},
+            "Key_Financial_Commentary": "매출 성장 " * 200,
+            "Investment_History": [],
+            "Future_Revenue_Structure": {"Business_Model": "B2B", "Future_Cash_Cow": "소재 판매"},
+        },
+        "Investment_Highlights": [{"Highlight_Title": f"[포인트 {i}]", "Highlight_Logic": "근거 " * 40} for i in range(3)],
+    }
+    return json.dumps(body, ensure_ascii=False)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chunks", type=int, default=40)
+    ap.add_argument("--chunk-delay", type=float, default=0.05, help="조각 간 생성 지연(초)")
+    ap.add_argument("--rows", type=int, default=60)
+    args = ap.parse_args()
+
+    server, base_url = start_stub_server(response_text=_financial_response(args.rows),
+                                         stream_chunks=args.chunks, stream_delay=args.chunk_delay)
+    os.environ["GEMINI_API_BASE"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    os.environ["GEMINI_RESPONSE_CACHE_MODE"] = "off"
+    os.environ["GEMINI_CONTEXT_CACHE"] = "0"
+
+    from agents import financial_agent
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+        f.write(b"%PDF-1.4 bench")
+        pdf_path = f.name
+
+    print(f"🏁 응답 {len(_financial_response(args.rows)):,} chars, {args.chunks}조각 x {args.chunk_delay * 1000:.0f}ms")
+    for label, stream in [("non-stream", False), ("stream", True)]:
+        marks = {}
+        t0 = time.perf_counter()
+        on_header = (lambda h: marks.setdefault("header", time.perf_counter() - t0)) if stream else None
+        data = financial_agent.analyze(pdf_path, extra_text="", on_header=on_header)
+        total = time.perf_counter() - t0
+        header_at = marks.get("header", total)
+        assert data.get("Report_Header", {}).get("CEO_Name") == "홍길동", data
+        print(f"   {label:<11} Phase 2 시작 가능 {header_at:6.2f}s | Financial 완료 {total:6.2f}s")
+
+    os.remove(pdf_path)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
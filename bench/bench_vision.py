@@ -0,0 +1,92 @@
+"""
+Vision PDF → Markdown 추출: 예전 순차 처리(페이지마다 렌더링 → 호출 → sleep 3초) vs vision_extract 파이프라인 (로컬 스텁 서버)
+
+- PyMuPDF로 임시 IR 덱을 만들고, 스텁 서버 응답 지연(--latency)으로 Vision 호출 시간을 흉내 냅니다.
+- 파이프라인은 렌더링 프로세스 풀 + 동시 호출(--concurrency) + 공용 rate_limiter로 돌고, 결과가 페이지 순서대로 기록되는지 확인합니다.
+- 재개 확인: 절반 이후 페이지를 일부러 실패시켜 중단한 뒤 다시 실행하면 빠진 페이지만 호출하는지 봅니다.
+- 예전 루프와 같은 결과를 비교하기 위해 페이지 라우팅은 끕니다. (라우팅은 bench_vision_routing)
+
+실행: python -m bench.bench_vision [--pages 12] [--latency 0.8] [--concurrency 4] [--old-sleep 3]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+from bench.stub_server import start_stub_server
+from bench.bench_pdf_extract import _make_pdf
+
+def _old_sequential(vision_extract, pdf_path: str, output_md: str, sleep_sec: float):
+    """예전 test_vision_extractor 루프 (페이지 순서대로 렌더링 → 호출 → 고정 대기)"""
+    import fitz
+    with fitz.open(pdf_path) as doc:
+        total = doc.page_count
+    with open(output_md, "w", encoding="utf-8") as f:
+        f.write(f"# {os.path.basename(pdf_path)} 전체 추출 결과\n\n")
+        for i in range(total):
+            md_text = vision_extract.extract_markdown_from_image(vision_extract.render_page(pdf_path, i))
+            f.write(f"## Page {i + 1}\n\n")
+            f.write(md_text + "\n\n")
+            f.write("---\n\n")
+            if i < total - 1: time.sleep(sleep_sec)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=12)
+    ap.add_argument("--latency", type=float, default=0.8, help="Vision 호출 1건 응답 지연(초)")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--old-sleep", type=float, default=3.0, help="예전 루프의 페이지 간 고정 대기(초)")
+    args = ap.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency, response_text="| 항목 | 2024 |\n|---|---|\n| 매출 | 1,234 |")
+    os.environ["GEMINI_API_BASE"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    os.environ["GEMINI_RESPONSE_CACHE_MODE"] = "off"
+    tmp = tempfile.mkdtemp(prefix="bench_vision_")
+    os.environ["VISION_RENDER_CACHE_DIR"] = os.path.join(tmp, "rendered")
+    import vision_extract
+
+    try:
+        pdf_path = os.path.join(tmp, "deck.pdf")
+        _make_pdf(pdf_path, args.pages)
+        print(f"🏁 Vision {args.pages}페이지 | 응답 지연 {args.latency}s | 동시 호출 {args.concurrency} "
+              f"| 렌더링 workers {vision_extract.VISION_RENDER_WORKERS} (CPU {os.cpu_count()})")
+
+        old_md = os.path.join(tmp, "old.md")
+        t0 = time.perf_counter()
+        _old_sequential(vision_extract, pdf_path, old_md, args.old_sleep)
+        t_old = time.perf_counter() - t0
+
+        new_md = os.path.join(tmp, "new.md")
+        result = vision_extract.extract_pdf(pdf_path, new_md, concurrency=args.concurrency, route=False)
+        with open(old_md, encoding="utf-8") as a, open(new_md, encoding="utf-8") as b:
+            assert a.read() == b.read(), "파이프라인 결과가 순차 처리 결과와 다릅니다."
+        print(f"   순차+sleep {t_old:6.2f}s | 파이프라인 {result['sec']:6.2f}s → {t_old / result['sec']:4.1f}x (결과 동일)")
+
+        # 재개: 첫 실행에서 절반 이후 페이지를 실패시키고, 두 번째 실행이 남은 페이지만 호출하는지 확인
+        resume_md = os.path.join(tmp, "resume.md")
+        half = args.pages // 2
+        page_job = vision_extract._page_job
+        def _failing(prepare_future, pdf, page_num, *args):
+            if page_num >= half: raise RuntimeError("중단 재현")
+            return page_job(prepare_future, pdf, page_num, *args)
+        vision_extract._page_job = _failing
+        first = vision_extract.extract_pdf(pdf_path, resume_md, concurrency=args.concurrency, route=False)
+        vision_extract._page_job = page_job
+        calls = vision_extract.stats()["calls"]
+        second = vision_extract.extract_pdf(pdf_path, resume_md, concurrency=args.concurrency, route=False)
+        resumed_calls = vision_extract.stats()["calls"] - calls
+        assert not first["complete"] and second["complete"] and second["resumed"] == half
+        assert resumed_calls == args.pages - half, resumed_calls
+        with open(old_md, encoding="utf-8") as a, open(resume_md, encoding="utf-8") as b:
+            assert a.read() == b.read(), "재개 결과가 순차 처리 결과와 다릅니다."
+        print(f"   재개: 1차 {first['failed']}페이지 실패 → 2차 {resumed_calls}페이지만 호출 ({second['sec']:.2f}s, 결과 동일)")
+        print(f"   {vision_extract.stats()}")
+    finally:
+        vision_extract.shutdown()
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
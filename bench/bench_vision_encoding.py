@@ -0,0 +1,73 @@
+"""
+Vision 업로드 이미지: 예전 고정 200dpi PNG vs 적응형 해상도 + JPEG/WebP 압축 + 렌더링 디스크 캐시 (로컬, 네트워크 없음)
+
+- bench_vision_routing의 혼합 IR 덱(본문/표/스캔/그림/차트/빈 페이지)을 만들어 페이지마다 업로드 바이트와 렌더링 시간을 비교합니다.
+- 적응형 해상도는 페이지별로 choose_dpi가 고른 값(작은 글자 크기, 이미지 원본 해상도 기준)을 씁니다.
+- 렌더링 캐시: 같은 PDF를 두 번 준비할 때(재실행/재시도) 두 번째는 디스크에서 읽기만 하는지 확인합니다.
+- 업로드 토큰은 이미지 크기와 무관하게 고정(rate_limiter.IMAGE_TOKENS)이므로, 줄어드는 것은 전송 바이트/렌더링 시간입니다.
+  Vision 추출 품질은 실제 Gemini 호출이 필요해 여기서는 측정하지 않습니다. (VISION_TEXT_PX / VISION_IMAGE_QUALITY로 조정)
+
+실행: python -m bench.bench_vision_encoding [--repeat 4] [--quality 80]
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import fitz
+
+from bench.bench_vision_routing import EXPECTED, _make_deck
+
+def _prepare_all(vision_extract, pdf_path: str, pages: int, pdf_hash: str, dpi=None) -> tuple:
+    t0 = time.perf_counter()
+    out = [vision_extract.prepare_page(pdf_path, n, dpi, False, pdf_hash) for n in range(pages)]
+    return time.perf_counter() - t0, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=4, help="페이지 유형 묶음 반복 횟수")
+    ap.add_argument("--quality", type=int, default=80)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_vision_encoding_")
+    os.environ["VISION_RENDER_CACHE_DIR"] = os.path.join(tmp, "rendered")
+    os.environ["VISION_IMAGE_QUALITY"] = str(args.quality)
+    import vision_extract
+    from hashing import file_sha256
+
+    try:
+        pdf_path = os.path.join(tmp, "deck.pdf")
+        kinds = _make_deck(pdf_path, args.repeat)
+        pdf_hash = file_sha256(pdf_path)
+        print(f"🏁 Vision 업로드 이미지 {len(kinds)}페이지 | 해상도 {vision_extract.VISION_MIN_DPI}~{vision_extract.VISION_DPI}dpi "
+              f"| 품질 {args.quality}")
+
+        with fitz.open(pdf_path) as doc:
+            chosen = {kind: vision_extract.choose_dpi(doc.load_page(n)) for n, kind in enumerate(kinds[:len(EXPECTED)])}
+        print(f"   페이지별 해상도: {chosen}")
+
+        # 예전 방식: 고정 200dpi PNG (캐시 없음)
+        t0 = time.perf_counter()
+        png_bytes = sum(len(vision_extract.render_page(pdf_path, n, vision_extract.VISION_DPI)) for n in range(len(kinds)))
+        t_png = time.perf_counter() - t0
+        print(f"   PNG {vision_extract.VISION_DPI}dpi     {png_bytes / len(kinds) / 1024:7.1f} KB/page | 렌더링 {t_png:5.2f}s")
+
+        for fmt in ("png", "jpeg", "webp"):
+            vision_extract.VISION_IMAGE_FORMAT = fmt
+            if vision_extract.image_format()[0] != fmt:
+                print(f"   {fmt:<4} 적응형     (사용 불가 - Pillow/webp 없음)")
+                continue
+            t_cold, cold = _prepare_all(vision_extract, pdf_path, len(kinds), pdf_hash)
+            t_warm, warm = _prepare_all(vision_extract, pdf_path, len(kinds), pdf_hash)
+            size = sum(len(p["image"]) for p in cold)
+            assert not any(p["cached"] for p in cold) and all(p["cached"] for p in warm)
+            assert [p["image"] for p in cold] == [p["image"] for p in warm]
+            print(f"   {fmt:<4} 적응형     {size / len(kinds) / 1024:7.1f} KB/page ({png_bytes / size:4.1f}x 작음) | "
+                  f"렌더링 {t_cold:5.2f}s → 캐시 {t_warm:5.2f}s")
+    finally:
+        vision_extract.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
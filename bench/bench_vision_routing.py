@@ -0,0 +1,105 @@
+"""
+Vision 페이지 라우팅: 모든 페이지 Vision vs 텍스트 밀도/이미지 면적/표 탐지로 필요한 페이지만 Vision (로컬 스텁 서버)
+
+IR 덱에서 흔한 페이지 유형을 섞은 임시 PDF를 만들고, 각 유형이 기대한 경로로 가는지와
+Vision 호출 수 / 소요 시간이 얼마나 줄어드는지 비교합니다.
+  - text   : 본문이 빽빽한 페이지                → PyMuPDF
+  - table  : 괘선 표 + 본문                      → PyMuPDF (표는 Markdown으로)
+  - scan   : 페이지 전체가 이미지(스캔본)         → Vision (low_text)
+  - figure : 본문 + 큰 차트/표 이미지            → Vision (image)
+  - chart  : 축 라벨 + 벡터 도형으로 그린 차트    → Vision (chart)
+  - blank  : 빈 페이지                           → 건너뜀 (blank)
+
+실행: python -m bench.bench_vision_routing [--repeat 4] [--latency 0.8] [--concurrency 4]
+"""
+import os
+import shutil
+import argparse
+import tempfile
+
+import fitz
+
+from bench.stub_server import start_stub_server
+
+BODY = "\n".join(f"{i:02d}. 매출액 1,234억원 / 영업이익 210억원 Revenue EBITDA margin outlook" for i in range(30))
+EXPECTED = {"text": "text/text", "table": "text/table", "scan": "vision/low_text",
+            "figure": "vision/image", "chart": "vision/chart", "blank": "text/blank"}
+
+def _image(w: int, h: int) -> fitz.Pixmap:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, w, h), False)
+    pix.set_rect(pix.irect, (40, 90, 160))
+    return pix
+
+def _add_page(doc, kind: str):
+    page = doc.new_page()
+    if kind in ("text", "table", "figure"):
+        page.insert_text((36, 40), f"{kind.title()} page - Financial Highlights", fontsize=12)
+        page.insert_textbox(fitz.Rect(36, 420 if kind != "text" else 60, 560, 800), BODY, fontsize=7)
+    if kind == "table":
+        x0, y0, cw, rh = 50, 70, 110, 20
+        for r in range(9): page.draw_line((x0, y0 + r * rh), (x0 + 4 * cw, y0 + r * rh))
+        for c in range(5): page.draw_line((x0 + c * cw, y0), (x0 + c * cw, y0 + 8 * rh))
+        for r in range(8):
+            for c in range(4):
+                page.insert_text((x0 + c * cw + 4, y0 + r * rh + 14), f"R{r}C{c}", fontsize=8)
+    elif kind == "scan":
+        page.insert_image(page.rect, pixmap=_image(200, 280))
+    elif kind == "figure":
+        page.insert_image(fitz.Rect(36, 50, 560, 410), pixmap=_image(262, 180))
+    elif kind == "chart":
+        page.insert_text((36, 40), "Revenue by segment (억원)", fontsize=12)
+        for i in range(200):
+            x = 50 + i * 2.5
+            page.draw_rect(fitz.Rect(x, 700 - (i * 37 % 300), x + 2, 700), color=(0.2, 0.4, 0.8), fill=(0.2, 0.4, 0.8))
+        for y in range(2020, 2026): page.insert_text((50 + (y - 2020) * 90, 720), str(y), fontsize=8)
+        page.insert_textbox(fitz.Rect(36, 60, 560, 380), BODY[:600], fontsize=7)  # 차트 해설 몇 줄
+
+def _make_deck(path: str, repeat: int) -> list:
+    doc = fitz.open()
+    kinds = [k for _ in range(repeat) for k in EXPECTED]
+    for kind in kinds: _add_page(doc, kind)
+    doc.save(path)
+    doc.close()
+    return kinds
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=4, help="페이지 유형 묶음 반복 횟수")
+    ap.add_argument("--latency", type=float, default=0.8)
+    ap.add_argument("--concurrency", type=int, default=4)
+    args = ap.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    os.environ["GEMINI_API_BASE"] = base_url
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    os.environ["GEMINI_RESPONSE_CACHE_MODE"] = "off"
+    tmp = tempfile.mkdtemp(prefix="bench_vision_routing_")
+    os.environ["VISION_RENDER_CACHE_DIR"] = os.path.join(tmp, "rendered")
+    import vision_extract
+
+    try:
+        pdf_path = os.path.join(tmp, "deck.pdf")
+        kinds = _make_deck(pdf_path, args.repeat)
+        print(f"🏁 혼합 덱 {len(kinds)}페이지 ({', '.join(EXPECTED)} x {args.repeat}) | 응답 지연 {args.latency}s")
+
+        # 유형별 분류 확인
+        with fitz.open(pdf_path) as doc:
+            for n, kind in enumerate(kinds[:len(EXPECTED)]):
+                info = vision_extract.classify_page(pdf_path, doc.load_page(n), n, {})
+                got = f"{info['route']}/{info['reason']}"
+                assert got == EXPECTED[kind], (kind, got, info["chars"], info["image_coverage"])
+                print(f"   {kind:<6} → {got:<16} (글자 {info['chars']:>5}, 이미지 {info['image_coverage']:.0%})")
+
+        all_vision = vision_extract.extract_pdf(pdf_path, os.path.join(tmp, "all.md"), concurrency=args.concurrency, route=False)
+        routed = vision_extract.extract_pdf(pdf_path, os.path.join(tmp, "routed.md"), concurrency=args.concurrency, route=True)
+        print(f"   전체 Vision {all_vision['sec']:6.2f}s (호출 {all_vision['vision_calls']}) | "
+              f"라우팅 {routed['sec']:6.2f}s (호출 {routed['vision_calls']}, 텍스트 {routed['native_pages']}) "
+              f"→ Vision 호출 {all_vision['vision_calls'] - routed['vision_calls']}건 절감, {all_vision['sec'] / routed['sec']:4.1f}x")
+        print(f"   {routed['routes']}")
+    finally:
+        vision_extract.shutdown()
+        server.shutdown()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+로컬 Gemini 목 서버 (stub_server + 프롬프트 해시별 기록 응답 + responseSchema 기반 합성 응답)
+
+응답 결정 순서
+  1) fixtures 디렉터리에 같은 프롬프트 해시의 기록이 있으면 그대로 재생
+  2) --record-upstream이 있으면 실제 API로 전달하고 200 응답을 fixture로 저장
+  3) 없으면 합성: responseSchema가 있으면 스키마에 맞는 JSON, google_search면 검색 요약 + groundingMetadata
+
+실행: python -m bench.mock_gemini [--port 8765] [--latency lognormal:0.8,0.5] [--fault-429 0.02] [--fault-5xx 0.01]
+      → GEMINI_API_BASE=http://127.0.0.1:8765/v1beta GEMINI_API_KEY=mock python main.py
+기록 모드에서는 목 서버가 만든 cachedContents 핸들을 실제 API가 알 수 없으므로 GEMINI_CONTEXT_CACHE=0으로 실행하십시오.
+"""
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+import requests
+
+from bench.stub_server import start_stub_server, STUB_TEXT
+
+FIXTURE_DIR = os.getenv("GEMINI_MOCK_FIXTURES", os.path.join("bench", "fixtures"))
+
+# =========================================================
+# ⏱️ 지연 분포
+# =========================================================
+def parse_latency(spec: str, seed: int = 0):
+    """
+    지연 분포 문자열 → 호출마다 지연(초)을 돌려주는 함수
+      "0.2" | "fixed:0.2" | "uniform:0.1,0.5" | "normal:0.5,0.1" | "lognormal:0.8,0.5"(중앙값, sigma) | "exp:0.5"(평균)
+    """
+    spec = (spec or "0").strip()
+    kind, _, args = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    vals = [float(x) for x in args.split(",") if x.strip()]
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    samplers = {
+        "fixed": lambda: vals[0],
+        "uniform": lambda: rng.uniform(vals[0], vals[1]),
+        "normal": lambda: rng.gauss(vals[0], vals[1]),
+        "lognormal": lambda: rng.lognormvariate(math.log(vals[0]), vals[1]),
+        "exp": lambda: rng.expovariate(1.0 / vals[0]),
+    }
+    if kind not in samplers:
+        raise ValueError(f"지원하지 않는 지연 분포입니다: {spec} ({', '.join(samplers)})")
+
+    def sample() -> float:
+        with lock:
+            return max(0.0, samplers[kind]())
+    return sample
+
+# =========================================================
+# 🗂️ 프롬프트 해시별 fixture
+# =========================================================
+def fixture_key(req: dict) -> str:
+    """
+    텍스트 파트 + responseSchema + tools 기준 해시.
+    PDF 바이트와 모델명은 제외하므로 같은 프롬프트면 다른 PDF/캐시 핸들로 보낸 요청도 같은 fixture를 씁니다.
+    """
+    texts = [p.get("text", "") for c in req.get("contents", []) for p in c.get("parts", []) if "text" in p]
+    blob = json.dumps({
+        "text": texts,
+        "schema": (req.get("generationConfig") or {}).get("responseSchema"),
+        "tools": req.get("tools"),
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class FixtureStore:
+    def __init__(self, directory: str = FIXTURE_DIR):
+        self.dir = directory
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, f"{key}.json")
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                body = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            with self.lock: self.stats["misses"] += 1
+            return None
+        with self.lock: self.stats["hits"] += 1
+        return body
+
+    def put(self, key: str, req: dict, body: dict):
+        texts = [p.get("text", "") for c in req.get("contents", []) for p in c.get("parts", []) if "text" in p]
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self._path(key), "w", encoding="utf-8") as f:
+            json.dump({"key": key, "prompt_head": (texts[0] if texts else "")[:120],
+                       "tools": req.get("tools"), "response": body}, f, ensure_ascii=False, indent=1)
+        with self.lock: self.stats["recorded"] += 1
+
+# =========================================================
+# 🧪 합성 응답
+# =========================================================
+def synthesize(schema: dict, rng: random.Random, name: str = "", array_len: int = 2):
+    """Gemini responseSchema(OBJECT/ARRAY/STRING/...)에 맞는 더미 값을 만듭니다."""
+    t = (schema.get("type") or "STRING").upper()
+    if schema.get("enum"):
+        return schema["enum"][0]
+    if t == "OBJECT":
+        props = schema.get("properties") or {}
+        return {k: synthesize(props[k], rng, k, array_len) for k in (schema.get("propertyOrdering") or props)}
+    if t == "ARRAY":
+        return [synthesize(schema.get("items") or {}, rng, name, array_len) for _ in range(array_len)]
+    if t == "INTEGER":
+        return rng.randint(1, 1000)
+    if t == "NUMBER":
+        return round(rng.uniform(1, 1000), 2)
+    if t == "BOOLEAN":
+        return True
+    return f"{name or 'value'} 샘플"
+
+def _search_body(query: str, rng: random.Random) -> dict:
+    head = " ".join(query.split())[:60]
+    sources = [{"web": {"uri": f"https://example.com/news/{rng.randint(1000, 9999)}", "title": f"모의 기사 {i + 1}"}}
+               for i in range(3)]
+    text = f"[모의 검색 결과] {head}\n" + "\n".join(f"- {s['web']['title']}: 관련 보도 요약" for s in sources)
+    return {"candidates": [{
+        "content": {"role": "model", "parts": [{"text": text}]},
+        "finishReason": "STOP",
+        "groundingMetadata": {"webSearchQueries": [head], "groundingChunks": sources},
+    }]}
+
+class MockResponder:
+    """stub_server의 responder 훅. 요청 1건 → GenerateContentResponse"""
+    def __init__(self, fixtures: FixtureStore = None, search_latency=None, record_upstream: str = None,
+                 record_key: str = None, record_model: str = "models/gemini-2.0-flash",
+                 fallback_text: str = STUB_TEXT, seed: int = 0):
+        self.fixtures = fixtures
+        self.search_latency = search_latency
+        self.record_upstream = (record_upstream or "").rstrip("/")
+        self.record_key = record_key
+        self.record_model = record_model
+        self.fallback_text = fallback_text
+        self.seed = seed
+
+    def _record(self, key: str, req: dict):
+        url = f"{self.record_upstream}/{self.record_model}:generateContent?key={self.record_key}"
+        try:
+            resp = requests.post(url, json=req, timeout=(10, 300))
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200: return None
+        body = resp.json()
+        self.fixtures.put(key, req, body)
+        return body
+
+    def __call__(self, req: dict) -> dict:
+        key = fixture_key(req)
+        is_search = any("google_search" in t for t in (req.get("tools") or []))
+        # 검색 그라운딩은 일반 생성보다 느리므로 별도 분포를 더합니다.
+        if is_search and self.search_latency:
+            time.sleep(self.search_latency())
+
+        if self.fixtures:
+            body = self.fixtures.get(key)
+            if body is None and self.record_upstream:
+                body = self._record(key, req)
+            if body is not None: return body
+
+        rng = random.Random(f"{self.seed}:{key}")
+        schema = (req.get("generationConfig") or {}).get("responseSchema")
+        if schema:
+            text = json.dumps(synthesize(schema, rng), ensure_ascii=False)
+        elif is_search:
+            texts = [p.get("text", "") for c in req.get("contents", []) for p in c.get("parts", []) if "text" in p]
+            return _search_body(texts[0] if texts else "", rng)
+        else:
+            text = self.fallback_text
+        return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}]}
+
+# =========================================================
+# 🚀 서버 기동
+# =========================================================
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, fixtures_dir: str = FIXTURE_DIR,
+                      latency: str = "0", search_latency: str = None, fault_429: float = 0.0,
+                      fault_5xx: float = 0.0, rpm_limit: int = 0, record_upstream: str = None,
+                      record_key: str = None, stream_chunks: int = 20, seed: int = 0):
+    """
+    Returns:
+        (server, base_url, responder) - server.state.faults로 주입된 오류 수, responder.fixtures.stats로 재생/기록 수 조회
+    """
+    responder = MockResponder(
+        fixtures=FixtureStore(fixtures_dir) if fixtures_dir else None,
+        search_latency=parse_latency(search_latency, seed + 1) if search_latency else None,
+        record_upstream=record_upstream, record_key=record_key, seed=seed,
+    )
+    fault_rates = {}
+    if fault_429: fault_rates[429] = fault_429
+    if fault_5xx:
+        fault_rates[500] = fault_5xx / 2
+        fault_rates[503] = fault_5xx / 2
+    server, base_url = start_stub_server(
+        host=host, port=port, rpm_limit=rpm_limit, stream_chunks=stream_chunks,
+        latency_fn=parse_latency(latency, seed), fault_rates=fault_rates, responder=responder, seed=seed,
+    )
+    return server, base_url, responder
+
+def main():
+    ap = argparse.ArgumentParser(description="로컬 Gemini 목 서버")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--fixtures", default=FIXTURE_DIR, help="프롬프트 해시별 기록 응답 디렉터리")
+    ap.add_argument("--latency", default="0", help="호출 지연 분포 (예: lognormal:0.8,0.5)")
+    ap.add_argument("--search-latency", default=None, help="google_search 호출에 추가되는 지연 분포")
+    ap.add_argument("--fault-429", type=float, default=0.0, help="429 주입 확률")
+    ap.add_argument("--fault-5xx", type=float, default=0.0, help="500/503 주입 확률")
+    ap.add_argument("--rpm", type=int, default=0, help="분당 요청 한도 (초과 시 429)")
+    ap.add_argument("--record-upstream", default=None,
+                    help="fixture가 없을 때 전달할 실제 API (예: https://generativelanguage.googleapis.com/v1beta)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    record_key = os.getenv("GEMINI_RECORD_API_KEY") or os.getenv("GEMINI_API_KEY")
+    if args.record_upstream and not record_key:
+        ap.error("--record-upstream에는 GEMINI_RECORD_API_KEY(또는 GEMINI_API_KEY)가 필요합니다.")
+
+    server, base_url, responder = start_mock_server(
+        port=args.port, fixtures_dir=args.fixtures, latency=args.latency, search_latency=args.search_latency,
+        fault_429=args.fault_429, fault_5xx=args.fault_5xx, rpm_limit=args.rpm,
+        record_upstream=args.record_upstream, record_key=record_key, seed=args.seed,
+    )
+    print(f"🧪 Mock Gemini server running: {base_url}")
+    print(f"   → GEMINI_API_BASE={base_url} GEMINI_API_KEY=mock python main.py")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        fx = responder.fixtures.stats if responder.fixtures else {}
+        print(f"\n   요청 {server.state.requests}건 | 오류 주입 {server.state.faults} | fixture {fx}")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
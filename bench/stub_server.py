@@ -0,0 +1,355 @@
+import json
+import time
+import uuid
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# =========================================================
+# 로컬 Gemini REST 스텁 서버 (벤치마크/오프라인 검증 전용)
+#   - POST   .../models/*:generateContent
+#   - POST   .../models/*:streamGenerateContent?alt=sse  (응답 텍스트를 stream_chunks개 조각으로 나눠 전송)
+#   - POST   .../cachedContents          (Context Cache 생성)
+#   - DELETE .../cachedContents/{id}     (Context Cache 삭제)
+#   - POST   /upload/v1beta/files        (Files API resumable 업로드: start → upload, finalize)
+#   - GET    /download/v1beta/files/{id}:download
+#   - POST   .../models/*:batchGenerateContent, GET .../batches/{id}
+#     (PENDING → RUNNING → SUCCEEDED를 batch_delay초에 걸쳐 진행하고 결과 JSONL을 파일로 남깁니다.)
+# rpm_limit를 주면 최근 60초 generateContent 수가 한도를 넘을 때 429 + Retry-After를 돌려줍니다.
+# fault_rates({429: 0.05, 503: 0.02})로 무작위 오류를, latency_fn으로 호출별 지연 분포를 주입할 수 있고,
+# responder(req) -> GenerateContentResponse를 넘기면 고정 텍스트 대신 요청별 응답을 만듭니다. (bench.mock_gemini)
+# =========================================================
+STUB_TEXT = json.dumps({"ok": True}, ensure_ascii=False)
+
+def _body_text(body: dict) -> str:
+    try:
+        return "".join(p.get("text", "") for p in body["candidates"][0]["content"]["parts"])
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+class StubState:
+    """서버가 받은 요청량과 살아 있는 캐시 핸들을 기록합니다."""
+    def __init__(self, seed: int = 0):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.faults = {}
+        self.caches = {}
+        self.requests = 0
+        self.bytes_in = 0
+        self.throttled = 0
+        self.window = []
+        self.files = {}
+        self.uploads = {}
+        self.batches = {}
+
+    def admit(self, rpm_limit: int):
+        """슬라이딩 60초 창 기준 쿼터 확인. Returns: 허용 시 None, 초과 시 Retry-After(초)"""
+        now = time.monotonic()
+        with self.lock:
+            self.window = [t for t in self.window if now - t < 60]
+            if len(self.window) >= rpm_limit:
+                self.throttled += 1
+                return max(1, int(60 - (now - self.window[0])) + 1)
+            self.window.append(now)
+            return None
+
+    def draw_fault(self, fault_rates: dict):
+        """fault_rates의 확률대로 주입할 오류 상태 코드를 고릅니다. Returns: 정상이면 None"""
+        if not fault_rates: return None
+        with self.lock:
+            r = self.rng.random()
+            for status, p in sorted(fault_rates.items()):
+                if r < p:
+                    self.faults[status] = self.faults.get(status, 0) + 1
+                    return status
+                r -= p
+        return None
+
+    def record(self, n: int):
+        with self.lock:
+            self.requests += 1
+            self.bytes_in += n
+
+class _StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1로 응답해야 클라이언트가 keep-alive 커넥션을 재사용할 수 있습니다.
+    protocol_version = "HTTP/1.1"
+    # 헤더/본문을 한 번에 내보내고 Nagle을 꺼야 keep-alive 측정이 delayed-ACK(40ms)에 묻히지 않습니다.
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    latency = 0.0
+    latency_fn = None
+    rpm_limit = 0
+    fault_rates = None
+    fault_retry_after = 1
+    responder = None
+    response_text = STUB_TEXT
+    stream_chunks = 20
+    stream_delay = 0.0
+    batch_delay = 0.5
+    state = None
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self.state.record(len(raw))
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return {}
+
+    def _send(self, status: int, obj: dict, headers: dict = None):
+        body = json.dumps(obj).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        for k, v in (headers or {}).items(): self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _usage(self, req: dict, text: str) -> dict:
+        # 실제 API처럼 usageMetadata를 돌려줘 토큰 계측 경로도 검증할 수 있게 합니다. (대략 4 bytes/token)
+        # 이미지는 실제 API처럼 크기와 무관하게 타일 단위로 계산 (768px 타일 12장 x 258 토큰으로 고정)
+        contents, images = [], 0
+        for content in req.get("contents", []):
+            parts = [p for p in content.get("parts", []) if not str((p.get("inline_data") or {}).get("mime_type", "")).startswith("image/")]
+            images += len(content.get("parts", [])) - len(parts)
+            contents.append({**content, "parts": parts})
+        prompt_tokens = len(json.dumps(contents)) // 4 + images * 12 * 258
+        output_tokens = max(1, len(text) // 4)
+        return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                "totalTokenCount": prompt_tokens + output_tokens}
+
+    def _generate(self, req: dict) -> dict:
+        if self.responder:
+            body = self.responder(req)
+        else:
+            body = {"candidates": [{"content": {"role": "model", "parts": [{"text": self.response_text}]}, "finishReason": "STOP"}]}
+        if "usageMetadata" not in body:
+            body = {**body, "usageMetadata": self._usage(req, _body_text(body))}
+        return body
+
+    def _sleep_latency(self):
+        delay = self.latency_fn() if self.latency_fn else self.latency
+        if delay > 0: time.sleep(delay)
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path.startswith("/upload/"):
+            return self._upload()
+        req = self._read_json()
+        self._sleep_latency()
+
+        if path.endswith("/cachedContents"):
+            name = f"cachedContents/stub-{uuid.uuid4().hex[:8]}"
+            with self.state.lock:
+                self.state.caches[name] = req
+            return self._send(200, {"name": name, "model": req.get("model")})
+
+        if ":batchGenerateContent" in path:
+            return self._create_batch(req)
+
+        if self.rpm_limit:
+            retry_after = self.state.admit(self.rpm_limit)
+            if retry_after is not None:
+                return self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                                  {"Retry-After": str(retry_after)})
+
+        fault = self.state.draw_fault(self.fault_rates)
+        if fault == 429:
+            return self._send(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                              {"Retry-After": str(self.fault_retry_after)})
+        if fault:
+            return self._send(fault, {"error": {"code": fault, "status": "UNAVAILABLE" if fault == 503 else "INTERNAL"}})
+
+        cached = req.get("cachedContent")
+        if cached and cached not in self.state.caches:
+            return self._send(404, {"error": {"code": 404, "message": f"{cached} not found"}})
+
+        if ":streamGenerateContent" in path:
+            return self._send_stream(self._generate(req))
+
+        # 비스트리밍 응답도 전체 생성 시간(조각 수 x 조각 지연)만큼 기다린 뒤 한 번에 반환
+        if self.stream_delay: time.sleep(self.stream_delay * self.stream_chunks)
+        self._send(200, self._generate(req))
+
+    # -----------------------------------------------------
+    # Files API / Batch
+    # -----------------------------------------------------
+    def _upload(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        self.state.record(len(raw))
+        command = self.headers.get("X-Goog-Upload-Command", "")
+
+        if command == "start":
+            upload_id = uuid.uuid4().hex[:12]
+            meta = json.loads(raw or b"{}").get("file", {})
+            with self.state.lock:
+                self.state.uploads[upload_id] = {
+                    "display_name": meta.get("display_name", ""),
+                    "mime_type": self.headers.get("X-Goog-Upload-Header-Content-Type", "application/octet-stream"),
+                }
+            url = f"http://{self.headers.get('Host')}/upload/v1beta/files?upload_id={upload_id}"
+            return self._send(200, {}, {"X-Goog-Upload-URL": url})
+
+        upload_id = self.path.split("upload_id=", 1)[-1].split("&")[0]
+        with self.state.lock:
+            meta = self.state.uploads.pop(upload_id, None)
+        if meta is None or "finalize" not in command:
+            return self._send(400, {"error": {"code": 400, "message": "unknown upload session"}})
+        return self._send(200, {"file": self._store_file(raw, meta["mime_type"], meta["display_name"])})
+
+    def _store_file(self, data: bytes, mime_type: str, display_name: str = "") -> dict:
+        name = f"files/stub-{uuid.uuid4().hex[:10]}"
+        info = {"name": name, "displayName": display_name, "mimeType": mime_type, "sizeBytes": str(len(data)),
+                "uri": f"http://{self.headers.get('Host')}/v1beta/{name}", "state": "ACTIVE"}
+        with self.state.lock:
+            self.state.files[name] = {"info": info, "data": data}
+        return info
+
+    def _create_batch(self, req: dict):
+        input_file = ((req.get("batch") or {}).get("input_config") or {}).get("file_name")
+        with self.state.lock:
+            source = self.state.files.get(input_file)
+        if source is None:
+            return self._send(400, {"error": {"code": 400, "message": f"input file {input_file} not found"}})
+
+        name = f"batches/stub-{uuid.uuid4().hex[:10]}"
+        batch = {"name": name, "state": "BATCH_STATE_PENDING", "output": None,
+                 "display_name": (req.get("batch") or {}).get("display_name", "")}
+        with self.state.lock:
+            self.state.batches[name] = batch
+        threading.Thread(target=self._run_batch, args=(batch, source["data"]), daemon=True).start()
+        self._send(200, self._batch_op(batch))
+
+    def _run_batch(self, batch: dict, data: bytes):
+        time.sleep(self.batch_delay / 2)
+        batch["state"] = "BATCH_STATE_RUNNING"
+        time.sleep(self.batch_delay / 2)
+
+        lines = []
+        for raw in data.decode("utf-8").splitlines():
+            if not raw.strip(): continue
+            item = json.loads(raw)
+            req = item.get("request", {})
+            # file_data가 가리키는 업로드 파일이 없으면 실제 API처럼 해당 줄만 실패
+            missing = [p["file_data"]["file_uri"] for c in req.get("contents", []) for p in c.get("parts", [])
+                       if "file_data" in p and p["file_data"]["file_uri"].rsplit("/v1beta/", 1)[-1] not in self.state.files]
+            if missing:
+                lines.append({"key": item.get("key"), "error": {"code": 400, "message": f"file not found: {missing[0]}"}})
+            else:
+                lines.append({"key": item.get("key"), "response": self._generate(req)})
+
+        out = self._store_file("\n".join(json.dumps(l, ensure_ascii=False) for l in lines).encode("utf-8"),
+                               "application/jsonl", f"{batch['name']}-output")
+        with self.state.lock:
+            batch["requests"] = len(lines)
+            batch["output"] = out["name"]
+            batch["state"] = "BATCH_STATE_SUCCEEDED"
+
+    def _batch_op(self, batch: dict) -> dict:
+        done = batch["state"] == "BATCH_STATE_SUCCEEDED"
+        op = {
+            "name": batch["name"],
+            "metadata": {
+                "@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.GenerateContentBatch",
+                "name": batch["name"], "displayName": batch["display_name"], "state": batch["state"],
+            },
+            "done": done,
+        }
+        if done:
+            op["response"] = {
+                "@type": "type.googleapis.com/google.ai.generativelanguage.v1beta.GenerateContentBatchOutput",
+                "responsesFile": batch["output"],
+            }
+        return op
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path.startswith("/download/") and path.endswith(":download"):
+            name = path[len("/download/v1beta/"):-len(":download")]
+            with self.state.lock:
+                f = self.state.files.get(name)
+            if f is None:
+                return self._send(404, {"error": {"code": 404, "message": f"{name} not found"}})
+            self.send_response(200)
+            self.send_header("Content-Type", f["info"]["mimeType"])
+            self.send_header("Content-Length", str(len(f["data"])))
+            self.end_headers()
+            return self.wfile.write(f["data"])
+
+        name = path.split("/v1beta/", 1)[-1]
+        with self.state.lock:
+            batch = self.state.batches.get(name)
+            f = self.state.files.get(name)
+        if batch: return self._send(200, self._batch_op(batch))
+        if f: return self._send(200, f["info"])
+        self._send(404, {"error": {"code": 404, "message": f"{name} not found"}})
+
+    def _send_stream(self, body: dict):
+        text = _body_text(body)
+        n = max(1, self.stream_chunks)
+        size = max(1, -(-len(text) // n))
+        pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for idx, piece in enumerate(pieces):
+            if self.stream_delay: time.sleep(self.stream_delay)
+            event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+            if idx == len(pieces) - 1:
+                event["candidates"][0]["finishReason"] = "STOP"
+                if body["candidates"][0].get("groundingMetadata"):
+                    event["candidates"][0]["groundingMetadata"] = body["candidates"][0]["groundingMetadata"]
+                event["usageMetadata"] = body["usageMetadata"]
+            data = f"data: {json.dumps(event, ensure_ascii=False)}\r\n\r\n".encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def do_DELETE(self):
+        path = self.path.split("?")[0]
+        self._read_json()
+        name = "cachedContents/" + path.rsplit("/", 1)[-1]
+        with self.state.lock:
+            existed = self.state.caches.pop(name, None) is not None
+        self._send(200 if existed else 404, {})
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, rpm_limit: int = 0,
+                      response_text: str = STUB_TEXT, stream_chunks: int = 20, stream_delay: float = 0.0,
+                      batch_delay: float = 0.5, latency_fn=None, fault_rates: dict = None,
+                      fault_retry_after: int = 1, responder=None, seed: int = 0):
+    """
+    백그라운드 스레드에서 스텁 서버를 띄웁니다.
+
+    Returns:
+        (server, base_url) - base_url은 GEMINI_API_BASE로 그대로 사용 가능, server.state로 요청 통계 조회
+    """
+    state = StubState(seed)
+    handler = type("StubHandler", (_StubHandler,), {
+        "latency": latency, "rpm_limit": rpm_limit, "state": state,
+        "response_text": response_text, "stream_chunks": stream_chunks, "stream_delay": stream_delay,
+        "batch_delay": batch_delay, "fault_rates": fault_rates, "fault_retry_after": fault_retry_after,
+        # 함수를 클래스 속성으로 두면 메서드로 바인딩되므로 staticmethod로 감쌉니다.
+        "latency_fn": staticmethod(latency_fn) if latency_fn else None,
+        "responder": staticmethod(responder) if responder else None,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1beta"
+
+if __name__ == "__main__":
+    server, base_url = start_stub_server(port=8765)
+    print(f"🧪 Stub server running: {base_url}")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
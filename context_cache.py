@@ -0,0 +1,94 @@
+import os
+import threading
+from contextlib import contextmanager
+from gemini_client import api_request, TARGET_MODEL
+import response_cache
+import token_budget
+
+# =========================================================
+# 💡 [설정] 기업 단위 Context Cache (메인 PDF + 보충 문서 텍스트)
+# =========================================================
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "1") != "0"
+# 기업 분석이 비정상 종료돼 delete가 누락되더라도 서버 쪽에서 만료되도록 하는 안전장치
+CONTEXT_CACHE_TTL_SEC = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "3600"))
+CACHED_EXTRA_PLACEHOLDER = "(※ [보충 문서 데이터]는 캐시된 컨텍스트에 포함되어 있습니다. 해당 내용을 참조하십시오.)"
+
+class CompanyContext:
+    """cachedContents 핸들 1개와, 프롬프트에서 치환할 보충 텍스트(캐시에 함께 올린 경우만, 아니면 "")를 함께 보관합니다."""
+    def __init__(self, name: str, pdf_path: str, extra_text: str, model: str):
+        self.name = name
+        self.pdf_path = pdf_path
+        self.extra_text = extra_text
+        self.model = model
+
+    def apply(self, prompt: str) -> str:
+        """
+        프롬프트에 그대로 붙어 있는 보충 텍스트를 캐시 참조 문구로 바꿉니다.
+        보충 텍스트를 캐시에 올리지 않았으면(호출별 예산보다 큼) 프롬프트의 예산 적용본을 그대로 보냅니다.
+        """
+        if not self.extra_text or self.extra_text not in prompt: return prompt
+        return prompt.replace(self.extra_text, CACHED_EXTRA_PLACEHOLDER)
+
+_active = {}
+_active_lock = threading.Lock()
+
+def _key(pdf_path: str) -> str:
+    return os.path.abspath(pdf_path)
+
+def create_company_context(pdf_path: str, extra_text: str = "", model: str = TARGET_MODEL):
+    """메인 PDF + 보충 텍스트로 cachedContents를 생성합니다. 실패 시 None (인라인 전송으로 폴백)"""
+    from utils import pdf_to_base64
+
+    parts = [pdf_to_base64(pdf_path)]
+    # 보충 텍스트는 어느 호출의 예산으로도 줄지 않을 때만 캐시에 올립니다. 더 크면 캐시에는 PDF만 두어
+    # 호출마다 자기 예산 적용본(token_budget.fit_extra_text)을 인라인으로 보내게 합니다. (캐시 사본이 예산을 우회하지 않도록)
+    if extra_text and token_budget.estimate_tokens(extra_text) > token_budget.smallest_budget():
+        extra_text = ""
+    if extra_text:
+        parts.append({"text": f"[보충 문서 데이터]\n{extra_text}"})
+
+    res = api_request("POST", "cachedContents", {
+        "model": model,
+        "contents": [{"role": "user", "parts": parts}],
+        "ttl": f"{CONTEXT_CACHE_TTL_SEC}s",
+    }, read_timeout=180)
+    if not res["ok"]:
+        # 최소 토큰 수 미달, 모델 미지원 등은 모두 캐시 없이 진행
+        print(f"      ⚠️ [Context Cache] 생성 실패 - 인라인 전송으로 진행 ({res.get('status')})")
+        return None
+    name = res["json"].get("name")
+    return CompanyContext(name, pdf_path, extra_text, model) if name else None
+
+def delete_company_context(ctx: CompanyContext):
+    res = api_request("DELETE", ctx.name)
+    if not res["ok"]:
+        print(f"      ⚠️ [Context Cache] 삭제 실패 (TTL {CONTEXT_CACHE_TTL_SEC}s 후 자동 만료): {ctx.name}")
+
+def lookup(pdf_path: str):
+    """call_gemini에서 해당 PDF에 대해 활성화된 캐시 핸들을 찾습니다."""
+    if not pdf_path: return None
+    with _active_lock:
+        return _active.get(_key(pdf_path))
+
+@contextmanager
+def company_context(pdf_path: str, extra_text: str = ""):
+    """
+    with 블록 동안 pdf_path를 참조하는 모든 call_gemini 호출이 캐시 핸들을 사용합니다.
+    블록을 빠져나오면 캐시를 즉시 삭제합니다.
+    """
+    ctx = None
+    # replay 모드는 네트워크를 쓰지 않으므로 캐시 핸들도 만들지 않습니다.
+    if CONTEXT_CACHE_ENABLED and pdf_path and response_cache.get_mode() != "replay":
+        ctx = create_company_context(pdf_path, extra_text)
+    if ctx:
+        with _active_lock:
+            _active[_key(pdf_path)] = ctx
+        print(f"      🧊 [Context Cache] 공유 컨텍스트 생성: {ctx.name} "
+              f"({'PDF + 보충 텍스트' if ctx.extra_text else 'PDF만 - 보충 텍스트는 호출별 예산 적용본을 인라인 전송'})")
+    try:
+        yield ctx
+    finally:
+        if ctx:
+            with _active_lock:
+                _active.pop(_key(pdf_path), None)
+            delete_company_context(ctx)
@@ -0,0 +1,102 @@
+import os
+import csv
+import codecs
+import threading
+import pandas as pd
+
+# =========================================================
+# CSV 공용 로더 (인코딩 1회 감지 + 파일별 파싱 결과 재사용)
+# =========================================================
+# 예전에는 읽는 곳마다 utf-8-sig → cp949 → euc-kr 순으로 파일 전체를 다시 읽고 다시 파싱했습니다.
+# 이제 앞부분 바이트만 보고 인코딩을 한 번 정하고, 같은 파일(path, size, mtime)의 결과는 메모리에서 재사용합니다.
+# 반환된 행 목록 / DataFrame은 여러 호출부가 공유하므로 수정하지 마십시오.
+SNIFF_BYTES = 64 * 1024
+
+_lock = threading.Lock()
+_encodings = {}
+_rows = {}
+_frames = {}
+
+def _file_key(path: str) -> tuple:
+    st = os.stat(path)
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+def _sniff(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        if head.startswith(codecs.BOM_UTF8): return "utf-8-sig"
+        # 영문 헤더/코드만 있는 앞부분으로는 구분이 안 되므로 처음 나오는 비ASCII 구간을 찾아 판별합니다.
+        window = head
+        while window.isascii():
+            window = f.read(SNIFF_BYTES)
+            if not window: return "utf-8"
+    # 창 끝에서 잘린 멀티바이트 문자는 오류로 보지 않도록 final=False로 디코딩
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(window, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    # cp949는 euc-kr의 상위 집합이라 euc-kr 파일도 그대로 읽힙니다.
+    # 둘 다 아니면 UnicodeDecodeError를 그대로 올려 호출부가 "지원하지 않는 인코딩"으로 처리하게 합니다.
+    codecs.getincrementaldecoder("cp949")().decode(window, final=False)
+    return "cp949"
+
+def detect_encoding(path: str) -> str:
+    key = _file_key(path)
+    with _lock:
+        if key in _encodings: return _encodings[key]
+    enc = _sniff(path)
+    with _lock:
+        _encodings[key] = enc
+    return enc
+
+def _with_fallback(path: str, read):
+    """감지한 인코딩으로 읽다가 뒷부분에서 디코딩 오류가 나면 cp949로 한 번 더 읽습니다."""
+    enc = detect_encoding(path)
+    try:
+        return read(enc)
+    except UnicodeDecodeError:
+        if enc == "cp949": raise
+        with _lock:
+            _encodings[_file_key(path)] = "cp949"
+        return read("cp949")
+
+def read_rows(path: str) -> tuple:
+    """csv.DictReader 결과. Returns: (앞뒤 공백을 제거한 헤더 목록, 행 dict 목록)"""
+    key = _file_key(path)
+    with _lock:
+        if key in _rows: return _rows[key]
+
+    def read(enc):
+        with open(path, "r", encoding=enc, newline="") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames:
+                reader.fieldnames = [h.strip() for h in reader.fieldnames]
+            return list(reader.fieldnames or []), list(reader)
+
+    result = _with_fallback(path, read)
+    with _lock:
+        _rows[key] = result
+    return result
+
+def read_frame(path: str, cache: bool = True, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv와 같지만 인코딩은 detect_encoding으로 정합니다.
+    cache=True이고 추가 인자가 없을 때만 결과를 재사용합니다. (한 번만 읽는 큰 보충 CSV는 cache=False)
+    """
+    key = _file_key(path)
+    cache = cache and not kwargs
+    if cache:
+        with _lock:
+            if key in _frames: return _frames[key]
+    df = _with_fallback(path, lambda enc: pd.read_csv(path, encoding=enc, **kwargs))
+    if cache:
+        with _lock:
+            _frames[key] = df
+    return df
+
+def clear():
+    with _lock:
+        _encodings.clear()
+        _rows.clear()
+        _frames.clear()
@@ -0,0 +1,138 @@
+import os
+import re
+import threading
+import numpy as np
+
+# =========================================================
+# 💡 [설정] 보충 문서 중복 페이지 제거 (MinHash)
+# =========================================================
+# 기업 폴더에는 IR PDF와 그 Vision 추출본(_전체추출결과.md), 예전 버전 덱이 함께 들어 있는 경우가 많아
+# combined_extra_text에 같은 내용이 두세 번 들어가고, 그대로 모든 에이전트 프롬프트에 붙습니다.
+# 문서를 페이지/슬라이드/시트 단위로 나눠 문자 shingle MinHash로 비교하고, 앞서 나온 페이지(메인 PDF 포함)와
+# 추정 Jaccard 유사도가 DEDUP_THRESHOLD 이상인 페이지를 뺍니다. (같은 입력이면 항상 같은 결과)
+DEDUP = os.getenv("EXTRA_DEDUP", "1") != "0"
+DEDUP_THRESHOLD = float(os.getenv("EXTRA_DEDUP_THRESHOLD", "0.8"))
+# 정규화 후 이 글자 수 미만인 페이지(표지, 간지, "감사합니다" 등)는 비교하지 않고 남깁니다.
+DEDUP_MIN_CHARS = int(os.getenv("EXTRA_DEDUP_MIN_CHARS", "200"))
+SHINGLE_CHARS = 8
+NUM_PERM = 64
+BANDS = 16  # 16밴드 x 4행 → 유사도 0.5 부근부터 후보가 되고, 후보는 서명 전체로 다시 확인
+
+# 페이지 구분: parser 마커(PDF/PPT/Excel)와 Vision 추출본의 "## Page N"
+_UNIT_RE = re.compile(r"^(?:--- \[(?:PDF Page|PPT Slide|Excel Sheet)[^\]\n]*\] ---|## Page \d+)[ \t]*$", re.M)
+# 추출 방식(PyMuPDF 텍스트 / Markdown 표 / 굵게 등)이 달라도 같은 내용이면 같아지도록 글자(한글/영문/숫자)만 남김
+_NORM_RE = re.compile(r"[\W_]+")
+
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, 2 ** 63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2 ** 63, NUM_PERM, dtype=np.uint64)
+_POWERS = np.array([pow(1000003, SHINGLE_CHARS - 1 - i, 2 ** 64) for i in range(SHINGLE_CHARS)], dtype=np.uint64)
+
+_stats = {"docs": 0, "units": 0, "dropped": 0, "bytes_in": 0, "bytes_removed": 0}
+_stats_lock = threading.Lock()
+
+def split_units(text: str) -> list:
+    """문서 텍스트 → 페이지 단위 조각 목록 (이어 붙이면 원문과 동일). 마커가 없으면 문서 전체가 1조각"""
+    starts = [m.start() for m in _UNIT_RE.finditer(text)]
+    if not starts or starts[0] != 0: starts = [0] + starts
+    return [text[a:b] for a, b in zip(starts, starts[1:] + [len(text)])]
+
+def _normalize(unit: str) -> str:
+    body = _UNIT_RE.sub("", unit, count=1) if _UNIT_RE.match(unit) else unit
+    return _NORM_RE.sub("", body).lower()
+
+def signature(unit: str):
+    """페이지 1개의 MinHash 서명 (NUM_PERM개). 비교하기에 너무 짧으면 None"""
+    norm = _normalize(unit)
+    if len(norm) < max(DEDUP_MIN_CHARS, SHINGLE_CHARS): return None
+    codes = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    # 문자 8-gram의 다항식 해시 (uint64 오버플로 = mod 2^64). 큰 엑셀 시트도 메모리가 글자 수에 비례하도록
+    # 8 x N 행렬을 만들지 않고 자리별로 더합니다.
+    n = len(codes) - SHINGLE_CHARS + 1
+    shingles = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE_CHARS):
+        shingles += codes[j:j + n] * _POWERS[j]
+    shingles = np.unique(shingles)
+    # multiply-shift 해시 NUM_PERM개의 최솟값 (순열마다 따로 계산해 NUM_PERM x N 행렬을 만들지 않음)
+    sig = np.empty(NUM_PERM, dtype=np.uint64)
+    buf = np.empty_like(shingles)
+    for k in range(NUM_PERM):
+        np.multiply(shingles, _PERM_A[k], out=buf)
+        buf += _PERM_B[k]
+        buf >>= np.uint64(32)
+        sig[k] = buf.min()
+    return sig
+
+class _Index:
+    """LSH 밴드 버킷. 후보를 찾은 뒤 서명 일치 비율(추정 Jaccard)로 확인합니다."""
+    def __init__(self):
+        self.buckets, self.entries = {}, []
+
+    def _keys(self, sig):
+        rows = NUM_PERM // BANDS
+        return [(b, sig[b * rows:(b + 1) * rows].tobytes()) for b in range(BANDS)]
+
+    def find(self, sig):
+        best, seen = None, set()
+        for key in self._keys(sig):
+            for i in self.buckets.get(key, ()):
+                if i in seen: continue
+                seen.add(i)
+                sim = float(np.mean(self.entries[i][0] == sig))
+                if sim >= DEDUP_THRESHOLD and (best is None or sim > best[1]): best = (i, sim)
+        return (self.entries[best[0]][1], best[1]) if best else None
+
+    def add(self, sig, where):
+        self.entries.append((sig, where))
+        for key in self._keys(sig):
+            self.buckets.setdefault(key, []).append(len(self.entries) - 1)
+
+def _label(name: str, unit: str, i: int) -> str:
+    m = _UNIT_RE.match(unit)
+    return f"{name} {m.group(0).strip('- []') if m else f'#{i + 1}'}"
+
+def dedup_documents(docs: list, reference: list = None) -> tuple:
+    """
+    docs: [(문서 이름, 텍스트)] (파일 순서). 앞 문서/앞 페이지를 남기고 뒤에 나온 중복 페이지를 뺍니다.
+    reference: [(이름, 텍스트)] 비교 기준만 되고 빠지지 않는 문서 (메인 IR PDF)
+    Returns: ([(이름, 남은 텍스트)] docs와 같은 순서 - 모두 빠진 문서는 "",
+              {"units", "dropped", "bytes_in", "bytes_removed", "matches": [(뺀 페이지, 같은 페이지, 유사도)]})
+    """
+    index = _Index()
+    for name, text in reference or []:
+        for i, unit in enumerate(split_units(text or "")):
+            sig = signature(unit)
+            if sig is not None: index.add(sig, _label(name, unit, i))
+
+    out, matches = [], []
+    units = bytes_in = bytes_removed = 0
+    for name, text in docs:
+        kept, dropped, compared = [], 0, 0
+        for i, unit in enumerate(split_units(text or "")):
+            units += 1
+            sig = signature(unit)
+            hit = index.find(sig) if sig is not None else None
+            if hit:
+                matches.append((_label(name, unit, i), hit[0], round(hit[1], 2)))
+                dropped += 1
+                continue
+            if sig is not None:
+                index.add(sig, _label(name, unit, i))
+                compared += 1
+            kept.append(unit)
+        size = len((text or "").encode("utf-8"))
+        # 비교 가능한 페이지가 모두 중복이면 짧은 페이지(표지, 제목 등)만 남으므로 문서째 뺍니다.
+        body = "".join(kept) if compared or not dropped else ""
+        bytes_in += size
+        bytes_removed += size - len(body.encode("utf-8"))
+        out.append((name, body))
+
+    report = {"units": units, "dropped": len(matches), "bytes_in": bytes_in, "bytes_removed": bytes_removed, "matches": matches}
+    with _stats_lock:
+        _stats["docs"] += len(docs)
+        for k in ("units", "dropped", "bytes_in", "bytes_removed"): _stats[k] += report[k]
+    return out, report
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, enabled=DEDUP, threshold=DEDUP_THRESHOLD)
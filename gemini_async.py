@@ -0,0 +1,174 @@
+import os
+import time
+import random
+import asyncio
+import gemini_client
+import rate_limiter
+import metrics
+
+# [Async HTTP] httpx가 없으면 비동기 경로만 비활성화되고 기존 동기 경로는 그대로 동작합니다.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# =========================================================
+# 💡 [설정] 이벤트 루프 단위 동시 요청 상한
+# =========================================================
+# 스레드 풀 대신 세마포어로 동시 in-flight 요청 수를 제한합니다.
+GEMINI_MAX_INFLIGHT = int(os.getenv("GEMINI_ASYNC_MAX_INFLIGHT", "16"))
+SCRAPE_MAX_INFLIGHT = int(os.getenv("SCRAPE_ASYNC_MAX_INFLIGHT", "10"))
+
+# asyncio.run()마다 새 루프가 생기므로 클라이언트/세마포어는 루프별로 만듭니다.
+_loop_state = {}
+
+def _state() -> dict:
+    loop = asyncio.get_running_loop()
+    st = _loop_state.get(loop)
+    if st is None:
+        if httpx is None:
+            raise RuntimeError("httpx가 설치되지 않아 비동기 모드를 사용할 수 없습니다. (pip install httpx)")
+        limits = httpx.Limits(
+            max_connections=GEMINI_MAX_INFLIGHT + SCRAPE_MAX_INFLIGHT,
+            max_keepalive_connections=GEMINI_MAX_INFLIGHT + SCRAPE_MAX_INFLIGHT,
+        )
+        st = {
+            "client": httpx.AsyncClient(limits=limits, headers=gemini_client.HEADERS),
+            "llm_sem": asyncio.Semaphore(GEMINI_MAX_INFLIGHT),
+            "scrape_sem": asyncio.Semaphore(SCRAPE_MAX_INFLIGHT),
+        }
+        _loop_state[loop] = st
+    return st
+
+async def aclose():
+    """현재 루프에서 만든 클라이언트를 닫습니다. asyncio.run() 종료 직전에 호출하십시오."""
+    st = _loop_state.pop(asyncio.get_running_loop(), None)
+    if st: await st["client"].aclose()
+
+def _timeout(read_timeout: float):
+    return httpx.Timeout(read_timeout, connect=gemini_client.CONNECT_TIMEOUT)
+
+# =========================================================
+# 🚀 generateContent (gemini_client.post_generate와 동일한 재시도 정책)
+# =========================================================
+async def post_generate_async(payload: dict, read_timeout: float = gemini_client.DEFAULT_READ_TIMEOUT,
+                              max_retries: int = 3, base_wait: float = 5,
+                              model: str = gemini_client.TARGET_MODEL) -> dict:
+    if not gemini_client.api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    st = _state()
+    url = gemini_client.build_url(model)
+    est_tokens = rate_limiter.estimate_tokens(payload)
+    body_bytes = gemini_client.encode_payload(payload)
+
+    for attempt in range(max_retries):
+        # 세마포어 밖에서 쿼터를 기다려야 대기 중인 호출이 in-flight 슬롯을 점유하지 않습니다.
+        await rate_limiter.acquire_async(est_tokens)
+        t0 = time.perf_counter()
+        try:
+            async with st["llm_sem"]:
+                t0 = time.perf_counter()
+                resp = await st["client"].post(url, content=body_bytes, timeout=_timeout(read_timeout))
+        except httpx.HTTPError:
+            rate_limiter.record_exec(time.perf_counter() - t0)
+            await asyncio.sleep(base_wait + random.uniform(0, 2))
+            continue
+
+        if resp.status_code == 200:
+            try:
+                body = resp.json()
+            except ValueError:
+                rate_limiter.record_exec(time.perf_counter() - t0)
+                return {"ok": False, "status": 200, "text": "Parsing Error", "attempts": attempt + 1}
+            rate_limiter.record_exec(time.perf_counter() - t0, est_tokens, rate_limiter.usage_tokens(body))
+            return {"ok": True, "json": body, "attempts": attempt + 1}
+
+        rate_limiter.record_exec(time.perf_counter() - t0)
+        if resp.status_code == 429:
+            rate_limiter.on_throttled(rate_limiter.retry_after_seconds(resp.headers, resp.text),
+                                      fallback=base_wait * (2 ** attempt), est_tokens=est_tokens)
+            continue
+
+        if resp.status_code >= 500:
+            await asyncio.sleep(base_wait)
+            continue
+
+        return {"ok": False, "status": resp.status_code, "text": resp.text, "attempts": attempt + 1}
+
+    return {"ok": False, "status": 0, "text": "Max retries exceeded", "attempts": max_retries}
+
+async def post_stream_async(payload: dict, on_text, read_timeout: float = gemini_client.DEFAULT_READ_TIMEOUT,
+                            max_retries: int = 3, base_wait: float = 5,
+                            model: str = gemini_client.TARGET_MODEL) -> dict:
+    """gemini_client.post_stream의 asyncio 버전 (on_text는 이벤트 루프 스레드에서 호출)"""
+    if not gemini_client.api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    st = _state()
+    url = f"{gemini_client.API_BASE}/{model}:streamGenerateContent?alt=sse&key={gemini_client.api_key}"
+    est_tokens = rate_limiter.estimate_tokens(payload)
+    body_bytes = gemini_client.encode_payload(payload)
+
+    for attempt in range(max_retries):
+        await rate_limiter.acquire_async(est_tokens)
+        t0 = time.perf_counter()
+        texts, last = [], None
+        try:
+            async with st["llm_sem"]:
+                t0 = time.perf_counter()
+                async with st["client"].stream("POST", url, content=body_bytes, timeout=_timeout(read_timeout)) as resp:
+                    if resp.status_code == 200:
+                        async for line in resp.aiter_lines():
+                            for chunk in gemini_client.iter_sse_json([line]):
+                                last = chunk
+                                piece = gemini_client.chunk_text(chunk)
+                                if piece:
+                                    texts.append(piece)
+                                    on_text(piece)
+                        body = gemini_client.merge_stream_chunks(texts, last)
+                        rate_limiter.record_exec(time.perf_counter() - t0, est_tokens, rate_limiter.usage_tokens(body))
+                        return {"ok": True, "json": body, "attempts": attempt + 1}
+                    await resp.aread()
+                    status, headers, text = resp.status_code, resp.headers, resp.text
+        except httpx.HTTPError as e:
+            rate_limiter.record_exec(time.perf_counter() - t0)
+            if texts:
+                return {"ok": False, "status": 0, "text": f"Stream interrupted: {e}", "attempts": attempt + 1}
+            await asyncio.sleep(base_wait + random.uniform(0, 2))
+            continue
+
+        rate_limiter.record_exec(time.perf_counter() - t0)
+        if status == 429:
+            rate_limiter.on_throttled(rate_limiter.retry_after_seconds(headers, text),
+                                      fallback=base_wait * (2 ** attempt), est_tokens=est_tokens)
+            continue
+
+        if status >= 500:
+            await asyncio.sleep(base_wait)
+            continue
+
+        return {"ok": False, "status": status, "text": text, "attempts": attempt + 1}
+
+    return {"ok": False, "status": 0, "text": "Max retries exceeded", "attempts": max_retries}
+
+# =========================================================
+# 🌐 크롤링용 GET (네이버 증권 / WiseReport)
+# =========================================================
+async def fetch_text_async(url: str, headers: dict = None, timeout: float = 10,
+                           fallback_encoding: str = "utf-8") -> tuple:
+    """
+    Returns:
+        (status_code, text) - 접속 실패 시 (0, "")
+    """
+    st = _state()
+    try:
+        async with st["scrape_sem"]:
+            t0 = time.perf_counter()
+            resp = await st["client"].get(url, headers=headers, timeout=timeout, follow_redirects=True)
+    except httpx.HTTPError as e:
+        metrics.record_scrape(url, 0, time.perf_counter() - t0, error=type(e).__name__)
+        return 0, ""
+    metrics.record_scrape(url, resp.status_code, time.perf_counter() - t0, len(resp.content))
+    # 응답 헤더에 charset이 없으면 requests 경로와 동일하게 사이트별 기본 인코딩을 적용
+    if not resp.charset_encoding:
+        resp.encoding = fallback_encoding
+    return resp.status_code, resp.text
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+import rate_limiter
+import schema_registry
+
+load_dotenv()
+api_key = (os.getenv("GEMINI_API_KEY") or "").strip()
+
+# 로컬 스텁/목 서버로 돌릴 때는 GEMINI_API_BASE 환경변수로 엔드포인트를 교체합니다.
+API_BASE = (os.getenv("GEMINI_API_BASE") or "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+TARGET_MODEL = "models/gemini-2.0-flash"
+HEADERS = {"Content-Type": "application/json"}
+
+# =========================================================
+# 💡 [설정] 커넥션 풀 / 타임아웃
+# =========================================================
+# main.main()의 에이전트 풀(5) + Stage3/Stage4 내부 풀(각 5) + 여유분
+POOL_SIZE = int(os.getenv("GEMINI_POOL_SIZE", "16"))
+CONNECT_TIMEOUT = float(os.getenv("GEMINI_CONNECT_TIMEOUT", "10"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("GEMINI_READ_TIMEOUT", "180"))
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """프로세스 전체가 공유하는 keep-alive 세션을 반환합니다. (최초 호출 시 1회 생성)"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                # urllib3 커넥션 풀은 스레드 안전하므로 여러 에이전트 스레드가 같은 세션을 공유해도 됩니다.
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=0)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                s.headers.update(HEADERS)
+                _session = s
+    return _session
+
+def close_session():
+    """풀에 남은 커넥션을 정리합니다. (벤치마크/테스트 종료 시 사용)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def build_url(model: str = TARGET_MODEL, method: str = "generateContent") -> str:
+    return f"{API_BASE}/{model}:{method}?key={api_key}"
+
+def encode_payload(payload: dict) -> bytes:
+    """
+    요청 본문을 1회만 직렬화합니다. (재시도마다 다시 만들지 않음)
+    responseSchema는 schema_registry의 사전 직렬화 조각을 쓰고, 한글 프롬프트는 유니코드 이스케이프 없이 UTF-8로 보냅니다.
+    """
+    return schema_registry.dumps(payload).encode("utf-8")
+
+# =========================================================
+# 🚀 generateContent 호출 (utils.call_gemini / processor._post_gemini 공용)
+# =========================================================
+def post_generate(payload: dict, read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = 3,
+                  base_wait: float = 5, model: str = TARGET_MODEL) -> dict:
+    """
+    공유 세션으로 generateContent를 호출하고 단일 재시도 정책을 적용합니다.
+
+    Returns:
+        성공: {"ok": True, "json": dict}
+        실패: {"ok": False, "status": int, "text": str}
+    """
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    url = build_url(model)
+    session = get_session()
+    est_tokens = rate_limiter.estimate_tokens(payload)
+    body_bytes = encode_payload(payload)
+
+    for attempt in range(max_retries):
+        # 프로세스 공용 RPM/TPM 버킷에서 순서대로 슬롯을 받은 뒤 전송
+        rate_limiter.acquire(est_tokens)
+        t0 = time.perf_counter()
+        try:
+            resp = session.post(url, data=body_bytes, timeout=(CONNECT_TIMEOUT, read_timeout))
+        except requests.RequestException:
+            rate_limiter.record_exec(time.perf_counter() - t0)
+            time.sleep(base_wait + random.uniform(0, 2))
+            continue
+
+        if resp.status_code == 200:
+            try:
+                body = resp.json()
+            except ValueError:
+                rate_limiter.record_exec(time.perf_counter() - t0)
+                return {"ok": False, "status": 200, "text": "Parsing Error", "attempts": attempt + 1}
+            rate_limiter.record_exec(time.perf_counter() - t0, est_tokens, rate_limiter.usage_tokens(body))
+            return {"ok": True, "json": body, "attempts": attempt + 1}
+
+        rate_limiter.record_exec(time.perf_counter() - t0)
+        if resp.status_code == 429:
+            # 개별 sleep 대신 전역 일시정지 → 다음 acquire()에서 모든 스레드가 함께 대기
+            rate_limiter.on_throttled(rate_limiter.retry_after_seconds(resp.headers, resp.text),
+                                      fallback=base_wait * (2 ** attempt), est_tokens=est_tokens)
+            continue
+
+        if resp.status_code >= 500:
+            time.sleep(base_wait)
+            continue
+
+        return {"ok": False, "status": resp.status_code, "text": resp.text, "attempts": attempt + 1}
+
+    return {"ok": False, "status": 0, "text": "Max retries exceeded", "attempts": max_retries}
+
+# =========================================================
+# 🌊 streamGenerateContent (SSE) - 텍스트 조각이 도착하는 대로 on_text 콜백
+# =========================================================
+def merge_stream_chunks(texts: list, last: dict) -> dict:
+    """SSE 조각들을 generateContent 단건 응답과 같은 모양으로 합칩니다. (캐시/파서 공용)"""
+    body = dict(last or {})
+    cand = dict((body.get("candidates") or [{}])[0])
+    cand["content"] = {"role": "model", "parts": [{"text": "".join(texts)}]}
+    body["candidates"] = [cand]
+    return body
+
+def iter_sse_json(lines):
+    """'data: {...}' 형식 SSE 줄에서 JSON 객체를 순서대로 꺼냅니다."""
+    for line in lines:
+        if isinstance(line, bytes): line = line.decode("utf-8")
+        if not line.startswith("data:"): continue
+        data = line[5:].strip()
+        if not data or data == "[DONE]": continue
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+def chunk_text(chunk: dict) -> str:
+    try:
+        return "".join(p.get("text", "") for p in chunk["candidates"][0]["content"]["parts"])
+    except (KeyError, IndexError, TypeError):
+        return ""
+
+def post_stream(payload: dict, on_text, read_timeout: float = DEFAULT_READ_TIMEOUT, max_retries: int = 3,
+                base_wait: float = 5, model: str = TARGET_MODEL) -> dict:
+    """
+    post_generate와 같은 반환 형식이지만, 응답 텍스트를 조각 단위로 on_text(str)에 먼저 흘려보냅니다.
+    재시도는 첫 조각을 받기 전까지만 합니다. (이미 콜백으로 흘려보낸 텍스트를 되돌릴 수 없으므로)
+    """
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    url = f"{API_BASE}/{model}:streamGenerateContent?alt=sse&key={api_key}"
+    session = get_session()
+    est_tokens = rate_limiter.estimate_tokens(payload)
+    body_bytes = encode_payload(payload)
+
+    for attempt in range(max_retries):
+        rate_limiter.acquire(est_tokens)
+        t0 = time.perf_counter()
+        texts, last = [], None
+        try:
+            with session.post(url, data=body_bytes, timeout=(CONNECT_TIMEOUT, read_timeout), stream=True) as resp:
+                if resp.status_code == 200:
+                    for chunk in iter_sse_json(resp.iter_lines()):
+                        last = chunk
+                        piece = chunk_text(chunk)
+                        if piece:
+                            texts.append(piece)
+                            on_text(piece)
+                    body = merge_stream_chunks(texts, last)
+                    rate_limiter.record_exec(time.perf_counter() - t0, est_tokens, rate_limiter.usage_tokens(body))
+                    return {"ok": True, "json": body, "attempts": attempt + 1}
+                status, headers, text = resp.status_code, resp.headers, resp.text
+        except requests.RequestException as e:
+            rate_limiter.record_exec(time.perf_counter() - t0)
+            if texts:
+                return {"ok": False, "status": 0, "text": f"Stream interrupted: {e}", "attempts": attempt + 1}
+            time.sleep(base_wait + random.uniform(0, 2))
+            continue
+
+        rate_limiter.record_exec(time.perf_counter() - t0)
+        if status == 429:
+            rate_limiter.on_throttled(rate_limiter.retry_after_seconds(headers, text),
+                                      fallback=base_wait * (2 ** attempt), est_tokens=est_tokens)
+            continue
+
+        if status >= 500:
+            time.sleep(base_wait)
+            continue
+
+        return {"ok": False, "status": status, "text": text, "attempts": attempt + 1}
+
+    return {"ok": False, "status": 0, "text": "Max retries exceeded", "attempts": max_retries}
+
+def api_request(method: str, path: str, payload: dict = None, read_timeout: float = 60) -> dict:
+    """cachedContents 등 generateContent 외 REST 리소스용 단발 호출 (재시도 없음)"""
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
+    url = f"{API_BASE}/{path.lstrip('/')}?key={api_key}"
+    try:
+        resp = get_session().request(method, url, json=payload, timeout=(CONNECT_TIMEOUT, read_timeout))
+    except requests.RequestException as e:
+        return {"ok": False, "status": 0, "text": str(e)}
+    if resp.status_code == 200:
+        try:
+            return {"ok": True, "json": resp.json() if resp.content else {}}
+        except ValueError:
+            return {"ok": False, "status": 200, "text": "Parsing Error"}
+    return {"ok": False, "status": resp.status_code, "text": resp.text}
@@ -0,0 +1,26 @@
+import os
+import hashlib
+import threading
+
+# =========================================================
+# 파일 내용 해시 (캐시 키 공용)
+# =========================================================
+# 같은 파일을 여러 스레드/에이전트가 반복 해싱하지 않도록 (path, size, mtime) 단위로 결과를 기억합니다.
+_memo = {}
+_memo_lock = threading.Lock()
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        if key in _memo: return _memo[key]
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _memo_lock:
+        _memo[key] = digest
+    return digest
@@ -0,0 +1,135 @@
+import json
+
+# =========================================================
+# 스트리밍 JSON 필드 감시기
+# =========================================================
+# streamGenerateContent로 조각조각 도착하는 JSON 텍스트를 문자 단위로 따라가며,
+# 지정한 경로(예: ("Report_Header",) 또는 ("Report_Header", "CEO_Name"))의 값이
+# 닫히는 즉시 콜백을 호출합니다. 전체 응답이 끝날 때까지 기다릴 필요가 없습니다.
+_WS = " \t\r\n"
+
+class JsonFieldWatcher:
+    def __init__(self, fields: list, on_field):
+        """
+        Args:
+            fields: 감시할 경로 목록. 각 경로는 키 이름 튜플 (배열 인덱스는 int)
+            on_field: on_field(path: tuple, value) - 경로별로 최대 1회 호출
+        """
+        self.fields = {tuple(f) for f in fields}
+        self.on_field = on_field
+        self.fired = set()
+        self.text = ""
+        self.pos = 0
+        self.started = False
+        # 컨테이너 스택: [type('{'|'['), 현재 키 또는 인덱스, 시작 위치, 키를 기다리는 중인지]
+        self.stack = []
+        self.in_str = False
+        self.esc = False
+        self.str_start = 0
+        self.prim_start = None
+
+    # -----------------------------------------------------
+    def _path(self) -> tuple:
+        return tuple(frame[1] for frame in self.stack)
+
+    def _complete(self, path: tuple, start: int, end: int):
+        if path in self.fields and path not in self.fired:
+            try:
+                value = json.loads(self.text[start:end])
+            except ValueError:
+                return
+            self.fired.add(path)
+            self.on_field(path, value)
+
+    def _value_done(self):
+        """스칼라/컨테이너 값 하나가 끝난 뒤, 부모가 배열이면 인덱스를 진행시킵니다."""
+        if self.stack and self.stack[-1][0] == "[":
+            self.stack[-1][1] += 1
+
+    def _end_primitive(self, i: int):
+        if self.prim_start is None: return
+        self._complete(self._path(), self.prim_start, i)
+        self.prim_start = None
+
+    def feed(self, chunk: str):
+        if not chunk or self.done(): return
+        self.text += chunk
+        text = self.text
+        i = self.pos
+
+        while i < len(text):
+            ch = text[i]
+
+            if not self.started:
+                # ```json 펜스 등 첫 '{' 이전의 잡음은 건너뜀
+                if ch == "{":
+                    self.started = True
+                    self.stack.append(["{", None, i, True])
+                i += 1
+                continue
+
+            if self.in_str:
+                if self.esc: self.esc = False
+                elif ch == "\\": self.esc = True
+                elif ch == '"':
+                    self.in_str = False
+                    top = self.stack[-1] if self.stack else None
+                    if top and top[0] == "{" and top[3]:
+                        top[1] = json.loads(text[self.str_start:i + 1])
+                        top[3] = False
+                    else:
+                        self._complete(self._path(), self.str_start, i + 1)
+                        self._value_done()
+                i += 1
+                continue
+
+            if self.prim_start is not None:
+                if ch in ",]}" or ch in _WS:
+                    self._end_primitive(i)
+                    self._value_done()
+                else:
+                    i += 1
+                    continue
+
+            if ch == '"':
+                self.in_str = True
+                self.str_start = i
+            elif ch in "{[":
+                self.stack.append([ch, None if ch == "{" else 0, i, ch == "{"])
+            elif ch in "}]":
+                if not self.stack: break
+                _, _, start, _ = self.stack.pop()
+                self._complete(self._path(), start, i + 1)
+                if not self.stack: break
+                self._value_done()
+            elif ch == ",":
+                if self.stack and self.stack[-1][0] == "{": self.stack[-1][3] = True
+            elif ch == ":" or ch in _WS:
+                pass
+            else:
+                self.prim_start = i
+            i += 1
+
+        self.pos = i
+
+    def done(self) -> bool:
+        return self.fields <= self.fired
+
+    def finish(self, full_text: str = None):
+        """
+        스트림이 끝난 뒤(또는 캐시/비스트리밍 응답일 때) 아직 발화하지 않은 필드를 전체 텍스트로 보완합니다.
+        """
+        if self.done(): return
+        if full_text is not None and not self.started:
+            self.feed(full_text)
+        if self.done() or full_text is None: return
+        from utils import safe_json_loads
+        obj = safe_json_loads(full_text)
+        for path in list(self.fields - self.fired):
+            node = obj
+            try:
+                for k in path: node = node[k]
+            except (KeyError, IndexError, TypeError):
+                continue
+            self.fired.add(path)
+            self.on_field(path, node)
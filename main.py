@@ -1,9 +1,20 @@
 import os
 import json
+import asyncio
 import traceback
 import concurrent.futures
 from collections import defaultdict
-from parser import parse_any_file
+from utils import pdf_cache_stats
+from token_budget import section_header
+from context_cache import company_context
+import response_cache
+import parse_cache
+import parse_stage
+import dedup
+import gemini_async
+import rate_limiter
+import batch_jobs
+import metrics
 
 # [Modules]
 try:
@@ -37,6 +48,9 @@ SUPPORTED_EXTS = ['.pdf', '.pptx', '.docx', '.xlsx', '.xls', '.csv', '.md']
 # 🚫 분석에서 아예 제외할 시스템/작업 폴더 이름들
 IGNORE_FOLDERS = ['metadata', 'test', '밸류추정 인수인의 의견', '.DS_Store']
 
+# Financial 응답을 스트리밍으로 받아 Report_Header가 완성되는 즉시 Phase 2를 시작합니다. (0이면 전체 응답 대기)
+STREAM_FINANCIAL_HEADER = os.getenv("GEMINI_STREAM_HEADER", "1") != "0"
+
 def gather_company_data(base_dir="data"):
     """data 폴더 안의 기업명 폴더 또는 단일 파일을 스캔하여 카테고리별로 수집"""
     company_files = defaultdict(lambda: defaultdict(list))
@@ -96,24 +110,221 @@ def merge_dictionaries(dicts):
         if d: result.update(d)
     return result
 
-# 🚨 [신규] 보충 문서 병렬 파싱을 위한 헬퍼 함수
-def parse_extra_file(file_path, main_pdf_path):
-    if file_path == main_pdf_path: return ""
-    parsed_text = ""
-    if file_path.lower().endswith('.md'):
+def prepare_company(files):
+    """메인 IR PDF 선택 + 보충 문서 병렬 파싱. Returns: (main_pdf_path, combined_extra_text)"""
+    # 1. 메인 PDF 추출
+    ir_pdfs = [f for f in files.get("IR", []) if f.lower().endswith('.pdf')]
+    main_pdf_path = ir_pdfs[0] if ir_pdfs else None
+
+    # 2. 추가 문서 병렬 파싱 (CPU 작업이라 기본은 프로세스 풀, 파일별 시간 제한)
+    print(f"   [1/3] 📑 추가 문서 병렬 파싱 중 (Excel, PPT, Word, Markdown 등 | {parse_stage.PARSE_EXECUTOR})...")
+    extra_paths = [file_path for file_list in files.values() for file_path in file_list if file_path != main_pdf_path]
+    # 중복 제거 기준으로 쓰도록 메인 PDF도 함께 파싱합니다. (parse_cache에 있으면 바로 읽음)
+    use_reference = dedup.DEDUP and main_pdf_path is not None
+    parsed_texts = parse_stage.parse_documents(([main_pdf_path] if use_reference else []) + extra_paths)
+    reference = [(os.path.basename(main_pdf_path), parsed_texts.pop(0))] if use_reference else []
+    docs = [(os.path.basename(path), text) for path, text in zip(extra_paths, parsed_texts)]
+
+    # 3. 중복 페이지 제거 (메인 PDF의 Vision 추출본, 예전 버전 덱 등)
+    if dedup.DEDUP:
+        docs, report = dedup.dedup_documents(docs, reference)
+        if report["dropped"]:
+            print(f"        🧹 중복 페이지 {report['dropped']}/{report['units']}개 제거 "
+                  f"({report['bytes_removed']:,} / {report['bytes_in']:,} bytes) - 예: {report['matches'][0][0]} ≈ {report['matches'][0][1]}")
+
+    # 완료 순서가 아닌 파일 순서로 합쳐야 보충 텍스트(→ 응답 캐시 키 / 예산 축약 결과)가 실행마다 같습니다.
+    combined_extra_text = "".join(section_header(name) + text for name, text in docs if text)
+    if main_pdf_path or combined_extra_text:
+        print(f"        → 확보된 데이터: 메인 PDF({'O' if main_pdf_path else 'X'}), 보충 텍스트({len(combined_extra_text)} bytes)")
+    return main_pdf_path, combined_extra_text
+
+def save_results(company_name, main_pdf_path, results, output_dir, report_dir):
+    """에이전트 결과 (fin, mkt, tech, human, val)를 병합해 JSON/Word로 저장"""
+    fin_data, mkt_data, tech_data, human_data, val_data = results
+    print("   [3/3] 💾 데이터 병합 및 보고서 생성 중...")
+    final_data = merge_dictionaries([fin_data, mkt_data, tech_data, human_data, val_data])
+    
+    # Valuation 에이전트가 만든 종합 등급을 Report_Header로 안전하게 이동
+    if "Investment_Rating" in val_data:
+        if "Report_Header" not in final_data: final_data["Report_Header"] = {}
+        final_data["Report_Header"]["Investment_Rating"] = val_data["Investment_Rating"]
+
+    json_path = os.path.join(output_dir, f"{company_name}_final.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(final_data, f, ensure_ascii=False, indent=2)
+
+    if save_as_word_report:                
+        orig_name = os.path.basename(main_pdf_path) if main_pdf_path else ""
+        doc_path = save_as_word_report(final_data, company_name, report_dir, orig_name)
+        print(f"   🎉 분석 및 Word 보고서 생성 완료: {doc_path}")
+
+def _phase2_inputs(header):
+    header = header or {}
+    ceo_name = header.get("CEO_Name", "")
+    industry = header.get("Industry_Classification", "IT/제조/바이오")
+    return ceo_name, industry
+
+def _market_peer_instruction(val_data):
+    val_judge = val_data.get("Valuation_and_Judgment", {})
+    logic = val_judge.get("Valuation_Logic_Detail", {})
+    peer_list = logic.get("Step5_Final_Peers", [])
+    if not peer_list: peer_list = val_judge.get("Step5_Final_Peers", [])
+    if not peer_list: peer_list = logic.get("stage4_final_peers") or logic.get("Step4_Final_Peers") or []
+
+    peer_names = ", ".join(peer_list) if peer_list else "관련 산업 상장사"
+    return f"\n\n🚨 [필독 - 분석 지시]: 이번 분석의 경쟁사 비교표에는 반드시 다음 Peer Group 기업 중 일부를 포함하십시오: {peer_names}"
+
+# ------------------------------------------------------------
+# [병렬 Agent 실행부] - 의존성 그래프에 기반한 Phase 제어
+# ------------------------------------------------------------
+def run_agents(main_pdf_path, company_name, combined_extra_text):
+    """스레드 풀 기반 실행. Returns: (fin, mkt, tech, human, val)"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as agent_executor:
+
+        # ▶ Phase 1: 의존성이 없는 Financial, Tech 에이전트 동시 실행
+        print("      ⚡ [Phase 1] Financial & Tech Agent 병렬 실행 중...")
+        header_future = concurrent.futures.Future()
+        def on_header(header):
+            if not header_future.done(): header_future.set_result(header)
+
+        future_fin = agent_executor.submit(metrics.bind(financial_agent.analyze, agent="financial"), main_pdf_path, extra_text=combined_extra_text,
+                                           on_header=on_header if STREAM_FINANCIAL_HEADER else None)
+        future_tech = agent_executor.submit(metrics.bind(tech_agent.analyze, agent="tech"), main_pdf_path, extra_text=combined_extra_text)
+
+        # Report_Header(CEO/산업군)만 있으면 Phase 2를 시작할 수 있으므로, 헤더 스트리밍 또는 Financial 완료 중 먼저 오는 쪽을 기다림
+        concurrent.futures.wait([header_future, future_fin], return_when=concurrent.futures.FIRST_COMPLETED)
+        if header_future.done():
+            header = header_future.result()
+            print("      ✅ Financial Report_Header 수신 (나머지 재무 분석은 계속 진행)")
+        else:
+            header = future_fin.result().get("Report_Header", {})
+            print("      ✅ Financial Agent 완료 (CEO 및 산업군 정보 확보)")
+        ceo_name, industry = _phase2_inputs(header)
+
+        # ▶ Phase 2: Financial에 의존하는 Valuation, Personnel 동시 실행
+        print("      ⚡ [Phase 2] Valuation & Personnel Agent 병렬 실행 중...")
+        future_val = agent_executor.submit(metrics.bind(valuation_agent.analyze, agent="valuation"), main_pdf_path, company_name, ceo_name, industry, extra_text=combined_extra_text)
+        future_human = agent_executor.submit(metrics.bind(personnel_agent.analyze, agent="personnel"), main_pdf_path, ceo_name, extra_text=combined_extra_text)
+
+        # Valuation 결과 대기 (Phase 3을 위한 필수 동기화 데이터)
+        val_data = future_val.result()
+        print("      ✅ Valuation Agent 완료 (Peer Group 상장사 명단 확보)")
+        peer_instruction = _market_peer_instruction(val_data)
+
+        # ▶ Phase 3: Valuation에 의존하는 Market 에이전트 단독 실행
+        print("      ⚡ [Phase 3] Market Agent 실행 중...")
+        future_mkt = agent_executor.submit(metrics.bind(market_agent.analyze, agent="market"), main_pdf_path, company_name, industry, extra_text=combined_extra_text, peer_instruction=peer_instruction)
+
+        # 모든 스레드의 결과물 최종 수집
+        fin_data = future_fin.result()
+        tech_data = future_tech.result()
+        human_data = future_human.result()
+        mkt_data = future_mkt.result()
+
+    print("      ✅ 모든 Agent 분석 완료!")
+    return fin_data, mkt_data, tech_data, human_data, val_data
+
+async def run_agents_async(main_pdf_path, company_name, combined_extra_text):
+    """
+    asyncio 기반 실행. Phase 그래프는 run_agents와 동일하며,
+    동시 요청 수는 스레드 수가 아니라 gemini_async의 세마포어가 제한합니다.
+    """
+    try:
+        print("      ⚡ [Phase 1] Financial & Tech Agent 병렬 실행 중...")
+        header_future = asyncio.get_running_loop().create_future()
+        def on_header(header):
+            if not header_future.done(): header_future.set_result(header)
+
+        task_fin = asyncio.create_task(metrics.bind(financial_agent.analyze_async, agent="financial")(
+            main_pdf_path, extra_text=combined_extra_text, on_header=on_header if STREAM_FINANCIAL_HEADER else None))
+        task_tech = asyncio.create_task(metrics.bind(tech_agent.analyze_async, agent="tech")(main_pdf_path, extra_text=combined_extra_text))
+
+        await asyncio.wait({header_future, task_fin}, return_when=asyncio.FIRST_COMPLETED)
+        if header_future.done():
+            header = header_future.result()
+            print("      ✅ Financial Report_Header 수신 (나머지 재무 분석은 계속 진행)")
+        else:
+            header = task_fin.result().get("Report_Header", {})
+            print("      ✅ Financial Agent 완료 (CEO 및 산업군 정보 확보)")
+        ceo_name, industry = _phase2_inputs(header)
+
+        print("      ⚡ [Phase 2] Valuation & Personnel Agent 병렬 실행 중...")
+        task_val = asyncio.create_task(metrics.bind(valuation_agent.analyze_async, agent="valuation")(main_pdf_path, company_name, ceo_name, industry, extra_text=combined_extra_text))
+        task_human = asyncio.create_task(metrics.bind(personnel_agent.analyze_async, agent="personnel")(main_pdf_path, ceo_name, extra_text=combined_extra_text))
+
+        val_data = await task_val
+        print("      ✅ Valuation Agent 완료 (Peer Group 상장사 명단 확보)")
+        peer_instruction = _market_peer_instruction(val_data)
+
+        print("      ⚡ [Phase 3] Market Agent 실행 중...")
+        mkt_data = await metrics.bind(market_agent.analyze_async, agent="market")(main_pdf_path, company_name, industry, extra_text=combined_extra_text, peer_instruction=peer_instruction)
+        fin_data, tech_data, human_data = await asyncio.gather(task_fin, task_tech, task_human)
+    finally:
+        await gemini_async.aclose()
+
+    print("      ✅ 모든 Agent 분석 완료!")
+    return fin_data, mkt_data, tech_data, human_data, val_data
+
+def run_batch(company_data_map, output_dir, report_dir):
+    """
+    오프라인 배치 모드. 기업별 의존성 그래프(run_agents)를 batch_jobs.collect() 안에서 wave마다 다시 실행합니다.
+    각 wave에서 모든 기업이 '지금 보낼 수 있는' 요청만 모아 배치 잡 하나로 제출하고,
+    결과가 응답 캐시에 적재되면 다음 wave에서 각 그래프가 캐시 적중으로 그 다음 단계까지 진행합니다.
+    """
+    if response_cache.get_mode() != "normal":
+        print("⚠️ 배치 모드는 응답 캐시(normal 모드)로 결과를 전달하므로 --replay/--refresh/--no-cache와 함께 쓸 수 없습니다.")
+        return
+    # 이전 실행이 제출만 하고 끊겼다면 그 결과부터 적재 (재제출 없이 이어서 진행)
+    batch_jobs.resume()
+
+    print("   [1/3] 📑 기업별 문서 파싱 중...")
+    remaining = {}
+    for company_name, files in company_data_map.items():
+        metrics.set_tags(company=company_name)
+        print(f"   ▶ {company_name}")
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                parsed_text = f.read()
+            main_pdf_path, combined_extra_text = prepare_company(files)
         except Exception as e:
-            print(f"      ⚠️ Markdown 읽기 실패 ({os.path.basename(file_path)}): {e}")
-    else:
-        parsed_text = parse_any_file(file_path)
-    
-    if parsed_text:
-        return f"\n\n==== [보충 문서: {os.path.basename(file_path)}] ====\n{parsed_text}"
-    return ""
-
-def main():
+            print(f"   ❌ [Fail] 문서 파싱 중 오류 발생: {e}")
+            continue
+        if not main_pdf_path and not combined_extra_text:
+            print(f"   ⚠️ [Skip] 분석 가능한 문서가 없습니다.")
+            continue
+        remaining[company_name] = (main_pdf_path, combined_extra_text)
+
+    total = len(remaining)
+    for wave in range(1, batch_jobs.MAX_WAVES + 1):
+        print(f"\n🌊 [Batch wave {wave}] 진행 중인 기업 {len(remaining)}/{total}개 그래프 재개")
+        with batch_jobs.collect():
+            for company_name, (main_pdf_path, combined_extra_text) in list(remaining.items()):
+                metrics.set_tags(company=company_name)
+                print(f"   ▶ {company_name}")
+                try:
+                    results = run_agents(main_pdf_path, company_name, combined_extra_text)
+                except batch_jobs.BatchDeferred:
+                    continue
+                except Exception as e:
+                    print(f"   ❌ [Fail] 분석 중 오류 발생: {e}")
+                    traceback.print_exc()
+                    remaining.pop(company_name)
+                    continue
+                save_results(company_name, main_pdf_path, results, output_dir, report_dir)
+                remaining.pop(company_name)
+
+        if not remaining: break
+        jobs = batch_jobs.submit_pending(wave)
+        if not jobs:
+            print("   ⚠️ [Batch] 대기 중인 요청 없이 멈춘 그래프가 있어 중단합니다.")
+            break
+        for job in jobs:
+            op = batch_jobs.wait(job)
+            if op is None: return
+            batch_jobs.ingest(job, op)
+
+    if remaining:
+        print(f"   ⚠️ [Batch] 미완료 기업 {len(remaining)}개: {', '.join(remaining)} (다시 실행하면 이어서 진행)")
+
+def main(use_async=False, use_batch=False):
     output_dir = "output"
     report_dir = "output_report"
     for d in [output_dir, report_dir]: os.makedirs(d, exist_ok=True)
@@ -125,113 +336,82 @@ def main():
         print("📂 처리할 기업 데이터(폴더)가 없습니다.")
         return
 
-    print(f"🚀 총 {len(company_data_map)}개 기업 멀티-에이전트 병렬 분석 시작\n")
+    metrics_path = metrics.open_run(output_dir)
+    print(f"📈 호출 계측 로그: {metrics_path}")
 
-    for i, (company_name, files) in enumerate(company_data_map.items()):
-        json_path = os.path.join(output_dir, f"{company_name}_final.json")
-        
-        print(f"==================================================")
-        print(f">>> [{i+1}/{len(company_data_map)}] '{company_name}' 분석 시작")
-        print(f"==================================================")
+    print(f"🚀 총 {len(company_data_map)}개 기업 멀티-에이전트 {'배치' if use_batch else '병렬'} 분석 시작\n")
 
-        try:
-            # 1. 메인 PDF 추출
-            ir_pdfs = [f for f in files.get("IR", []) if f.lower().endswith('.pdf')]
-            main_pdf_path = ir_pdfs[0] if ir_pdfs else None
-
-            # 2. 추가 문서 병렬 파싱 (속도 극대화)
-            print("   [1/3] 📑 추가 문서 병렬 파싱 중 (Excel, PPT, Word, Markdown 등)...")
-            extra_texts = []
-            parse_futures = []
-            with concurrent.futures.ThreadPoolExecutor() as parse_executor:
-                for doc_type, file_list in files.items():
-                    for file_path in file_list:
-                        parse_futures.append(parse_executor.submit(parse_extra_file, file_path, main_pdf_path))
-                
-                for f in concurrent.futures.as_completed(parse_futures):
-                    res = f.result()
-                    if res: extra_texts.append(res)
-            
-            combined_extra_text = "".join(extra_texts)
-
-            if not main_pdf_path and not combined_extra_text:
-                print(f"   ⚠️ [Skip] 분석 가능한 문서가 없습니다.")
-                continue
-
-            print(f"        → 확보된 데이터: 메인 PDF({'O' if main_pdf_path else 'X'}), 보충 텍스트({len(combined_extra_text)} bytes)")
-            
-            # ------------------------------------------------------------
-            # [비동기 병렬 Agent 실행부] - 의존성 그래프에 기반한 Phase 제어
-            # ------------------------------------------------------------
-            print("   [2/3] 🤖 멀티 에이전트 병렬 분석 시작...")
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as agent_executor:
-                
-                # ▶ Phase 1: 의존성이 없는 Financial, Tech 에이전트 동시 실행
-                print("      ⚡ [Phase 1] Financial & Tech Agent 병렬 실행 중...")
-                future_fin = agent_executor.submit(financial_agent.analyze, main_pdf_path, extra_text=combined_extra_text)
-                future_tech = agent_executor.submit(tech_agent.analyze, main_pdf_path, extra_text=combined_extra_text)
-
-                # Financial 결과 대기 (Phase 2를 위한 필수 기초 데이터)
-                fin_data = future_fin.result()
-                print("      ✅ Financial Agent 완료 (CEO 및 산업군 정보 확보)")
-
-                header = fin_data.get("Report_Header", {})
-                ceo_name = header.get("CEO_Name", "")
-                industry = header.get("Industry_Classification", "IT/제조/바이오")
-
-                # ▶ Phase 2: Financial에 의존하는 Valuation, Personnel 동시 실행
-                print("      ⚡ [Phase 2] Valuation & Personnel Agent 병렬 실행 중...")
-                future_val = agent_executor.submit(valuation_agent.analyze, main_pdf_path, company_name, ceo_name, industry, extra_text=combined_extra_text)
-                future_human = agent_executor.submit(personnel_agent.analyze, main_pdf_path, ceo_name, extra_text=combined_extra_text)
-
-                # Valuation 결과 대기 (Phase 3을 위한 필수 동기화 데이터)
-                val_data = future_val.result()
-                print("      ✅ Valuation Agent 완료 (Peer Group 상장사 명단 확보)")
-
-                val_judge = val_data.get("Valuation_and_Judgment", {})
-                logic = val_judge.get("Valuation_Logic_Detail", {})
-                peer_list = logic.get("Step5_Final_Peers", [])
-                if not peer_list: peer_list = val_judge.get("Step5_Final_Peers", [])
-                if not peer_list: peer_list = logic.get("stage4_final_peers") or logic.get("Step4_Final_Peers") or []
-                
-                peer_names = ", ".join(peer_list) if peer_list else "관련 산업 상장사"
-                market_sync_instruction = f"\n\n🚨 [필독 - 분석 지시]: 이번 분석의 경쟁사 비교표에는 반드시 다음 Peer Group 기업 중 일부를 포함하십시오: {peer_names}"
-                market_extra_text = combined_extra_text + market_sync_instruction
-
-                # ▶ Phase 3: Valuation에 의존하는 Market 에이전트 단독 실행
-                print("      ⚡ [Phase 3] Market Agent 실행 중...")
-                future_mkt = agent_executor.submit(market_agent.analyze, main_pdf_path, company_name, industry, extra_text=market_extra_text)
-
-                # 모든 스레드의 결과물 최종 수집
-                tech_data = future_tech.result()
-                human_data = future_human.result()
-                mkt_data = future_mkt.result()
-                
-                print("      ✅ 모든 Agent 분석 완료!")
-
-            # ------------------------------------------------------------
-            # [데이터 병합 및 저장]
-            # ------------------------------------------------------------
-            print("   [3/3] 💾 데이터 병합 및 보고서 생성 중...")
-            final_data = merge_dictionaries([fin_data, mkt_data, tech_data, human_data, val_data])
+    if use_batch:
+        run_batch(company_data_map, output_dir, report_dir)
+    else:
+        for i, (company_name, files) in enumerate(company_data_map.items()):
+            print(f"==================================================")
+            print(f">>> [{i+1}/{len(company_data_map)}] '{company_name}' 분석 시작")
+            print(f"==================================================")
+
+            metrics.set_tags(company=company_name)
+            try:
+                main_pdf_path, combined_extra_text = prepare_company(files)
+                if not main_pdf_path and not combined_extra_text:
+                    print(f"   ⚠️ [Skip] 분석 가능한 문서가 없습니다.")
+                    continue
+
+                # ------------------------------------------------------------
+                # [비동기 병렬 Agent 실행부] - 의존성 그래프에 기반한 Phase 제어
+                # ------------------------------------------------------------
+                print("   [2/3] 🤖 멀티 에이전트 병렬 분석 시작...")
             
-            # Valuation 에이전트가 만든 종합 등급을 Report_Header로 안전하게 이동
-            if "Investment_Rating" in val_data:
-                if "Report_Header" not in final_data: final_data["Report_Header"] = {}
-                final_data["Report_Header"]["Investment_Rating"] = val_data["Investment_Rating"]
-
-            with open(json_path, "w", encoding="utf-8") as f:
-                json.dump(final_data, f, ensure_ascii=False, indent=2)
-
-            if save_as_word_report:                
-                orig_name = os.path.basename(main_pdf_path) if main_pdf_path else ""
-                doc_path = save_as_word_report(final_data, company_name, report_dir, orig_name)
-                print(f"   🎉 분석 및 Word 보고서 생성 완료: {doc_path}")
-
-        except Exception as e:
-            print(f"   ❌ [Fail] 분석 중 오류 발생: {e}")
-            traceback.print_exc()
+                # 메인 PDF + 보충 텍스트를 기업 단위 Context Cache로 1회만 업로드하고, 분석이 끝나면 즉시 만료
+                with company_context(main_pdf_path, combined_extra_text):
+                    if use_async:
+                        fin_data, mkt_data, tech_data, human_data, val_data = asyncio.run(
+                            run_agents_async(main_pdf_path, company_name, combined_extra_text))
+                    else:
+                        fin_data, mkt_data, tech_data, human_data, val_data = run_agents(
+                            main_pdf_path, company_name, combined_extra_text)
+
+                save_results(company_name, main_pdf_path, (fin_data, mkt_data, tech_data, human_data, val_data), output_dir, report_dir)
+
+            except Exception as e:
+                print(f"   ❌ [Fail] 분석 중 오류 발생: {e}")
+                traceback.print_exc()
+
+    metrics.set_tags(company=None)
+    metrics.print_summary()
+    metrics.close_run()
+
+    stats = pdf_cache_stats()
+    rc = response_cache.stats()
+    print(f"\n🗄️ 응답 캐시({rc['mode']}): hit {rc['hits']} / miss {rc['misses']} (만료 {rc['expired']}, 저장 {rc['writes']})")
+    rl = rate_limiter.stats()
+    print(f"🚦 Rate limiter: 요청 {rl['requests']}건 / 429 {rl['throttled']}회 | 쿼터 대기 {rl['wait_sec']:.1f}s (max {rl['max_wait_sec']:.1f}s) vs 실행 {rl['exec_sec']:.1f}s | 토큰 추정 {rl['est_tokens']:,} / 실측 {rl['actual_tokens']:,}")
+    if use_batch:
+        bs = batch_jobs.stats()
+        print(f"📮 Batch: 잡 {bs['jobs']}개 (미적재 {bs['open']}) | 요청 {bs['requests']}건 → 성공 {bs['ok']} / 실패 {bs['failed']}")
+    parse_stage.shutdown()
+    ps = parse_stage.stats()
+    print(f"🧵 문서 파싱({ps['executor']} x{ps['workers']}): 파일 {ps['files']}개 | 캐시 {ps['cached']} / 프로세스 {ps['process']} / 스레드 {ps['thread']} | 시간 초과 {ps['timeouts']} · 실패 {ps['errors']}")
+    ds = dedup.stats()
+    if ds["enabled"] and ds["units"]:
+        print(f"🧹 중복 제거: 페이지 {ds['dropped']}/{ds['units']}개 | {ds['bytes_removed'] / 1024:.0f} / {ds['bytes_in'] / 1024:.0f} KB 제거 (유사도 ≥ {ds['threshold']})")
+    pc = parse_cache.stats()
+    if pc["enabled"]:
+        print(f"📑 파싱 캐시: hit {pc['hits']} / miss {pc['misses']} (저장 {pc['writes']}건, {pc['bytes_written'] / 1024:.0f} KB)")
+    print(f"📦 PDF base64 캐시: hit {stats['hits']} / miss {stats['misses']} (evict {stats['evictions']}, {stats['bytes'] / 1024 / 1024:.1f} MB 보관)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    ap = argparse.ArgumentParser(description="IR 자료 멀티-에이전트 분석")
+    cache_group = ap.add_mutually_exclusive_group()
+    cache_group.add_argument("--replay", action="store_true", help="디스크 응답 캐시만 사용 (네트워크 호출 없음)")
+    cache_group.add_argument("--refresh", action="store_true", help="응답 캐시를 무시하고 모두 재호출 후 갱신")
+    cache_group.add_argument("--no-cache", action="store_true", help="응답 캐시 미사용")
+    mode_group = ap.add_mutually_exclusive_group()
+    mode_group.add_argument("--async", dest="use_async", action="store_true", help="에이전트를 asyncio 이벤트 루프에서 실행 (httpx 필요)")
+    mode_group.add_argument("--batch", action="store_true", help="모든 기업의 호출을 배치 잡(batchGenerateContent)으로 모아 제출 (야간 일괄 처리용)")
+    args = ap.parse_args()
+
+    if args.replay: response_cache.set_mode("replay")
+    elif args.refresh: response_cache.set_mode("refresh")
+    elif args.no_cache: response_cache.set_mode("off")
+    main(use_async=args.use_async, use_batch=args.batch)
\ No newline at end of file
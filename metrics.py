@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import asyncio
+import datetime
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+from urllib.parse import urlparse
+
+# =========================================================
+# 💡 [설정] 호출 단위 계측 (Gemini 호출 / 크롤링)
+# =========================================================
+# company / agent / stage 태그는 ContextVar로 전달됩니다.
+#   - asyncio Task는 생성 시점의 컨텍스트를 자동으로 복사
+#   - ThreadPoolExecutor는 복사하지 않으므로 submit/map 시 bind()로 감싸야 합니다.
+_tags = contextvars.ContextVar("metrics_tags", default={})
+
+_lock = threading.Lock()
+_records = []
+_file = None
+_path = None
+
+@contextmanager
+def scope(**tags):
+    """with 블록 안에서 기록되는 모든 이벤트에 태그를 붙입니다."""
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+def set_tags(**tags):
+    """현재 컨텍스트의 태그를 교체합니다. (main 루프에서 기업이 바뀔 때 사용)"""
+    _tags.set({**_tags.get(), **tags})
+
+def bind(fn, **tags):
+    """현재 태그(+추가 태그)를 다른 스레드/태스크로 넘기기 위해 함수를 감쌉니다."""
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            with scope(**tags):
+                return await fn(*args, **kwargs)
+        return async_wrapper
+
+    ctx_tags = {**_tags.get(), **tags}
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _tags.set(ctx_tags)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _tags.reset(token)
+    return wrapper
+
+def open_run(output_dir: str = "output") -> str:
+    """실행 단위 JSONL 파일을 엽니다. 호출하지 않으면 메모리에만 기록합니다."""
+    global _file, _path
+    path = os.getenv("GEMINI_METRICS_PATH") or os.path.join(
+        output_dir, "metrics", f"run_{datetime.datetime.now():%Y%m%d_%H%M%S}.jsonl")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with _lock:
+        if _file: _file.close()
+        _file = open(path, "a", encoding="utf-8", buffering=1)
+        _path = path
+    return path
+
+def close_run():
+    global _file
+    with _lock:
+        if _file:
+            _file.close()
+            _file = None
+
+def record(kind: str, **fields):
+    rec = {"ts": round(time.time(), 3), "kind": kind, **_tags.get(), **fields}
+    with _lock:
+        _records.append(rec)
+        if _file: _file.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+def records() -> list:
+    with _lock:
+        return list(_records)
+
+def reset():
+    with _lock:
+        _records.clear()
+
+# =========================================================
+# 🔌 계측 지점 헬퍼
+# =========================================================
+def record_llm(res: dict, latency: float, call_type: str = "document", model: str = None, **extra):
+    """
+    gemini_client.post_generate / response_cache.fetch 결과를 그대로 받아 기록합니다.
+    토큰 수는 응답의 usageMetadata 기준이며, 캐시 적중 시에도 저장된 응답의 값을 그대로 남깁니다.
+    """
+    usage = ((res.get("json") or {}).get("usageMetadata") or {}) if res.get("ok") else {}
+    attempts = res.get("attempts", 0 if res.get("cached") else 1)
+    record(
+        "llm",
+        call_type=call_type,
+        model=model,
+        ok=bool(res.get("ok")),
+        status=res.get("status", 200 if res.get("ok") else 0),
+        latency_ms=round(latency * 1000, 1),
+        retries=max(0, attempts - 1),
+        cached=bool(res.get("cached")),
+        prompt_tokens=usage.get("promptTokenCount", 0),
+        output_tokens=usage.get("candidatesTokenCount", 0),
+        cached_tokens=usage.get("cachedContentTokenCount", 0),
+        total_tokens=usage.get("totalTokenCount", 0),
+        **extra,
+    )
+
+def record_scrape(url: str, status: int, latency: float, nbytes: int = 0, error: str = None):
+    record(
+        "scrape",
+        host=urlparse(url).netloc,
+        status=status,
+        latency_ms=round(latency * 1000, 1),
+        bytes=nbytes,
+        error=error,
+    )
+
+def timed_get(url: str, **kwargs):
+    """requests.get과 동일하게 동작하면서 크롤링 이벤트를 기록합니다. (예외는 그대로 전파)"""
+    import requests
+    t0 = time.perf_counter()
+    try:
+        res = requests.get(url, **kwargs)
+    except Exception as e:
+        record_scrape(url, 0, time.perf_counter() - t0, error=type(e).__name__)
+        raise
+    record_scrape(url, res.status_code, time.perf_counter() - t0, len(res.content))
+    return res
+
+# =========================================================
+# 📊 실행 요약
+# =========================================================
+def _pct(values: list, p: float) -> float:
+    if not values: return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, max(0, int(round(p / 100 * len(s))) - 1))]
+
+def summarize(recs: list = None) -> list:
+    """(company, agent|stage) 단위 집계 행 목록"""
+    groups = defaultdict(list)
+    for r in (recs if recs is not None else records()):
+        if r["kind"] not in ("llm", "scrape"): continue
+        owner = "/".join(x for x in (r.get("agent"), r.get("stage")) if x) or "-"
+        groups[(r.get("company") or "-", owner, r["kind"])].append(r)
+
+    rows = []
+    for (company, owner, kind), rs in sorted(groups.items()):
+        lat = [r["latency_ms"] for r in rs]
+        rows.append({
+            "company": company, "owner": owner, "kind": kind,
+            "calls": len(rs),
+            "cached": sum(1 for r in rs if r.get("cached")),
+            "retries": sum(r.get("retries", 0) for r in rs),
+            "errors": sum(1 for r in rs if (r.get("ok") is False) or (kind == "scrape" and r.get("status") != 200)),
+            "p50_ms": _pct(lat, 50), "p95_ms": _pct(lat, 95),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in rs),
+            "output_tokens": sum(r.get("output_tokens", 0) for r in rs),
+        })
+    return rows
+
+def budget_summary(recs: list = None) -> dict:
+    """token_budget이 보충 텍스트를 줄인 기록 집계"""
+    rs = [r for r in (recs if recs is not None else records()) if r["kind"] == "budget"]
+    return {
+        "trimmed_calls": sum(1 for r in rs if not r.get("over_limit")),
+        "saved_tokens": sum(r.get("saved_tokens", 0) for r in rs),
+        "over_limit": sum(1 for r in rs if r.get("over_limit")),
+    }
+
+def print_summary(recs: list = None):
+    recs = recs if recs is not None else records()
+    rows = summarize(recs)
+    if not rows: return
+    header = ["company", "agent/stage", "kind", "calls", "cache", "retry", "err", "p50(ms)", "p95(ms)", "in tok", "out tok"]
+    table = [[r["company"], r["owner"], r["kind"], r["calls"], r["cached"], r["retries"], r["errors"],
+              f"{r['p50_ms']:.0f}", f"{r['p95_ms']:.0f}", f"{r['prompt_tokens']:,}", f"{r['output_tokens']:,}"]
+             for r in rows]
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *table)]
+    line = lambda cells: "  " + " | ".join(str(c).ljust(w) for c, w in zip(cells, widths))
+
+    print("\n📊 [Metrics] 호출 요약")
+    print(line(header))
+    print("  " + "-+-".join("-" * w for w in widths))
+    for row in table: print(line(row))
+    budget = budget_summary(recs)
+    if budget["trimmed_calls"] or budget["over_limit"]:
+        print(f"   ✂️ 보충 텍스트 예산 적용 {budget['trimmed_calls']}건 | 절감 약 {budget['saved_tokens']:,} tok"
+              + (f" | 🚨 모델 한도 초과 추정 {budget['over_limit']}건" if budget["over_limit"] else ""))
+    if _path: print(f"   → 상세 로그: {_path}")
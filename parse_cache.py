@@ -0,0 +1,67 @@
+import os
+import zlib
+import threading
+from hashing import file_sha256
+
+# =========================================================
+# 💡 [설정] 파싱 결과 디스크 캐시 (파일 내용 해시 + 파서 버전)
+# =========================================================
+# data/ 폴더가 그대로면 main을 다시 돌리거나 보고서만 재생성할 때 PDF/DOCX/PPTX/XLSX/CSV를 다시 파싱하지 않습니다.
+# 키는 (파일 내용 sha256, 추출 종류, 파서 버전)이라 파일 이름/위치가 바뀌어도 재사용되고,
+# 파서 출력 형식이 바뀌면 버전만 올리면 기존 항목은 자연스럽게 무시됩니다.
+CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(".cache", "parsed"))
+ENABLED = os.getenv("PARSE_CACHE", "1") != "0"
+
+_stats = {"hits": 0, "misses": 0, "writes": 0, "bytes_written": 0}
+_stats_lock = threading.Lock()
+
+def _path(digest: str, kind: str, version: str) -> str:
+    return os.path.join(CACHE_DIR, digest[:2], f"{digest}.{kind}.v{version}.txt.z")
+
+def get(file_path: str, kind: str, version: str):
+    """캐시된 추출 텍스트 또는 None"""
+    if not ENABLED: return None
+    try:
+        with open(_path(file_sha256(file_path), kind, version), "rb") as f:
+            text = zlib.decompress(f.read()).decode("utf-8")
+    except (OSError, zlib.error, UnicodeDecodeError):
+        with _stats_lock: _stats["misses"] += 1
+        return None
+    with _stats_lock: _stats["hits"] += 1
+    return text
+
+def put(file_path: str, kind: str, version: str, text: str):
+    if not ENABLED: return
+    path = _path(file_sha256(file_path), kind, version)
+    data = zlib.compress(text.encode("utf-8"), 6)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 여러 스레드/프로세스가 같은 파일을 동시에 파싱해도 반쯤 쓴 파일을 읽지 않도록 임시 파일 → 교체
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"      ⚠️ [Parse Cache] 저장 실패 ({os.path.basename(file_path)}): {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+        return
+    with _stats_lock:
+        _stats["writes"] += 1
+        _stats["bytes_written"] += len(data)
+
+def cached(file_path: str, kind: str, version: str, parse_fn, is_error=None) -> str:
+    """
+    캐시에 있으면 돌려주고, 없으면 parse_fn(file_path)를 호출해 저장합니다.
+    is_error(text)가 True인 결과(라이브러리 미설치, 파싱 오류 문구 등)는 저장하지 않습니다.
+    """
+    if not ENABLED or not os.path.isfile(file_path): return parse_fn(file_path)
+    text = get(file_path, kind, version)
+    if text is not None: return text
+    text = parse_fn(file_path)
+    if isinstance(text, str) and not (is_error and is_error(text)):
+        put(file_path, kind, version, text)
+    return text
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, enabled=ENABLED)
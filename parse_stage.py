@@ -0,0 +1,215 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+import concurrent.futures
+import parser as doc_parser
+import parse_cache
+
+# =========================================================
+# 💡 [설정] 보충 문서 파싱 단계 (프로세스 풀 / 스레드 풀)
+# =========================================================
+# PyMuPDF, python-docx/pptx, pandas/openpyxl 파싱은 대부분 CPU 작업이라 스레드 풀로는 GIL 때문에 거의 병렬로 돌지 않습니다.
+#   - "process": 파일마다 별도 워커 프로세스에서 파싱 (기본값)
+#   - "thread" : 예전처럼 스레드 풀에서 파싱
+# 워커 기동(spawn) 비용이 있으므로 파싱할 분량이 PARSE_PROCESS_MIN_BYTES 미만이면 process 모드여도 스레드로 처리합니다.
+PARSE_EXECUTOR = os.getenv("PARSE_EXECUTOR", "process")
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_PROCESS_MIN_BYTES = int(os.getenv("PARSE_PROCESS_MIN_BYTES", str(512 * 1024)))
+# 파일 1개가 실제로 파싱을 시작한 뒤 이 시간을 넘기면 건너뜁니다.
+# 시작 시각은 워커가 직접 알려 주므로, 앞 파일 때문에 대기열에 머문 시간은 포함되지 않습니다.
+# 멈춘 파일 뒤에 줄 선 파일이 기약 없이 기다리지 않도록
+#   - process 모드: 첫 시간 초과 때 풀을 종료하고, 끝나지 않은 파일만 새 풀에서 다시 파싱
+#   - thread 모드 : 스레드는 종료할 수 없으므로, 멈춘 작업이 스레드를 모두 차지하면 남은 파일을 프로세스 풀로 넘김
+PARSE_TIMEOUT_SEC = float(os.getenv("PARSE_TIMEOUT_SEC", "300"))
+
+_pool = None
+_pool_starts = None  # 워커 → 부모: (path, 파싱 시작 시각) - 풀과 함께 만들고 버림
+_pool_lock = threading.Lock()
+_start_queue = None  # 워커 프로세스 안에서 쓰는 _pool_starts
+_stats = {"files": 0, "cached": 0, "process": 0, "thread": 0, "timeouts": 0, "resubmitted": 0, "errors": 0}
+
+def read_markdown(file_path: str) -> str:
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception as e:
+        print(f"      ⚠️ Markdown 읽기 실패 ({os.path.basename(file_path)}): {e}")
+        return ""
+
+def parse_file(file_path: str) -> str:
+    """파일 1개 → 텍스트 (워커 프로세스에서도 호출되므로 최상위 함수로 두고 str만 반환)"""
+    if file_path.lower().endswith('.md'):
+        return read_markdown(file_path)
+    return doc_parser.parse_any_file(file_path)
+
+def _parse_job(file_path: str, starts=None):
+    """시작 시각을 부모에게 알린 뒤 파싱합니다. (starts: 스레드 모드의 queue.Queue, 프로세스 모드는 _start_queue)"""
+    starts = starts or _start_queue
+    if starts is not None: starts.put((file_path, time.time()))
+    return parse_file(file_path)
+
+def _init_worker(starts=None):
+    global _start_queue
+    # 워커 안에서 다시 PDF/Excel 프로세스 풀을 만들면 코어 수보다 많은 프로세스가 뜨므로 워커 내부는 단일 프로세스로 추출합니다.
+    doc_parser.PARSER_WORKERS = 1
+    _start_queue = starts
+
+def _get_pool() -> tuple:
+    """Returns: (풀, 시작 시각 큐)"""
+    global _pool, _pool_starts
+    with _pool_lock:
+        if _pool is None:
+            # 스레드가 떠 있는 프로세스에서 fork하면 잠금 상태가 복제될 수 있으므로 spawn을 씁니다. (Windows 기본값과 동일)
+            ctx = multiprocessing.get_context("spawn")
+            # ProcessPoolExecutor는 호출 큐에 넘긴 작업도 running()이 True라, 실제 시작 시각은 워커가 이 큐로 알립니다.
+            _pool_starts = ctx.Queue()
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS, mp_context=ctx, initializer=_init_worker, initargs=(_pool_starts,))
+        return _pool, _pool_starts
+
+def _kill_pool():
+    """타임아웃된 파싱은 취소할 수 없으므로 워커를 강제 종료하고, 다음 파싱 때 새 풀을 만듭니다."""
+    global _pool, _pool_starts
+    with _pool_lock:
+        pool, _pool, _pool_starts = _pool, None, None
+    if pool is None: return
+    # ProcessPoolExecutor는 실행 중인 작업을 중단하는 공개 API가 없어 워커 프로세스를 직접 종료합니다.
+    for proc in list((getattr(pool, "_processes", None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def shutdown():
+    global _pool, _pool_starts
+    with _pool_lock:
+        pool, _pool, _pool_starts = _pool, None, None
+    if pool is not None: pool.shutdown(wait=True, cancel_futures=True)
+
+def _drain_starts(starts, started: dict, since: float):
+    while True:
+        try:
+            path, ts = starts.get_nowait()
+        except (queue.Empty, OSError, ValueError):
+            return
+        # 이전 parse_documents 호출에서 같은 파일이 남긴 알림은 무시
+        if ts >= since: started.setdefault(path, ts)
+
+def _collect(f, path: str, results: dict):
+    try:
+        results[path] = f.result() or ""
+    except Exception as e:
+        print(f"      ⚠️ 파싱 실패 ({os.path.basename(path)}): {type(e).__name__}: {e}")
+        results[path] = ""
+        _stats["errors"] += 1
+
+def _wait_all(futures: dict, timeout: float, starts, since: float, stop_at: int = 1) -> tuple:
+    """
+    futures: {path: future} (since 이후 제출). 워커가 _parse_job에서 알린 시작 시각(starts 큐)부터
+    timeout초가 지난 파일은 포기합니다. 포기한 작업 중 아직 끝나지 않은 것이 stop_at개가 되면
+    (그 워커들은 더 이상 다음 파일을 받지 못하므로) 나머지를 취소하고 바로 돌아옵니다.
+    Returns: ({path: text}, [타임아웃된 path], [끝나지 않아 다시 맡겨야 하는 path])
+    """
+    by_future = {f: path for path, f in futures.items()}
+    results, started, timed_out, hung = {}, {}, [], []
+    pending = set(by_future)
+    while pending:
+        done, pending = concurrent.futures.wait(pending, timeout=min(1.0, timeout))
+        for f in done:
+            _collect(f, by_future[f], results)
+        _drain_starts(starts, started, since)
+        now = time.time()
+        for f in list(pending):
+            # 대기열에 있는 동안은 시간을 재지 않습니다. (큰 파일 뒤에 줄 선 작은 파일이 억울하게 잘리지 않도록)
+            # f.running()은 프로세스 풀 호출 큐에 넘어간 작업도 True이므로 쓰지 않습니다.
+            path = by_future[f]
+            if path in started and now - started[path] > timeout:
+                pending.discard(f)
+                f.cancel()
+                timed_out.append(path)
+                hung.append(f)
+        if pending and sum(not f.done() for f in hung) >= stop_at:
+            break
+    left = []
+    for f in pending:
+        if f.done() and not f.cancelled():
+            _collect(f, by_future[f], results)
+        else:
+            f.cancel()
+            left.append(by_future[f])
+    for path in timed_out:
+        print(f"      ⏱️ 파싱 시간 초과 ({timeout:.0f}s) - 건너뜀: {os.path.basename(path)}")
+        results[path] = ""
+    _stats["timeouts"] += len(timed_out)
+    return results, timed_out, left
+
+def _parse_in_processes(paths: list, timeout: float, job=_parse_job) -> dict:
+    """
+    시간 초과가 나오면 바로 풀을 종료하고(멈춘 워커는 죽이는 것 말고는 방법이 없음),
+    아직 끝나지 않은 파일만 새 풀에 다시 맡깁니다. 매 회차 적어도 1개는 시간 초과로 빠지므로 반드시 끝납니다.
+    """
+    results = {}
+    while paths:
+        pool, starts = _get_pool()
+        parsed, timed_out, paths = _wait_all({p: pool.submit(job, p) for p in paths}, timeout, starts, time.time())
+        results.update(parsed)
+        if timed_out: _kill_pool()
+        if paths:
+            print(f"      🔁 파싱 워커 재시작 - 남은 {len(paths)}개 파일을 새 워커에서 다시 파싱")
+            _stats["resubmitted"] += len(paths)
+    return results
+
+def _parse_in_threads(paths: list, timeout: float, job=_parse_job) -> tuple:
+    """
+    스레드는 강제 종료할 수 없으므로, 시간 초과된 작업이 스레드를 모두 붙잡아 대기열이 멈추면 더 기다리지 않고
+    시작하지 못한 파일을 돌려줍니다. Returns: ({path: text}, [프로세스 풀로 넘길 path])
+    """
+    workers = max(1, PARSE_WORKERS)
+    thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+    starts, since = queue.Queue(), time.time()
+    parsed, timed_out, left = _wait_all({p: thread_pool.submit(job, p, starts) for p in paths}, timeout, starts, since, stop_at=workers)
+    # 시간 초과된 작업은 기다리지 않고 버립니다.
+    thread_pool.shutdown(wait=not timed_out, cancel_futures=True)
+    return parsed, left
+
+def _parse_pending(paths: list, use_process: bool, timeout: float, job=_parse_job) -> dict:
+    if use_process:
+        _stats["process"] += len(paths)
+        return _parse_in_processes(paths, timeout, job)
+    _stats["thread"] += len(paths)
+    parsed, left = _parse_in_threads(paths, timeout, job)
+    if left:
+        print(f"      🔁 파싱 스레드가 모두 멈춤 - 남은 {len(left)}개 파일은 프로세스 풀에서 파싱")
+        _stats["resubmitted"] += len(left)
+        parsed.update(_parse_in_processes(left, timeout, job))
+    return parsed
+
+def parse_documents(paths: list, executor: str = None, timeout: float = None) -> list:
+    """
+    파일 목록을 병렬로 파싱합니다. Returns: paths와 같은 순서의 텍스트 목록 (실패/시간 초과는 "")
+    Markdown과 parse_cache 적중 파일은 워커를 거치지 않고 바로 읽습니다.
+    """
+    executor = executor or PARSE_EXECUTOR
+    timeout = timeout or PARSE_TIMEOUT_SEC
+    results, pending = {}, []
+    for path in paths:
+        _stats["files"] += 1
+        if path.lower().endswith('.md'):
+            results[path] = read_markdown(path)
+            continue
+        cached = parse_cache.get(path, "text", doc_parser.PARSER_VERSION) if os.path.isfile(path) else None
+        if cached is not None:
+            results[path] = cached
+            _stats["cached"] += 1
+            continue
+        pending.append(path)
+
+    if pending:
+        total_bytes = sum(os.path.getsize(p) for p in pending if os.path.isfile(p))
+        use_process = executor == "process" and PARSE_WORKERS > 1 and total_bytes >= PARSE_PROCESS_MIN_BYTES
+        results.update(_parse_pending(pending, use_process, timeout))
+
+    return [results.get(p, "") for p in paths]
+
+def stats() -> dict:
+    return dict(_stats, executor=PARSE_EXECUTOR, workers=PARSE_WORKERS)
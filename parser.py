@@ -1,6 +1,34 @@
 import os
+import datetime
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import json
+import collections
 import pandas as pd
 import traceback
+import parse_cache
+import csv_loader
+
+# 추출 결과 형식(마커, 표 변환 방식 등)이 바뀌면 올려서 parse_cache의 기존 항목을 무효화합니다.
+PARSER_VERSION = "3"
+
+# =========================================================
+# 💡 [설정] PDF/Excel 병렬 추출 (프로세스 풀)
+# =========================================================
+# PyMuPDF 추출 / 엑셀 셀 변환은 CPU 작업이라 main의 스레드 풀에서는 GIL 때문에 사실상 직렬로 돕니다.
+# 임계값 이상인 문서만 페이지 구간(PDF) / 시트(Excel) 단위로 나눠 별도 프로세스에서 처리하고, 작은 문서는 기존처럼 단일 프로세스로 처리합니다.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PARSER_PDF_PARALLEL_MIN_PAGES", "80"))
+PDF_CHUNK_PAGES = int(os.getenv("PARSER_PDF_CHUNK_PAGES", "40"))
+# 표까지 찾을 때는 페이지당 비용이 수십 배라 더 적은 페이지부터 병렬로 처리합니다.
+PDF_TABLES_PARALLEL_MIN_PAGES = int(os.getenv("PARSER_PDF_TABLES_PARALLEL_MIN_PAGES", "16"))
+EXCEL_PARALLEL_MIN_BYTES = int(os.getenv("PARSER_EXCEL_PARALLEL_MIN_BYTES", str(2 * 1024 * 1024)))
+# 0 또는 1이면 프로세스 풀을 쓰지 않습니다.
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# 엑셀 고속 경로 (read-only 스트리밍 + 직접 작성하는 Markdown). 0이면 예전 pandas.read_excel + tabulate 경로
+EXCEL_FAST = os.getenv("PARSER_EXCEL_FAST", "1") != "0"
 
 # [PDF 파싱]
 try:
@@ -8,6 +36,40 @@ try:
 except ImportError:
     fitz = None
 
+# =========================================================
+# 🔎 [설정] 스캔 페이지 로컬 OCR (Tesseract)
+# =========================================================
+# 텍스트 레이어가 거의 없고 이미지가 있는 PDF 페이지(스캔본 IR 자료)는 PyMuPDF의 Tesseract 연동으로 이미지 영역을 OCR합니다.
+# Tesseract와 언어 데이터(kor.traineddata 등)가 설치된 환경에서만 켜지고, 없으면 기존처럼 텍스트 레이어만 씁니다.
+# (tessdata 위치는 TESSDATA_PREFIX 또는 tesseract 실행 파일에서 찾음) PARSER_PDF_OCR=0이면 끕니다.
+PDF_OCR = os.getenv("PARSER_PDF_OCR", "1") != "0"
+PDF_OCR_LANG = os.getenv("PARSER_PDF_OCR_LANG", "kor+eng")
+PDF_OCR_DPI = int(os.getenv("PARSER_PDF_OCR_DPI", "300"))
+# 공백을 뺀 텍스트 레이어가 이 글자 수 미만인 페이지만 OCR
+PDF_OCR_MIN_CHARS = int(os.getenv("PARSER_PDF_OCR_MIN_CHARS", "100"))
+
+def _find_tessdata():
+    if not (PDF_OCR and fitz): return None
+    try:
+        tessdata = fitz.get_tessdata()
+    except Exception:
+        return None
+    missing = [lang for lang in PDF_OCR_LANG.split("+") if not os.path.exists(os.path.join(tessdata, f"{lang}.traineddata"))]
+    if missing:
+        print(f"      ⚠️ [OCR] Tesseract 언어 데이터 없음 {missing} ({tessdata}) - 스캔 페이지 OCR을 끕니다.")
+        return None
+    return tessdata
+
+_TESSDATA = _find_tessdata()
+# OCR 사용 여부에 따라 스캔본 추출 결과가 달라지므로 캐시 버전을 나눕니다.
+if _TESSDATA: PARSER_VERSION += "+ocr"
+
+# [PDF 표 탐지 보조] PyMuPDF find_tables가 없거나 실패한 페이지에만 사용
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
 # [Word 파싱]
 try:
     import docx
@@ -20,90 +82,523 @@ try:
 except ImportError:
     Presentation = None
 
-def extract_text_from_pdf(file_path):
-    if not fitz: return "PyMuPDF 라이브러리가 설치되지 않았습니다."
+# [Excel 고속 파싱] calamine(Rust)이 있으면 우선 사용하고, 없으면 openpyxl read-only 모드
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# =========================================================
+# 🧩 청크 단위 추출 (iter_parse)
+# =========================================================
+# 모든 추출기는 페이지/슬라이드/시트 단위 청크를 하나씩 내보내는 제너레이터이고,
+# 기존 extract_text_from_* 함수는 청크를 "\n"으로 이어 붙인 것과 같습니다. (출력 형식 동일)
+# 청크: {"kind": "pdf_page"|"pptx_slide"|"excel_sheet"|"csv"|"docx_body"|"docx_table"|"error",
+#        "index": 1부터 시작하는 번호, "label": 사람이 읽는 위치, "text": 마커를 포함한 본문,
+#        "blocks": 청크를 이루는 블록 목록}
+# 블록: {"type": "marker"|"heading"|"text"|"table"|"error", "text": 직렬화된 본문, "cells": 표 셀(table만)}
+#   - 청크 text는 항상 블록 text를 "\n"으로 이은 것과 같습니다. (parse_document → to_text가 기존 텍스트와 동일)
+#   - marker는 "--- [PDF Page N] ---" 같은 위치 구분선입니다.
+def _block(type_, text, **extra):
+    return {"type": type_, "text": text, **extra}
+
+def _chunk(kind, index, label, blocks):
+    return {"kind": kind, "index": index, "label": label, "text": "\n".join(b["text"] for b in blocks), "blocks": blocks}
+
+def _error(text):
+    return _chunk("error", 0, "", [_block("error", text)])
+
+def _marker(text):
+    return _block("marker", text)
+
+def _join(chunks):
+    """청크를 기존 extract_text_from_* 반환값으로 합칩니다. 오류 청크가 나오면 기존처럼 오류 문구만 돌려줍니다."""
+    texts = []
+    for c in chunks:
+        if c["kind"] == "error": return c["text"]
+        texts.append(c["text"])
+    return "\n".join(texts)
+
+def _extract_pdf_pages(file_path, start, end, doc=None, tables=False, opened=None, ocr=True):
+    """
+    [start, end) 페이지의 (본문 텍스트, 표 목록 | None, OCR 상태) 목록 (프로세스 풀 작업 단위).
+    tables=True면 같은 페이지 객체에서 표도 찾습니다.
+    OCR 상태: None(텍스트 레이어), "done"(스캔 페이지를 OCR함), "pending"(ocr=False - 호출한 쪽이 _ocr_pdf_page로 처리)
+    opened: pdfplumber 보조 문서를 호출 사이에 재사용하기 위한 dict (없으면 이 호출 안에서만 사용)
+    """
+    own = doc is None
+    if own: doc = fitz.open(file_path)
+    own_opened = opened is None
+    if own_opened: opened = {}
     try:
-        doc = fitz.open(file_path)
-        content = []
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            content.append(f"\n--- [PDF Page {page_num + 1}] ---\n{page.get_text('text')}")
-        doc.close()
-        return "\n".join(content)
+        out = []
+        for n in range(start, end):
+            page = doc.load_page(n)
+            text = page.get_text('text')
+            state = None
+            if _needs_ocr(page, text):
+                text, state = _ocr_page(file_path, page, n, text) if ocr else (text, "pending")
+            out.append((text, _page_tables(file_path, page, n, opened) if tables else None, state))
+        return out
+    finally:
+        if own_opened: _close_opened(opened)
+        if own: doc.close()
+
+def _needs_ocr(page, text):
+    """텍스트 레이어가 PDF_OCR_MIN_CHARS 미만이고 이미지가 있는 페이지 (빈 페이지/벡터 도형만 있는 페이지는 제외)"""
+    return bool(_TESSDATA) and len("".join(text.split())) < PDF_OCR_MIN_CHARS and bool(page.get_images())
+
+def _ocr_page(file_path, page, n, text):
+    """
+    이미지 영역만 OCR하고 기존 텍스트 레이어는 그대로 둡니다. (full=False)
+    Returns: (텍스트, "done") / 실패하면 (기존 텍스트, None)
+    """
+    try:
+        tp = page.get_textpage_ocr(language=PDF_OCR_LANG, dpi=PDF_OCR_DPI, full=False, tessdata=_TESSDATA)
+        return page.get_text('text', textpage=tp), "done"
     except Exception as e:
-        return f"[PDF 파싱 오류] {e}"
+        print(f"      ⚠️ [OCR] {os.path.basename(file_path)} {n + 1}페이지 실패 - 텍스트 레이어만 사용: {e}")
+        return text, None
 
-def extract_text_from_docx(file_path):
-    if not docx: return "python-docx 라이브러리가 설치되지 않았습니다."
+def _ocr_pdf_page(file_path, n):
+    """페이지 1개(0부터) OCR (프로세스 풀 작업 단위)"""
+    with fitz.open(file_path) as doc:
+        page = doc.load_page(n)
+        return _ocr_page(file_path, page, n, page.get_text('text'))
+
+def _close_opened(opened):
+    if opened.get("plumber") is not None: opened.pop("plumber").close()
+
+def _is_ruled(drawings):
+    """가로선 3개 + 세로선 2개 이상이면 괘선 표가 있을 법한 페이지 (사각형은 네 변으로 셈)"""
+    h = v = 0
+    for d in drawings:
+        for item in d["items"]:
+            if item[0] == "re":
+                h += 2; v += 2
+            elif item[0] == "l":
+                (x0, y0), (x1, y1) = item[1], item[2]
+                h += abs(y0 - y1) < 1
+                v += abs(x0 - x1) < 1
+    return h >= 3 and v >= 2
+
+def _page_tables(file_path, page, n, opened):
+    """
+    페이지 1개의 표 목록 (표 = 셀 문자열 행 목록, pdfplumber와 같은 정제).
+    PyMuPDF find_tables를 쓰고, find_tables가 없거나(구버전) 실패한 페이지, 괘선이 있는데 표를 못 찾은 페이지만
+    pdfplumber로 다시 찾습니다. 선/사각형이 하나도 없는 페이지는 두 라이브러리 모두 기본(lines) 전략으로
+    표를 찾을 수 없으므로 바로 건너뜁니다.
+    """
+    drawings = page.get_cdrawings() if hasattr(page, "get_cdrawings") else page.get_drawings()
+    if not drawings: return []
+    tables = None
+    try:
+        tables = [t.extract() for t in page.find_tables().tables]
+    except Exception:
+        pass
+    if (tables is None or (not tables and _is_ruled(drawings))) and pdfplumber:
+        if opened.get("plumber") is None: opened["plumber"] = pdfplumber.open(file_path)
+        tables = opened["plumber"].pages[n].extract_tables()
+    # 빈 셀(None)은 빈 문자열로, 셀 안 줄바꿈은 띄어쓰기로 (Markdown 표가 깨지지 않게)
+    return [[[str(cell).replace('\n', ' ').strip() if cell is not None else "" for cell in row] for row in table]
+            for table in tables or []]
+
+def _pdf_table_markdown(rows):
+    """TableExtractor와 같은 형식 (첫 행 = 헤더, pandas + tabulate). 1행짜리 표나 변환 실패는 None"""
+    if len(rows) < 2: return None
+    # 헤더에 빈 값이 있으면 pandas에서 에러가 날 수 있으므로 임의 처리
+    headers = [h if h else f"Column_{i}" for i, h in enumerate(rows[0])]
+    try:
+        return pd.DataFrame(rows[1:], columns=headers).to_markdown(index=False)
+    except Exception as e:
+        print(f"      ⚠️ 표 변환 오류: {e}")
+        return None
+
+def _pdf_page_chunk(n, text, tables=None, ocr=None):
+    # OCR로 얻은 본문은 블록에 ocr=True를 붙여 구분합니다. (텍스트 형식은 동일)
+    blocks = [_marker(f"\n--- [PDF Page {n}] ---"), _block("text", text, ocr=True) if ocr == "done" else _block("text", text)]
+    for i, rows in enumerate(tables or []):
+        md = _pdf_table_markdown(rows)
+        if md is not None: blocks.append(_block("table", md, cells=rows, table_index=i + 1))
+    return _chunk("pdf_page", n, f"Page {n}", blocks)
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+def _get_process_pool():
+    """main의 여러 파싱 스레드가 같은 풀을 공유합니다. (PDF마다 풀을 만들면 코어 수보다 많은 프로세스가 뜸)"""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # 스레드가 떠 있는 프로세스에서 fork하면 잠금 상태가 복제될 수 있으므로 spawn을 씁니다. (Windows 기본값과 동일)
+            _pdf_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=PARSER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+def shutdown_process_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=True, cancel_futures=True)
+            _pdf_pool = None
+
+def iter_pdf(file_path, parallel=None, tables=False):
+    """
+    parallel=None이면 페이지 수(PDF_PARALLEL_MIN_PAGES, 표 포함 시 PDF_TABLES_PARALLEL_MIN_PAGES)로 자동 결정합니다.
+    병렬 모드도 페이지 순서대로 내보내므로 결과는 단일 프로세스 추출과 동일합니다.
+    tables=True면 페이지 청크에 표 블록(type "table", table_index)도 붙습니다. (문서를 한 번만 열어 본문과 함께 추출)
+    """
+    if not fitz:
+        yield _error("PyMuPDF 라이브러리가 설치되지 않았습니다.")
+        return
+    opened = {}
+    try:
+        with fitz.open(file_path) as doc:
+            page_count = len(doc)
+            if parallel is None:
+                parallel = PARSER_WORKERS > 1 and page_count >= (PDF_TABLES_PARALLEL_MIN_PAGES if tables else PDF_PARALLEL_MIN_PAGES)
+            if not parallel:
+                yield from _iter_pdf_serial(file_path, doc, 0, page_count, tables, opened)
+                return
+
+        # 앞 구간이 끝나는 대로 순서대로 내보내고, 워커가 죽으면 남은 페이지는 단일 프로세스로 추출합니다.
+        done = 0
+        try:
+            pool = _get_process_pool()
+            # 구간이 워커 수보다 적으면 코어가 놀기 때문에 구간 크기를 줄여 최소 워커 수만큼 나눕니다.
+            size = max(1, min(PDF_CHUNK_PAGES, -(-page_count // PARSER_WORKERS)))
+            futures = [pool.submit(_extract_pdf_pages, file_path, start, min(start + size, page_count), None, tables)
+                       for start in range(0, page_count, size)]
+            try:
+                for f in futures:
+                    for page in f.result():
+                        done += 1
+                        yield _pdf_page_chunk(done, *page)
+            finally:
+                # 호출한 쪽이 중간에 멈추면(iter_parse 조기 종료) 아직 시작하지 않은 구간은 공용 풀에서 빼냅니다.
+                for f in futures: f.cancel()
+        except (BrokenProcessPool, OSError) as e:
+            print(f"      ⚠️ PDF 병렬 추출 실패 - 단일 프로세스로 재시도 ({os.path.basename(file_path)}): {e}")
+            shutdown_process_pool()
+            with fitz.open(file_path) as doc:
+                yield from _iter_pdf_serial(file_path, doc, done, page_count, tables, opened)
+    except Exception as e:
+        yield _error(f"[PDF 파싱 오류] {e}")
+    finally:
+        _close_opened(opened)
+
+def _iter_pdf_serial(file_path, doc, start, end, tables, opened):
+    """
+    스캔 페이지 OCR은 페이지당 수 초씩 CPU를 쓰므로 (PARSER_WORKERS > 1이면) 프로세스 풀에 맡기고,
+    그동안 다음 페이지를 계속 추출합니다. 출력은 페이지 순서 그대로입니다.
+    """
+    pool_ocr = bool(_TESSDATA) and PARSER_WORKERS > 1
+    pending = collections.deque()
+    for n in range(start, end):
+        text, page_tables, state = _extract_pdf_pages(file_path, n, n + 1, doc, tables, opened, ocr=not pool_ocr)[0]
+        if state == "pending":
+            text = _get_process_pool().submit(_ocr_pdf_page, file_path, n)
+        pending.append((n, text, page_tables, state))
+        while pending and not (pending[0][3] == "pending" and not pending[0][1].done()):
+            yield _resolve_pdf_page(file_path, *pending.popleft())
+    while pending:
+        yield _resolve_pdf_page(file_path, *pending.popleft())
+
+def _resolve_pdf_page(file_path, n, text, page_tables, state):
+    if state == "pending":
+        try:
+            text, state = text.result()
+        except (BrokenProcessPool, OSError) as e:
+            print(f"      ⚠️ [OCR] 프로세스 풀 실패 - 이 프로세스에서 OCR ({os.path.basename(file_path)} {n + 1}페이지): {e}")
+            text, state = _ocr_pdf_page(file_path, n)
+    return _pdf_page_chunk(n + 1, text, page_tables, state)
+
+def extract_pdf_text_and_tables(file_path, parallel=None):
+    """
+    본문 텍스트와 표를 한 번에 추출합니다. (PDF를 PyMuPDF로 한 번만 열고, 같은 페이지 객체에서 표를 찾음)
+    Returns: (extract_text_from_pdf와 같은 텍스트, TableExtractor.extract_pdf_tables_to_md와 같은 형식의 표 Markdown)
+    오류면 (오류 문구, "")
+    """
+    texts, tables = [], []
+    for c in iter_pdf(file_path, parallel, tables=True):
+        if c["kind"] == "error": return c["text"], ""
+        texts.append("\n".join(b["text"] for b in c["blocks"] if b["type"] != "table"))
+        tables += [f"**[Page {c['index']} - Table {b['table_index']}]**\n{b['text']}"
+                   for b in c["blocks"] if b["type"] == "table"]
+    return "\n".join(texts), "\n\n".join(tables)
+
+def _is_heading_style(para):
+    name = (getattr(para.style, "name", "") or "").lower()
+    return name.startswith(("heading", "title", "제목"))
+
+def iter_docx(file_path):
+    if not docx:
+        yield _error("python-docx 라이브러리가 설치되지 않았습니다.")
+        return
     try:
         doc = docx.Document(file_path)
-        content = []
-        # 단락 추출
-        for para in doc.paragraphs:
-            if para.text.strip():
-                content.append(para.text.strip())
+        # 단락 추출 (제목 스타일 단락은 heading 블록)
+        paragraphs = [_block("heading" if _is_heading_style(para) else "text", para.text.strip())
+                      for para in doc.paragraphs if para.text.strip()]
+        if paragraphs:
+            yield _chunk("docx_body", 1, "본문", paragraphs)
         # 표 데이터 추출
-        for table in doc.tables:
+        for i, table in enumerate(doc.tables):
+            cells = []
             for row in table.rows:
                 row_data = [cell.text.strip().replace('\n', ' ') for cell in row.cells if cell.text.strip()]
                 if row_data:
-                    content.append(" | ".join(row_data))
-        return "\n".join(content)
+                    cells.append(row_data)
+            if cells:
+                text = "\n".join(" | ".join(row) for row in cells)
+                yield _chunk("docx_table", i + 1, f"Table {i + 1}", [_block("table", text, cells=cells)])
     except Exception as e:
-        return f"[DOCX 파싱 오류] {e}"
+        yield _error(f"[DOCX 파싱 오류] {e}")
 
-def extract_text_from_pptx(file_path):
-    if not Presentation: return "python-pptx 라이브러리가 설치되지 않았습니다."
+def iter_pptx(file_path):
+    if not Presentation:
+        yield _error("python-pptx 라이브러리가 설치되지 않았습니다.")
+        return
     try:
         prs = Presentation(file_path)
-        content = []
         for i, slide in enumerate(prs.slides):
-            slide_texts = []
+            title = slide.shapes.title
+            blocks = []
             for shape in slide.shapes:
                 if hasattr(shape, "text") and shape.text.strip():
-                    slide_texts.append(shape.text.strip())
-            if slide_texts:
-                content.append(f"\n--- [PPT Slide {i + 1}] ---\n" + "\n".join(slide_texts))
-        return "\n".join(content)
+                    is_title = title is not None and shape.shape_id == title.shape_id
+                    blocks.append(_block("heading" if is_title else "text", shape.text.strip()))
+            if blocks:
+                yield _chunk("pptx_slide", i + 1, f"Slide {i + 1}", [_marker(f"\n--- [PPT Slide {i + 1}] ---")] + blocks)
     except Exception as e:
-        return f"[PPTX 파싱 오류] {e}"
+        yield _error(f"[PPTX 파싱 오류] {e}")
+
+def _cell_text(v):
+    """엑셀 셀 값 → Markdown 셀 문자열 (정수형 실수는 소수점 제거, 자정 시각은 날짜만)"""
+    if v is None: return ""
+    if isinstance(v, bool): return str(v)
+    if isinstance(v, float):
+        if v != v: return ""
+        return str(int(v)) if v.is_integer() and abs(v) < 1e15 else repr(v)
+    if isinstance(v, datetime.datetime):
+        return v.date().isoformat() if v.time() == datetime.time() else v.isoformat(sep=" ")
+    if isinstance(v, (datetime.date, datetime.time)): return v.isoformat()
+    return str(v).replace("\r\n", " ").replace("\n", " ").replace("|", "\\|")
+
+def _table_cells(rows):
+    """
+    행 목록(첫 행 = 헤더) → 열 수를 맞춘 문자열 셀 표.
+    완전히 빈 행과 오른쪽 끝의 빈 열은 버립니다. (read-only 모드는 서식만 있는 셀도 범위에 포함하므로)
+    """
+    cells = [[_cell_text(v) for v in row] for row in rows]
+    cells = [row for row in cells if any(row)]
+    if not cells: return []
+    width = max(max((i + 1 for i, c in enumerate(row) if c), default=0) for row in cells)
+    cells = [(row + [""] * width)[:width] for row in cells]
+    cells[0] = [c or f"Unnamed: {i}" for i, c in enumerate(cells[0])]
+    return cells
+
+def _markdown_table(cells):
+    """셀 표 → Markdown 표. tabulate처럼 열 너비를 맞추지 않으므로 빠르고 토큰도 적습니다."""
+    lines = ["| " + " | ".join(cells[0]) + " |", "|" + "---|" * len(cells[0])]
+    for row in cells[1:]:
+        lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(lines)
 
-def extract_text_from_excel(file_path):
+def _sheet_chunk(index, name, cells):
+    body = _block("table", _markdown_table(cells), cells=cells) if cells else _block("text", "(빈 시트)")
+    return _chunk("excel_sheet", index, str(name), [_marker(f"\n--- [Excel Sheet: {name}] ---"), body])
+
+def _frame_table(df):
+    """pandas 경로의 표 블록 (본문은 기존 tabulate 출력 그대로, cells는 헤더 + 값 문자열)"""
+    df = df.fillna("")
+    cells = [[str(c) for c in df.columns]] + [[str(v) for v in row] for row in df.itertuples(index=False)]
+    return _block("table", df.to_markdown(index=False), cells=cells)
+
+def _fast_excel_engine(file_path):
+    if not EXCEL_FAST: return None
+    if CalamineWorkbook: return "calamine"
+    # openpyxl은 .xls(BIFF)를 읽지 못하므로 pandas 경로로 보냅니다.
+    if openpyxl and os.path.splitext(file_path)[1].lower() in (".xlsx", ".xlsm"): return "openpyxl"
+    return None
+
+def _open_workbook(file_path, engine):
+    if engine == "calamine":
+        return CalamineWorkbook.from_path(file_path)
+    return openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+
+def _close_workbook(wb):
+    # openpyxl read-only 모드는 close 전까지 파일을 열어 둡니다. (calamine은 버전에 따라 close가 없음)
+    if hasattr(wb, "close"): wb.close()
+
+def _workbook_sheet_cells(wb, sheet_name, engine):
+    if engine == "calamine":
+        return _table_cells(wb.get_sheet_by_name(sheet_name).to_python(skip_empty_area=True))
+    return _table_cells(wb[sheet_name].iter_rows(values_only=True))
+
+def _excel_sheet_cells(file_path, sheet_name, engine):
+    """시트 1개 → 셀 표 (프로세스 풀 작업 단위라 워커마다 통합 문서를 직접 엽니다)"""
+    wb = _open_workbook(file_path, engine)
     try:
-        # 모든 시트를 읽어서 Dictionary 형태로 가져옴
-        dfs = pd.read_excel(file_path, sheet_name=None)
-        content = []
-        for sheet_name, df in dfs.items():
-            content.append(f"\n--- [Excel Sheet: {sheet_name}] ---")
-            # NaN 값 정리 및 Markdown 표 형태로 변환 (LLM이 읽기 매우 좋음)
-            content.append(df.fillna("").to_markdown(index=False))
-        return "\n".join(content)
-    except Exception as e:
-        return f"[Excel 파싱 오류] {e}"
+        return _workbook_sheet_cells(wb, sheet_name, engine)
+    finally:
+        _close_workbook(wb)
 
-def extract_text_from_csv(file_path):
+def iter_excel(file_path, parallel=None):
+    """
+    시트 단위 청크. 고속 경로는 셀 값을 스트리밍으로 읽어 바로 Markdown으로 만들고,
+    시트가 여럿인 큰 통합 문서(EXCEL_PARALLEL_MIN_BYTES 이상)는 시트별로 프로세스 풀에서 변환합니다.
+    단일 프로세스 경로는 통합 문서를 한 번만 열어 모든 시트를 읽습니다. (열 때마다 공유 문자열/스타일을 다시 읽으므로)
+    """
+    engine = _fast_excel_engine(file_path)
+    if engine is None:
+        yield from _iter_excel_pandas(file_path)
+        return
+    wb = None
     try:
-        encodings = ['utf-8', 'utf-8-sig', 'cp949', 'euc-kr']
-        for enc in encodings:
+        wb = _open_workbook(file_path, engine)
+        names = wb.sheet_names if engine == "calamine" else wb.sheetnames
+        if parallel is None:
+            parallel = PARSER_WORKERS > 1 and len(names) > 1 and os.path.getsize(file_path) >= EXCEL_PARALLEL_MIN_BYTES
+        done = 0
+        if parallel:
             try:
-                df = pd.read_csv(file_path, encoding=enc)
-                return f"\n--- [CSV Data] ---\n" + df.fillna("").to_markdown(index=False)
-            except UnicodeDecodeError:
-                continue
-        return "[CSV 파싱 오류] 지원하지 않는 인코딩입니다."
+                pool = _get_process_pool()
+                futures = [pool.submit(_excel_sheet_cells, file_path, name, engine) for name in names]
+                try:
+                    for name, f in zip(names, futures):
+                        cells = f.result()
+                        done += 1
+                        yield _sheet_chunk(done, name, cells)
+                finally:
+                    for f in futures: f.cancel()
+            except (BrokenProcessPool, OSError) as e:
+                print(f"      ⚠️ Excel 병렬 변환 실패 - 단일 프로세스로 재시도 ({os.path.basename(file_path)}): {e}")
+                shutdown_process_pool()
+        for i in range(done, len(names)):
+            yield _sheet_chunk(i + 1, names[i], _workbook_sheet_cells(wb, names[i], engine))
+    except Exception as e:
+        yield _error(f"[Excel 파싱 오류] {e}")
+    finally:
+        if wb is not None: _close_workbook(wb)
+
+def _iter_excel_pandas(file_path):
+    """예전 경로 (pandas.read_excel + tabulate). .xls이거나 고속 엔진이 없을 때 사용"""
+    try:
+        # 시트를 하나씩 읽어 변환하므로 통합 문서 전체의 DataFrame을 한꺼번에 들고 있지 않습니다.
+        with pd.ExcelFile(file_path) as xls:
+            for i, sheet_name in enumerate(xls.sheet_names):
+                df = xls.parse(sheet_name)
+                # NaN 값 정리 및 Markdown 표 형태로 변환 (LLM이 읽기 매우 좋음)
+                yield _chunk("excel_sheet", i + 1, str(sheet_name),
+                             [_marker(f"\n--- [Excel Sheet: {sheet_name}] ---"), _frame_table(df)])
     except Exception as e:
-        return f"[CSV 파싱 오류] {e}"
+        yield _error(f"[Excel 파싱 오류] {e}")
+
+def iter_csv(file_path):
+    try:
+        df = csv_loader.read_frame(file_path, cache=False)
+        yield _chunk("csv", 1, "CSV", [_marker("\n--- [CSV Data] ---"), _frame_table(df)])
+    except UnicodeDecodeError:
+        yield _error("[CSV 파싱 오류] 지원하지 않는 인코딩입니다.")
+    except Exception as e:
+        yield _error(f"[CSV 파싱 오류] {e}")
+
+_ITERATORS = {
+    '.pdf': iter_pdf,
+    '.docx': iter_docx,
+    '.pptx': iter_pptx,
+    '.xlsx': iter_excel, '.xls': iter_excel,
+    '.csv': iter_csv,
+}
 
-def parse_any_file(file_path):
-    """파일 확장자를 감지하여 알맞은 텍스트 추출기를 호출합니다."""
+def iter_parse(file_path):
+    """
+    parse_any_file의 스트리밍 버전. 페이지/슬라이드/시트 단위 청크(dict)를 순서대로 내보냅니다.
+    호출부는 필요한 청크만 고르거나 중간에 멈출 수 있습니다. (parse_cache는 거치지 않음)
+    """
     ext = os.path.splitext(file_path)[1].lower()
-    
-    if ext == '.pdf': return extract_text_from_pdf(file_path)
-    elif ext == '.docx': return extract_text_from_docx(file_path)
-    elif ext == '.pptx': return extract_text_from_pptx(file_path)
-    elif ext in ['.xlsx', '.xls']: return extract_text_from_excel(file_path)
-    elif ext == '.csv': return extract_text_from_csv(file_path)
-    else: return f"지원하지 않는 확장자입니다: {ext}"
+    it = _ITERATORS.get(ext)
+    if it is None:
+        yield _error(f"지원하지 않는 확장자입니다: {ext}")
+        return
+    yield from it(file_path)
+
+def extract_text_from_pdf(file_path, parallel=None):
+    return _join(iter_pdf(file_path, parallel))
+
+def extract_text_from_docx(file_path):
+    return _join(iter_docx(file_path))
+
+def extract_text_from_pptx(file_path):
+    return _join(iter_pptx(file_path))
+
+def extract_text_from_excel(file_path, parallel=None):
+    return _join(iter_excel(file_path, parallel))
+
+def extract_text_from_csv(file_path):
+    return _join(iter_csv(file_path))
+
+def is_error_text(text):
+    """추출기가 예외 대신 돌려주는 오류/미설치 안내 문구인지 (캐시에 저장하지 않음)"""
+    head = text.lstrip()[:40]
+    return (head.startswith("[") and "오류]" in head) or head.startswith("지원하지 않는 확장자") \
+        or text.endswith("라이브러리가 설치되지 않았습니다.")
+
+def parse_any_file(file_path, use_cache=True):
+    """파일 확장자를 감지하여 알맞은 텍스트 추출기를 호출합니다. (parse_cache에 있으면 파싱 생략)"""
+    if use_cache:
+        return parse_cache.cached(file_path, "text", PARSER_VERSION, _parse_uncached, is_error_text)
+    return _parse_uncached(file_path)
+
+def _parse_uncached(file_path):
+    return _join(iter_parse(file_path))
+
+# =========================================================
+# 🧱 구조화 문서 (블록 목록)
+# =========================================================
+# parse_document → {"source", "version", "blocks"}. 각 블록에는 위치(unit = 청크 kind, index, label)가 붙습니다.
+# to_text(doc)는 parse_any_file과 같은 텍스트를 돌려주므로, 에이전트는 select_blocks로 필요한 블록(예: 표만)을 고른 뒤
+# 같은 형식으로 직렬화해 프롬프트에 넣을 수 있습니다.
+def parse_document(file_path, use_cache=True):
+    """파일 → 구조화 문서 (parse_cache에는 JSON으로 저장)"""
+    if use_cache:
+        raw = parse_cache.cached(file_path, "doc", PARSER_VERSION,
+                                 lambda path: json.dumps(_build_document(path), ensure_ascii=False),
+                                 lambda raw: '"type": "error"' in raw)
+        return json.loads(raw)
+    return _build_document(file_path)
+
+def _build_document(file_path):
+    blocks = []
+    for c in iter_parse(file_path):
+        for b in c["blocks"]:
+            blocks.append(dict(b, unit=c["kind"], index=c["index"], label=c["label"]))
+    return {"source": os.path.basename(file_path), "version": PARSER_VERSION, "blocks": blocks}
+
+def to_text(doc):
+    """구조화 문서(또는 블록 목록) → 기존 텍스트 형식. 오류 블록이 있으면 기존처럼 오류 문구만 돌려줍니다."""
+    blocks = doc["blocks"] if isinstance(doc, dict) else doc
+    for b in blocks:
+        if b["type"] == "error": return b["text"]
+    return "\n".join(b["text"] for b in blocks)
+
+def select_blocks(doc, types=None, units=None, with_markers=True):
+    """
+    types: 블록 type 목록 (예: ["table"]), units: 청크 kind 목록 (예: ["pdf_page"]). None이면 거르지 않습니다.
+    with_markers=True면 고른 블록이 속한 페이지/시트의 구분선도 남겨 출처를 알 수 있게 합니다.
+    """
+    picked = [b for b in doc["blocks"] if b["type"] != "marker"
+              and (types is None or b["type"] in types) and (units is None or b["unit"] in units)]
+    if not with_markers: return picked
+    places = {(b["unit"], b["index"]) for b in picked}
+    ids = {id(b) for b in picked}
+    return [b for b in doc["blocks"] if id(b) in ids or (b["type"] == "marker" and (b["unit"], b["index"]) in places)]
 
 if __name__ == "__main__":
     # 개별 테스트용
@@ -2,18 +2,11 @@ import os
 import re
 import json
 import time
-import random
-import base64
-import requests
 from json import JSONDecodeError
-from dotenv import load_dotenv
-
-load_dotenv()
-api_key = (os.getenv("GEMINI_API_KEY") or "").strip()
-
-TARGET_MODEL = "models/gemini-2.0-flash" 
-API_BASE = "https://generativelanguage.googleapis.com/v1beta"
-HEADERS = {"Content-Type": "application/json"}
+from gemini_client import api_key, API_BASE, TARGET_MODEL, HEADERS, post_generate
+from hashing import file_sha256
+import response_cache
+import metrics
 
 # =========================================================
 # 1. Helper Functions (String & JSON Processing)
@@ -68,32 +61,21 @@ def _safe_json_loads(text: str) -> dict:
     except:
         return {}
 
-def _post_gemini(payload: dict, timeout: int = 120, max_retries: int = 3, base_wait: int = 5) -> dict:
-    if not api_key:
-        raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다.")
-    url = f"{API_BASE}/{TARGET_MODEL}:generateContent?key={api_key}"
-
-    for attempt in range(max_retries):
-        try:
-            resp = requests.post(url, headers=HEADERS, json=payload, timeout=timeout)
-        except requests.RequestException:
-            time.sleep(base_wait + random.uniform(0, 2))
-            continue
-
-        if resp.status_code == 200:
-            return {"ok": True, "json": resp.json()}
-        
-        if resp.status_code == 429:
-            time.sleep(base_wait * (2 ** attempt))
-            continue
-
-        if resp.status_code >= 500:
-            time.sleep(base_wait)
-            continue
-        
-        return {"ok": False, "status": resp.status_code, "text": resp.text}
-
-    return {"ok": False, "status": 0, "text": "Max retries exceeded"}
+def _post_gemini(payload: dict, timeout: int = 120, max_retries: int = 3, base_wait: int = 5, pdf_path: str = None) -> dict:
+    # 연결 풀/재시도 정책은 gemini_client에서 utils.call_gemini와 공유합니다.
+    def _request():
+        return post_generate(payload, read_timeout=timeout, max_retries=max_retries, base_wait=base_wait)
+
+    call_type = response_cache.call_type_for(payload.get("tools"))
+    t0 = time.perf_counter()
+    if response_cache.enabled():
+        # inline PDF는 base64 전체 대신 파일 내용 해시로 키를 만듭니다. (utils._response_cache_key와 같은 기준)
+        key = response_cache.payload_key(TARGET_MODEL, payload, file_sha256(pdf_path) if pdf_path else None)
+        res = response_cache.fetch(key, call_type, _request)
+    else:
+        res = _request()
+    metrics.record_llm(res, time.perf_counter() - t0, call_type, TARGET_MODEL)
+    return res
 
 def _extract_text(res_json: dict) -> str:
     if not res_json: return ""
@@ -105,15 +87,9 @@ def _extract_text(res_json: dict) -> str:
         return ""
 
 def _pdf_part_from_path(pdf_path: str) -> dict:
-    with open(pdf_path, "rb") as f:
-        data = f.read()
-    b64 = base64.b64encode(data).decode("utf-8")
-    return {
-        "inline_data": {
-            "mime_type": "application/pdf",
-            "data": b64
-        }
-    }
+    # utils.pdf_to_base64의 프로세스 공용 LRU 캐시를 그대로 사용합니다.
+    from utils import pdf_to_base64
+    return pdf_to_base64(pdf_path)
 
 # =========================================================
 # 2. JSON Schema Definition
@@ -464,7 +440,7 @@ def refine_pdf_to_json_onecall(
             ]
         }],
         "generationConfig": {"temperature": 0.2, "maxOutputTokens": max_output_tokens}
-    }, timeout=240)
+    }, timeout=240, pdf_path=pdf_path)
 
     if not r1.get("ok"):
         return {"error": r1.get("status"), "message": r1.get("text")}
@@ -0,0 +1,170 @@
+import os
+import re
+import time
+import json
+import random
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from token_budget import estimate_tokens as estimate_text_tokens, inline_pdf_tokens
+
+# =========================================================
+# 💡 [설정] 프로세스 공용 Gemini 쿼터 (RPM / TPM)
+# =========================================================
+# 0으로 두면 해당 버킷은 비활성화됩니다. 429 시 전역 일시정지(Retry-After)는 항상 적용됩니다.
+RPM_LIMIT = float(os.getenv("GEMINI_RPM", "1000"))
+TPM_LIMIT = float(os.getenv("GEMINI_TPM", "4000000"))
+# 버킷 용량 = 분당 한도 중 몇 초치까지 한 번에 몰아 보낼 수 있는지 (순간 폭주 억제)
+BURST_SEC = float(os.getenv("GEMINI_RATE_BURST_SEC", "10"))
+# Retry-After 이후 대기 중이던 호출이 한꺼번에 몰리지 않도록 더하는 무작위 지연 상한
+JITTER_SEC = float(os.getenv("GEMINI_RATE_JITTER_SEC", "1.0"))
+# inline 이미지 1장 토큰 추정치 (768px 타일당 258 토큰 - 200 DPI A4 페이지 ≈ 3x4 타일)
+IMAGE_TOKENS = int(os.getenv("GEMINI_IMAGE_TOKENS", "3100"))
+
+class TokenBucket:
+    """
+    예약형 토큰 버킷. 잔량이 음수가 될 수 있으며, 부족분을 채우는 데 걸리는 시간만큼 대기합니다.
+    락 안에서 순서대로 예약하므로 먼저 온 호출이 먼저 슬롯을 받습니다(FIFO).
+    """
+    def __init__(self, per_minute: float, burst_sec: float = BURST_SEC):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_sec)
+        self.level = self.capacity
+        self.last = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.last) * self.rate)
+        self.last = now
+
+    def reserve(self, cost: float, now: float) -> float:
+        """cost만큼 예약하고, 예약분이 채워질 때까지 기다려야 하는 시간(초)을 반환합니다."""
+        self._refill(now)
+        self.level -= cost
+        return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def credit(self, amount: float):
+        """예상치 보정(+ 환급 / - 추가 차감)"""
+        self.level = min(self.capacity, self.level + amount)
+
+_lock = threading.Lock()
+_rpm = TokenBucket(RPM_LIMIT) if RPM_LIMIT > 0 else None
+_tpm = TokenBucket(TPM_LIMIT) if TPM_LIMIT > 0 else None
+_blocked_until = 0.0
+
+def configure(rpm: float = None, tpm: float = None, burst_sec: float = None):
+    """런타임에 쿼터를 다시 설정합니다. (0이면 비활성화, None이면 기존 값 유지)"""
+    global _rpm, _tpm, _blocked_until
+    with _lock:
+        burst = BURST_SEC if burst_sec is None else burst_sec
+        if rpm is not None: _rpm = TokenBucket(rpm, burst) if rpm > 0 else None
+        if tpm is not None: _tpm = TokenBucket(tpm, burst) if tpm > 0 else None
+        _blocked_until = 0.0
+
+_stats = {
+    "requests": 0, "throttled": 0, "waits": 0,
+    "wait_sec": 0.0, "max_wait_sec": 0.0, "exec_sec": 0.0,
+    "est_tokens": 0, "actual_tokens": 0,
+}
+
+# =========================================================
+# 🔢 토큰 추정 / Retry-After 해석
+# =========================================================
+def estimate_tokens(payload: dict) -> int:
+    """요청 전 TPM 예약용 대략치. 응답의 usageMetadata로 사후 보정합니다."""
+    tokens = 0
+    for content in payload.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                tokens += estimate_text_tokens(part["text"])
+            elif "inline_data" in part:
+                if part["inline_data"].get("mime_type", "").startswith("image/"):
+                    tokens += IMAGE_TOKENS
+                else:
+                    # PDF는 파일 크기가 아니라 페이지 수로 과금됩니다. (token_budget.inline_pdf_tokens)
+                    tokens += inline_pdf_tokens(part["inline_data"].get("data", ""))
+    for part in (payload.get("system_instruction") or {}).get("parts", []):
+        tokens += estimate_text_tokens(part.get("text", ""))
+    return int(tokens) + 1
+
+def usage_tokens(body: dict) -> int:
+    usage = (body or {}).get("usageMetadata") or {}
+    return int(usage.get("totalTokenCount") or 0)
+
+def retry_after_seconds(headers, text: str = "") -> float:
+    """Retry-After 헤더(초 또는 HTTP-date) 또는 에러 본문의 RetryInfo.retryDelay("12s")를 해석합니다."""
+    value = (headers or {}).get("Retry-After") or (headers or {}).get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    if text and "retryDelay" in text:
+        try:
+            for d in json.loads(text).get("error", {}).get("details", []):
+                if "retryDelay" in d:
+                    return float(str(d["retryDelay"]).rstrip("s"))
+        except (ValueError, AttributeError):
+            m = re.search(r'"retryDelay"\s*:\s*"([\d.]+)s"', text)
+            if m: return float(m.group(1))
+    return None
+
+# =========================================================
+# 🚦 예약 / 대기
+# =========================================================
+def _reserve(tokens: int) -> float:
+    now = time.monotonic()
+    with _lock:
+        blocked = max(0.0, _blocked_until - now)
+        # 버킷 예약은 이미 호출마다 다른 시각으로 분산되므로, 지터는 Retry-After로 함께 멈춘 경우에만 더합니다.
+        wait = blocked + random.uniform(0, JITTER_SEC) if blocked > 0 else 0.0
+        if _rpm: wait = max(wait, _rpm.reserve(1, now))
+        if _tpm: wait = max(wait, _tpm.reserve(tokens, now))
+        _stats["requests"] += 1
+        _stats["est_tokens"] += tokens
+        if wait > 0:
+            _stats["waits"] += 1
+            _stats["wait_sec"] += wait
+            _stats["max_wait_sec"] = max(_stats["max_wait_sec"], wait)
+    return wait
+
+def acquire(tokens: int = 1):
+    """요청 1건 + 추정 토큰을 예약하고, 쿼터가 허용할 때까지 현재 스레드를 대기시킵니다."""
+    wait = _reserve(tokens)
+    if wait > 0: time.sleep(wait)
+
+async def acquire_async(tokens: int = 1):
+    """acquire()의 비동기 버전. 이벤트 루프를 막지 않고 대기합니다."""
+    wait = _reserve(tokens)
+    if wait > 0: await asyncio.sleep(wait)
+
+def record_exec(seconds: float, est_tokens: int = 0, actual_tokens: int = 0):
+    """실제 호출 소요 시간과 usageMetadata 기준 토큰 수를 반영합니다."""
+    with _lock:
+        _stats["exec_sec"] += seconds
+        if actual_tokens:
+            _stats["actual_tokens"] += actual_tokens
+            if _tpm: _tpm.credit(est_tokens - actual_tokens)
+
+def on_throttled(retry_after: float = None, fallback: float = 5.0, est_tokens: int = 0):
+    """
+    429 수신 시 모든 호출자를 함께 멈춥니다.
+    Retry-After가 없으면 호출부의 지수 백오프 값(fallback)을 사용합니다.
+    거절된 요청은 TPM을 소모하지 않으므로 예약분을 돌려줍니다.
+    """
+    global _blocked_until
+    delay = retry_after if retry_after is not None else fallback
+    with _lock:
+        _stats["throttled"] += 1
+        _blocked_until = max(_blocked_until, time.monotonic() + delay)
+        if _tpm and est_tokens: _tpm.credit(est_tokens)
+
+def stats() -> dict:
+    with _lock:
+        return dict(_stats)
+
+def reset_stats():
+    with _lock:
+        for k in _stats: _stats[k] = 0
@@ -0,0 +1,149 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import schema_registry
+
+# =========================================================
+# 💡 [설정] Gemini 응답 디스크 캐시 (SQLite)
+# =========================================================
+# mode
+#   - "normal" : 유효한 캐시가 있으면 재사용, 없으면 호출 후 저장 (기본값)
+#   - "replay" : 캐시만 사용하고 네트워크 호출 금지 (오프라인 재현/벤치마크용)
+#   - "refresh": 캐시를 무시하고 항상 호출한 뒤 덮어쓰기
+#   - "off"    : 캐시 미사용
+CACHE_MODES = ("normal", "replay", "refresh", "off")
+CACHE_DIR = os.getenv("GEMINI_RESPONSE_CACHE_DIR", os.path.join(".cache", "gemini"))
+_mode = os.getenv("GEMINI_RESPONSE_CACHE_MODE", "normal")
+
+# 호출 유형별 TTL(초). None이면 만료 없음.
+#   - search  : google_search 결과는 시점에 따라 달라지므로 만료
+#   - document: PDF/프롬프트가 같으면 결과도 같아야 하는 문서 추출 호출
+CALL_TYPE_TTL = {
+    "search": float(os.getenv("GEMINI_CACHE_TTL_SEARCH", str(24 * 3600))),
+    "document": None,
+}
+
+_conn = None
+_conn_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "expired": 0, "writes": 0}
+
+def set_mode(mode: str):
+    global _mode
+    if mode not in CACHE_MODES:
+        raise ValueError(f"지원하지 않는 캐시 모드입니다: {mode} ({', '.join(CACHE_MODES)})")
+    _mode = mode
+
+def get_mode() -> str:
+    return _mode
+
+def enabled() -> bool:
+    return _mode != "off"
+
+def call_type_for(tools: list = None) -> str:
+    if tools and any("google_search" in t for t in tools): return "search"
+    return "document"
+
+def make_key(model: str, prompt: str, pdf_hash: str = None, response_schema: dict = None,
+             tools: list = None, generation_config: dict = None) -> str:
+    # responseSchema는 schema_registry가 미리 직렬화해 둔 조각을 재사용 (결과 문자열은 json.dumps와 동일)
+    blob = schema_registry.dumps({
+        "model": model,
+        "prompt": prompt,
+        "pdf": pdf_hash,
+        "schema": response_schema,
+        "tools": tools,
+        "config": generation_config,
+    }, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def payload_key(model: str, payload: dict, pdf_hash: str = None) -> str:
+    """
+    processor처럼 payload를 직접 만드는 호출부용 키.
+    inline_data(base64 PDF)는 직렬화하지 않고 내용 해시로 바꿉니다. (pdf_hash = hashing.file_sha256, make_key와 같은 기준)
+    """
+    contents = [dict(c, parts=[_part_for_key(p, pdf_hash) for p in c.get("parts", [])]) for c in payload.get("contents", [])]
+    blob = schema_registry.dumps({"model": model, "payload": dict(payload, contents=contents)}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _part_for_key(part: dict, pdf_hash: str = None) -> dict:
+    inline = part.get("inline_data")
+    if inline is None: return part
+    # pdf_hash가 없으면 base64 문자열을 한 번만 해싱 (JSON 직렬화보다 훨씬 가벼움)
+    digest = pdf_hash or hashlib.sha256(inline["data"].encode("ascii")).hexdigest()
+    return {"inline_data": {"mime_type": inline.get("mime_type"), "sha256": digest}}
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        _conn = sqlite3.connect(os.path.join(CACHE_DIR, "responses.sqlite"), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, call_type TEXT, created REAL, expires REAL, body TEXT)"
+        )
+        _conn.commit()
+    return _conn
+
+def get(key: str):
+    with _conn_lock:
+        row = _db().execute("SELECT expires, body FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _stats["misses"] += 1
+            return None
+        expires, body = row
+        if expires is not None and expires < time.time():
+            _stats["expired"] += 1
+            return None
+        _stats["hits"] += 1
+    return json.loads(body)
+
+def put(key: str, body: dict, call_type: str = "document"):
+    ttl = CALL_TYPE_TTL.get(call_type)
+    now = time.time()
+    with _conn_lock:
+        db = _db()
+        db.execute(
+            "INSERT OR REPLACE INTO responses (key, call_type, created, expires, body) VALUES (?, ?, ?, ?, ?)",
+            (key, call_type, now, now + ttl if ttl is not None else None, json.dumps(body, ensure_ascii=False)),
+        )
+        db.commit()
+        _stats["writes"] += 1
+
+def fetch(key: str, call_type: str, call_fn) -> dict:
+    """
+    캐시 모드에 따라 저장된 응답을 돌려주거나 call_fn()을 호출합니다.
+    call_fn은 gemini_client.post_generate와 같은 형태({"ok", "json"|"text"})를 반환해야 합니다.
+    """
+    if _mode in ("normal", "replay"):
+        cached = get(key)
+        if cached is not None:
+            return {"ok": True, "json": cached, "cached": True}
+        if _mode == "replay":
+            return {"ok": False, "status": 0, "text": f"Replay cache miss ({key[:12]})"}
+
+    res = call_fn()
+    if res.get("ok") and _mode in ("normal", "refresh"):
+        put(key, res["json"], call_type)
+    return res
+
+def stats() -> dict:
+    with _conn_lock:
+        return dict(_stats, mode=_mode)
+
+async def fetch_async(key: str, call_type: str, call_coro_fn) -> dict:
+    """fetch()의 비동기 버전. call_coro_fn은 post_generate_async 결과를 돌려주는 코루틴 함수입니다."""
+    if _mode in ("normal", "replay"):
+        cached = get(key)
+        if cached is not None:
+            return {"ok": True, "json": cached, "cached": True}
+        if _mode == "replay":
+            return {"ok": False, "status": 0, "text": f"Replay cache miss ({key[:12]})"}
+
+    res = await call_coro_fn()
+    if res.get("ok") and _mode in ("normal", "refresh"):
+        put(key, res["json"], call_type)
+    return res
@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+import threading
+
+# =========================================================
+# 💡 [설정] Gemini responseSchema 사전 변환 레지스트리
+# =========================================================
+# 에이전트가 쓰는 Pydantic 모델은 십여 개뿐인데, 예전에는 호출마다
+# model_json_schema() → convert_to_gemini_schema() 재귀 변환 → json.dumps(캐시 키/요청 본문)를 반복했습니다.
+# 이제 모델당 1회만 변환해 읽기 전용 객체로 고정하고, 직렬화된 JSON 조각도 함께 보관해 재사용합니다.
+
+# 자기 참조 모델($ref 순환)을 몇 단계까지 펼칠지. 그 아래는 JSON 문자열 필드로 받습니다.
+MAX_RECURSION = int(os.getenv("GEMINI_SCHEMA_MAX_RECURSION", "2"))
+
+class FrozenSchema(dict):
+    """변환이 끝난 스키마 노드. 여러 스레드가 같은 객체를 공유하므로 수정을 막습니다. (json 직렬화는 dict와 동일)"""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("FrozenSchema는 수정할 수 없습니다. dict(schema)로 복사한 뒤 수정하십시오.")
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self): return self
+    def __deepcopy__(self, memo): return self
+    def __reduce__(self): return (type(self), (dict(self),))
+
+class CompiledSchema(FrozenSchema):
+    """
+    모델 1개의 최종 responseSchema (루트 노드).
+    json        : 요청 본문용 직렬화 조각
+    sorted_json : 응답 캐시 키용 직렬화 조각 (sort_keys=True, 기존 키와 바이트 단위로 동일)
+    """
+    def __init__(self, schema: dict, name: str = ""):
+        super().__init__(schema)
+        self.name = name
+        self.json = json.dumps(self, ensure_ascii=False)
+        self.sorted_json = json.dumps(self, ensure_ascii=False, sort_keys=True)
+        self.digest = hashlib.sha256(self.sorted_json.encode("utf-8")).hexdigest()
+
+    def __reduce__(self): return (type(self), (dict(self), self.name))
+
+def _freeze(node):
+    if isinstance(node, dict): return FrozenSchema({k: _freeze(v) for k, v in node.items()})
+    if isinstance(node, (list, tuple)): return tuple(_freeze(v) for v in node)
+    return node
+
+# =========================================================
+# 🔄 JSON Schema(Pydantic) → Gemini Schema 변환
+# =========================================================
+def _convert_enum(schema_node: dict) -> dict:
+    values = list(schema_node["enum"]) if "enum" in schema_node else [schema_node["const"]]
+    t = (schema_node.get("type") or "string").upper()
+    # Gemini는 STRING 타입에서만 enum을 지원하므로, 숫자 enum은 타입을 유지하고 허용 값을 설명으로 안내합니다.
+    if t == "STRING" or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        out = {"type": "STRING", "format": "enum", "enum": [str(v) for v in values]}
+        hint = None
+    else:
+        out = {"type": t}
+        hint = "허용 값: " + ", ".join(str(v) for v in values)
+    desc = " ".join(x for x in (schema_node.get("description"), hint) if x)
+    if desc: out["description"] = desc
+    return out
+
+def convert_to_gemini_schema(schema_node, defs=None, _refs=()):
+    """Pydantic의 $defs와 $ref를 Gemini REST API 규격에 맞게 펼칩니다."""
+    if defs is None:
+        defs = schema_node.get("$defs", {})
+
+    # $ref(참조)가 있으면 원본 딕셔너리로 교체
+    if "$ref" in schema_node:
+        ref_name = schema_node["$ref"].split("/")[-1]
+        # 순환 참조는 Gemini 스키마로 표현할 수 없으므로 MAX_RECURSION 단계까지만 펼칩니다.
+        if _refs.count(ref_name) >= MAX_RECURSION:
+            return {"type": "STRING", "description": f"{ref_name} 하위 구조 (JSON 문자열)"}
+        return convert_to_gemini_schema(defs[ref_name], defs, _refs + (ref_name,))
+
+    # Optional 타입(anyOf) 처리
+    if "anyOf" in schema_node:
+        for sub in schema_node["anyOf"]:
+            if sub.get("type") != "null":
+                return convert_to_gemini_schema(sub, defs, _refs)
+        return {"type": "STRING"}
+
+    # Enum / Literal
+    if "enum" in schema_node or "const" in schema_node:
+        return _convert_enum(schema_node)
+
+    out = {}
+    t = schema_node.get("type", "OBJECT").upper()
+    out["type"] = t
+
+    if "description" in schema_node:
+        out["description"] = schema_node["description"]
+
+    if t == "OBJECT" and "properties" in schema_node:
+        out["properties"] = {
+            k: convert_to_gemini_schema(v, defs, _refs)
+            for k, v in schema_node["properties"].items()
+        }
+        # 🚨 순서를 지정하지 않으면 모델이 키를 알파벳순으로 생성하므로, Pydantic 선언 순서를 그대로 고정합니다.
+        # (스트리밍 시 Report_Header처럼 앞에 선언한 필드가 먼저 완성되어야 후속 에이전트를 일찍 시작할 수 있음)
+        out["propertyOrdering"] = list(schema_node["properties"].keys())
+        if "required" in schema_node:
+            out["required"] = schema_node["required"]
+
+    if t == "ARRAY" and "items" in schema_node:
+        out["items"] = convert_to_gemini_schema(schema_node["items"], defs, _refs)
+
+    return out
+
+# =========================================================
+# 🗂️ 레지스트리
+# =========================================================
+_compiled = {}
+_lock = threading.Lock()
+_stats = {"compiled": 0, "hits": 0}
+
+def compile_schema(model) -> CompiledSchema:
+    """레지스트리를 거치지 않고 Pydantic 모델 1개를 변환합니다."""
+    return CompiledSchema(_freeze(convert_to_gemini_schema(model.model_json_schema())), model.__name__)
+
+def get(model) -> CompiledSchema:
+    """모델별로 1회만 변환하고 이후에는 같은 객체를 돌려줍니다. (스레드 안전)"""
+    compiled = _compiled.get(model)
+    if compiled is not None:
+        _stats["hits"] += 1
+        return compiled
+    with _lock:
+        compiled = _compiled.get(model)
+        if compiled is None:
+            compiled = compile_schema(model)
+            _compiled[model] = compiled
+            _stats["compiled"] += 1
+    return compiled
+
+def precompile(*models):
+    """프로세스 시작 시 미리 변환해 두면 첫 호출에서도 변환 비용이 없습니다."""
+    for m in models: get(m)
+
+def clear():
+    with _lock:
+        _compiled.clear()
+        _stats.update(compiled=0, hits=0)
+
+def stats() -> dict:
+    return dict(_stats, models=len(_compiled))
+
+# =========================================================
+# 🧾 직렬화 (사전 직렬화 조각 재사용)
+# =========================================================
+def dumps(obj, sort_keys: bool = False) -> str:
+    """
+    json.dumps(obj, ensure_ascii=False)와 같은 결과를 내되, 안에 든 CompiledSchema는 다시 직렬화하지 않고
+    보관해 둔 조각을 그대로 끼워 넣습니다. (응답 캐시 키 / 요청 본문 공용)
+    """
+    fragments = []
+
+    def _swap(node):
+        if isinstance(node, CompiledSchema):
+            fragments.append(node.sorted_json if sort_keys else node.json)
+            return f"\x00schema:{len(fragments) - 1}\x00"
+        if isinstance(node, dict): return {k: _swap(v) for k, v in node.items()}
+        if isinstance(node, (list, tuple)): return [_swap(v) for v in node]
+        return node
+
+    text = json.dumps(_swap(obj), ensure_ascii=False, sort_keys=sort_keys)
+    for i, fragment in enumerate(fragments):
+        text = text.replace(f'"\\u0000schema:{i}\\u0000"', fragment, 1)
+    return text
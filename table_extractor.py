@@ -1,10 +1,20 @@
 import os
 import pandas as pd
-import pdfplumber
+import parse_cache
+import parser as doc_parser
+
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
 
 class TableExtractor:
     """IR 문서 및 재무제표 파일에서 표 데이터를 추출하여 Markdown으로 변환하는 클래스"""
 
+    # 표 → Markdown 변환 방식이 바뀌면 올려서 parse_cache의 기존 항목을 무효화합니다.
+    # 2: PDF 표 탐지를 PyMuPDF find_tables로 변경 (pdfplumber는 필요한 페이지에만)
+    VERSION = "2"
+
     @staticmethod
     def extract_pdf_tables_to_md(pdf_path: str) -> str:
         """
@@ -12,6 +22,25 @@ class TableExtractor:
         """
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {pdf_path}")
+        return parse_cache.cached(pdf_path, "pdf_tables", TableExtractor.VERSION, TableExtractor._pdf_tables_to_md)
+
+    @staticmethod
+    def _pdf_tables_to_md(pdf_path: str) -> str:
+        """
+        parser.extract_pdf_text_and_tables로 본문과 표를 한 번에 추출합니다.
+        같이 나온 본문 텍스트는 parse_cache("text")에 넣어 두므로 이어지는 parse_any_file은 PDF를 다시 열지 않습니다.
+        """
+        if not doc_parser.fitz:
+            return TableExtractor._pdfplumber_tables_to_md(pdf_path)
+        text, tables = doc_parser.extract_pdf_text_and_tables(pdf_path)
+        if doc_parser.is_error_text(text):
+            raise ValueError(text)
+        parse_cache.put(pdf_path, "text", doc_parser.PARSER_VERSION, text)
+        return tables
+
+    @staticmethod
+    def _pdfplumber_tables_to_md(pdf_path: str) -> str:
+        """예전 경로 (pdfplumber로 전 페이지 표 탐지). PyMuPDF가 없을 때 사용"""
 
         md_tables = []
         with pdfplumber.open(pdf_path) as pdf:
@@ -51,7 +80,12 @@ class TableExtractor:
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file_path}")
+        return parse_cache.cached(file_path, "financial_md", TableExtractor.VERSION,
+                                  TableExtractor._financial_data_to_md,
+                                  is_error=lambda text: text.startswith("파일 읽기/변환 중 오류 발생"))
 
+    @staticmethod
+    def _financial_data_to_md(file_path: str) -> str:
         ext = os.path.splitext(file_path)[1].lower()
         
         try:
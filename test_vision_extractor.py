@@ -1,52 +1,19 @@
 import os
-import time  # API 호출 간격을 위한 time 모듈 추가
-import fitz  # PyMuPDF
-import google.generativeai as genai
-from PIL import Image
 from dotenv import load_dotenv
+import gemini_client
+import vision_extract
 
 # 환경변수(API KEY) 로드
 load_dotenv()
 API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
 if not API_KEY:
     raise ValueError("API_KEY가 설정되지 않았습니다. .env 파일을 확인해 주세요.")
+# gemini_client는 GEMINI_API_KEY만 읽으므로 GOOGLE_API_KEY만 있는 환경도 그대로 동작하도록 맞춰 둡니다.
+gemini_client.api_key = gemini_client.api_key or API_KEY.strip()
 
-genai.configure(api_key=API_KEY)
-
-def pdf_page_to_image(doc, page_num: int, dpi: int = 200) -> Image.Image:
-    """
-    PDF의 특정 페이지를 고해상도 이미지(PIL Image)로 변환합니다.
-    """
-    page = doc.load_page(page_num)
-    
-    # 해상도 설정 (dpi 200~300 권장)
-    pix = page.get_pixmap(dpi=dpi)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-    return img
-
-def extract_markdown_from_image(image: Image.Image) -> str:
-    """
-    Gemini Vision API를 사용하여 이미지 내의 표와 텍스트를 Markdown으로 추출합니다.
-    """
-    # 텍스트와 레이아웃 이해도가 높은 gemini-2.0-flash 모델 적용
-    model = genai.GenerativeModel('gemini-2.0-flash')
-    
-    prompt = """
-    당신은 전문적인 데이터 추출 및 문서화 AI입니다.
-    주어진 이미지는 스타트업의 IR(투자유치) 자료 슬라이드입니다. 이미지에 포함된 모든 텍스트, 표, 구조도를 완벽한 형태의 Markdown 문서로 변환해 주세요.
-
-    [중요 지침]
-    1. **표(Table)**: 데이터가 행과 열로 구성된 표 형태라면, 반드시 Markdown 표 형식(`| Column | Column |`)으로 깔끔하게 정리하십시오.
-    2. **다이어그램/흐름도**: 시각적인 도형이나 화살표로 이어진 프로세스, 파이프라인 등은 계층적인 글머리기호(`-`, `*`, `1.`)를 사용하여 문맥이 매끄럽게 이어지도록 구조화하여 요약하십시오.
-    3. **불필요한 파편화 방지**: 무의미한 띄어쓰기나 단어 쪼개짐을 수정하고, 문장과 단어를 자연스럽게 이어 붙이십시오.
-    4. **디자인 요소 무시**: 의미 없는 배경, 단순 아이콘 디자인은 무시하고 '핵심 정보와 텍스트'의 논리적 배치에 집중하십시오.
-    """
-    
-    try:
-        response = model.generate_content([prompt, image])
-        return response.text
-    except Exception as e:
-        return f"Error generation: {str(e)}"
+# 페이지 렌더링 / Vision 호출 / 체크포인트는 vision_extract 모듈이 담당합니다.
+# (렌더링은 프로세스 풀, 호출은 VISION_CONCURRENCY개 동시 + 공용 rate_limiter, 중단 시 빠진 페이지부터 재개)
+# 텍스트 레이어가 충분한 페이지는 Vision 없이 PyMuPDF로 추출합니다. (VISION_ROUTE=0이면 모든 페이지 Vision)
 
 if __name__ == "__main__":
     print("=== Vision LLM 기반 PDF 전체 페이지 -> Markdown 일괄 추출 ===")
@@ -92,32 +59,14 @@ if __name__ == "__main__":
                     print(f"  📄 PDF 발견: {file_name}")
                     
                     try:
-                        doc = fitz.open(target_pdf)
-                        total_pages = doc.page_count
-                        print(f"  ▶ 총 {total_pages}페이지 추출 시작...")
-                        
-                        # 파일 열기 (덮어쓰기 모드)
-                        with open(output_md, "w", encoding="utf-8") as f:
-                            f.write(f"# {file_name} 전체 추출 결과\n\n")
-                            
-                            for i in range(total_pages):
-                                print(f"    🔄 [{i+1}/{total_pages}] 페이지 처리 중...")
-                                
-                                page_image = pdf_page_to_image(doc, i, dpi=200)
-                                md_text = extract_markdown_from_image(page_image)
-                                
-                                f.write(f"## Page {i+1}\n\n")
-                                f.write(md_text + "\n\n")
-                                f.write("---\n\n")
-                                
-                                # API 속도 제한(Rate Limit) 방지를 위해 3초 대기 (마지막 페이지 제외)
-                                if i < total_pages - 1:
-                                    time.sleep(3)
-                        
-                        doc.close()
-                        print(f"  ✅ 추출 완료! 저장 위치: {output_md}")
-                        
+                        result = vision_extract.extract_pdf(target_pdf, output_md)
+                        if result["complete"]:
+                            print(f"  ✅ 추출 완료! ({result['pages']}페이지, {result['sec']}s) 저장 위치: {output_md}")
+
                     except Exception as e:
                         print(f"  ❌ 파일 처리 중 오류 발생 ({file_name}): {e}")
 
+        vision_extract.shutdown()
+        print(f"  📊 {vision_extract.stats()}")
+
     print("\n🎉 모든 기업 폴더의 PDF 추출 작업이 완료되었습니다!")
\ No newline at end of file
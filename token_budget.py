@@ -0,0 +1,266 @@
+import os
+import re
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from hashing import file_sha256
+import metrics
+
+# [PDF 페이지 수] inline PDF 토큰 추정용
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+# =========================================================
+# 💡 [설정] 보충 문서(extra_text) 토큰 예산
+# =========================================================
+# combined_extra_text는 에이전트 프롬프트마다 통째로 붙으므로(엑셀 to_markdown 포함),
+# 호출별 예산을 넘으면 아래 순서로 줄인 뒤 전송합니다. 같은 입력이면 항상 같은 결과가 나옵니다.
+#   1) 표 축약  : 긴 마크다운 표는 머리 TABLE_KEEP_ROWS행만 남김 (우선순위 낮은 문서부터)
+#   2) 절단     : 우선순위 가장 낮은 문서의 뒷부분을 잘라 예산에 맞춤
+#   3) 제외     : 잘라도 의미 있는 분량(MIN_KEEP_TOKENS)이 남지 않으면 문서 전체를 빼고 이름만 남김
+# 예산은 GEMINI_EXTRA_BUDGET_<호출명> 환경변수로 덮어쓸 수 있습니다. (예: GEMINI_EXTRA_BUDGET_FINANCIAL=80000)
+# 기업 단위 Context Cache를 써도 호출별 예산은 그대로 적용됩니다. 보충 텍스트가 가장 작은 예산(smallest_budget) 이내일
+# 때만 캐시에 함께 올리고(어느 호출도 줄이지 않으므로 같은 텍스트), 넘으면 캐시에는 PDF만 두고 각 호출이 예산 적용본을 직접 보냅니다.
+BUDGETS = {
+    "financial": 60000,
+    "tech": 30000,
+    "market": 20000,
+    "personnel_signature": 8000,
+    "personnel": 20000,
+    "valuation_industry": 8000,
+    "valuation_extract": 40000,
+    "valuation_main": 20000,
+}
+DEFAULT_BUDGET = int(os.getenv("GEMINI_EXTRA_BUDGET_DEFAULT", "30000"))
+
+# 문서 이름에 포함된 키워드 순서가 곧 우선순위 (앞일수록 마지막까지 보존)
+PRIORITY = {
+    "financial": ["재무", "감사", "IR"],
+    "valuation_extract": ["재무", "감사", "IR"],
+    "valuation_main": ["재무", "IR"],
+    "market": ["IR", "홍보"],
+    "tech": ["IR", "홍보"],
+}
+DEFAULT_PRIORITY = ["IR", "재무", "홍보"]
+
+TABLE_KEEP_ROWS = int(os.getenv("GEMINI_BUDGET_TABLE_ROWS", "30"))
+MIN_KEEP_TOKENS = 500
+
+# 프롬프트 + PDF가 이 값을 넘으면 API가 400으로 거절하므로 전송 전에 경고합니다.
+MODEL_CONTEXT_TOKENS = int(os.getenv("GEMINI_MODEL_CONTEXT_TOKENS", "1000000"))
+# inline PDF는 파일 크기와 무관하게 페이지당 약 258 토큰으로 과금됩니다. (이미지가 많은 큰 덱도 페이지 수 기준)
+PDF_TOKENS_PER_PAGE = int(os.getenv("GEMINI_PDF_TOKENS_PER_PAGE", "258"))
+# 페이지 수를 읽을 수 없을 때(PyMuPDF 미설치, 손상 파일)만 쓰는 크기 기준 대략치
+PDF_TOKENS_PER_MB = float(os.getenv("GEMINI_PDF_TOKENS_PER_MB", "20000"))
+
+SECTION_PREFIX = "\n\n==== [보충 문서: "
+_SECTION_RE = re.compile(r"\n\n==== \[보충 문서: (.+?)\] ====\n")
+
+def section_header(name: str) -> str:
+    """main.prepare_company가 보충 문서마다 붙이는 구분 헤더 (예산 계산 시 문서 경계로 사용)"""
+    return f"{SECTION_PREFIX}{name}] ====\n"
+
+# =========================================================
+# 🔢 토큰 추정
+# =========================================================
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 근사치. 영문/숫자/기호는 약 4자, 한글 등 비ASCII는 약 1.5자당 1토큰.
+    (rate_limiter의 TPM 예약도 같은 추정치를 사용)
+    """
+    if not text: return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5) + 1
+
+# 페이지 수는 PDF 내용 해시 단위로 기억합니다. (에이전트 호출마다 PDF를 다시 열지 않도록)
+_PDF_PAGES_MAX = 256
+_pdf_pages = OrderedDict()
+_pdf_pages_lock = threading.Lock()
+
+def _pdf_page_count(key: str, load):
+    with _pdf_pages_lock:
+        if key in _pdf_pages:
+            _pdf_pages.move_to_end(key)
+            return _pdf_pages[key]
+    pages = None
+    if fitz:
+        try:
+            with load() as doc:
+                pages = doc.page_count
+        except Exception:
+            pages = None
+    with _pdf_pages_lock:
+        _pdf_pages[key] = pages
+        while len(_pdf_pages) > _PDF_PAGES_MAX: _pdf_pages.popitem(last=False)
+    return pages
+
+def pdf_tokens(pdf_path: str) -> int:
+    """PDF 파일 1개의 추정 토큰 (페이지 수 x PDF_TOKENS_PER_PAGE)"""
+    pages = _pdf_page_count(file_sha256(pdf_path), lambda: fitz.open(pdf_path))
+    if pages is None: return int(os.path.getsize(pdf_path) / (1024 * 1024) * PDF_TOKENS_PER_MB)
+    return pages * PDF_TOKENS_PER_PAGE
+
+def inline_pdf_tokens(b64: str) -> int:
+    """
+    payload의 inline PDF(base64) 추정 토큰. 호출마다 수십 MB를 해싱/디코딩하지 않도록
+    길이 + 앞뒤 4KB(PDF 헤더, 트레일러/xref)로 키를 만들고, 처음 보는 PDF만 디코딩해 페이지 수를 셉니다.
+    """
+    key = hashlib.sha256(f"{len(b64)}:{b64[:4096]}:{b64[-4096:]}".encode("ascii", "ignore")).hexdigest()
+    pages = _pdf_page_count(key, lambda: fitz.open(stream=base64.b64decode(b64), filetype="pdf"))
+    if pages is None: return int(len(b64) * 3 // 4 / (1024 * 1024) * PDF_TOKENS_PER_MB)
+    return pages * PDF_TOKENS_PER_PAGE
+
+def budget_for(name: str) -> int:
+    env = os.getenv(f"GEMINI_EXTRA_BUDGET_{name.upper()}")
+    return int(env) if env else BUDGETS.get(name, DEFAULT_BUDGET)
+
+def smallest_budget() -> int:
+    """모든 호출별 예산 중 최솟값 (환경변수 반영). 이 이내의 보충 텍스트는 어느 호출에서도 줄지 않습니다."""
+    return min([budget_for(name) for name in BUDGETS] + [DEFAULT_BUDGET])
+
+# =========================================================
+# ✂️ 문서 단위 축약
+# =========================================================
+def _split_sections(text: str) -> tuple:
+    """Returns: (머리말, [[문서명, 헤더, 본문], ...])"""
+    matches = list(_SECTION_RE.finditer(text))
+    if not matches: return text, []
+    sections = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append([m.group(1), m.group(0), text[m.end():end]])
+    return text[:matches[0].start()], sections
+
+def _condense_tables(body: str) -> tuple:
+    """TABLE_KEEP_ROWS행을 넘는 마크다운 표를 머리(헤더 + 구분선 + N행)만 남기고 축약. Returns: (본문, 축약한 표 수)"""
+    lines = body.split("\n")
+    out, run, condensed = [], [], 0
+
+    def flush():
+        nonlocal condensed
+        if len(run) > TABLE_KEEP_ROWS + 2:
+            out.extend(run[:TABLE_KEEP_ROWS + 2])
+            out.append(f"| … (이하 {len(run) - TABLE_KEEP_ROWS - 2}행 생략) |")
+            condensed += 1
+        else:
+            out.extend(run)
+        run.clear()
+
+    for line in lines:
+        if line.lstrip().startswith("|"):
+            run.append(line)
+            continue
+        flush()
+        out.append(line)
+    flush()
+    return "\n".join(out), condensed
+
+def _truncate(body: str, keep_tokens: int) -> str:
+    """keep_tokens 이내(생략 안내 포함)가 되도록 줄 경계에서 자릅니다."""
+    total = estimate_tokens(body)
+    note = f"\n(… 예산 초과로 이하 약 {total - keep_tokens:,} tok 생략)"
+    target = max(0, keep_tokens - estimate_tokens(note))
+    cut = int(len(body) * target / max(1, total))
+    # 문자 종류(한글/영문) 비율이 고르지 않으면 비례 추정이 빗나가므로 예산 이내가 될 때까지 줄입니다.
+    while cut > 0 and estimate_tokens(body[:cut]) > target:
+        cut -= max(1, (estimate_tokens(body[:cut]) - target))
+    nl = body.rfind("\n", 0, cut)
+    if nl > cut // 2: cut = nl
+    return body[:max(0, cut)] + note
+
+def _priority(name: str, doc_name: str) -> int:
+    keywords = PRIORITY.get(name, DEFAULT_PRIORITY)
+    for i, kw in enumerate(keywords):
+        if kw.lower() in doc_name.lower(): return i
+    return len(keywords)
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_MEMO_MAX = 64
+
+def fit_extra_text(text: str, name: str) -> str:
+    """
+    호출명(name)의 예산에 맞게 보충 텍스트를 줄입니다. 예산 이내면 원문을 그대로 돌려줍니다.
+    같은 (text, name)은 한 번만 계산하고 기록합니다. (에이전트가 같은 보충 텍스트로 여러 번 호출하므로)
+    """
+    if not text: return text
+    memo_key = (name, text)
+    with _memo_lock:
+        if memo_key in _memo:
+            _memo.move_to_end(memo_key)
+            return _memo[memo_key]
+
+    budget = budget_for(name)
+    before = estimate_tokens(text)
+    result = text
+    if before > budget:
+        result, counts = _reduce(text, name, budget)
+        after = estimate_tokens(result)
+        print(f"      ✂️ [Budget:{name}] 보충 텍스트 {before:,} → {after:,} tok (-{before - after:,}) "
+              f"| 표 축약 {counts['condensed']} · 절단 {counts['trimmed']} · 제외 {counts['dropped']}")
+        metrics.record("budget", call=name, budget=budget, before_tokens=before, after_tokens=after,
+                       saved_tokens=before - after, **counts)
+
+    with _memo_lock:
+        _memo[memo_key] = result
+        while len(_memo) > _MEMO_MAX: _memo.popitem(last=False)
+    return result
+
+def _reduce(text: str, name: str, budget: int) -> tuple:
+    preamble, sections = _split_sections(text)
+    counts = {"condensed": 0, "trimmed": 0, "dropped": 0}
+    sizes = [estimate_tokens(h) + estimate_tokens(b) for _, h, b in sections]
+    total = estimate_tokens(preamble) + sum(sizes)
+    # 우선순위가 낮은 문서부터, 같은 우선순위면 뒤에 붙은 문서부터 줄입니다.
+    order = sorted(range(len(sections)), key=lambda i: (-_priority(name, sections[i][0]), -i))
+
+    # 1) 표 축약
+    for i in order:
+        if total <= budget: break
+        body, n = _condense_tables(sections[i][2])
+        if n:
+            sections[i][2] = body
+            new_size = estimate_tokens(sections[i][1]) + estimate_tokens(body)
+            total -= sizes[i] - new_size
+            sizes[i] = new_size
+            counts["condensed"] += n
+
+    # 2) 절단 / 3) 제외
+    for i in order:
+        if total <= budget: break
+        doc, header, body = sections[i]
+        keep = sizes[i] - (total - budget) - estimate_tokens(header)
+        if keep >= MIN_KEEP_TOKENS:
+            sections[i][2] = _truncate(body, keep)
+            counts["trimmed"] += 1
+        else:
+            sections[i][2] = "(예산 초과로 본문 생략)"
+            counts["dropped"] += 1
+        new_size = estimate_tokens(header) + estimate_tokens(sections[i][2])
+        total -= sizes[i] - new_size
+        sizes[i] = new_size
+
+    # 구분 헤더가 없는 단일 텍스트(또는 머리말만으로 초과)는 통째로 절단
+    if total > budget and preamble:
+        preamble = _truncate(preamble, max(MIN_KEEP_TOKENS, budget - sum(sizes)))
+        counts["trimmed"] += 1
+    return preamble + "".join(h + b for _, h, b in sections), counts
+
+# =========================================================
+# 🚧 최종 프롬프트 크기 점검
+# =========================================================
+def check_prompt(prompt: str, pdf_path: str = None, label: str = "") -> int:
+    """프롬프트 + PDF 추정 토큰이 모델 한도를 넘으면 경고합니다. Returns: 추정 토큰 수"""
+    tokens = estimate_tokens(prompt)
+    if pdf_path and os.path.exists(pdf_path):
+        # rate_limiter의 TPM 예약과 같은 페이지 수 기준 추정 (이미지가 많은 큰 덱도 과대 추정하지 않도록)
+        tokens += pdf_tokens(pdf_path)
+    if tokens > MODEL_CONTEXT_TOKENS:
+        print(f"      🚨 [Budget] 프롬프트 추정 {tokens:,} tok > 모델 한도 {MODEL_CONTEXT_TOKENS:,} tok {label}"
+              f"- API가 거절할 수 있습니다. GEMINI_EXTRA_BUDGET_* 값을 낮추십시오.")
+        metrics.record("budget", call=label or "prompt", over_limit=True, before_tokens=tokens, after_tokens=tokens,
+                       saved_tokens=0)
+    return tokens
@@ -2,22 +2,27 @@ import os
 import time
 import json
 import re
-import csv
 import base64
 import requests
 import random
 import io
 import pandas as pd
+import asyncio
+import threading
 import concurrent.futures
+from collections import OrderedDict
 import traceback # 에러 역추적용
-from dotenv import load_dotenv
-
-load_dotenv()
-api_key = (os.getenv("GEMINI_API_KEY") or "").strip()
-
-API_BASE = "https://generativelanguage.googleapis.com/v1beta"
-TARGET_MODEL = "models/gemini-2.0-flash"
-HEADERS = {"Content-Type": "application/json"}
+from gemini_client import api_key, API_BASE, TARGET_MODEL, HEADERS, post_generate, post_stream, chunk_text
+from json_stream import JsonFieldWatcher
+import context_cache
+import response_cache
+import schema_registry
+from schema_registry import convert_to_gemini_schema
+import batch_jobs
+import token_budget
+import metrics
+from hashing import file_sha256
+import csv_loader
 
 # =========================================================
 # 1. Helper Functions
@@ -38,57 +43,54 @@ def safe_json_loads(text: str) -> dict:
     except:
         return {}
 
+# 🚨 [캐시] 같은 IR PDF를 에이전트마다 다시 읽고 인코딩하지 않도록 base64 문자열을 프로세스 단위로 보관합니다.
+# (path, size, mtime) 키 기반 LRU이며, 인코딩 문자열 총 길이가 상한(MB)을 넘으면 오래된 것부터 버립니다.
+PDF_B64_CACHE_MAX_MB = float(os.getenv("PDF_B64_CACHE_MAX_MB", "512"))
+
+_pdf_b64_cache = OrderedDict()
+_pdf_b64_lock = threading.Lock()
+_pdf_b64_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+def _pdf_cache_key(pdf_path: str) -> tuple:
+    st = os.stat(pdf_path)
+    return (os.path.abspath(pdf_path), st.st_size, st.st_mtime_ns)
+
 def pdf_to_base64(pdf_path: str) -> dict:
+    key = _pdf_cache_key(pdf_path)
+    with _pdf_b64_lock:
+        b64 = _pdf_b64_cache.get(key)
+        if b64 is not None:
+            _pdf_b64_cache.move_to_end(key)
+            _pdf_b64_stats["hits"] += 1
+            return {"inline_data": {"mime_type": "application/pdf", "data": b64}}
+        _pdf_b64_stats["misses"] += 1
+
     with open(pdf_path, "rb") as f:
         data = f.read()
     b64 = base64.b64encode(data).decode("utf-8")
+
+    limit = int(PDF_B64_CACHE_MAX_MB * 1024 * 1024)
+    if len(b64) <= limit:
+        with _pdf_b64_lock:
+            if key not in _pdf_b64_cache:
+                _pdf_b64_cache[key] = b64
+                _pdf_b64_stats["bytes"] += len(b64)
+            while _pdf_b64_stats["bytes"] > limit:
+                _, old = _pdf_b64_cache.popitem(last=False)
+                _pdf_b64_stats["bytes"] -= len(old)
+                _pdf_b64_stats["evictions"] += 1
     return {"inline_data": {"mime_type": "application/pdf", "data": b64}}
 
-# 🚨 [신규 추가] Pydantic의 $defs와 $ref를 Gemini REST API 규격에 맞게 쫙 펴주는 변환기
-def convert_to_gemini_schema(schema_node, defs=None):
-    if defs is None:
-        defs = schema_node.get("$defs", {})
-        
-    # $ref(참조)가 있으면 원본 딕셔너리로 교체
-    if "$ref" in schema_node:
-        ref_name = schema_node["$ref"].split("/")[-1]
-        return convert_to_gemini_schema(defs[ref_name], defs)
-        
-    # Optional 타입(anyOf) 처리
-    if "anyOf" in schema_node:
-        for sub in schema_node["anyOf"]:
-            if sub.get("type") != "null":
-                return convert_to_gemini_schema(sub, defs)
-        return {"type": "STRING"} 
-        
-    out = {}
-    t = schema_node.get("type", "OBJECT").upper()
-    out["type"] = t
-    
-    if "description" in schema_node:
-        out["description"] = schema_node["description"]
-        
-    if t == "OBJECT" and "properties" in schema_node:
-        out["properties"] = {
-            k: convert_to_gemini_schema(v, defs) 
-            for k, v in schema_node["properties"].items()
-        }
-        if "required" in schema_node:
-            out["required"] = schema_node["required"]
-            
-    if t == "ARRAY" and "items" in schema_node:
-        out["items"] = convert_to_gemini_schema(schema_node["items"], defs)
-        
-    return out
+def pdf_cache_stats() -> dict:
+    with _pdf_b64_lock:
+        return dict(_pdf_b64_stats, entries=len(_pdf_b64_cache))
 
-# 🚨 [핵심 수정] response_schema 파라미터를 추가하여 Pydantic 모델을 수용할 수 있게 만듭니다.
-def call_gemini(prompt: str, pdf_path: str = None, tools: list = None, response_schema=None, max_tokens: int = 8192) -> dict:
-    if not api_key: raise RuntimeError("GEMINI_API_KEY is missing")
-    url = f"{API_BASE}/{TARGET_MODEL}:generateContent?key={api_key}"
-    
-    parts = [{"text": prompt}]
-    if pdf_path: parts.append(pdf_to_base64(pdf_path))
-    
+def clear_pdf_cache():
+    with _pdf_b64_lock:
+        _pdf_b64_cache.clear()
+        _pdf_b64_stats.update(hits=0, misses=0, evictions=0, bytes=0)
+
+def _build_generation_config(response_schema=None, max_tokens: int = 8192) -> dict:
     # 기본 Configuration
     generation_config = {
         "temperature": 0.1, 
@@ -98,33 +100,118 @@ def call_gemini(prompt: str, pdf_path: str = None, tools: list = None, response_
     # 🚨 Pydantic 스키마가 전달된 경우, API 페이로드에 JSON Schema 형태로 변환하여 강제 주입합니다.
     if response_schema:
         generation_config["responseMimeType"] = "application/json"
-        raw_schema = response_schema.model_json_schema()
-        # 🚨 [핵심 수정] 제미나이가 못 읽는 $defs 에러를 원천 차단하기 위해 변환기 적용
-        generation_config["responseSchema"] = convert_to_gemini_schema(raw_schema)
+        # 🚨 [핵심 수정] 제미나이가 못 읽는 $defs 에러를 원천 차단하기 위해 변환기 적용 (모델당 1회 변환 후 재사용)
+        generation_config["responseSchema"] = schema_registry.get(response_schema)
+    return generation_config
+
+def _build_payload(prompt: str, pdf_path: str, tools: list, generation_config: dict) -> tuple:
+    """(payload, model) - call_gemini / call_gemini_async 공용"""
+    # 🚨 기업 단위 Context Cache가 활성화돼 있으면 PDF/보충 텍스트 대신 캐시 핸들만 참조합니다.
+    # (tools와 cachedContent는 한 요청에 함께 쓸 수 없으므로 검색 호출은 기존 방식 유지)
+    ctx = None if tools else context_cache.lookup(pdf_path)
+    if ctx:
+        parts = [{"text": ctx.apply(prompt)}]
+    else:
+        parts = [{"text": prompt}]
+        if pdf_path: parts.append(pdf_to_base64(pdf_path))
+        token_budget.check_prompt(prompt, pdf_path)
 
     payload = {
         "contents": [{"parts": parts}], 
         "generationConfig": generation_config
     }
     if tools: payload["tools"] = tools
-    
-    for _ in range(3):
-        try:
-            resp = requests.post(url, headers=HEADERS, json=payload, timeout=180)
-            if resp.status_code == 200:
-                try: 
-                    return {"ok": True, "text": resp.json()["candidates"][0]["content"]["parts"][0]["text"]}
-                except: 
-                    return {"ok": False, "error": "Parsing Error"}
-            elif resp.status_code == 429: 
-                time.sleep(5)
-                continue
-            else: 
-                return {"ok": False, "error": resp.text}
-        except Exception as e: 
-            time.sleep(3)
-            
-    return {"ok": False, "error": "Timeout"}
+    if ctx: payload["cachedContent"] = ctx.name
+    return payload, (ctx.model if ctx else TARGET_MODEL)
+
+def _response_cache_key(prompt: str, pdf_path: str, tools: list, generation_config: dict) -> str:
+    # 🚨 디스크 응답 캐시: 원본 프롬프트 + PDF 내용 해시 기준이라 Context Cache 사용 여부와 무관하게 같은 키가 됩니다.
+    return response_cache.make_key(
+        TARGET_MODEL, prompt, file_sha256(pdf_path) if pdf_path else None,
+        generation_config.get("responseSchema"), tools, generation_config
+    )
+
+def _to_call_result(res: dict) -> dict:
+    if not res["ok"]:
+        return {"ok": False, "error": res.get("text") or "Timeout"}
+    try: 
+        return {"ok": True, "text": res["json"]["candidates"][0]["content"]["parts"][0]["text"]}
+    except: 
+        return {"ok": False, "error": "Parsing Error"}
+
+def _field_watcher(watch_fields, on_field, t0: float, timing: dict):
+    """스트리밍 필드 감시기. 첫 필드가 완성된 시점을 metrics용으로 기록합니다."""
+    if not on_field: return None
+    def _on_field(path, value):
+        timing.setdefault("first_field_ms", round((time.perf_counter() - t0) * 1000, 1))
+        on_field(path, value)
+    return JsonFieldWatcher(watch_fields or [], _on_field)
+
+def _finish_watcher(watcher, res: dict):
+    # 캐시 적중/스트림 중단 등으로 아직 발화하지 않은 필드는 전체 응답 기준으로 보완
+    if watcher and res.get("ok"):
+        watcher.finish(chunk_text(res["json"]))
+
+# 🚨 [핵심 수정] response_schema 파라미터를 추가하여 Pydantic 모델을 수용할 수 있게 만듭니다.
+def call_gemini(prompt: str, pdf_path: str = None, tools: list = None, response_schema=None, max_tokens: int = 8192,
+                watch_fields: list = None, on_field=None) -> dict:
+    """
+    on_field를 넘기면 streamGenerateContent로 받으며, watch_fields 경로의 JSON 값이 완성되는 즉시
+    on_field(path, value)를 호출합니다. (반환값은 스트리밍 여부와 무관하게 동일)
+    """
+    if not api_key and response_cache.get_mode() != "replay": raise RuntimeError("GEMINI_API_KEY is missing")
+    generation_config = _build_generation_config(response_schema, max_tokens)
+    t0 = time.perf_counter()
+    timing = {}
+    watcher = _field_watcher(watch_fields, on_field, t0, timing)
+
+    call_type = response_cache.call_type_for(tools)
+    key = _response_cache_key(prompt, pdf_path, tools, generation_config) if response_cache.enabled() else None
+
+    def _request():
+        payload, model = _build_payload(prompt, pdf_path, tools, generation_config)
+        # 🚨 배치 수집 모드: 캐시 미스는 호출하지 않고 배치 잡 대기열로 보낸 뒤 그래프를 멈춤 (batch_jobs.BatchDeferred)
+        if key and batch_jobs.collecting():
+            return batch_jobs.defer(key, payload, call_type, model)
+        # 🚨 공유 keep-alive 세션 + 단일 재시도 정책 (gemini_client)
+        if watcher:
+            return post_stream(payload, watcher.feed, read_timeout=180, model=model)
+        return post_generate(payload, read_timeout=180, model=model)
+
+    if key:
+        res = response_cache.fetch(key, call_type, _request)
+    else:
+        res = _request()
+    _finish_watcher(watcher, res)
+    metrics.record_llm(res, time.perf_counter() - t0, call_type, TARGET_MODEL, **timing)
+    return _to_call_result(res)
+
+async def call_gemini_async(prompt: str, pdf_path: str = None, tools: list = None, response_schema=None, max_tokens: int = 8192,
+                            watch_fields: list = None, on_field=None) -> dict:
+    """call_gemini의 asyncio 버전 (같은 payload/캐시 키/결과 형식)"""
+    import gemini_async
+    if not api_key and response_cache.get_mode() != "replay": raise RuntimeError("GEMINI_API_KEY is missing")
+    generation_config = _build_generation_config(response_schema, max_tokens)
+    t0 = time.perf_counter()
+    timing = {}
+    watcher = _field_watcher(watch_fields, on_field, t0, timing)
+
+    async def _request():
+        # PDF 읽기/인코딩은 블로킹 작업이므로 루프 밖에서 수행 (LRU 캐시 적중 시 즉시 반환)
+        payload, model = await asyncio.to_thread(_build_payload, prompt, pdf_path, tools, generation_config)
+        if watcher:
+            return await gemini_async.post_stream_async(payload, watcher.feed, read_timeout=180, model=model)
+        return await gemini_async.post_generate_async(payload, read_timeout=180, model=model)
+
+    call_type = response_cache.call_type_for(tools)
+    if response_cache.enabled():
+        key = await asyncio.to_thread(_response_cache_key, prompt, pdf_path, tools, generation_config)
+        res = await response_cache.fetch_async(key, call_type, _request)
+    else:
+        res = await _request()
+    _finish_watcher(watcher, res)
+    metrics.record_llm(res, time.perf_counter() - t0, call_type, TARGET_MODEL, **timing)
+    return _to_call_result(res)
 
 # =========================================================
 # 2. Industry Code Logic
@@ -135,70 +222,56 @@ def load_industry_codes(csv_path: str):
         return {}
     
     industry_map = {}
-    encodings = ['utf-8-sig', 'cp949', 'euc-kr']
-    
-    for enc in encodings:
-        try:
-            with open(csv_path, 'r', encoding=enc) as f:
-                reader = csv.DictReader(f)
-                if reader.fieldnames:
-                    reader.fieldnames = [h.strip() for h in reader.fieldnames]
-                    
-                name_col = next((c for c in reader.fieldnames if '산업내용' in c), None)
-                code_col = None
-                priority_cols = [c for c in reader.fieldnames if '산업분류코드' in c]
-                
-                if priority_cols: 
-                    code_col = priority_cols[0]
-                else: 
-                    code_col = next((c for c in reader.fieldnames if '산업코드' in c), None)
-                    
-                if not name_col or not code_col: 
-                    continue
-                    
-                for row in reader:
-                    name = row.get(name_col, '').strip()
-                    code = row.get(code_col, '').strip()
-                    if name and code:
-                        if name not in industry_map:
-                            industry_map[name] = []
-                        if code not in industry_map[name]:
-                            industry_map[name].append(code)
-                            
-                if industry_map:
-                    print(f"   ✅ Industry Codes Loaded: {len(industry_map)} unique industries")
-                    break
-        except: 
-            continue
-            
+    try:
+        fieldnames, rows = csv_loader.read_rows(csv_path)
+    except Exception as e:
+        print(f"⚠️ [Error] 산업코드 파일을 읽을 수 없습니다: {e}")
+        return {}
+
+    name_col = next((c for c in fieldnames if '산업내용' in c), None)
+    code_col = None
+    priority_cols = [c for c in fieldnames if '산업분류코드' in c]
+
+    if priority_cols:
+        code_col = priority_cols[0]
+    else:
+        code_col = next((c for c in fieldnames if '산업코드' in c), None)
+
+    if not name_col or not code_col:
+        return {}
+
+    for row in rows:
+        name = (row.get(name_col) or '').strip()
+        code = (row.get(code_col) or '').strip()
+        if name and code:
+            if name not in industry_map:
+                industry_map[name] = []
+            if code not in industry_map[name]:
+                industry_map[name].append(code)
+
+    if industry_map:
+        print(f"   ✅ Industry Codes Loaded: {len(industry_map)} unique industries")
     return industry_map
 
 def get_companies_by_code(target_code: str, csv_path: str):
     if not os.path.exists(csv_path): return []
     matched_companies = []
-    encodings = ['utf-8-sig', 'cp949', 'euc-kr']
     target_clean = target_code.strip()
-    for enc in encodings:
-        try:
-            with open(csv_path, 'r', encoding=enc) as f:
-                reader = csv.DictReader(f)
-                if reader.fieldnames:
-                    reader.fieldnames = [h.strip() for h in reader.fieldnames]
-                code_col = next((c for c in reader.fieldnames if '산업분류코드' in c), None)
-                name_col = next((c for c in reader.fieldnames if '회사명' in c), None)
-                if not code_col or not name_col: continue
-                for row in reader:
-                    row_code = row.get(code_col, '').strip()
-                    row_name = row.get(name_col, '').strip()
-                    if not row_code: continue
-                    if row_code == target_clean: matched_companies.append(row_name)
-                    elif len(target_clean) >= 3 and row_code.startswith(target_clean): matched_companies.append(row_name)
-                    elif len(target_clean) >= 3 and target_clean in row_code: matched_companies.append(row_name)
-                if matched_companies:
-                    matched_companies = list(set(matched_companies))
-                    break
-        except: continue
-    return matched_companies
+    try:
+        fieldnames, rows = csv_loader.read_rows(csv_path)
+    except Exception:
+        return []
+    code_col = next((c for c in fieldnames if '산업분류코드' in c), None)
+    name_col = next((c for c in fieldnames if '회사명' in c), None)
+    if not code_col or not name_col: return []
+    for row in rows:
+        row_code = (row.get(code_col) or '').strip()
+        row_name = (row.get(name_col) or '').strip()
+        if not row_code: continue
+        if row_code == target_clean: matched_companies.append(row_name)
+        elif len(target_clean) >= 3 and row_code.startswith(target_clean): matched_companies.append(row_name)
+        elif len(target_clean) >= 3 and target_clean in row_code: matched_companies.append(row_name)
+    return list(set(matched_companies))
 
 # =========================================================
 # 3. Financial Filtering Engine (Debug Mode)
@@ -210,6 +283,63 @@ def get_random_ua():
     ]
     return random.choice(uas)
 
+def _parse_net_income(name: str, html: str) -> tuple:
+    """네이버 증권 메인 HTML에서 2024.12 당기순이익(지배) 흑자 여부 판정 (동기/비동기 공용)"""
+    if len(html) < 1000:
+        return (name, False, f"HTML 내용 너무 짧음 ({len(html)} bytes) - 차단 의심")
+
+    try:
+        dfs = pd.read_html(io.StringIO(html), attrs={"class": "tb_type1"}, match="매출액")
+        if not dfs: 
+            return (name, False, "재무 테이블(tb_type1) 없음")
+        
+        fin_df = dfs[0]
+        cols = [str(c).replace(" ", "").replace("'", "").replace("(", "").replace(")", "").replace("\n", "") for c in fin_df.columns]
+
+        target_idx = -1
+        for i, c in enumerate(cols):
+            if '2024.12' in c and 'E' not in c:
+                target_idx = i
+                break
+        if target_idx == -1:
+            for i, c in enumerate(cols):
+                if '2024.12' in c:
+                    target_idx = i
+                    break
+        
+        if target_idx == -1:
+            return (name, False, f"2024년 컬럼 없음. 발견된 최근 컬럼: {cols[-3:]}")
+
+        ni_idx = -1
+        for idx, row in fin_df.iterrows():
+            label = str(row.iloc[0]).replace(" ", "").strip()
+            if '당기순이익(지배)' in label:
+                ni_idx = idx
+                break
+            elif label == '당기순이익' and ni_idx == -1:
+                ni_idx = idx
+
+        if ni_idx == -1:
+            return (name, False, "당기순이익 행 없음")
+
+        val_raw = fin_df.iloc[ni_idx, target_idx]
+        
+        def parse_val(v):
+            s = str(v).strip()
+            if s in ['-', 'nan', '', 'N/A']: return -999999
+            try: return float(s.replace(',', ''))
+            except: return -999999
+
+        ni_val = parse_val(val_raw)
+
+        if ni_val > 0:
+            return (name, True, f"흑자 ({ni_val})")
+        else:
+            return (name, False, f"적자 ({ni_val})")
+
+    except Exception as e:
+        return (name, False, f"파싱 에러: {str(e)[:50]}")
+
 def check_net_income(company_info):
     name = company_info['name']
     code = company_info['code'] 
@@ -219,96 +349,75 @@ def check_net_income(company_info):
     
     try:
         headers = {'User-Agent': get_random_ua(), 'Referer': 'https://finance.naver.com/'}
-        res = requests.get(url, headers=headers, timeout=10)
+        res = metrics.timed_get(url, headers=headers, timeout=10)
         
         if res.status_code != 200:
             return (name, False, f"HTTP Error {res.status_code}")
 
-        if len(res.text) < 1000:
-            return (name, False, f"HTML 내용 너무 짧음 ({len(res.text)} bytes) - 차단 의심")
-
-        try:
-            dfs = pd.read_html(io.StringIO(res.text), attrs={"class": "tb_type1"}, match="매출액")
-            if not dfs: 
-                return (name, False, "재무 테이블(tb_type1) 없음")
-            
-            fin_df = dfs[0]
-            cols = [str(c).replace(" ", "").replace("'", "").replace("(", "").replace(")", "").replace("\n", "") for c in fin_df.columns]
-
-            target_idx = -1
-            for i, c in enumerate(cols):
-                if '2024.12' in c and 'E' not in c:
-                    target_idx = i
-                    break
-            if target_idx == -1:
-                for i, c in enumerate(cols):
-                    if '2024.12' in c:
-                        target_idx = i
-                        break
-            
-            if target_idx == -1:
-                return (name, False, f"2024년 컬럼 없음. 발견된 최근 컬럼: {cols[-3:]}")
-
-            ni_idx = -1
-            for idx, row in fin_df.iterrows():
-                label = str(row.iloc[0]).replace(" ", "").strip()
-                if '당기순이익(지배)' in label:
-                    ni_idx = idx
-                    break
-                elif label == '당기순이익' and ni_idx == -1:
-                    ni_idx = idx
-
-            if ni_idx == -1:
-                return (name, False, "당기순이익 행 없음")
-
-            val_raw = fin_df.iloc[ni_idx, target_idx]
-            
-            def parse_val(v):
-                s = str(v).strip()
-                if s in ['-', 'nan', '', 'N/A']: return -999999
-                try: return float(s.replace(',', ''))
-                except: return -999999
-
-            ni_val = parse_val(val_raw)
-
-            if ni_val > 0:
-                return (name, True, f"흑자 ({ni_val})")
-            else:
-                return (name, False, f"적자 ({ni_val})")
-
-        except Exception as e:
-            return (name, False, f"파싱 에러: {str(e)[:50]}")
+        return _parse_net_income(name, res.text)
 
     except Exception as e:
         return (name, False, f"접속 에러: {str(e)}")
 
-def filter_peers_stage2(peer_names, company_csv_path):
-    print(f"   📊 [Step 4~8] 재무 정밀 필터링 시작 (Input: {len(peer_names)}개 사)")
+async def check_net_income_async(company_info):
+    import gemini_async
+    name = company_info['name']
+    code = company_info['code'] 
+    
+    await asyncio.sleep(random.uniform(0.5, 1.0))
+    url = f"https://finance.naver.com/item/main.naver?code={code}"
+    headers = {'User-Agent': get_random_ua(), 'Referer': 'https://finance.naver.com/'}
+    status, html = await gemini_async.fetch_text_async(url, headers=headers, timeout=10, fallback_encoding="euc-kr")
     
+    if status == 0:
+        return (name, False, "접속 에러")
+    if status != 200:
+        return (name, False, f"HTTP Error {status}")
+    # read_html 파싱은 CPU 작업이므로 이벤트 루프를 막지 않도록 스레드로 넘깁니다.
+    return await asyncio.to_thread(_parse_net_income, name, html)
+
+def _select_dec_candidates(peer_names, company_csv_path) -> tuple:
+    """회사 목록 CSV에서 12월 결산 + 종목코드 보유 기업만 추립니다. Returns: (이름 목록, {'name','code'} 목록)"""
     dec_candidates = []
     dec_candidate_objs = []
     seen_codes = set()
     
     try:
-        encodings = ['utf-8-sig', 'cp949', 'euc-kr']
-        for enc in encodings:
-            try:
-                with open(company_csv_path, 'r', encoding=enc) as f:
-                    reader = csv.DictReader(f)
-                    if reader.fieldnames: reader.fieldnames = [h.strip() for h in reader.fieldnames]
-                    for row in reader:
-                        name = row.get('회사명', '').strip()
-                        month = row.get('결산월', '').strip()
-                        raw_code = row.get('종목코드', '').strip()
-                        if name in peer_names:
-                            if '12' in month and raw_code:
-                                clean_code = raw_code.zfill(6)
-                                if clean_code not in seen_codes:
-                                    dec_candidates.append(name)
-                                    dec_candidate_objs.append({'name': name, 'code': clean_code})
-                                    seen_codes.add(clean_code)
-                    if dec_candidates: break
-            except: continue
+        _, rows = csv_loader.read_rows(company_csv_path)
+    except Exception as e:
+        print(f"      ⚠️ 회사 목록 CSV 읽기 실패 ({company_csv_path}): {e}")
+        return [], []
+    for row in rows:
+        name = (row.get('회사명') or '').strip()
+        month = (row.get('결산월') or '').strip()
+        raw_code = (row.get('종목코드') or '').strip()
+        if name in peer_names:
+            if '12' in month and raw_code:
+                clean_code = raw_code.zfill(6)
+                if clean_code not in seen_codes:
+                    dec_candidates.append(name)
+                    dec_candidate_objs.append({'name': name, 'code': clean_code})
+                    seen_codes.add(clean_code)
+    return dec_candidates, dec_candidate_objs
+
+def _summarize_stage2(dec_candidates, results) -> dict:
+    profit_passed = []
+    for name, passed, reason in results:
+        if passed:
+            profit_passed.append(name)
+    
+    print(f"      👉 최종 통과: {len(profit_passed)}개 사")
+    
+    return {
+        "dec_passed": dec_candidates,
+        "profit_passed": profit_passed
+    }
+
+def filter_peers_stage2(peer_names, company_csv_path):
+    print(f"   📊 [Step 4~8] 재무 정밀 필터링 시작 (Input: {len(peer_names)}개 사)")
+    
+    try:
+        dec_candidates, dec_candidate_objs = _select_dec_candidates(peer_names, company_csv_path)
     except: 
         return {"dec_passed": peer_names, "profit_passed": peer_names}
 
@@ -318,17 +427,26 @@ def filter_peers_stage2(peer_names, company_csv_path):
 
     print("      👉 당기순이익(지배) 흑자 여부 조회 중...")
     
-    profit_passed = []
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        results = list(executor.map(check_net_income, dec_candidate_objs))
+        results = list(executor.map(metrics.bind(check_net_income), dec_candidate_objs))
     
-    for name, passed, reason in results:
-        if passed:
-            profit_passed.append(name)
+    return _summarize_stage2(dec_candidates, results)
+
+async def filter_peers_stage2_async(peer_names, company_csv_path):
+    """filter_peers_stage2의 asyncio 버전 (스레드 풀 대신 gemini_async 크롤링 세마포어로 동시성 제한)"""
+    print(f"   📊 [Step 4~8] 재무 정밀 필터링 시작 (Input: {len(peer_names)}개 사)")
     
-    print(f"      👉 최종 통과: {len(profit_passed)}개 사")
+    try:
+        dec_candidates, dec_candidate_objs = await asyncio.to_thread(_select_dec_candidates, peer_names, company_csv_path)
+    except: 
+        return {"dec_passed": peer_names, "profit_passed": peer_names}
+
+    print(f"      👉 12월 결산 & 코드 정제 완료: {len(dec_candidates)}개 사")
+    if not dec_candidates: 
+        return {"dec_passed": [], "profit_passed": []}
+
+    print("      👉 당기순이익(지배) 흑자 여부 조회 중...")
     
-    return {
-        "dec_passed": dec_candidates,
-        "profit_passed": profit_passed
-    }
\ No newline at end of file
+    results = await asyncio.gather(*(check_net_income_async(obj) for obj in dec_candidate_objs))
+    
+    return _summarize_stage2(dec_candidates, results)
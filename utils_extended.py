@@ -4,9 +4,11 @@ import re
 import requests
 import random
 from bs4 import BeautifulSoup
-import pandas as pd
 import io
+import asyncio
 import concurrent.futures
+import metrics
+import csv_loader
 
 # =========================================================
 # 0. 종목코드 조회 함수
@@ -32,61 +34,48 @@ def get_stock_code_from_csv(company_name: str, csv_path: str) -> str:
     if not os.path.exists(csv_path):
         return None
     
-    encodings = ['cp949', 'euc-kr', 'utf-8-sig', 'utf-8']
-    
-    for enc in encodings:
-        try:
-            df = pd.read_csv(csv_path, encoding=enc)
-            
-            # 회사명 컬럼 찾기
-            name_col = None
-            for col in df.columns:
-                if '회사명' in col:
-                    name_col = col
-                    break
-            
-            if not name_col:
-                continue
-            
-            # 종목코드 컬럼 찾기  
-            code_col = None
-            for col in df.columns:
-                if '종목코드' in col:
-                    code_col = col
-                    break
-            
-            if not code_col:
-                continue
-            
-            # 정확히 일치하는 회사 찾기
-            matched = df[df[name_col] == company_name.strip()]
-            
-            if len(matched) == 0:
-                # 부분 일치 검색
-                matched = df[df[name_col].str.contains(company_name.strip(), na=False, case=False)]
-            
-            if len(matched) > 0:
-                code = str(matched.iloc[0][code_col]).strip()
-                # 6자리 패딩
-                code = code.zfill(6)
-                return code
-            
-        except Exception as e:
-            continue
-    
+    try:
+        df = csv_loader.read_frame(csv_path)
+    except Exception:
+        return None
+
+    # 회사명 컬럼 찾기
+    name_col = None
+    for col in df.columns:
+        if '회사명' in col:
+            name_col = col
+            break
+
+    # 종목코드 컬럼 찾기
+    code_col = None
+    for col in df.columns:
+        if '종목코드' in col:
+            code_col = col
+            break
+
+    if not name_col or not code_col:
+        return None
+
+    # 정확히 일치하는 회사 찾기
+    matched = df[df[name_col] == company_name.strip()]
+
+    if len(matched) == 0:
+        # 부분 일치 검색 (회사명은 정규식이 아니라 문자열 그대로 비교)
+        matched = df[df[name_col].str.contains(company_name.strip(), na=False, case=False, regex=False)]
+
+    if len(matched) > 0:
+        code = str(matched.iloc[0][code_col]).strip()
+        # 6자리 패딩
+        code = code.zfill(6)
+        return code
+
     return None
 
 # =========================================================
 # 3단계: 사업 유사성 필터링
 # =========================================================
 
-def get_business_description(company_code: str) -> dict:
-    """
-    WiseReport(네이버 기업개요 원본)에서 기업 개요 + 주요제품 매출구성(cTB203) 크롤링
-    Returns: {"business": str, "main_products": str}
-    """
-    time.sleep(random.uniform(0.4, 0.9))
-
+def _business_description_request(company_code: str) -> tuple:
     url = f"https://navercomp.wisereport.co.kr/v2/company/c1020001.aspx?cmp_cd={company_code}&cn="
 
     headers = {
@@ -97,9 +86,63 @@ def get_business_description(company_code: str) -> dict:
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         "Connection": "keep-alive",
     }
+    return url, headers
+
+def _parse_business_description(html: str) -> dict:
+    soup = BeautifulSoup(html, "html.parser")
+
+    # -------------------------
+    # 1) 기업 개요 텍스트(최소한이라도 확보)
+    #    - selector가 확정되면 그걸로 교체 권장
+    # -------------------------
+    business_summary = ""
+    candidates = []
+    for node in soup.find_all(["div", "p", "td"]):
+        txt = node.get_text(" ", strip=True)
+        if len(txt) >= 200:
+            candidates.append((len(txt), txt))
+    if candidates:
+        candidates.sort(reverse=True, key=lambda x: x[0])
+        business_summary = candidates[0][1][:700]
+
+    # -------------------------
+    # 2) 주요제품 매출구성(cTB203)
+    # -------------------------
+    main_products = ""
+    table = soup.find("table", id="cTB203")
+    if table:
+        products = []
+        for tr in table.select("tbody tr"):
+            th = tr.select_one("th span.cut") or tr.select_one("th")
+            td = tr.select_one("td.c2.num") or tr.select_one("td")
+            if not th or not td:
+                continue
+
+            name = th.get_text(" ", strip=True).replace("\xa0", "").strip()
+            ratio = td.get_text(" ", strip=True).replace("\xa0", "").strip()
+
+            # 빈 행 제외
+            if not name or not ratio or name == "&nbsp;" or ratio == "&nbsp;":
+                continue
+
+            products.append(f"{name} ({ratio}%)")
+
+        if products:
+            main_products = ", ".join(products)
+
+    return {"business": business_summary, "main_products": main_products}
+
+def get_business_description(company_code: str) -> dict:
+    """
+    WiseReport(네이버 기업개요 원본)에서 기업 개요 + 주요제품 매출구성(cTB203) 크롤링
+    Returns: {"business": str, "main_products": str}
+    """
+    time.sleep(random.uniform(0.4, 0.9))
+
+    url, headers = _business_description_request(company_code)
 
     try:
-        res = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+        res = metrics.timed_get(url, headers=headers, timeout=10, allow_redirects=True)
         if res.status_code != 200:
             return {"business": "", "main_products": ""}
 
@@ -107,77 +150,34 @@ def get_business_description(company_code: str) -> dict:
         if not res.encoding or res.encoding.lower() in ("iso-8859-1", "latin-1"):
             res.encoding = "utf-8"
 
-        soup = BeautifulSoup(res.text, "html.parser")
-
-        # -------------------------
-        # 1) 기업 개요 텍스트(최소한이라도 확보)
-        #    - selector가 확정되면 그걸로 교체 권장
-        # -------------------------
-        business_summary = ""
-        candidates = []
-        for node in soup.find_all(["div", "p", "td"]):
-            txt = node.get_text(" ", strip=True)
-            if len(txt) >= 200:
-                candidates.append((len(txt), txt))
-        if candidates:
-            candidates.sort(reverse=True, key=lambda x: x[0])
-            business_summary = candidates[0][1][:700]
-
-        # -------------------------
-        # 2) 주요제품 매출구성(cTB203)
-        # -------------------------
-        main_products = ""
-        table = soup.find("table", id="cTB203")
-        if table:
-            products = []
-            for tr in table.select("tbody tr"):
-                th = tr.select_one("th span.cut") or tr.select_one("th")
-                td = tr.select_one("td.c2.num") or tr.select_one("td")
-                if not th or not td:
-                    continue
-
-                name = th.get_text(" ", strip=True).replace("\xa0", "").strip()
-                ratio = td.get_text(" ", strip=True).replace("\xa0", "").strip()
-
-                # 빈 행 제외
-                if not name or not ratio or name == "&nbsp;" or ratio == "&nbsp;":
-                    continue
-
-                products.append(f"{name} ({ratio}%)")
+        return _parse_business_description(res.text)
 
-            if products:
-                main_products = ", ".join(products)
+    except Exception:
+        return {"business": "", "main_products": ""}
 
-        return {"business": business_summary, "main_products": main_products}
+async def get_business_description_async(company_code: str) -> dict:
+    """get_business_description의 asyncio 버전"""
+    import gemini_async
+    await asyncio.sleep(random.uniform(0.4, 0.9))
 
+    url, headers = _business_description_request(company_code)
+    status, html = await gemini_async.fetch_text_async(url, headers=headers, timeout=10, fallback_encoding="utf-8")
+    if status != 200:
+        return {"business": "", "main_products": ""}
+    try:
+        return await asyncio.to_thread(_parse_business_description, html)
     except Exception:
         return {"business": "", "main_products": ""}
 
-def check_business_similarity(target_business: str, peer_info: dict, threshold: float = 0.3) -> tuple:
-    """
-    Gemini를 사용하여 타겟 기업과 Peer의 사업 유사도 판정
-    
-    Args:
-        target_business: 타겟 기업의 사업 설명 (PDF에서 추출)
-        peer_info: {"name": str, "code": str, "business": str, "main_products": str}
-        threshold: 유사도 임계치 (0.3 = 30% 이상 유사)
-    
-    Returns:
-        (company_name, passed: bool, similarity_score: float, reason: str)
-    """
-    from utils import call_gemini, safe_json_loads
-    
-    name = peer_info['name']
+def _peer_description(peer_info: dict) -> str:
     peer_business = peer_info.get('business', '')
     peer_products = peer_info.get('main_products', '')
     
     # 주요제품 정보를 우선적으로 사용
-    peer_description = f"{peer_business}\n주요제품 구성: {peer_products}" if peer_products else peer_business
-    
-    if not peer_description.strip():
-        return (name, False, 0.0, "사업 정보 없음 (네이버 증권 크롤링 실패)")
-    
-    prompt = f"""
+    return f"{peer_business}\n주요제품 구성: {peer_products}" if peer_products else peer_business
+
+def _similarity_prompt(target_business: str, name: str, peer_description: str) -> str:
+    return f"""
 당신은 사업 유사성 분석 전문가입니다.
 
 [타겟 기업 사업 내용]
@@ -206,8 +206,9 @@ def check_business_similarity(target_business: str, peer_info: dict, threshold:
   "reason": "유사성 판단 근거 (1~2문장, 주요제품 언급)"
 }}
 """
-    
-    res = call_gemini(prompt, max_tokens=500)
+
+def _similarity_result(name: str, res: dict, threshold: float) -> tuple:
+    from utils import safe_json_loads
     if not res.get("ok"):
         return (name, False, 0.0, "AI 분석 실패")
     
@@ -219,6 +220,100 @@ def check_business_similarity(target_business: str, peer_info: dict, threshold:
     
     return (name, passed, score, reason)
 
+def check_business_similarity(target_business: str, peer_info: dict, threshold: float = 0.3) -> tuple:
+    """
+    Gemini를 사용하여 타겟 기업과 Peer의 사업 유사도 판정
+    
+    Args:
+        target_business: 타겟 기업의 사업 설명 (PDF에서 추출)
+        peer_info: {"name": str, "code": str, "business": str, "main_products": str}
+        threshold: 유사도 임계치 (0.3 = 30% 이상 유사)
+    
+    Returns:
+        (company_name, passed: bool, similarity_score: float, reason: str)
+    """
+    from utils import call_gemini
+    
+    name = peer_info['name']
+    peer_description = _peer_description(peer_info)
+    
+    if not peer_description.strip():
+        return (name, False, 0.0, "사업 정보 없음 (네이버 증권 크롤링 실패)")
+    
+    res = call_gemini(_similarity_prompt(target_business, name, peer_description), max_tokens=500)
+    return _similarity_result(name, res, threshold)
+
+async def check_business_similarity_async(target_business: str, peer_info: dict, threshold: float = 0.3) -> tuple:
+    """check_business_similarity의 asyncio 버전"""
+    from utils import call_gemini_async
+    
+    name = peer_info['name']
+    peer_description = _peer_description(peer_info)
+    
+    if not peer_description.strip():
+        return (name, False, 0.0, "사업 정보 없음 (네이버 증권 크롤링 실패)")
+    
+    res = await call_gemini_async(_similarity_prompt(target_business, name, peer_description), max_tokens=500)
+    return _similarity_result(name, res, threshold)
+
+def _target_business_prompt(company_name: str) -> str:
+    return f"""
+당신은 사업 분석 전문가입니다.
+제공된 IR 자료에서 '{company_name}'의 핵심 사업 내용을 200자 이내로 요약하십시오.
+- 주요 제품/서비스
+- 타겟 고객
+- 핵심 기술/사업 모델
+
+[Output JSON]
+{{ "business_summary": "사업 요약" }}
+"""
+
+def _summarize_stage3(peer_business_info: list, results: list) -> dict:
+    # 4) 통과 기업 필터링
+    business_passed = []
+    similarity_details = []
+    
+    # peer_business_info와 results를 매칭하여 주요제품 정보 포함
+    peer_info_map = {p['name']: p for p in peer_business_info}
+    
+    for name, passed, score, reason in results:
+        peer_info = peer_info_map.get(name, {})
+        main_products = peer_info.get('main_products', '정보 없음')
+        
+        similarity_details.append({
+            "company": name,
+            "score": score,
+            "reason": reason,
+            "main_products": main_products
+        })
+        
+        if passed:
+            business_passed.append(name)
+    
+    # 정렬 (유사도 높은 순)
+    similarity_details.sort(key=lambda x: x['score'], reverse=True)
+    
+    print(f"      👉 사업 유사성 통과: {len(business_passed)}개 사")
+    
+    # 모든 기업 상세 정보 출력 (통과/미통과 구분)
+    print(f"\n      📊 사업 유사도 분석 결과 (주요제품 구성 포함):")
+    print(f"      " + "="*70)
+    
+    for item in similarity_details[:15]:  # 콘솔 출력만 상위 15개
+        name = item['company']
+        score = item['score']
+        reason = item['reason']
+        main_products = item['main_products']
+        
+        status = "✅ 통과" if name in business_passed else "❌ 미통과"
+        print(f"\n      {status} [{name}] 유사도 {score:.2f}")
+        print(f"         주요제품: {main_products}")
+        print(f"         판단근거: {reason[:80]}...")
+    
+    return {
+        "business_passed": business_passed,
+        "similarity_details": similarity_details
+    }
 
 def filter_peers_stage3(
     target_pdf_path: str,
@@ -233,18 +328,7 @@ def filter_peers_stage3(
     print(f"   📋 [Step 3] 사업 유사성 필터링 시작 (Input: {len(peer_companies)}개 사)")
     
     # 1) 타겟 기업의 사업 설명 추출
-    prompt_target = f"""
-당신은 사업 분석 전문가입니다.
-제공된 IR 자료에서 '{company_name}'의 핵심 사업 내용을 200자 이내로 요약하십시오.
-- 주요 제품/서비스
-- 타겟 고객
-- 핵심 기술/사업 모델
-
-[Output JSON]
-{{ "business_summary": "사업 요약" }}
-"""
-    
-    res = call_gemini(prompt_target, pdf_path=target_pdf_path, max_tokens=1000)
+    res = call_gemini(_target_business_prompt(company_name), pdf_path=target_pdf_path, max_tokens=1000)
     if not res.get("ok"):
         print("      ⚠️ 타겟 기업 사업 추출 실패 - 필터링 스킵")
         return {"business_passed": [p['name'] for p in peer_companies], "similarity_details": []}
@@ -275,61 +359,257 @@ def filter_peers_stage3(
     results = []
     with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
         futures = [
-            executor.submit(check_business_similarity, target_business, peer_info, threshold)
+            executor.submit(metrics.bind(check_business_similarity), target_business, peer_info, threshold)
             for peer_info in peer_business_info
         ]
         for future in concurrent.futures.as_completed(futures):
             results.append(future.result())
     
-    # 4) 통과 기업 필터링
-    business_passed = []
-    similarity_details = []
+    return _summarize_stage3(peer_business_info, results)
+
+async def filter_peers_stage3_async(
+    target_pdf_path: str,
+    peer_companies: list,
+    company_name: str,
+    threshold: float = 0.3
+) -> dict:
+    """
+    filter_peers_stage3의 asyncio 버전
+    - 크롤링과 유사도 판정을 스레드 풀 없이 한 이벤트 루프에서 동시에 진행 (동시성 상한은 gemini_async 세마포어)
+    """
+    from utils import call_gemini_async, safe_json_loads
     
-    # peer_business_info와 results를 매칭하여 주요제품 정보 포함
-    peer_info_map = {p['name']: p for p in peer_business_info}
+    print(f"   📋 [Step 3] 사업 유사성 필터링 시작 (Input: {len(peer_companies)}개 사)")
     
-    for name, passed, score, reason in results:
-        peer_info = peer_info_map.get(name, {})
-        main_products = peer_info.get('main_products', '정보 없음')
-        
-        similarity_details.append({
-            "company": name,
-            "score": score,
-            "reason": reason,
-            "main_products": main_products
-        })
-        
-        if passed:
-            business_passed.append(name)
+    # 1) 타겟 기업 사업 설명 추출과 Peer 크롤링은 서로 독립적이므로 동시에 시작
+    target_task = asyncio.ensure_future(
+        call_gemini_async(_target_business_prompt(company_name), pdf_path=target_pdf_path, max_tokens=1000)
+    )
+    biz_infos = await asyncio.gather(*(get_business_description_async(peer['code']) for peer in peer_companies))
+    res = await target_task
     
-    # 정렬 (유사도 높은 순)
-    similarity_details.sort(key=lambda x: x['score'], reverse=True)
+    if not res.get("ok"):
+        print("      ⚠️ 타겟 기업 사업 추출 실패 - 필터링 스킵")
+        return {"business_passed": [p['name'] for p in peer_companies], "similarity_details": []}
     
-    print(f"      👉 사업 유사성 통과: {len(business_passed)}개 사")
+    target_business = safe_json_loads(res.get("text", "")).get("business_summary", "")
+    if not target_business:
+        print("      ⚠️ 타겟 사업 정보 없음 - 필터링 스킵")
+        return {"business_passed": [p['name'] for p in peer_companies], "similarity_details": []}
     
-    # 모든 기업 상세 정보 출력 (통과/미통과 구분)
-    print(f"\n      📊 사업 유사도 분석 결과 (주요제품 구성 포함):")
-    print(f"      " + "="*70)
+    print(f"      👉 타겟 사업: {target_business[:100]}...")
     
-    for item in similarity_details[:15]:  # 콘솔 출력만 상위 15개
-        name = item['company']
-        score = item['score']
-        reason = item['reason']
-        main_products = item['main_products']
-        
-        status = "✅ 통과" if name in business_passed else "❌ 미통과"
-        print(f"\n      {status} [{name}] 유사도 {score:.2f}")
-        print(f"         주요제품: {main_products}")
-        print(f"         판단근거: {reason[:80]}...")
+    peer_business_info = [
+        {"name": peer['name'], "code": peer['code'], "business": biz['business'], "main_products": biz['main_products']}
+        for peer, biz in zip(peer_companies, biz_infos)
+    ]
+    
+    # 2) 사업 유사도 판정 (전체 기업 동시 분석)
+    print(f"      👉 사업 유사도 분석 중...")
+    results = await asyncio.gather(*(
+        check_business_similarity_async(target_business, peer_info, threshold)
+        for peer_info in peer_business_info
+    ))
+    
+    return _summarize_stage3(peer_business_info, list(results))
+
+# =========================================================
+# 4단계: 일반 요건 유사성 필터링
+# =========================================================
+
+def _clean_text(s: str) -> str:
+    if not s:
+        return ""
+    return re.sub(r"\s+", " ", s).replace("\xa0", " ").strip()
+
+def _parse_market_cap_eok(text: str) -> float:
+    """
+    예: '40조1,935' / '1조6,222' / '6,222' 등을 '억원' 단위 숫자로 변환
+    - 조(兆) = 10,000억원
+    """
+    if not text:
+        return 0.0
+    s = re.sub(r"\s+", "", text)
+    s = s.replace("억원", "")
+
+    m = re.search(r"(?:(\d+(?:,\d+)*)조)?(?:(\d+(?:,\d+)*))?$", s)
+    if not m:
+        m2 = re.search(r"([\d,]+)", s)
+        return float(m2.group(1).replace(",", "")) if m2 else 0.0
+
+    jo_part = m.group(1)
+    eok_part = m.group(2)
+
+    jo = float(jo_part.replace(",", "")) if jo_part else 0.0
+    eok = float(eok_part.replace(",", "")) if eok_part else 0.0
+    return jo * 10000.0 + eok
+
+def _parse_float_first(text: str):
+    """문자열에서 첫 번째 숫자(float)만 뽑아 반환. 없으면 None."""
+    if not text:
+        return None
+    t = text.replace(",", "")
+    m = re.search(r"([-+]?\d+(?:\.\d+)?)", t)
+    if not m:
+        return None
+    try:
+        return float(m.group(1))
+    except:
+        return None
+
+def _listing_requests(company_code: str) -> tuple:
+    """(네이버 메인 url, headers, WiseReport url, headers)"""
+    url = f"https://finance.naver.com/item/main.naver?code={company_code}"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Referer": "https://finance.naver.com/",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+        "Connection": "keep-alive",
+    }
+    # 1. 공유해주신 정확한 wisereport 원본 URL 사용
+    fnguide_url = f"https://navercomp.wisereport.co.kr/v2/company/c1010001.aspx?cmp_cd={company_code}"
+    # 2. 크롤링 차단(403 Forbidden 등)을 막기 위한 전용 헤더
+    fn_headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Referer": f"https://finance.naver.com/item/main.naver?code={company_code}",
+        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"
+    }
+    return url, headers, fnguide_url, fn_headers
+
+def _empty_listing_result() -> dict:
+    from datetime import datetime
+    return {
+        "listing_date": None,
+        "is_warning": False,
+        "market_cap": 0.0,
+        "per": None,
+        "pbr": None,
+        "ev_ebitda": None, # 🚨 [추가] EV/EBITDA 키 추가
+        "fetch_date": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+def _parse_listing_main(html: str, result: dict) -> dict:
+    """네이버 증권 메인 HTML → result(관리종목/시총/PER/PBR) 채우기. 디버그용 raw 문자열을 반환합니다."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    # =========================================================
+    # 1) 관리종목/투자위험 여부
+    # =========================================================
+    wrap = soup.select_one("div.wrap_company")
+    if wrap:
+        wrap_text = _clean_text(wrap.get_text(" ", strip=True))
+        if any(k in wrap_text for k in ["관리종목", "투자위험", "투자주의", "투자경고", "거래정지"]):
+            result["is_warning"] = True
+
+    # =========================================================
+    # 2) 시가총액: '시가총액 정보' 테이블(별도 블록)에서만 추출
+    # =========================================================
+    market_sum = None
+
+    # 1) 가장 확실한 id
+    market_node = soup.select_one("div.first em#_market_sum") or soup.select_one("em#_market_sum")
+    if market_node:
+        market_sum = _clean_text(market_node.get_text(strip=True))
+
+    # 2) fallback: caption 기반으로 테이블 찾아 row 파싱
+    if not market_sum:
+        cap_table = None
+        for t in soup.select("div.first table"):
+            cap = t.select_one("caption")
+            if cap and "시가총액" in _clean_text(cap.get_text()):
+                cap_table = t
+                break
+        if cap_table:
+            for tr in cap_table.select("tbody tr"):
+                th = tr.select_one("th")
+                td = tr.select_one("td")
+                if not th or not td:
+                    continue
+                if "시가총액" in _clean_text(th.get_text(" ", strip=True)):
+                    em = td.select_one("em")
+                    market_sum = _clean_text(em.get_text(strip=True)) if em else _clean_text(td.get_text(" ", strip=True))
+                    break
+
+    if market_sum and market_sum not in ("N/A", "-", "NA"):
+        result["market_cap"] = _parse_market_cap_eok(market_sum)
+
+    # =========================================================
+    # 3) PER / 4) PBR: per_table에서만 추출
+    # =========================================================
+    per_table = soup.select_one("table.per_table")
+
+    per_raw = None
+    pbr_raw = None
+
+    per_node = (per_table.select_one("em#_per") if per_table else None) or soup.select_one("em#_per")
+    if per_node:
+        per_raw = _clean_text(per_node.get_text(strip=True))
+
+    pbr_node = (per_table.select_one("em#_pbr") if per_table else None) or soup.select_one("em#_pbr")
+    if pbr_node:
+        pbr_raw = _clean_text(pbr_node.get_text(strip=True))
+
+    if per_table and (not per_raw or per_raw in ("N/A", "-", "NA")):
+        for tr in per_table.select("tr"):
+            th = tr.select_one("th")
+            td = tr.select_one("td")
+            if not th or not td:
+                continue
+            if "PER" in _clean_text(th.get_text(" ", strip=True)):
+                per_raw = _clean_text(td.get_text(" ", strip=True))
+                break
+
+    if per_table and (not pbr_raw or pbr_raw in ("N/A", "-", "NA")):
+        for tr in per_table.select("tr"):
+            th = tr.select_one("th")
+            td = tr.select_one("td")
+            if not th or not td:
+                continue
+            if "PBR" in _clean_text(th.get_text(" ", strip=True)):
+                pbr_raw = _clean_text(td.get_text(" ", strip=True))
+                break
+
+    if per_raw and "N/A" not in per_raw and per_raw not in ("-", "NA"):
+        result["per"] = _parse_float_first(per_raw)
+
+    if pbr_raw and "N/A" not in pbr_raw and pbr_raw not in ("-", "NA"):
+        result["pbr"] = _parse_float_first(pbr_raw)
+
+    return {"market_sum": market_sum, "per_raw": per_raw, "pbr_raw": pbr_raw}
+
+def _parse_ev_ebitda(html: str):
+    """WiseReport 기업현황 HTML에서 EV/EBITDA raw 문자열 추출 (fnGuide 펀더멘털 실적 테이블)"""
+    ev_raw = None
+    soup_fn = BeautifulSoup(html, "html.parser")
     
-    return {
-        "business_passed": business_passed,
-        "similarity_details": similarity_details
-    }
+    # 3. 제공해주신 HTML 구조 타겟팅 (div.fund.fl_le 안의 table.gHead03)
+    fund_table = soup_fn.select_one("div.fund.fl_le table.gHead03")
+    
+    if fund_table:
+        # 4. table 안의 모든 행(tr)을 순회하며 가장 확실하게 찾기
+        for tr in fund_table.select("tbody tr"):
+            th = tr.select_one("th")
+            if th and "EV/EBITDA" in th.get_text(strip=True).upper():
+                # 해당 행의 td들을 가져옴
+                tds = tr.select("td")
+                if len(tds) > 0:
+                    # 첫 번째 td 값이 2024/12(A) 실적값 (예: "5.67")
+                    ev_raw = _clean_text(tds[0].get_text(strip=True))
+                    break
+    return ev_raw
 
-# =========================================================
-# 4단계: 일반 요건 유사성 필터링
-# =========================================================
+def _apply_ev_ebitda(result: dict, ev_raw):
+    # 5. 숫자(Float) 변환 및 저장
+    if ev_raw and ev_raw not in ("N/A", "-", "NA", ""):
+        result["ev_ebitda"] = _parse_float_first(ev_raw)
+
+def _print_listing_debug(company_code: str, result: dict, raw: dict, ev_raw):
+    print(
+        f"      [DEBUG] {company_code}: 시가총액={result['market_cap']}억, "
+        f"PER={result['per']}, PBR={result['pbr']}, EV/EBITDA={result['ev_ebitda']}, warning={result['is_warning']}"
+    )
+    print(f"      [DEBUG] raw: market_sum='{raw['market_sum']}', per_raw='{raw['per_raw']}', pbr_raw='{raw['pbr_raw']}', ev_raw='{ev_raw}'")
 
 def get_listing_info(company_code: str, debug: bool = False) -> dict:
     """
@@ -338,74 +618,12 @@ def get_listing_info(company_code: str, debug: bool = False) -> dict:
     - PER/PBR: table.per_table / em#_per, em#_pbr
     - EV/EBITDA: '투자정보' 테이블 (table.gHead03) 내부 th 파싱
     """
-    from datetime import datetime
-    import time, random, re
-    import requests
-    from bs4 import BeautifulSoup
-
-    def clean_text(s: str) -> str:
-        if not s:
-            return ""
-        return re.sub(r"\s+", " ", s).replace("\xa0", " ").strip()
-
-    def parse_market_cap_eok(text: str) -> float:
-        """
-        예: '40조1,935' / '1조6,222' / '6,222' 등을 '억원' 단위 숫자로 변환
-        - 조(兆) = 10,000억원
-        """
-        if not text:
-            return 0.0
-        s = re.sub(r"\s+", "", text)
-        s = s.replace("억원", "")
-
-        m = re.search(r"(?:(\d+(?:,\d+)*)조)?(?:(\d+(?:,\d+)*))?$", s)
-        if not m:
-            m2 = re.search(r"([\d,]+)", s)
-            return float(m2.group(1).replace(",", "")) if m2 else 0.0
-
-        jo_part = m.group(1)
-        eok_part = m.group(2)
-
-        jo = float(jo_part.replace(",", "")) if jo_part else 0.0
-        eok = float(eok_part.replace(",", "")) if eok_part else 0.0
-        return jo * 10000.0 + eok
-
-    def parse_float_first(text: str):
-        """문자열에서 첫 번째 숫자(float)만 뽑아 반환. 없으면 None."""
-        if not text:
-            return None
-        t = text.replace(",", "")
-        m = re.search(r"([-+]?\d+(?:\.\d+)?)", t)
-        if not m:
-            return None
-        try:
-            return float(m.group(1))
-        except:
-            return None
-
     time.sleep(random.uniform(0.3, 0.8))
-    url = f"https://finance.naver.com/item/main.naver?code={company_code}"
-
-    result = {
-        "listing_date": None,
-        "is_warning": False,
-        "market_cap": 0.0,
-        "per": None,
-        "pbr": None,
-        "ev_ebitda": None, # 🚨 [추가] EV/EBITDA 키 추가
-        "fetch_date": datetime.now().strftime("%Y-%m-%d"),
-    }
+    url, headers, fnguide_url, fn_headers = _listing_requests(company_code)
+    result = _empty_listing_result()
 
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Referer": "https://finance.naver.com/",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-            "Connection": "keep-alive",
-        }
-
-        res = requests.get(url, headers=headers, timeout=15)
+        res = metrics.timed_get(url, headers=headers, timeout=15)
         if res.status_code != 200:
             if debug:
                 print(f"      [DEBUG] HTTP {res.status_code} - {company_code}")
@@ -421,143 +639,23 @@ def get_listing_info(company_code: str, debug: bool = False) -> dict:
                 print(f"      [DEBUG] HTML too short ({len(html)} bytes) - {company_code}")
             return result
 
-        soup = BeautifulSoup(html, "html.parser")
-
-        # =========================================================
-        # 1) 관리종목/투자위험 여부
-        # =========================================================
-        wrap = soup.select_one("div.wrap_company")
-        if wrap:
-            wrap_text = clean_text(wrap.get_text(" ", strip=True))
-            if any(k in wrap_text for k in ["관리종목", "투자위험", "투자주의", "투자경고", "거래정지"]):
-                result["is_warning"] = True
-
-        # =========================================================
-        # 2) 시가총액: '시가총액 정보' 테이블(별도 블록)에서만 추출
-        # =========================================================
-        market_sum = None
-
-        # 1) 가장 확실한 id
-        market_node = soup.select_one("div.first em#_market_sum") or soup.select_one("em#_market_sum")
-        if market_node:
-            market_sum = clean_text(market_node.get_text(strip=True))
-
-        # 2) fallback: caption 기반으로 테이블 찾아 row 파싱
-        if not market_sum:
-            cap_table = None
-            for t in soup.select("div.first table"):
-                cap = t.select_one("caption")
-                if cap and "시가총액" in clean_text(cap.get_text()):
-                    cap_table = t
-                    break
-            if cap_table:
-                for tr in cap_table.select("tbody tr"):
-                    th = tr.select_one("th")
-                    td = tr.select_one("td")
-                    if not th or not td:
-                        continue
-                    if "시가총액" in clean_text(th.get_text(" ", strip=True)):
-                        em = td.select_one("em")
-                        market_sum = clean_text(em.get_text(strip=True)) if em else clean_text(td.get_text(" ", strip=True))
-                        break
-
-        if market_sum and market_sum not in ("N/A", "-", "NA"):
-            result["market_cap"] = parse_market_cap_eok(market_sum)
-
-        # =========================================================
-        # 3) PER / 4) PBR: per_table에서만 추출
-        # =========================================================
-        per_table = soup.select_one("table.per_table")
-
-        per_raw = None
-        pbr_raw = None
-
-        per_node = (per_table.select_one("em#_per") if per_table else None) or soup.select_one("em#_per")
-        if per_node:
-            per_raw = clean_text(per_node.get_text(strip=True))
-
-        pbr_node = (per_table.select_one("em#_pbr") if per_table else None) or soup.select_one("em#_pbr")
-        if pbr_node:
-            pbr_raw = clean_text(pbr_node.get_text(strip=True))
-
-        if per_table and (not per_raw or per_raw in ("N/A", "-", "NA")):
-            for tr in per_table.select("tr"):
-                th = tr.select_one("th")
-                td = tr.select_one("td")
-                if not th or not td:
-                    continue
-                if "PER" in clean_text(th.get_text(" ", strip=True)):
-                    per_raw = clean_text(td.get_text(" ", strip=True))
-                    break
-
-        if per_table and (not pbr_raw or pbr_raw in ("N/A", "-", "NA")):
-            for tr in per_table.select("tr"):
-                th = tr.select_one("th")
-                td = tr.select_one("td")
-                if not th or not td:
-                    continue
-                if "PBR" in clean_text(th.get_text(" ", strip=True)):
-                    pbr_raw = clean_text(td.get_text(" ", strip=True))
-                    break
-
-        if per_raw and "N/A" not in per_raw and per_raw not in ("-", "NA"):
-            result["per"] = parse_float_first(per_raw)
-
-        if pbr_raw and "N/A" not in pbr_raw and pbr_raw not in ("-", "NA"):
-            result["pbr"] = parse_float_first(pbr_raw)
+        raw = _parse_listing_main(html, result)
 
         # =========================================================
         # 🚨 [추가] 5) EV/EBITDA 추출 로직 (fnGuide 펀더멘털 실적 테이블)
         # =========================================================
         ev_raw = None
         try:
-            # 1. 공유해주신 정확한 wisereport 원본 URL 사용
-            fnguide_url = f"https://navercomp.wisereport.co.kr/v2/company/c1010001.aspx?cmp_cd={company_code}"
-            
-            # 2. 크롤링 차단(403 Forbidden 등)을 막기 위한 전용 헤더
-            fn_headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Referer": f"https://finance.naver.com/item/main.naver?code={company_code}",
-                "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"
-            }
-            
-            res_fn = requests.get(fnguide_url, headers=fn_headers, timeout=10)
-            
+            res_fn = metrics.timed_get(fnguide_url, headers=fn_headers, timeout=10)
             if res_fn.status_code == 200:
-                soup_fn = BeautifulSoup(res_fn.text, "html.parser")
-                
-                # 3. 제공해주신 HTML 구조 타겟팅 (div.fund.fl_le 안의 table.gHead03)
-                fund_table = soup_fn.select_one("div.fund.fl_le table.gHead03")
-                
-                if fund_table:
-                    # 4. table 안의 모든 행(tr)을 순회하며 가장 확실하게 찾기
-                    for tr in fund_table.select("tbody tr"):
-                        th = tr.select_one("th")
-                        if th and "EV/EBITDA" in th.get_text(strip=True).upper():
-                            # 해당 행의 td들을 가져옴
-                            tds = tr.select("td")
-                            if len(tds) > 0:
-                                # 첫 번째 td 값이 2024/12(A) 실적값 (예: "5.67")
-                                ev_raw = clean_text(tds[0].get_text(strip=True))
-                                break
-                
-                # 5. 숫자(Float) 변환 및 저장
-                if ev_raw and ev_raw not in ("N/A", "-", "NA", ""):
-                    result["ev_ebitda"] = parse_float_first(ev_raw)
-                    
+                ev_raw = _parse_ev_ebitda(res_fn.text)
+                _apply_ev_ebitda(result, ev_raw)
         except Exception as e:
             if debug:
                 print(f"      [DEBUG] EV/EBITDA 크롤링 실패: {e}")
 
-        # =========================================================
-        # DEBUG
-        # =========================================================
         if debug:
-            print(
-                f"      [DEBUG] {company_code}: 시가총액={result['market_cap']}억, "
-                f"PER={result['per']}, PBR={result['pbr']}, EV/EBITDA={result['ev_ebitda']}, warning={result['is_warning']}"
-            )
-            print(f"      [DEBUG] raw: market_sum='{market_sum}', per_raw='{per_raw}', pbr_raw='{pbr_raw}', ev_raw='{ev_raw}'")
+            _print_listing_debug(company_code, result, raw, ev_raw)
 
         return result
 
@@ -565,15 +663,42 @@ def get_listing_info(company_code: str, debug: bool = False) -> dict:
         if debug:
             print(f"      [DEBUG] 크롤링 실패: {str(e)[:120]} - {company_code}")
         return result
+
+async def get_listing_info_async(company_code: str, debug: bool = False) -> dict:
+    """get_listing_info의 asyncio 버전 (네이버 메인 / WiseReport 두 페이지를 동시에 요청)"""
+    import gemini_async
+    await asyncio.sleep(random.uniform(0.3, 0.8))
+    url, headers, fnguide_url, fn_headers = _listing_requests(company_code)
+    result = _empty_listing_result()
+
+    (status, html), (fn_status, fn_html) = await asyncio.gather(
+        gemini_async.fetch_text_async(url, headers=headers, timeout=15, fallback_encoding="euc-kr"),
+        gemini_async.fetch_text_async(fnguide_url, headers=fn_headers, timeout=10),
+    )
+    if status != 200:
+        if debug:
+            print(f"      [DEBUG] HTTP {status} - {company_code}")
+        return result
+    if len(html) < 1000:
+        if debug:
+            print(f"      [DEBUG] HTML too short ({len(html)} bytes) - {company_code}")
+        return result
+
+    try:
+        raw = await asyncio.to_thread(_parse_listing_main, html, result)
+        ev_raw = None
+        if fn_status == 200:
+            ev_raw = await asyncio.to_thread(_parse_ev_ebitda, fn_html)
+            _apply_ev_ebitda(result, ev_raw)
+        if debug:
+            _print_listing_debug(company_code, result, raw, ev_raw)
+    except Exception as e:
+        if debug:
+            print(f"      [DEBUG] 크롤링 실패: {str(e)[:120]} - {company_code}")
+    return result
     
-def check_general_requirements(company_info: dict, strict_per_bottom: bool = True, debug: bool = False) -> tuple:
-    """
-    일반 요건 체크 (Python 1차 필터링: 관리종목, PER 조건부 하한 10~100, 시총 1000억 이상)
-    """
-    code = company_info.get('code', '')
+def _evaluate_requirements(company_info: dict, info: dict, strict_per_bottom: bool = True) -> tuple:
     name = company_info.get('name', '')
-    info = get_listing_info(code, debug=False)  
-
     listing_date = info.get("listing_date")
     is_warning = bool(info.get("is_warning", False))
     market_cap = info.get("market_cap", 0) or 0
@@ -614,106 +739,93 @@ def check_general_requirements(company_info: dict, strict_per_bottom: bool = Tru
         "fetch_date": info.get("fetch_date"),
     }
 
-def filter_peers_stage4(
-    peer_companies: list,  
-    max_workers: int = 5,
-    debug: bool = False 
-) -> dict:
+def check_general_requirements(company_info: dict, strict_per_bottom: bool = True, debug: bool = False) -> tuple:
     """
-    [4단계] 일반 요건 필터링 및 🚨 아웃라이어(MAX/MIN) 제거 (조건부 하한선 완화 적용)
+    일반 요건 체크 (Python 1차 필터링: 관리종목, PER 조건부 하한 10~100, 시총 1000억 이상)
     """
-    import concurrent.futures
-    print(f"   🔍 [Step 4] 일반 요건 및 Outlier 필터링 시작 (Input: {len(peer_companies)}개 사)")
+    code = company_info.get('code', '')
+    info = get_listing_info(code, debug=False)  
+    return _evaluate_requirements(company_info, info, strict_per_bottom)
 
-    # 🚨 [핵심] 필터링과 아웃라이어 제거 로직을 하나의 내부 함수로 묶어 1차/2차 재실행을 쉽게 만듭니다.
-    def run_filtering(strict: bool):
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # strict 인자(True/False)를 check_general_requirements에 함께 전달합니다.
-            futures = [executor.submit(check_general_requirements, company, strict, debug) for company in peer_companies]
-            results = [f.result() for f in concurrent.futures.as_completed(futures)]
-        
-        general_passed_info = []
-        details = []
+async def check_general_requirements_async(company_info: dict, strict_per_bottom: bool = True, debug: bool = False) -> tuple:
+    """check_general_requirements의 asyncio 버전"""
+    code = company_info.get('code', '')
+    info = await get_listing_info_async(code, debug=False)
+    return _evaluate_requirements(company_info, info, strict_per_bottom)
+
+def _apply_outlier_filter(results: list) -> tuple:
+    """check_general_requirements 결과 → (최종 통과 기업명, details). 🚨 MAX/MIN 아웃라이어 제거 포함"""
+    general_passed_info = []
+    details = []
+    
+    # 1차 절대 기준(PER, 시총 등) 통과 기업 분류
+    for name, passed, reason, info in results:
+        if passed:
+            general_passed_info.append({"name": name, "info": info})
+        else:
+            details.append((name, False, reason, info))
+            
+    final_passed_names = []
+    
+    # -------------------------------------------------------------
+    # Python 2차 필터링: MAX/MIN 아웃라이어 제거 로직
+    # -------------------------------------------------------------
+    if len(general_passed_info) > 4:
+        metrics = ['per', 'pbr', 'market_cap', 'ev_ebitda']
+        companies_to_drop = set()
+        drop_reasons = {}
         
-        # 1차 절대 기준(PER, 시총 등) 통과 기업 분류
-        for name, passed, reason, info in results:
-            if passed:
-                general_passed_info.append({"name": name, "info": info})
-            else:
-                details.append((name, False, reason, info))
+        for metric in metrics:
+            valid_peers = [p for p in general_passed_info if p['info'].get(metric) is not None]
+            if len(valid_peers) > 2:
+                max_val = max(p['info'][metric] for p in valid_peers)
+                min_val = min(p['info'][metric] for p in valid_peers)
                 
-        final_passed_names = []
+                for p in valid_peers:
+                    if p['info'][metric] == max_val:
+                        companies_to_drop.add(p['name'])
+                        drop_reasons[p['name']] = f"MAX {metric.upper()} ({max_val})"
+                    elif p['info'][metric] == min_val:
+                        companies_to_drop.add(p['name'])
+                        drop_reasons[p['name']] = f"MIN {metric.upper()} ({min_val})"
         
-        # -------------------------------------------------------------
-        # Python 2차 필터링: MAX/MIN 아웃라이어 제거 로직
-        # -------------------------------------------------------------
-        if len(general_passed_info) > 4:
-            metrics = ['per', 'pbr', 'market_cap', 'ev_ebitda']
+        # [방어로직] 제외 기업이 너무 많아 최종 피어그룹이 3개 미만이 되는 경우
+        if len(general_passed_info) - len(companies_to_drop) < 3:
+            # 경고 문구는 1차 시도에서만 출력되도록 처리하거나 생략할 수 있습니다.
             companies_to_drop = set()
             drop_reasons = {}
-            
-            for metric in metrics:
-                valid_peers = [p for p in general_passed_info if p['info'].get(metric) is not None]
-                if len(valid_peers) > 2:
-                    max_val = max(p['info'][metric] for p in valid_peers)
-                    min_val = min(p['info'][metric] for p in valid_peers)
-                    
-                    for p in valid_peers:
-                        if p['info'][metric] == max_val:
-                            companies_to_drop.add(p['name'])
-                            drop_reasons[p['name']] = f"MAX {metric.upper()} ({max_val})"
-                        elif p['info'][metric] == min_val:
-                            companies_to_drop.add(p['name'])
-                            drop_reasons[p['name']] = f"MIN {metric.upper()} ({min_val})"
-            
-            # [방어로직] 제외 기업이 너무 많아 최종 피어그룹이 3개 미만이 되는 경우
+            per_valid = [p for p in general_passed_info if p['info'].get('per') is not None]
+            if len(per_valid) > 2:
+                max_per = max(p['info']['per'] for p in per_valid)
+                min_per = min(p['info']['per'] for p in per_valid)
+                for p in per_valid:
+                    if p['info']['per'] in (max_per, min_per):
+                        companies_to_drop.add(p['name'])
+                        drop_reasons[p['name']] = f"MAX/MIN PER ({p['info']['per']})"
+                        
+            # 그래도 3개 미만이면 아예 아웃라이어 제거 취소
             if len(general_passed_info) - len(companies_to_drop) < 3:
-                # 경고 문구는 1차 시도에서만 출력되도록 처리하거나 생략할 수 있습니다.
                 companies_to_drop = set()
-                drop_reasons = {}
-                per_valid = [p for p in general_passed_info if p['info'].get('per') is not None]
-                if len(per_valid) > 2:
-                    max_per = max(p['info']['per'] for p in per_valid)
-                    min_per = min(p['info']['per'] for p in per_valid)
-                    for p in per_valid:
-                        if p['info']['per'] in (max_per, min_per):
-                            companies_to_drop.add(p['name'])
-                            drop_reasons[p['name']] = f"MAX/MIN PER ({p['info']['per']})"
-                            
-                # 그래도 3개 미만이면 아예 아웃라이어 제거 취소
-                if len(general_passed_info) - len(companies_to_drop) < 3:
-                    companies_to_drop = set()
-
-            # 최종 탈락/합격 분류 적용
-            for p in general_passed_info:
-                name = p['name']
-                info = p['info']
-                if name in companies_to_drop:
-                    reason = drop_reasons[name]
-                    details.append((name, False, reason, info)) # Outlier로 탈락
-                else:
-                    details.append((name, True, "OK", info))
-                    final_passed_names.append(name)
-        else:
-            # 기업이 4개 이하면 모두 합격 처리
-            for p in general_passed_info:
-                details.append((p['name'], True, "OK", p['info']))
-                final_passed_names.append(p['name'])
-                
-        return final_passed_names, details
 
-    # =========================================================
-    # 🚨 1차 시도: 엄격한 필터링 (PER 10 미만 차단)
-    # =========================================================
-    final_passed_names, details = run_filtering(strict=True)
+        # 최종 탈락/합격 분류 적용
+        for p in general_passed_info:
+            name = p['name']
+            info = p['info']
+            if name in companies_to_drop:
+                reason = drop_reasons[name]
+                details.append((name, False, reason, info)) # Outlier로 탈락
+            else:
+                details.append((name, True, "OK", info))
+                final_passed_names.append(name)
+    else:
+        # 기업이 4개 이하면 모두 합격 처리
+        for p in general_passed_info:
+            details.append((p['name'], True, "OK", p['info']))
+            final_passed_names.append(p['name'])
 
-    # =========================================================
-    # 🚨 2차 시도 (Fallback): 전멸 시 저평가(PER 10 미만) 허용
-    # =========================================================
-    if len(final_passed_names) == 0 and len(peer_companies) > 0:
-        print("      ⚠️ [Fallback] 1차 필터링 통과 기업이 0개입니다. PER 하한선(10 미만) 조건을 해제하고 재검색합니다.")
-        final_passed_names, details = run_filtering(strict=False)
+    return final_passed_names, details
 
+def _report_stage4(final_passed_names: list, details: list) -> dict:
     print(f"      👉 일반 요건 및 Outlier 필터링 최종 통과: {len(final_passed_names)}개 사")
     
     # 탈락 사유(아웃라이어 포함) 출력
@@ -734,10 +846,102 @@ def filter_peers_stage4(
         "details": details
     }
 
+def filter_peers_stage4(
+    peer_companies: list,  
+    max_workers: int = 5,
+    debug: bool = False 
+) -> dict:
+    """
+    [4단계] 일반 요건 필터링 및 🚨 아웃라이어(MAX/MIN) 제거 (조건부 하한선 완화 적용)
+    """
+    import concurrent.futures
+    print(f"   🔍 [Step 4] 일반 요건 및 Outlier 필터링 시작 (Input: {len(peer_companies)}개 사)")
+
+    # 🚨 [핵심] 필터링과 아웃라이어 제거 로직을 하나의 내부 함수로 묶어 1차/2차 재실행을 쉽게 만듭니다.
+    def run_filtering(strict: bool):
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # strict 인자(True/False)를 check_general_requirements에 함께 전달합니다.
+            futures = [executor.submit(metrics.bind(check_general_requirements), company, strict, debug) for company in peer_companies]
+            results = [f.result() for f in concurrent.futures.as_completed(futures)]
+        return _apply_outlier_filter(results)
+
+    # =========================================================
+    # 🚨 1차 시도: 엄격한 필터링 (PER 10 미만 차단)
+    # =========================================================
+    final_passed_names, details = run_filtering(strict=True)
+
+    # =========================================================
+    # 🚨 2차 시도 (Fallback): 전멸 시 저평가(PER 10 미만) 허용
+    # =========================================================
+    if len(final_passed_names) == 0 and len(peer_companies) > 0:
+        print("      ⚠️ [Fallback] 1차 필터링 통과 기업이 0개입니다. PER 하한선(10 미만) 조건을 해제하고 재검색합니다.")
+        final_passed_names, details = run_filtering(strict=False)
+
+    return _report_stage4(final_passed_names, details)
+
+async def filter_peers_stage4_async(peer_companies: list, debug: bool = False) -> dict:
+    """
+    filter_peers_stage4의 asyncio 버전
+    - 시세 정보는 한 번만 크롤링하고, Fallback(PER 하한 해제) 재판정은 같은 데이터로 다시 계산합니다.
+    """
+    print(f"   🔍 [Step 4] 일반 요건 및 Outlier 필터링 시작 (Input: {len(peer_companies)}개 사)")
+
+    infos = await asyncio.gather(*(get_listing_info_async(c.get('code', ''), debug=False) for c in peer_companies))
+
+    def run_filtering(strict: bool):
+        results = [_evaluate_requirements(c, info, strict) for c, info in zip(peer_companies, infos)]
+        return _apply_outlier_filter(results)
+
+    final_passed_names, details = run_filtering(strict=True)
+    if len(final_passed_names) == 0 and len(peer_companies) > 0:
+        print("      ⚠️ [Fallback] 1차 필터링 통과 기업이 0개입니다. PER 하한선(10 미만) 조건을 해제하고 재검색합니다.")
+        final_passed_names, details = run_filtering(strict=False)
+
+    return _report_stage4(final_passed_names, details)
+
 # =========================================================
 # 통합 필터링 파이프라인
 # =========================================================
 
+def _stage2_peer_objs(stage2_profit: list, company_csv_path: str) -> list:
+    # Stage 2 결과를 {"name": str, "code": str} 형태로 변환
+    peer_objs = []
+    failed_companies = []
+    
+    for peer_name in stage2_profit:
+        code = get_stock_code_from_csv(peer_name, company_csv_path)
+        if code:
+            peer_objs.append({"name": peer_name, "code": code})
+        else:
+            failed_companies.append(peer_name)
+    
+    if failed_companies:
+        print(f"      ⚠️ 종목코드 찾기 실패: {len(failed_companies)}개사")
+        for name in failed_companies[:3]:
+            print(f"         - {name}")
+    return peer_objs
+
+def _pipeline_result(stage1_raw, stage2_result, stage2_profit, stage3_result, stage3_business, stage4_result, stage4_final) -> dict:
+    print(f"\n{'='*60}")
+    print(f"  ✅ 필터링 완료")
+    print(f"     - Stage 1 (산업): {len(stage1_raw)}개")
+    print(f"     - Stage 2 (재무): {len(stage2_profit)}개")
+    print(f"     - Stage 3 (사업): {len(stage3_business)}개")
+    print(f"     - Stage 4 (요건): {len(stage4_final)}개")
+    print(f"{'='*60}\n")
+    
+    return {
+        "stage1_raw": stage1_raw,
+        "stage2_dec_passed": stage2_result.get("dec_passed", []),
+        "stage2_profit_passed": stage2_profit,
+        "stage3_business_passed": stage3_business,
+        "stage4_final_peers": stage4_final[:10],  # 최대 10개로 제한
+        "details": {
+            "stage3_similarity": stage3_result.get("similarity_details", []),
+            "stage4_requirements": stage4_result.get("details", [])
+        }
+    }
+
 def full_peer_filtering_pipeline(
     target_pdf_path: str,
     company_name: str,
@@ -759,36 +963,24 @@ def full_peer_filtering_pipeline(
     print(f"✅ [Stage 1] 산업분류 매칭: {len(stage1_raw)}개 사")
     
     # Stage 2: 재무 필터링 (12월 결산 + 흑자)
-    stage2_result = filter_peers_stage2(stage1_raw, company_csv_path)
+    with metrics.scope(stage="peer_stage2"):
+        stage2_result = filter_peers_stage2(stage1_raw, company_csv_path)
     stage2_profit = stage2_result.get("profit_passed", [])
     
     # [수정] 2단계 통과 기업이 3개 미만이더라도 강제로 3, 4단계를 진행하도록 스킵 로직 제거
     if len(stage2_profit) == 0:
         print("      ⚠️ 2단계 통과 기업이 0개입니다. (이후 단계는 빈 리스트로 진행됩니다)")
     
-    # Stage 2 결과를 {"name": str, "code": str} 형태로 변환
-    peer_objs = []
-    failed_companies = []
-    
-    for company_name in stage2_profit:
-        code = get_stock_code_from_csv(company_name, company_csv_path)
-        if code:
-            peer_objs.append({"name": company_name, "code": code})
-        else:
-            failed_companies.append(company_name)
-    
-    if failed_companies:
-        print(f"      ⚠️ 종목코드 찾기 실패: {len(failed_companies)}개사")
-        for name in failed_companies[:3]:
-            print(f"         - {name}")
+    peer_objs = _stage2_peer_objs(stage2_profit, company_csv_path)
     
     # Stage 3: 사업 유사성 필터링
-    stage3_result = filter_peers_stage3(
-        target_pdf_path=target_pdf_path,
-        peer_companies=peer_objs,
-        company_name=company_name,
-        threshold=similarity_threshold
-    )
+    with metrics.scope(stage="peer_stage3"):
+        stage3_result = filter_peers_stage3(
+            target_pdf_path=target_pdf_path,
+            peer_companies=peer_objs,
+            company_name=company_name,
+            threshold=similarity_threshold
+        )
     stage3_business = stage3_result.get("business_passed", [])
     
     # [수정] 3단계 통과 기업이 부족해도 2단계 결과로 되돌리는(롤백) 로직 제거
@@ -799,29 +991,58 @@ def full_peer_filtering_pipeline(
     stage3_objs = [p for p in peer_objs if p['name'] in stage3_business]
     
     # Stage 4: 일반 요건 필터링
-    stage4_result = filter_peers_stage4(stage3_objs, debug=False)
+    with metrics.scope(stage="peer_stage4"):
+        stage4_result = filter_peers_stage4(stage3_objs, debug=False)
     stage4_final = stage4_result.get("general_passed", [])
     
     # [수정] 4단계 통과 기업이 부족해도 3단계 결과로 되돌리는(롤백) 로직 제거
     if len(stage4_final) == 0 and len(stage3_objs) > 0:
         print("      ⚠️ 4단계 일반 요건 통과 기업이 0개입니다.")
     
+    return _pipeline_result(stage1_raw, stage2_result, stage2_profit, stage3_result, stage3_business, stage4_result, stage4_final)
+
+async def full_peer_filtering_pipeline_async(
+    target_pdf_path: str,
+    company_name: str,
+    raw_peer_names: list,
+    company_csv_path: str,
+    similarity_threshold: float = 0.3
+) -> dict:
+    """full_peer_filtering_pipeline의 asyncio 버전 (단계 순서/결과 형식 동일)"""
+    from utils import filter_peers_stage2_async
+    
     print(f"\n{'='*60}")
-    print(f"  ✅ 필터링 완료")
-    print(f"     - Stage 1 (산업): {len(stage1_raw)}개")
-    print(f"     - Stage 2 (재무): {len(stage2_profit)}개")
-    print(f"     - Stage 3 (사업): {len(stage3_business)}개")
-    print(f"     - Stage 4 (요건): {len(stage4_final)}개")
+    print(f"  🎯 Peer Group 정밀 필터링 파이프라인 시작 (async)")
     print(f"{'='*60}\n")
     
-    return {
-        "stage1_raw": stage1_raw,
-        "stage2_dec_passed": stage2_result.get("dec_passed", []),
-        "stage2_profit_passed": stage2_profit,
-        "stage3_business_passed": stage3_business,
-        "stage4_final_peers": stage4_final[:10],  # 최대 10개로 제한
-        "details": {
-            "stage3_similarity": stage3_result.get("similarity_details", []),
-            "stage4_requirements": stage4_result.get("details", [])
-        }
-    }
\ No newline at end of file
+    stage1_raw = raw_peer_names
+    print(f"✅ [Stage 1] 산업분류 매칭: {len(stage1_raw)}개 사")
+    
+    with metrics.scope(stage="peer_stage2"):
+        stage2_result = await filter_peers_stage2_async(stage1_raw, company_csv_path)
+    stage2_profit = stage2_result.get("profit_passed", [])
+    if len(stage2_profit) == 0:
+        print("      ⚠️ 2단계 통과 기업이 0개입니다. (이후 단계는 빈 리스트로 진행됩니다)")
+    
+    peer_objs = await asyncio.to_thread(_stage2_peer_objs, stage2_profit, company_csv_path)
+    
+    with metrics.scope(stage="peer_stage3"):
+        stage3_result = await filter_peers_stage3_async(
+            target_pdf_path=target_pdf_path,
+            peer_companies=peer_objs,
+            company_name=company_name,
+            threshold=similarity_threshold
+        )
+    stage3_business = stage3_result.get("business_passed", [])
+    if len(stage3_business) == 0 and len(peer_objs) > 0:
+        print("      ⚠️ 3단계 사업 유사성 통과 기업이 0개입니다.")
+    
+    stage3_objs = [p for p in peer_objs if p['name'] in stage3_business]
+    
+    with metrics.scope(stage="peer_stage4"):
+        stage4_result = await filter_peers_stage4_async(stage3_objs, debug=False)
+    stage4_final = stage4_result.get("general_passed", [])
+    if len(stage4_final) == 0 and len(stage3_objs) > 0:
+        print("      ⚠️ 4단계 일반 요건 통과 기업이 0개입니다.")
+    
+    return _pipeline_result(stage1_raw, stage2_result, stage2_profit, stage3_result, stage3_business, stage4_result, stage4_final)
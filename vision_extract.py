@@ -0,0 +1,434 @@
+import io
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+import multiprocessing
+import concurrent.futures
+from collections import Counter
+from concurrent.futures.process import BrokenProcessPool
+import fitz  # PyMuPDF
+import parser as doc_parser
+from gemini_client import TARGET_MODEL, post_generate
+import response_cache
+import metrics
+from hashing import file_sha256
+
+# [WebP 인코딩] Pillow가 없으면 PyMuPDF 내장 JPEG 인코더를 사용
+try:
+    from PIL import Image, features
+    _HAS_WEBP = features.check("webp")
+except ImportError:
+    Image = None
+    _HAS_WEBP = False
+
+# =========================================================
+# 💡 [설정] Vision 기반 PDF → Markdown 추출 (페이지 파이프라인)
+# =========================================================
+# 페이지 렌더링(PyMuPDF)은 프로세스 풀에서, Gemini Vision 호출은 VISION_CONCURRENCY개까지 동시에 보냅니다.
+# 호출 간격은 예전의 고정 sleep(3) 대신 프로세스 공용 rate_limiter(RPM/TPM)가 조절합니다.
+# 결과는 항상 페이지 순서대로 기록하고, 끝난 페이지는 체크포인트(.ckpt.jsonl)에 바로 남겨
+# 중단된 파일을 다시 돌리면 빠진 페이지만 호출합니다.
+# 적응형 해상도의 상한/하한. extract_pdf(dpi=...)로 고정 해상도를 줄 수도 있습니다.
+VISION_DPI = int(os.getenv("VISION_DPI", "200"))
+VISION_MIN_DPI = int(os.getenv("VISION_MIN_DPI", "100"))
+# 작은 글자(글자 수 기준 하위 10% 크기)가 이 픽셀 높이로 보이도록 해상도를 정합니다.
+VISION_TEXT_PX = float(os.getenv("VISION_TEXT_PX", "18"))
+# 업로드 이미지 형식(webp | jpeg | png)과 품질. webp는 Pillow가 있어야 하며 없으면 jpeg
+VISION_IMAGE_FORMAT = os.getenv("VISION_IMAGE_FORMAT", "webp").lower()
+VISION_IMAGE_QUALITY = int(os.getenv("VISION_IMAGE_QUALITY", "80"))
+# 렌더링 결과 디스크 캐시 (PDF 내용 해시, 페이지, DPI, 형식, 품질) - 재실행/재시도 때 렌더링 생략
+RENDER_CACHE_DIR = os.getenv("VISION_RENDER_CACHE_DIR", os.path.join(".cache", "rendered"))
+RENDER_CACHE = os.getenv("VISION_RENDER_CACHE", "1") != "0"
+VISION_CONCURRENCY = int(os.getenv("VISION_CONCURRENCY", "4"))
+# 0 또는 1이면 렌더링도 호출 스레드에서 처리합니다.
+VISION_RENDER_WORKERS = int(os.getenv("VISION_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 호출을 기다리는 렌더링 완료 페이지 상한 (동시 호출 수의 배수) - 큰 PDF의 이미지를 한꺼번에 메모리에 올리지 않도록
+VISION_PREFETCH = int(os.getenv("VISION_PREFETCH", "2"))
+
+# =========================================================
+# 💡 [설정] 페이지 라우팅 (텍스트 레이어가 충분한 페이지는 Vision 대신 PyMuPDF 추출)
+# =========================================================
+# 0이면 예전처럼 모든 페이지를 Vision으로 보냅니다.
+VISION_ROUTE = os.getenv("VISION_ROUTE", "1") != "0"
+# 공백을 뺀 글자 수가 이보다 적으면 스캔/이미지 페이지로 보고 Vision
+VISION_MIN_TEXT_CHARS = int(os.getenv("VISION_MIN_TEXT_CHARS", "200"))
+# 이미지가 페이지 면적의 이 비율 이상을 덮으면 차트/표 이미지 페이지로 보고 Vision
+VISION_IMAGE_COVERAGE = float(os.getenv("VISION_IMAGE_COVERAGE", "0.35"))
+# 표로 잡히지 않는 벡터 도형이 이 개수 이상이면 벡터 차트로 보고 Vision (글자는 축 라벨뿐인 경우가 많음)
+VISION_CHART_MIN_DRAWINGS = int(os.getenv("VISION_CHART_MIN_DRAWINGS", "150"))
+
+VISION_PROMPT = """
+    당신은 전문적인 데이터 추출 및 문서화 AI입니다.
+    주어진 이미지는 스타트업의 IR(투자유치) 자료 슬라이드입니다. 이미지에 포함된 모든 텍스트, 표, 구조도를 완벽한 형태의 Markdown 문서로 변환해 주세요.
+
+    [중요 지침]
+    1. **표(Table)**: 데이터가 행과 열로 구성된 표 형태라면, 반드시 Markdown 표 형식(`| Column | Column |`)으로 깔끔하게 정리하십시오.
+    2. **다이어그램/흐름도**: 시각적인 도형이나 화살표로 이어진 프로세스, 파이프라인 등은 계층적인 글머리기호(`-`, `*`, `1.`)를 사용하여 문맥이 매끄럽게 이어지도록 구조화하여 요약하십시오.
+    3. **불필요한 파편화 방지**: 무의미한 띄어쓰기나 단어 쪼개짐을 수정하고, 문장과 단어를 자연스럽게 이어 붙이십시오.
+    4. **디자인 요소 무시**: 의미 없는 배경, 단순 아이콘 디자인은 무시하고 '핵심 정보와 텍스트'의 논리적 배치에 집중하십시오.
+    """
+
+ERROR_PREFIX = "Error generation: "
+_GENERATION_CONFIG = {"temperature": 0.1, "maxOutputTokens": 8192}
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats = {"pages": 0, "resumed": 0, "calls": 0, "native": 0, "failed": 0, "render_wait_sec": 0.0,
+          "rendered": 0, "render_cache_hits": 0, "image_bytes": 0}
+_stats_lock = threading.Lock()
+
+# =========================================================
+# 🖼️ 렌더링 (프로세스 풀 작업 단위)
+# =========================================================
+def render_page(pdf_path: str, page_num: int, dpi: int = VISION_DPI) -> bytes:
+    """PDF의 특정 페이지(0부터) → PNG 바이트 (고정 해상도, 무손실)"""
+    with fitz.open(pdf_path) as doc:
+        return doc.load_page(page_num).get_pixmap(dpi=dpi).tobytes("png")
+
+def image_format() -> tuple:
+    """(형식, MIME). webp를 쓸 수 없으면 jpeg"""
+    fmt = VISION_IMAGE_FORMAT
+    if fmt == "webp" and not _HAS_WEBP: fmt = "jpeg"
+    if fmt not in ("webp", "jpeg", "png"): fmt = "jpeg"
+    return fmt, f"image/{fmt}"
+
+def encode_pixmap(pix, fmt: str, quality: int = VISION_IMAGE_QUALITY) -> bytes:
+    if fmt == "png": return pix.tobytes("png")
+    if fmt == "webp":
+        img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        buf = io.BytesIO()
+        img.save(buf, "WEBP", quality=quality, method=2)  # method 4+는 크기 차이 ~3%에 인코딩 2배
+        return buf.getvalue()
+    return pix.tobytes("jpg", jpg_quality=quality)
+
+def choose_dpi(page) -> int:
+    """
+    페이지 내용에 맞춘 렌더링 해상도 (VISION_MIN_DPI ~ VISION_DPI, 10 단위).
+    - 글자: 작은 글자(글자 수 기준 하위 10% 크기)가 VISION_TEXT_PX 픽셀 높이가 되는 해상도
+    - 이미지: 가장 큰 이미지의 원본 해상도보다 높게 렌더링해도 정보가 늘지 않으므로 그 값 (스캔본)
+    큰 글자만 있는 단순한 슬라이드는 낮은 해상도로, 작은 글자의 표/주석이 있는 페이지는 높은 해상도로 렌더링합니다.
+    """
+    sizes = []
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            for span in line["spans"]:
+                n = len(span["text"].strip())
+                if n: sizes.append((span["size"], n))
+    text_dpi = 0
+    if sizes:
+        sizes.sort()
+        cutoff, acc = sum(n for _, n in sizes) * 0.1, 0
+        for size, n in sizes:
+            acc += n
+            if acc >= cutoff: break
+        text_dpi = VISION_TEXT_PX * 72 / max(size, 1.0)
+    image_dpi = 0
+    images = [(abs(fitz.Rect(i["bbox"])), i) for i in page.get_image_info() if not fitz.Rect(i["bbox"]).is_empty]
+    if images:
+        _, info = max(images, key=lambda x: x[0])
+        width_pt = fitz.Rect(info["bbox"]).width
+        image_dpi = info["width"] / max(width_pt, 1.0) * 72
+    dpi = max(text_dpi, image_dpi) or VISION_MIN_DPI  # 글자/이미지가 없으면 벡터 도형뿐 - 최저 해상도
+    return int(min(VISION_DPI, max(VISION_MIN_DPI, round(dpi / 10) * 10)))
+
+# =========================================================
+# 🗄️ 렌더링 결과 디스크 캐시
+# =========================================================
+def _render_cache_path(pdf_hash: str, page_num: int, dpi: int, fmt: str, quality: int) -> str:
+    return os.path.join(RENDER_CACHE_DIR, pdf_hash[:2], f"{pdf_hash}.p{page_num}.d{dpi}.q{quality}.{fmt}")
+
+def _render_cache_get(path: str):
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def _render_cache_put(path: str, data: bytes):
+    # 여러 워커가 같은 페이지를 동시에 렌더링해도 반쯤 쓴 파일을 읽지 않도록 임시 파일 → 교체 (parse_cache와 동일)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"      ⚠️ [Render Cache] 저장 실패: {e}")
+        if os.path.exists(tmp): os.remove(tmp)
+
+def render_for_vision(page, page_num: int, dpi: int = None, pdf_hash: str = None) -> dict:
+    """
+    Vision 업로드용 이미지. dpi=None이면 choose_dpi로 정합니다.
+    Returns: {"image": bytes, "mime", "dpi", "cached"}
+    """
+    dpi = dpi or choose_dpi(page)
+    fmt, mime = image_format()
+    quality = VISION_IMAGE_QUALITY if fmt != "png" else 0
+    path = _render_cache_path(pdf_hash, page_num, dpi, fmt, quality) if RENDER_CACHE and pdf_hash else None
+    data = _render_cache_get(path) if path else None
+    if data is not None:
+        return {"image": data, "mime": mime, "dpi": dpi, "cached": True}
+    data = encode_pixmap(page.get_pixmap(dpi=dpi), fmt, quality)
+    if path: _render_cache_put(path, data)
+    return {"image": data, "mime": mime, "dpi": dpi, "cached": False}
+
+# =========================================================
+# 🧭 페이지 분류 (텍스트 밀도 / 이미지 면적 / 표 탐지)
+# =========================================================
+def _image_coverage(page) -> float:
+    """페이지 면적 대비 이미지가 덮는 비율 (겹침은 무시하고 합산, 최대 1.0)"""
+    page_area = abs(page.rect) or 1.0
+    covered = 0.0
+    for info in page.get_image_info():
+        covered += abs(fitz.Rect(info["bbox"]) & page.rect)
+    return min(1.0, covered / page_area)
+
+def classify_page(file_path: str, page, page_num: int, opened: dict) -> dict:
+    """
+    Returns: {"route": "text"|"vision", "reason", "chars", "image_coverage", "tables"}
+    텍스트 레이어가 충분하고 이미지가 적은 페이지는 PyMuPDF 본문 + 벡터 표로 충분하므로 Vision을 건너뜁니다.
+    """
+    text = page.get_text("text")
+    chars = len("".join(text.split()))
+    coverage = _image_coverage(page)
+    info = {"chars": chars, "image_coverage": round(coverage, 3), "tables": [], "text": text}
+    if chars < VISION_MIN_TEXT_CHARS:
+        # 글자도 이미지도 도형도 없는 빈 페이지는 Vision으로 보내도 얻을 것이 없습니다.
+        if coverage == 0 and not page.get_cdrawings():
+            return dict(info, route="text", reason="blank")
+        return dict(info, route="vision", reason="low_text")
+    if coverage >= VISION_IMAGE_COVERAGE:
+        return dict(info, route="vision", reason="image")
+    tables = doc_parser._page_tables(file_path, page, page_num, opened)
+    if not tables and len(page.get_cdrawings()) >= VISION_CHART_MIN_DRAWINGS:
+        return dict(info, route="vision", reason="chart")
+    return dict(info, route="text", reason="table" if tables else "text", tables=tables)
+
+def _native_markdown(info: dict) -> str:
+    """text 경로 페이지의 본문 + 벡터 표(Markdown)"""
+    parts = [info["text"].strip()]
+    for rows in info["tables"]:
+        md = doc_parser._pdf_table_markdown(rows)
+        if md: parts.append(md)
+    return "\n\n".join(p for p in parts if p)
+
+def prepare_page(pdf_path: str, page_num: int, dpi: int = None, route: bool = True, pdf_hash: str = None) -> dict:
+    """
+    페이지 1개(0부터)를 분류하고 Vision이 필요하면 렌더링합니다. (프로세스 풀 작업 단위)
+    Returns: {"route", "reason", "text"(text 경로) | "image", "mime", "dpi", "cached"(vision 경로)}
+    """
+    opened = {}
+    try:
+        with fitz.open(pdf_path) as doc:
+            page = doc.load_page(page_num)
+            reason = "all"
+            if route:
+                info = classify_page(pdf_path, page, page_num, opened)
+                if info["route"] == "text":
+                    return {"route": "text", "reason": info["reason"], "text": _native_markdown(info)}
+                reason = info["reason"]
+            return dict(render_for_vision(page, page_num, dpi, pdf_hash), route="vision", reason=reason)
+    finally:
+        doc_parser._close_opened(opened)
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 스레드가 떠 있는 프로세스에서 fork하면 잠금 상태가 복제될 수 있으므로 spawn을 씁니다. (Windows 기본값과 동일)
+            _pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=VISION_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None: pool.shutdown(wait=True, cancel_futures=True)
+
+# =========================================================
+# 👁️ Vision 호출
+# =========================================================
+def extract_markdown_from_image(image: bytes, mime_type: str = "image/png") -> str:
+    """
+    Gemini Vision으로 페이지 이미지의 텍스트/표를 Markdown으로 추출합니다.
+    같은 이미지는 응답 캐시(response_cache)에서 재사용하며, 실패하면 "Error generation: ..." 문구를 돌려줍니다.
+    """
+    payload = {
+        "contents": [{"parts": [{"text": VISION_PROMPT},
+                                {"inline_data": {"mime_type": mime_type, "data": base64.b64encode(image).decode("ascii")}}]}],
+        "generationConfig": _GENERATION_CONFIG,
+    }
+    t0 = time.perf_counter()
+    if response_cache.enabled():
+        key = response_cache.make_key(TARGET_MODEL, VISION_PROMPT, hashlib.sha256(image).hexdigest(),
+                                      None, None, _GENERATION_CONFIG)
+        res = response_cache.fetch(key, "document", lambda: post_generate(payload))
+    else:
+        res = post_generate(payload)
+    metrics.record_llm(res, time.perf_counter() - t0, "vision", TARGET_MODEL)
+    if not res["ok"]:
+        return f"{ERROR_PREFIX}{res.get('status')} {str(res.get('text'))[:300]}"
+    try:
+        return res["json"]["candidates"][0]["content"]["parts"][0]["text"]
+    except (KeyError, IndexError, TypeError):
+        return f"{ERROR_PREFIX}Parsing Error"
+
+# =========================================================
+# 💾 체크포인트 (페이지별 결과, 완료 순서대로 추가)
+# =========================================================
+def _checkpoint_path(output_md: str) -> str:
+    return output_md + ".ckpt.jsonl"
+
+def _load_checkpoint(path: str, header: dict) -> dict:
+    """{페이지 번호(1부터): 텍스트}. PDF 내용, DPI, 라우팅 여부가 달라졌으면 버리고 처음부터 합니다."""
+    done = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if json.loads(f.readline() or "{}") != header: return {}
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break  # 강제 종료로 마지막 줄이 잘린 경우
+                done[row["page"]] = row["text"]
+    except (OSError, ValueError):
+        return {}
+    return done
+
+class _Checkpoint:
+    """완료된 페이지를 한 줄씩 추가 기록합니다. (여러 호출 스레드가 공유)"""
+    def __init__(self, path: str, header: dict, done: dict):
+        self.lock = threading.Lock()
+        self.f = open(path, "w", encoding="utf-8")
+        # 기존 체크포인트는 헤더 + 유효한 줄만 다시 씁니다. (잘린 줄 정리)
+        for row in [header] + [{"page": p, "text": t} for p, t in sorted(done.items())]:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.f.flush()
+
+    def add(self, page: int, text: str):
+        with self.lock:
+            self.f.write(json.dumps({"page": page, "text": text}, ensure_ascii=False) + "\n")
+            self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+# =========================================================
+# 🚀 파일 단위 파이프라인
+# =========================================================
+def _page_job(prepare_future, pdf_path: str, page_num: int, dpi: int, route: bool, pdf_hash: str) -> dict:
+    """Returns: {"route", "reason", "text"} - text 경로 페이지는 Vision을 호출하지 않습니다."""
+    t0 = time.perf_counter()
+    try:
+        page = prepare_future.result() if prepare_future is not None else prepare_page(pdf_path, page_num, dpi, route, pdf_hash)
+    except (BrokenProcessPool, OSError):
+        page = prepare_page(pdf_path, page_num, dpi, route, pdf_hash)  # 렌더링 워커가 죽으면 이 스레드에서 다시 처리
+    with _stats_lock:
+        _stats["render_wait_sec"] += time.perf_counter() - t0
+        _stats["calls" if page["route"] == "vision" else "native"] += 1
+        if page["route"] == "vision":
+            _stats["render_cache_hits" if page["cached"] else "rendered"] += 1
+            _stats["image_bytes"] += len(page["image"])
+    if page["route"] == "text": return page
+    return {"route": "vision", "reason": page["reason"], "text": extract_markdown_from_image(page["image"], page["mime"])}
+
+def _on_page_done(ckpt: _Checkpoint, page: int, future):
+    # 완료 즉시 체크포인트에 남깁니다. (앞 페이지가 늦어도 뒤 페이지 결과를 잃지 않도록) 실패한 페이지는 남기지 않아 재실행 때 다시 호출
+    if future.cancelled() or future.exception() is not None: return
+    text = future.result()["text"]
+    if not text.startswith(ERROR_PREFIX): ckpt.add(page, text)
+
+def extract_pdf(pdf_path: str, output_md: str, dpi: int = None, concurrency: int = None, route: bool = None) -> dict:
+    """
+    PDF 전체 페이지를 Markdown으로 추출해 output_md에 씁니다. (기존 test_vision_extractor와 같은 Markdown 형식)
+    route=True(기본 VISION_ROUTE)면 텍스트 레이어가 충분한 페이지는 Vision 대신 PyMuPDF로 추출합니다.
+    output_md는 모든 페이지가 성공했을 때만 만들어지며, 그 전까지는 output_md + ".part"에 페이지 순서대로 기록합니다.
+    dpi를 주지 않으면 페이지마다 choose_dpi로 해상도를 정하고 VISION_IMAGE_FORMAT(기본 webp)으로 압축해 올립니다.
+    Returns: {"pages", "resumed", "failed", "complete", "sec", "vision_calls", "native_pages", "routes"}
+    """
+    route = VISION_ROUTE if route is None else route
+    concurrency = max(1, concurrency or VISION_CONCURRENCY)
+    t0 = time.perf_counter()
+    file_name = os.path.basename(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        total = doc.page_count
+
+    pdf_hash = file_sha256(pdf_path)
+    header = {"pdf": pdf_hash, "dpi": dpi or "auto", "pages": total, "route": route}
+    ckpt_path = _checkpoint_path(output_md)
+    done = _load_checkpoint(ckpt_path, header)
+    todo = [n for n in range(1, total + 1) if n not in done]
+    if done:
+        print(f"  ↩️ 체크포인트에서 {len(done)}/{total}페이지 복구 - {todo[0] if todo else '-'}페이지부터 이어서 추출")
+
+    ckpt = _Checkpoint(ckpt_path, header, done)
+    use_pool = VISION_RENDER_WORKERS > 1 and len(todo) > 1
+    failed = []
+    routes = Counter()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as call_pool, \
+                open(output_md + ".part", "w", encoding="utf-8") as out:
+            out.write(f"# {file_name} 전체 추출 결과\n\n")
+            futures = {}
+            pending = iter(todo)
+
+            def _submit_next():
+                n = next(pending, None)
+                if n is None: return
+                prepare_future = _get_pool().submit(prepare_page, pdf_path, n - 1, dpi, route, pdf_hash) if use_pool else None
+                f = call_pool.submit(_page_job, prepare_future, pdf_path, n - 1, dpi, route, pdf_hash)
+                f.add_done_callback(lambda f, n=n: _on_page_done(ckpt, n, f))
+                futures[n] = f
+
+            for _ in range(concurrency * max(1, VISION_PREFETCH)):
+                _submit_next()
+
+            # 결과는 페이지 순서대로 기록하고, 한 페이지를 쓸 때마다 다음 페이지를 하나 더 예약합니다.
+            for n in range(1, total + 1):
+                if n in done:
+                    md_text = done[n]
+                else:
+                    try:
+                        page = futures.pop(n).result()
+                    except Exception as e:
+                        page = {"route": "vision", "reason": "error", "text": f"{ERROR_PREFIX}{type(e).__name__}: {e}"}
+                    _submit_next()
+                    md_text = page["text"]
+                    routes[(page["route"], page["reason"])] += 1
+                    if md_text.startswith(ERROR_PREFIX): failed.append(n)
+                    print(f"    🔄 [{n}/{total}] 페이지 완료 ({'Vision' if page['route'] == 'vision' else '텍스트'})"
+                          + (" (실패)" if md_text.startswith(ERROR_PREFIX) else ""))
+                out.write(f"## Page {n}\n\n")
+                out.write(md_text + "\n\n")
+                out.write("---\n\n")
+    finally:
+        ckpt.close()
+
+    vision_calls = sum(c for (r, _), c in routes.items() if r == "vision")
+    native_pages = sum(routes.values()) - vision_calls
+    if route and routes:
+        reasons = ", ".join(f"{r}/{why} {c}" for (r, why), c in sorted(routes.items()))
+        print(f"  🧭 라우팅: Vision {vision_calls} / 텍스트 {native_pages}페이지 → Vision 호출 {native_pages}건 절감 ({reasons})")
+
+    complete = not failed
+    if complete:
+        os.replace(output_md + ".part", output_md)
+        os.remove(ckpt_path)
+    else:
+        print(f"  ⚠️ {len(failed)}페이지 실패 {failed[:10]} - 다시 실행하면 실패한 페이지만 재시도합니다. (중간 결과: {output_md}.part)")
+    with _stats_lock:
+        _stats["pages"] += total
+        _stats["resumed"] += len(done)
+        _stats["failed"] += len(failed)
+    return {"pages": total, "resumed": len(done), "failed": len(failed), "complete": complete,
+            "sec": round(time.perf_counter() - t0, 2), "vision_calls": vision_calls, "native_pages": native_pages,
+            "routes": {f"{r}/{why}": c for (r, why), c in routes.items()}}
+
+def stats() -> dict:
+    with _stats_lock:
+        return dict(_stats, render_wait_sec=round(_stats["render_wait_sec"], 2),
+                    concurrency=VISION_CONCURRENCY, render_workers=VISION_RENDER_WORKERS)